@@ -0,0 +1,86 @@
+"""
+Счётчики прогресса чек-листов без чтения таблиц значений в списках:
+
+  LeadSubfunnel.checklist_total / checklist_completed — пункты чек-листа задачи;
+  Lead.stage_checklist_total / stage_checklist_completed — пункты текущей стадии лида.
+
+Пересчитываются одним UPDATE с подзапросами в той же транзакции, что и изменение
+значения чек-листа, пункта стадии или стадии лида (сигналы в models.py).
+Пакетные операции, минующие сигналы (bulk_create/update), вызывают sync_* сами.
+"""
+
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from apps.funnels.models import StageChecklistItem
+
+from .models import Lead, LeadChecklistValue, LeadSubfunnel, LeadSubfunnelChecklistValue
+
+
+def _count_subquery(queryset, group_field):
+    return Coalesce(
+        Subquery(
+            queryset.order_by().values(group_field).annotate(n=Count("id")).values("n")[:1],
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+def sync_subfunnel_checklist_counters(subfunnels):
+    """Пересчитать checklist_total/checklist_completed для queryset задач одним UPDATE."""
+    values = LeadSubfunnelChecklistValue.objects.filter(lead_subfunnel_id=OuterRef("pk"))
+    return subfunnels.update(
+        checklist_total=_count_subquery(values, "lead_subfunnel_id"),
+        checklist_completed=_count_subquery(values.filter(is_completed=True), "lead_subfunnel_id"),
+    )
+
+
+def sync_lead_checklist_counters(leads):
+    """Пересчитать счётчики чек-листа текущей стадии для queryset лидов одним UPDATE."""
+    return leads.update(
+        stage_checklist_total=_count_subquery(
+            StageChecklistItem.objects.filter(stage_id=OuterRef("current_stage_id")),
+            "stage_id",
+        ),
+        stage_checklist_completed=_count_subquery(
+            LeadChecklistValue.objects.filter(
+                lead_id=OuterRef("pk"),
+                checklist_item__stage_id=OuterRef("current_stage_id"),
+                is_completed=True,
+            ),
+            "lead_id",
+        ),
+    )
+
+
+def sync_lead_checklist_counter(lead):
+    """Счётчики одного лида (после смены стадии) — с обновлением атрибутов экземпляра."""
+    total = completed = 0
+    if lead.current_stage_id:
+        total = StageChecklistItem.objects.filter(stage_id=lead.current_stage_id).count()
+        completed = LeadChecklistValue.objects.filter(
+            lead_id=lead.pk,
+            checklist_item__stage_id=lead.current_stage_id,
+            is_completed=True,
+        ).count()
+    if (total, completed) != (lead.stage_checklist_total, lead.stage_checklist_completed):
+        Lead.objects.filter(pk=lead.pk).update(
+            stage_checklist_total=total, stage_checklist_completed=completed
+        )
+        lead.stage_checklist_total = total
+        lead.stage_checklist_completed = completed
+
+
+def rebuild_checklist_counters(campaign_ids=None):
+    """Пересчёт всех счётчиков (или по кампаниям). Возвращает (лидов, задач)."""
+    leads = Lead.objects.all()
+    subfunnels = LeadSubfunnel.objects.all()
+    if campaign_ids is not None:
+        campaign_ids = list(campaign_ids)
+        leads = leads.filter(campaign_id__in=campaign_ids)
+        subfunnels = subfunnels.filter(
+            Q(lead__campaign_id__in=campaign_ids)
+            | Q(campaign_region__campaign_id__in=campaign_ids)
+        )
+    return sync_lead_checklist_counters(leads), sync_subfunnel_checklist_counters(subfunnels)
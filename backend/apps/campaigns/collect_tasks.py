@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from apps.funnels.models import TaskTemplateStage
+from apps.funnels.models import FunnelStage, TaskTemplateStage
 
 from .models import Campaign, LeadSubfunnel
 
@@ -21,12 +21,12 @@ def _has_collect_stage(campaign: Campaign) -> bool:
     return campaign.funnels.filter(stages__is_collect_stage=True).exists()
 
 
-def _default_template_stage(subfunnel):
-    return (
-        TaskTemplateStage.objects.filter(template_id=subfunnel.template_id)
-        .order_by("order", "id")
-        .first()
-    )
+def _default_template_stages(template_ids):
+    """First stage (by order, id) of each template, loaded in one query."""
+    stages = {}
+    for stage in TaskTemplateStage.objects.filter(template_id__in=template_ids).order_by("order", "id"):
+        stages.setdefault(stage.template_id, stage)
+    return stages
 
 
 def _is_collect_stage_subfunnel(subfunnel, collect_stage):
@@ -49,49 +49,52 @@ def _sync_region_tasks(campaign: Campaign) -> None:
     """
     Materialize region-level tasks for active campaign subfunnels.
     These tasks are used in collect-stage workspace.
+
+    Desired (subfunnel, region) pairs are compared with existing ones: missing tasks are
+    added with one bulk_create, stale ones are removed with one filtered delete().
     """
-    regions = list(campaign.campaign_regions.all())
+    region_ids = list(campaign.campaign_regions.values_list("id", flat=True))
     collect_stage_by_funnel_id = {}
-    for funnel in campaign.funnels.prefetch_related("stages").all():
-        collect_stage = funnel.stages.filter(is_collect_stage=True).order_by("order", "id").first()
-        if collect_stage:
-            collect_stage_by_funnel_id[funnel.id] = collect_stage
-
-    active_subfunnels = list(
-        campaign.subfunnels.filter(is_active=True).select_related(
+    for stage in FunnelStage.objects.filter(
+        funnel__in=campaign.funnels.all(), is_collect_stage=True
+    ).order_by("order", "id"):
+        collect_stage_by_funnel_id.setdefault(stage.funnel_id, stage)
+
+    active_subfunnels = [
+        sub
+        for sub in campaign.subfunnels.filter(is_active=True).select_related(
             "template",
             "binding",
             "binding__target_stage",
             "binding__from_stage",
             "binding__to_stage",
         )
-    )
-
-    valid_pairs = set()
-    for sub in active_subfunnels:
-        collect_stage = collect_stage_by_funnel_id.get(sub.funnel_id)
-        if not _is_collect_stage_subfunnel(sub, collect_stage):
-            continue
-        default_stage = _default_template_stage(sub)
-        defaults = {
-            "assignee_id": sub.default_assignee_id,
-            "current_template_stage": default_stage,
-            "status": LeadSubfunnel.Status.BACKLOG,
-            "is_available": True,
-        }
-        for region in regions:
-            valid_pairs.add((sub.id, region.id))
-            LeadSubfunnel.objects.get_or_create(
+        if _is_collect_stage_subfunnel(sub, collect_stage_by_funnel_id.get(sub.funnel_id))
+    ]
+    default_stages = _default_template_stages({sub.template_id for sub in active_subfunnels})
+
+    region_tasks = LeadSubfunnel.objects.filter(campaign_region__campaign=campaign)
+    existing = set(region_tasks.values_list("campaign_subfunnel_id", "campaign_region_id"))
+    LeadSubfunnel.objects.bulk_create(
+        [
+            LeadSubfunnel(
                 campaign_subfunnel=sub,
-                campaign_region=region,
-                defaults=defaults,
+                campaign_region_id=region_id,
+                assignee_id=sub.default_assignee_id,
+                current_template_stage=default_stages.get(sub.template_id),
+                status=LeadSubfunnel.Status.BACKLOG,
+                is_available=True,
             )
+            for sub in active_subfunnels
+            for region_id in region_ids
+            if (sub.id, region_id) not in existing
+        ],
+        ignore_conflicts=True,
+    )
 
-    for row in LeadSubfunnel.objects.filter(campaign_region__campaign=campaign).select_related(
-        "campaign_subfunnel", "campaign_region"
-    ):
-        if (row.campaign_subfunnel_id, row.campaign_region_id) not in valid_pairs:
-            row.delete()
+    # Desired pairs are all campaign regions × matching subfunnels,
+    # so stale tasks are exactly those of the other subfunnels.
+    region_tasks.exclude(campaign_subfunnel__in=[sub.id for sub in active_subfunnels]).delete()
 
 
 def activate_collect_campaign_workflow(campaign: Campaign) -> None:
@@ -0,0 +1,161 @@
+"""
+Keyset-пагинация по составному ключу: курсор хранит значения полей сортировки последней
+строки страницы, следующая страница — условие «строго после» по этим полям (индекс, без OFFSET).
+
+KeysetPagination — постраничная пагинация DRF с режимом курсора по ?cursor= (пустое значение —
+первая страница). Ключ сортировки задаёт представление атрибутом keyset_ordering; общее число
+строк в режиме курсора считается только по ?with_count=1 и кешируется отдельно.
+"""
+
+import base64
+import hashlib
+import json
+from datetime import date, datetime
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import ParseError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def encode_cursor(values):
+    """Непрозрачный курсор из значений полей сортировки."""
+    raw = json.dumps(
+        [v.isoformat() if isinstance(v, (date, datetime)) else v for v in values],
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Значения из курсора; ValueError, если курсор повреждён."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Некорректный курсор") from exc
+    # Только скаляры JSON: список или объект вместо значения поля — подделанный курсор
+    if not isinstance(values, list) or not all(
+        value is None or isinstance(value, (str, int, float)) for value in values
+    ):
+        raise ValueError("Некорректный курсор")
+    return values
+
+
+def _field_name(order_field):
+    return order_field.lstrip("-")
+
+
+def keyset_after(ordering, values):
+    """
+    Условие «строка идёт после values» для сортировки ordering (["-updated_at", "-id"]):
+    (a > x) OR (a = x AND b > y) ... с учётом направления каждого поля.
+    """
+    if len(values) != len(ordering):
+        raise ValueError("Некорректный курсор")
+    condition = Q()
+    equal = Q()
+    for order_field, value in zip(ordering, values):
+        name = _field_name(order_field)
+        lookup = "lt" if order_field.startswith("-") else "gt"
+        condition |= equal & Q(**{f"{name}__{lookup}": value})
+        equal &= Q(**{name: value})
+    return condition
+
+
+def keyset_filter(queryset, ordering, cursor):
+    """queryset после курсора cursor; ValueError, если курсор повреждён или не подходит к полям."""
+    try:
+        return queryset.filter(keyset_after(ordering, decode_cursor(cursor)))
+    except (ValidationError, TypeError, ValueError) as exc:
+        raise ValueError("Некорректный курсор") from exc
+
+
+def cursor_for(obj, ordering):
+    return encode_cursor([getattr(obj, _field_name(f)) for f in ordering])
+
+
+def keyset_page(queryset, ordering, cursor=None, limit=50):
+    """
+    Страница queryset по ordering после cursor: (объекты, курсор следующей страницы или None).
+    Поля ordering должны быть атрибутами модели, последнее — уникальным (обычно id).
+    """
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        queryset = keyset_filter(queryset, ordering, cursor)
+    items = list(queryset[: limit + 1])
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = cursor_for(items[-1], ordering)
+    return items, next_cursor
+
+
+def cached_count(queryset, timeout):
+    """COUNT(*) queryset из кеша (ключ — SQL запроса с параметрами)."""
+    sql, params = queryset.order_by().query.sql_with_params()
+    digest = hashlib.md5(f"{sql}|{params!r}".encode()).hexdigest()
+    key = f"keyset-count:{queryset.model._meta.label_lower}:{digest}"
+    count = cache.get(key)
+    if count is None:
+        count = queryset.order_by().count()
+        cache.set(key, count, timeout)
+    return count
+
+
+class KeysetPagination(PageNumberPagination):
+    """
+    Без ?cursor — обычные страницы (?page=). С ?cursor= — keyset-страницы по keyset_ordering
+    представления: {"next", "next_cursor", "results"} и "count" при ?with_count=1.
+    """
+    page_size = 50
+    max_page_size = 500
+    cursor_query_param = "cursor"
+    cursor_page_size_query_param = "page_size"
+    count_query_param = "with_count"
+    count_cache_timeout = 300
+
+    def paginate_queryset(self, queryset, request, view=None):
+        ordering = getattr(view, "keyset_ordering", None)
+        if not ordering or self.cursor_query_param not in request.query_params:
+            self.keyset = False
+            return super().paginate_queryset(queryset, request, view=view)
+        self.keyset = True
+        self.request = request
+        try:
+            items, self.next_cursor = keyset_page(
+                queryset,
+                ordering,
+                cursor=request.query_params.get(self.cursor_query_param) or None,
+                limit=self.get_cursor_page_size(request),
+            )
+        except ValueError as exc:
+            raise ParseError(str(exc)) from exc
+        self.count = None
+        if request.query_params.get(self.count_query_param) in ("1", "true"):
+            self.count = cached_count(queryset, self.count_cache_timeout)
+        return items
+
+    def get_cursor_page_size(self, request):
+        raw = request.query_params.get(self.cursor_page_size_query_param, "")
+        if raw.isdigit() and int(raw) > 0:
+            return min(int(raw), self.max_page_size)
+        return self.page_size
+
+    def get_next_cursor_link(self):
+        if not self.next_cursor:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.count_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        payload = {"next": self.get_next_cursor_link(), "next_cursor": self.next_cursor}
+        if self.count is not None:
+            payload["count"] = self.count
+        payload["results"] = data
+        return Response(payload)
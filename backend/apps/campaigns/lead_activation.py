@@ -0,0 +1,198 @@
+"""
+Активация лидов кампании и материализация задач подворонок на уровне кампании.
+
+Воронки, стадии, подворонки кампании, этапы и пункты шаблонов читаются один раз; лиды
+переводятся на входную стадию UPDATE'ом на каждую воронку, а LeadChecklistValue,
+LeadSubfunnel и LeadSubfunnelChecklistValue создаются пачками bulk_create с
+ignore_conflicts — уже существующие строки не трогаются. Число запросов не зависит
+от числа лидов (кроме пачек по MATERIALIZE_CHUNK_SIZE).
+"""
+
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.funnels.models import FunnelStage, SubfunnelTemplateBinding, TaskTemplateStage
+
+from .checklist_counters import sync_lead_checklist_counters, sync_subfunnel_checklist_counters
+from .models import Lead, LeadSubfunnel, LeadSubfunnelChecklistValue
+from .stage_checklists import MATERIALIZE_CHUNK_SIZE, materialize_stage_checklists
+from .stage_deadlines import sync_lead_stage_deadlines
+from .stats import schedule_campaign_stats_refresh
+
+DEFAULT_TEMPLATE_STAGES = (
+    ("К выполнению", False),
+    ("В работе", False),
+    ("Готово", True),
+)
+
+
+def _chunks(items, size=MATERIALIZE_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _entry_stages(funnel_ids):
+    """
+    funnel_id → входная стадия (как get_entry_funnel_stage_for_lead): первая не отказная и
+    не стадия сбора, иначе первая не отказная.
+    """
+    entry = {}
+    fallback = {}
+    stages = FunnelStage.objects.filter(funnel_id__in=funnel_ids, is_rejection=False).order_by(
+        "funnel_id", "order", "id"
+    )
+    for stage in stages:
+        fallback.setdefault(stage.funnel_id, stage)
+        if not stage.is_collect_stage:
+            entry.setdefault(stage.funnel_id, stage)
+    return {funnel_id: entry.get(funnel_id, stage) for funnel_id, stage in fallback.items()}
+
+
+def _template_stages(template_ids):
+    """template_id → этапы шаблона по порядку; шаблонам без этапов создаются стандартные."""
+    stages = defaultdict(list)
+    for stage in TaskTemplateStage.objects.filter(template_id__in=template_ids).order_by("order", "id"):
+        stages[stage.template_id].append(stage)
+    missing = [template_id for template_id in template_ids if template_id not in stages]
+    if missing:
+        TaskTemplateStage.objects.bulk_create([
+            TaskTemplateStage(template_id=template_id, name=name, order=order, is_terminal=is_terminal)
+            for template_id in missing
+            for order, (name, is_terminal) in enumerate(DEFAULT_TEMPLATE_STAGES)
+        ])
+        for stage in TaskTemplateStage.objects.filter(template_id__in=missing).order_by("order", "id"):
+            stages[stage.template_id].append(stage)
+    return stages
+
+
+def _is_available(binding, stage_order):
+    if not binding or binding.binding_type != SubfunnelTemplateBinding.BindingType.STAGE_RANGE_CHECKLIST:
+        return True
+    return bool(
+        stage_order is not None
+        and binding.from_stage_id
+        and binding.to_stage_id
+        and binding.from_stage.order <= stage_order <= binding.to_stage.order
+    )
+
+
+def materialize_lead_subfunnels(campaign, leads, source=""):
+    """
+    Задачи активных подворонок кампании и значения их чек-листов для queryset лидов.
+    source="collect_import" — только подворонки с auto_create_on_collect_import.
+    Недостающим задачам без этапа ставится первый этап шаблона. Возвращает число новых задач.
+    """
+    subfunnels = campaign.subfunnels.filter(is_active=True)
+    if source == "collect_import":
+        subfunnels = subfunnels.filter(template__auto_create_on_collect_import=True)
+    subfunnels = list(
+        subfunnels.select_related("binding__from_stage", "binding__to_stage").prefetch_related("template__items")
+    )
+    if not subfunnels:
+        return 0
+    lead_rows = list(leads.values_list("id", "current_stage__order"))
+    if not lead_rows:
+        return 0
+    lead_ids = [lead_id for lead_id, _ in lead_rows]
+    stages = _template_stages({sub.template_id for sub in subfunnels})
+    default_stage_ids = {
+        sub.id: stages[sub.template_id][0].id if stages.get(sub.template_id) else None
+        for sub in subfunnels
+    }
+
+    existing = set(
+        LeadSubfunnel.objects.filter(campaign_subfunnel__in=subfunnels, lead_id__in=lead_ids).values_list(
+            "campaign_subfunnel_id", "lead_id"
+        )
+    )
+    new_tasks = [
+        LeadSubfunnel(
+            campaign_subfunnel=sub,
+            lead_id=lead_id,
+            assignee_id=sub.default_assignee_id,
+            current_template_stage_id=default_stage_ids[sub.id],
+            status=LeadSubfunnel.Status.BACKLOG,
+            is_available=_is_available(sub.binding, stage_order),
+        )
+        for sub in subfunnels
+        for lead_id, stage_order in lead_rows
+        if (sub.id, lead_id) not in existing
+    ]
+    for chunk in _chunks(new_tasks):
+        LeadSubfunnel.objects.bulk_create(chunk, ignore_conflicts=True)
+
+    tasks = list(
+        LeadSubfunnel.objects.filter(campaign_subfunnel__in=subfunnels, lead_id__in=lead_ids).only(
+            "id", "campaign_subfunnel_id", "assignee_id", "current_template_stage_id", "status"
+        )
+    )
+    # Существующим задачам без этапа — первый этап шаблона
+    staged = []
+    for task in tasks:
+        default_stage_id = default_stage_ids[task.campaign_subfunnel_id]
+        if not task.current_template_stage_id and default_stage_id:
+            task.current_template_stage_id = default_stage_id
+            task.status = LeadSubfunnel.normalize_status(task.status)
+            task.updated_at = timezone.now()
+            staged.append(task)
+    if staged:
+        LeadSubfunnel.objects.bulk_update(
+            staged, ["current_template_stage", "status", "updated_at"], batch_size=MATERIALIZE_CHUNK_SIZE
+        )
+
+    items_by_subfunnel = {sub.id: list(sub.template.items.all()) for sub in subfunnels}
+    values = [
+        LeadSubfunnelChecklistValue(
+            lead_subfunnel_id=task.id,
+            template_item_id=item.id,
+            assignee_id=item.default_specialist_id or task.assignee_id,
+        )
+        for task in tasks
+        for item in items_by_subfunnel[task.campaign_subfunnel_id]
+    ]
+    for chunk in _chunks(values):
+        LeadSubfunnelChecklistValue.objects.bulk_create(chunk, ignore_conflicts=True)
+    if values:
+        # bulk_create минует сигнал пересчёта счётчиков задачи
+        sync_subfunnel_checklist_counters(
+            LeadSubfunnel.objects.filter(campaign_subfunnel__in=subfunnels, lead_id__in=lead_ids)
+        )
+    return len(new_tasks)
+
+
+def activate_campaign_leads(campaign):
+    """
+    Лиды кампании без стадии переводятся на входную стадию своей воронки (специалист стадии —
+    тем, у кого специалиста нет), получают значения чек-листа стадии и задачи подворонок.
+    Возвращает число переведённых лидов.
+    """
+    pending_ids = list(campaign.leads.filter(current_stage__isnull=True).values_list("id", flat=True))
+    if not pending_ids:
+        return 0
+    entry_stages = _entry_stages(
+        set(campaign.leads.filter(current_stage__isnull=True).values_list("funnel_id", flat=True))
+    )
+    now = timezone.now()
+    activated = 0
+    with transaction.atomic():
+        for chunk in _chunks(pending_ids):
+            pending = Lead.objects.filter(id__in=chunk)
+            for funnel_id, stage in entry_stages.items():
+                changes = {"current_stage": stage, "updated_at": now}
+                if stage.primary_contact_specialist_id:
+                    changes["primary_contact_specialist_id"] = Coalesce(
+                        "primary_contact_specialist_id", Value(stage.primary_contact_specialist_id)
+                    )
+                activated += pending.filter(funnel_id=funnel_id).update(**changes)
+            # queryset.update минует сигналы Lead — их действия повторены здесь
+            materialize_stage_checklists(pending)
+            sync_lead_checklist_counters(pending)
+            sync_lead_stage_deadlines(pending)
+            materialize_lead_subfunnels(campaign, pending)
+        if activated:
+            schedule_campaign_stats_refresh(campaign.pk)
+    return activated
@@ -0,0 +1,37 @@
+"""
+Создание недостающих значений чек-листа текущей стадии (LeadChecklistValue) у лидов.
+
+  python manage.py materialize_stage_checklists
+  python manage.py materialize_stage_checklists --campaign 12 --campaign 15
+
+Значения создаются автоматически при смене стадии лида и добавлении пункта на стадию;
+раньше их создавало открытие карточки лида, поэтому у старых лидов часть значений
+может отсутствовать. Повторный запуск безопасен — существующие значения не меняются.
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.campaigns.models import Lead, LeadChecklistValue
+from apps.campaigns.stage_checklists import materialize_stage_checklists
+
+
+class Command(BaseCommand):
+    help = "Создать недостающие значения чек-листа текущей стадии у лидов"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--campaign",
+            type=int,
+            action="append",
+            dest="campaign_ids",
+            help="ID кампании (можно указать несколько раз); по умолчанию — все",
+        )
+
+    def handle(self, *args, **options):
+        leads = Lead.objects.all()
+        if options.get("campaign_ids"):
+            leads = leads.filter(campaign_id__in=options["campaign_ids"])
+        before = LeadChecklistValue.objects.count()
+        materialize_stage_checklists(leads)
+        created = LeadChecklistValue.objects.count() - before
+        self.stdout.write(self.style.SUCCESS(f"Создано значений чек-листа: {created}"))
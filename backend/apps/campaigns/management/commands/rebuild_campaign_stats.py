@@ -0,0 +1,32 @@
+"""
+Полный пересчёт сводки кампаний (CampaignStats) для списка кампаний.
+
+  python manage.py rebuild_campaign_stats
+  python manage.py rebuild_campaign_stats --campaign 12 --campaign 15
+
+Обычно сводка обновляется автоматически при изменении лидов, организаций и программ;
+команда нужна после первого деплоя и для исправления расхождений
+(например, после массовых правок в обход ORM-сигналов).
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.campaigns.stats import refresh_campaign_stats
+
+
+class Command(BaseCommand):
+    help = "Пересчитать сводку кампаний (CampaignStats)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--campaign",
+            type=int,
+            action="append",
+            dest="campaign_ids",
+            help="ID кампании (можно указать несколько раз); по умолчанию — все кампании",
+        )
+
+    def handle(self, *args, **options):
+        campaign_ids = options.get("campaign_ids")
+        refreshed = refresh_campaign_stats(campaign_ids)
+        self.stdout.write(self.style.SUCCESS(f"Пересчитано сводок кампаний: {refreshed}"))
@@ -0,0 +1,35 @@
+"""
+Пересчёт денормализованных счётчиков прогресса чек-листов:
+LeadSubfunnel.checklist_total/checklist_completed и
+Lead.stage_checklist_total/stage_checklist_completed.
+
+  python manage.py rebuild_checklist_counters
+  python manage.py rebuild_checklist_counters --campaign 12 --campaign 15
+
+Счётчики поддерживаются автоматически при изменении значений чек-листов, пунктов стадий
+и стадии лида; команда нужна после первого деплоя, массовых правок в обход ORM
+и для исправления расхождений.
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.campaigns.checklist_counters import rebuild_checklist_counters
+
+
+class Command(BaseCommand):
+    help = "Пересчитать счётчики прогресса чек-листов у лидов и задач подворонок"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--campaign",
+            type=int,
+            action="append",
+            dest="campaign_ids",
+            help="ID кампании (можно указать несколько раз); по умолчанию — все",
+        )
+
+    def handle(self, *args, **options):
+        leads, subfunnels = rebuild_checklist_counters(options.get("campaign_ids"))
+        self.stdout.write(
+            self.style.SUCCESS(f"Пересчитано: лидов {leads}, задач подворонок {subfunnels}")
+        )
@@ -0,0 +1,32 @@
+"""
+Полная пересборка дат дедлайнов стадий по очередям (QueueStageDeadlineDate)
+и срока текущей стадии у лидов (Lead.current_stage_deadline).
+
+  python manage.py rebuild_stage_deadlines
+  python manage.py rebuild_stage_deadlines --queue 3 --queue 4
+
+Обычно даты пересобираются автоматически при изменении старта очереди, сроков стадий,
+переопределений QueueStageDeadline и производственного календаря; команда нужна после
+первого деплоя и для исправления расхождений.
+"""
+
+from django.core.management.base import BaseCommand
+
+from apps.campaigns.stage_deadlines import rebuild_stage_deadline_dates
+
+
+class Command(BaseCommand):
+    help = "Пересобрать даты дедлайнов стадий по очередям и сроки текущих стадий лидов"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--queue",
+            type=int,
+            action="append",
+            dest="queue_ids",
+            help="ID очереди (можно указать несколько раз); по умолчанию — все очереди",
+        )
+
+    def handle(self, *args, **options):
+        rows = rebuild_stage_deadline_dates(options.get("queue_ids"))
+        self.stdout.write(self.style.SUCCESS(f"Дат дедлайнов стадий: {rows}"))
@@ -0,0 +1,65 @@
+"""
+Снимки загрузки по дням (WorkloadDailySnapshot) для истории дашборда загрузки.
+
+  python manage.py snapshot_workload                      # ночной запуск по cron: дни после последнего снимка по вчера
+  python manage.py snapshot_workload --date 2026-03-01
+  python manage.py snapshot_workload --date-from 2026-01-01 --date-to 2026-03-31
+
+Снимок дня фиксирует статусы задач на момент запуска: дальнейшие правки задач историю
+не меняют. Повторный запуск за тот же день перезаписывает его снимок. Текущий день не
+снимается — дашборд считает его вживую. Заполнение прошлых дней (после первого деплоя)
+строится по нынешнему состоянию задач. Без параметров команда дописывает и ночи, пропущенные
+cron после последнего снимка; дни без снимков дашборд в любом случае досчитывает вживую.
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from apps.campaigns.workload import last_snapshot_date, write_workload_snapshots
+
+
+def _date_option(raw, name):
+    if not raw:
+        return None
+    value = parse_date(raw)
+    if value is None:
+        raise CommandError(f"{name}: ожидается дата ГГГГ-ММ-ДД, получено «{raw}»")
+    return value
+
+
+class Command(BaseCommand):
+    help = "Записать снимки загрузки по дням (по умолчанию — после последнего снимка по вчера)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", type=str, help="День снимка (ГГГГ-ММ-ДД)")
+        parser.add_argument("--date-from", type=str, help="Начало диапазона дней (ГГГГ-ММ-ДД)")
+        parser.add_argument("--date-to", type=str, help="Конец диапазона дней (ГГГГ-ММ-ДД), по умолчанию — вчера")
+
+    def handle(self, *args, **options):
+        yesterday = timezone.localdate() - timedelta(days=1)
+        day = _date_option(options.get("date"), "--date")
+        date_from = _date_option(options.get("date_from"), "--date-from")
+        date_to = _date_option(options.get("date_to"), "--date-to")
+        if day and (date_from or date_to):
+            raise CommandError("Укажите либо --date, либо диапазон --date-from/--date-to")
+        if day:
+            date_from = date_to = day
+        if not (day or date_from or date_to):
+            last = last_snapshot_date()
+            date_from = last + timedelta(days=1) if last and last < yesterday else yesterday
+        date_to = date_to or yesterday
+        date_from = date_from or date_to
+        if date_to > yesterday:
+            raise CommandError("Снимок текущего или будущего дня не пишется — он считается вживую")
+        if date_from > date_to:
+            raise CommandError("--date-from позже --date-to")
+
+        rows = write_workload_snapshots(date_from, date_to)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Снимки загрузки за {date_from:%d.%m.%Y}–{date_to:%d.%m.%Y}: {rows} строк"
+            )
+        )
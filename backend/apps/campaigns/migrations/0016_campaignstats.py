@@ -0,0 +1,35 @@
+# Generated by Django 5.1.15 on 2026-10-17 02:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaigns', '0015_campaign_responsible'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CampaignStats',
+            fields=[
+                ('campaign', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='campaigns.campaign', verbose_name='Кампания')),
+                ('demand_plan', models.IntegerField(default=0, verbose_name='План (чел.)')),
+                ('demand_declared_collected', models.IntegerField(default=0, verbose_name='Собрано по заявленной квоте (чел.)')),
+                ('demand_declared_quota', models.IntegerField(default=0, verbose_name='Квота заявленная (чел.)')),
+                ('demand_list_collected', models.IntegerField(default=0, verbose_name='Собрано по списочной квоте (чел.)')),
+                ('demand_list_quota', models.IntegerField(default=0, verbose_name='Квота списочная (чел.)')),
+                ('leads_count', models.PositiveIntegerField(default=0, verbose_name='Лидов')),
+                ('organizations_count', models.PositiveIntegerField(default=0, verbose_name='Организаций')),
+                ('regions_count', models.PositiveIntegerField(default=0, verbose_name='Регионов лидов')),
+                ('programs_count', models.PositiveIntegerField(default=0, verbose_name='Программ')),
+                ('funnel_names', models.JSONField(blank=True, default=list, verbose_name='Воронки')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Сводка кампании',
+                'verbose_name_plural': 'Сводки кампаний',
+            },
+        ),
+    ]
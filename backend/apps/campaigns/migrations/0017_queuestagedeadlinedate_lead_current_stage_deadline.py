@@ -0,0 +1,34 @@
+# Generated by Django 5.1.15 on 2026-10-17 02:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaigns', '0016_campaignstats'),
+        ('funnels', '0019_subfunneltemplatebinding_advance_lead_on_task_stage_forward'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lead',
+            name='current_stage_deadline',
+            field=models.DateField(blank=True, db_index=True, editable=False, null=True, verbose_name='Срок текущей стадии'),
+        ),
+        migrations.CreateModel(
+            name='QueueStageDeadlineDate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('deadline_date', models.DateField(db_index=True, verbose_name='Дата дедлайна')),
+                ('funnel_stage', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='queue_deadline_dates', to='funnels.funnelstage', verbose_name='Стадия воронки')),
+                ('queue', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stage_deadline_dates', to='campaigns.campaignqueue', verbose_name='Очередь')),
+            ],
+            options={
+                'verbose_name': 'Дата дедлайна стадии в очереди',
+                'verbose_name_plural': 'Даты дедлайнов стадий в очередях',
+                'unique_together': {('queue', 'funnel_stage')},
+            },
+        ),
+    ]
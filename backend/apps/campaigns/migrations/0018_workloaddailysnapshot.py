@@ -0,0 +1,70 @@
+# Generated by Django 5.1.15 on 2026-10-17 02:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaigns', '0017_queuestagedeadlinedate_lead_current_stage_deadline'),
+        ('funnels', '0019_subfunneltemplatebinding_advance_lead_on_task_stage_forward'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkloadDailySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='День')),
+                ('backlog', models.PositiveIntegerField(default=0, verbose_name='Бэклог')),
+                ('in_progress', models.PositiveIntegerField(default=0, verbose_name='В работе')),
+                ('paused', models.PositiveIntegerField(default=0, verbose_name='Пауза')),
+                ('rejected', models.PositiveIntegerField(default=0, verbose_name='Отказ')),
+                ('done', models.PositiveIntegerField(default=0, verbose_name='Готово')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Снимок загрузки за день',
+                'verbose_name_plural': 'Снимки загрузки по дням',
+                'ordering': ['date'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='leadsubfunnel',
+            index=models.Index(fields=['updated_at'], name='campaigns_l_updated_84fe6c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leadsubfunnel',
+            index=models.Index(fields=['completed_at'], name='campaigns_l_complet_ea2632_idx'),
+        ),
+        migrations.AddField(
+            model_name='workloaddailysnapshot',
+            name='campaign',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='workload_snapshots', to='campaigns.campaign', verbose_name='Кампания'),
+        ),
+        migrations.AddField(
+            model_name='workloaddailysnapshot',
+            name='funnel',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='workload_snapshots', to='funnels.funnel', verbose_name='Воронка'),
+        ),
+        migrations.AddField(
+            model_name='workloaddailysnapshot',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='workload_snapshots', to=settings.AUTH_USER_MODEL, verbose_name='Исполнитель'),
+        ),
+        migrations.AddIndex(
+            model_name='workloaddailysnapshot',
+            index=models.Index(fields=['campaign', 'date'], name='campaigns_w_campaig_99d8a1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workloaddailysnapshot',
+            index=models.Index(fields=['user', 'date'], name='campaigns_w_user_id_1c1369_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='workloaddailysnapshot',
+            unique_together={('date', 'user', 'campaign', 'funnel')},
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.15 on 2026-10-17 02:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaigns', '0018_workloaddailysnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lead',
+            name='stage_checklist_completed',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Выполнено пунктов текущей стадии'),
+        ),
+        migrations.AddField(
+            model_name='lead',
+            name='stage_checklist_total',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Пунктов чек-листа текущей стадии'),
+        ),
+        migrations.AddField(
+            model_name='leadsubfunnel',
+            name='checklist_completed',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Выполнено пунктов чек-листа'),
+        ),
+        migrations.AddField(
+            model_name='leadsubfunnel',
+            name='checklist_total',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Пунктов чек-листа'),
+        ),
+    ]
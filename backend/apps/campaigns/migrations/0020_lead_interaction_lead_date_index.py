@@ -0,0 +1,20 @@
+# Generated by Django 5.1.15 on 2026-10-17 02:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaigns', '0019_checklist_counters'),
+        ('organizations', '0015_rename_organizatio_batch_i_6f0b0d_idx_organizatio_batch_i_7746db_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='leadinteraction',
+            index=models.Index(fields=['lead', '-date'], name='campaigns_l_lead_id_73dac4_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.15 on 2026-10-17 02:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaigns', '0020_lead_interaction_lead_date_index'),
+        ('funnels', '0019_subfunneltemplatebinding_advance_lead_on_task_stage_forward'),
+        ('organizations', '0015_rename_organizatio_batch_i_6f0b0d_idx_organizatio_batch_i_7746db_idx'),
+        ('reference', '0010_productioncalendar'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['-created_at', '-id'], name='campaigns_l_created_64beb8_idx'),
+        ),
+    ]
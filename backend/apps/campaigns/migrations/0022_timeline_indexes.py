@@ -0,0 +1,25 @@
+# Generated by Django 5.1.15 on 2026-10-17 02:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('campaigns', '0021_keyset_indexes'),
+        ('funnels', '0019_subfunneltemplatebinding_advance_lead_on_task_stage_forward'),
+        ('organizations', '0016_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='leadactivitylog',
+            index=models.Index(fields=['lead', '-created_at'], name='campaigns_l_lead_id_d7b58d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leadchecklistvalue',
+            index=models.Index(fields=['lead', '-completed_at'], name='campaigns_l_lead_id_3fc51e_idx'),
+        ),
+    ]
@@ -1,6 +1,12 @@
 from django.conf import settings
 from django.db import models
 from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.reference.business_calendar import calendar_changed
+
+_NOT_LOADED = object()
 
 
 class Campaign(models.Model):
@@ -128,6 +134,53 @@ class Campaign(models.Model):
         return self.leads.count()
 
 
+class CampaignStats(models.Model):
+    """Сводные показатели кампании для списка (пересчитываются при изменении лидов/организаций/программ)."""
+
+    campaign = models.OneToOneField(
+        Campaign,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="stats",
+        verbose_name="Кампания",
+    )
+    demand_plan = models.IntegerField(default=0, verbose_name="План (чел.)")
+    demand_declared_collected = models.IntegerField(
+        default=0, verbose_name="Собрано по заявленной квоте (чел.)"
+    )
+    demand_declared_quota = models.IntegerField(
+        default=0, verbose_name="Квота заявленная (чел.)"
+    )
+    demand_list_collected = models.IntegerField(
+        default=0, verbose_name="Собрано по списочной квоте (чел.)"
+    )
+    demand_list_quota = models.IntegerField(
+        default=0, verbose_name="Квота списочная (чел.)"
+    )
+    leads_count = models.PositiveIntegerField(default=0, verbose_name="Лидов")
+    organizations_count = models.PositiveIntegerField(default=0, verbose_name="Организаций")
+    regions_count = models.PositiveIntegerField(default=0, verbose_name="Регионов лидов")
+    programs_count = models.PositiveIntegerField(default=0, verbose_name="Программ")
+    funnel_names = models.JSONField(default=list, blank=True, verbose_name="Воронки")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Сводка кампании"
+        verbose_name_plural = "Сводки кампаний"
+
+    def __str__(self):
+        return f"Сводка: {self.campaign_id}"
+
+    def demand_summary(self):
+        return {
+            "plan": self.demand_plan,
+            "declared_collected": self.demand_declared_collected,
+            "declared_quota": self.demand_declared_quota,
+            "list_collected": self.demand_list_collected,
+            "list_quota": self.demand_list_quota,
+        }
+
+
 class CampaignQueue(models.Model):
     campaign = models.ForeignKey(
         Campaign,
@@ -205,6 +258,35 @@ class QueueStageDeadline(models.Model):
         return f"{self.queue} — {self.funnel_stage.name}: {self.deadline_days} дн."
 
 
+class QueueStageDeadlineDate(models.Model):
+    """
+    Рассчитанная дата дедлайна стадии в очереди: старт очереди + срок стадии (переопределение
+    QueueStageDeadline или FunnelStage.deadline_days) в рабочих днях производственного календаря.
+    Пересобирается apps.campaigns.stage_deadlines при изменении исходных данных.
+    """
+    queue = models.ForeignKey(
+        CampaignQueue,
+        on_delete=models.CASCADE,
+        related_name="stage_deadline_dates",
+        verbose_name="Очередь",
+    )
+    funnel_stage = models.ForeignKey(
+        "funnels.FunnelStage",
+        on_delete=models.CASCADE,
+        related_name="queue_deadline_dates",
+        verbose_name="Стадия воронки",
+    )
+    deadline_date = models.DateField(db_index=True, verbose_name="Дата дедлайна")
+
+    class Meta:
+        verbose_name = "Дата дедлайна стадии в очереди"
+        verbose_name_plural = "Даты дедлайнов стадий в очередях"
+        unique_together = ["queue", "funnel_stage"]
+
+    def __str__(self):
+        return f"{self.queue} — {self.funnel_stage_id}: {self.deadline_date:%d.%m.%Y}"
+
+
 class CampaignProgram(models.Model):
     campaign = models.ForeignKey(
         Campaign,
@@ -445,6 +527,20 @@ class Lead(models.Model):
         related_name="primary_for_leads",
         verbose_name="Основной контакт",
     )
+    # Копия QueueStageDeadlineDate для (queue, current_stage) — фильтр и сортировка по сроку в SQL
+    current_stage_deadline = models.DateField(
+        null=True,
+        blank=True,
+        db_index=True,
+        editable=False,
+        verbose_name="Срок текущей стадии",
+    )
+    stage_checklist_total = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Пунктов чек-листа текущей стадии"
+    )
+    stage_checklist_completed = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Выполнено пунктов текущей стадии"
+    )
     tags = models.ManyToManyField(
         "organizations.OrganizationTag",
         blank=True,
@@ -466,6 +562,62 @@ class Lead(models.Model):
                 name="lead_org_single_primary_contact",
             ),
         ]
+        indexes = [models.Index(fields=["-created_at", "-id"])]
+
+    # Поля, смену которых проверяют сигналы post_save (см. changed_on_save).
+    # От STATS_FIELDS зависит сводка кампании (stats._build_stats_rows), от STAGE_FIELDS —
+    # чек-лист стадии, его счётчики и срок стадии лида
+    STATS_FIELDS = (
+        "campaign",
+        "organization",
+        "region",
+        "funnel",
+        "forecast_demand",
+        "demand_collected_declared",
+        "demand_collected_list",
+        "demand_quota_declared",
+        "demand_quota_list",
+    )
+    STAGE_FIELDS = ("current_stage", "queue")
+    TRACKED_FIELDS = STATS_FIELDS + STAGE_FIELDS
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: instance.__dict__[attname]
+            for name, attname in cls._tracked_attnames()
+            if attname in instance.__dict__
+        }
+        return instance
+
+    @classmethod
+    def _tracked_attnames(cls):
+        return [(name, cls._meta.get_field(name).attname) for name in cls.TRACKED_FIELDS]
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        loaded = getattr(self, "_loaded_values", {})
+        saved = [
+            (name, attname)
+            for name, attname in self._tracked_attnames()
+            if attname in self.__dict__
+            and (update_fields is None or name in update_fields or attname in update_fields)
+        ]
+        self._changed_fields = {
+            name for name, attname in saved if loaded.get(name, _NOT_LOADED) != getattr(self, attname)
+        }
+        super().save(*args, **kwargs)
+        self._loaded_values = {**loaded, **{name: getattr(self, attname) for name, attname in saved}}
+
+    def changed_on_save(self, *names):
+        """Меняет ли текущий save() в БД одно из полей names (для обработчиков post_save)."""
+        changed = getattr(self, "_changed_fields", None)
+        return changed is None or bool(changed.intersection(names))
+
+    def loaded_value(self, name):
+        """Значение отслеживаемого поля, прочитанное из БД (в post_save — до текущего save())."""
+        return getattr(self, "_loaded_values", {}).get(name)
 
     def __str__(self):
         if self.region_id:
@@ -473,17 +625,25 @@ class Lead(models.Model):
         return f"{self.organization} [{self.funnel}]"
 
     def get_stage_deadline(self, stage):
-        """Compute deadline date for a given stage based on queue start_date."""
-        if not self.queue or not self.queue.start_date:
-            return None
-        override = QueueStageDeadline.objects.filter(
-            queue=self.queue, funnel_stage=stage
-        ).first()
-        days = override.deadline_days if override else stage.deadline_days
-        if not days:
+        """Deadline date for a given stage (materialized in QueueStageDeadlineDate)."""
+        if not self.queue_id or not stage:
             return None
-        from apps.campaigns.utils import add_business_days
-        return add_business_days(self.queue.start_date, days)
+        if stage.pk == self.current_stage_id:
+            return self.current_stage_deadline
+        return (
+            QueueStageDeadlineDate.objects.filter(queue_id=self.queue_id, funnel_stage=stage)
+            .values_list("deadline_date", flat=True)
+            .first()
+        )
+
+    def get_stage_deadlines(self):
+        """{stage_id: deadline_date} для всех стадий с дедлайном в очереди лида — одним запросом."""
+        if not self.queue_id:
+            return {}
+        return dict(
+            QueueStageDeadlineDate.objects.filter(queue_id=self.queue_id)
+            .values_list("funnel_stage_id", "deadline_date")
+        )
 
 
 class CampaignSubfunnel(models.Model):
@@ -612,6 +772,12 @@ class LeadSubfunnel(models.Model):
         verbose_name="Доступна на текущей стадии",
         help_text="Для диапазонных подворонок availability вычисляется по стадии лида.",
     )
+    checklist_total = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Пунктов чек-листа"
+    )
+    checklist_completed = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Выполнено пунктов чек-листа"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -638,6 +804,10 @@ class LeadSubfunnel(models.Model):
                 name="lead_subfunnel_lead_xor_campaign_region",
             ),
         ]
+        indexes = [
+            models.Index(fields=["updated_at"]),
+            models.Index(fields=["completed_at"]),
+        ]
 
     def __str__(self):
         if self.campaign_region_id:
@@ -783,6 +953,7 @@ class LeadChecklistValue(models.Model):
         verbose_name = "Значение чек-листа лида"
         verbose_name_plural = "Значения чек-листа лидов"
         unique_together = ["lead", "checklist_item"]
+        indexes = [models.Index(fields=["lead", "-completed_at"])]
 
     def __str__(self):
         return f"{self.lead} — {self.checklist_item.text}"
@@ -858,6 +1029,7 @@ class LeadInteraction(models.Model):
         verbose_name = "Взаимодействие по лиду"
         verbose_name_plural = "Взаимодействия по лидам"
         ordering = ["-date"]
+        indexes = [models.Index(fields=["lead", "-date"])]
 
     def __str__(self):
         return f"{self.lead} — {self.get_channel_display()} ({self.date})"
@@ -896,6 +1068,215 @@ class LeadActivityLog(models.Model):
         verbose_name = "Запись активности лида"
         verbose_name_plural = "Активность лида"
         ordering = ["-created_at"]
+        indexes = [models.Index(fields=["lead", "-created_at"])]
 
     def __str__(self):
         return f"{self.lead} — {self.summary[:60]}"
+
+
+class WorkloadDailySnapshot(models.Model):
+    """
+    Снимок активности задач подворонок за день: число задач по статусам в разрезе
+    исполнителя, кампании и воронки. Пишется командой snapshot_workload (ночью за прошедший
+    день); дашборд загрузки берёт историю отсюда и считает вживую только дни после снимков.
+    """
+    date = models.DateField(verbose_name="День")
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="workload_snapshots",
+        verbose_name="Исполнитель",
+    )
+    campaign = models.ForeignKey(
+        Campaign,
+        on_delete=models.CASCADE,
+        related_name="workload_snapshots",
+        verbose_name="Кампания",
+    )
+    funnel = models.ForeignKey(
+        "funnels.Funnel",
+        on_delete=models.CASCADE,
+        related_name="workload_snapshots",
+        verbose_name="Воронка",
+    )
+    backlog = models.PositiveIntegerField(default=0, verbose_name="Бэклог")
+    in_progress = models.PositiveIntegerField(default=0, verbose_name="В работе")
+    paused = models.PositiveIntegerField(default=0, verbose_name="Пауза")
+    rejected = models.PositiveIntegerField(default=0, verbose_name="Отказ")
+    done = models.PositiveIntegerField(default=0, verbose_name="Готово")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Снимок загрузки за день"
+        verbose_name_plural = "Снимки загрузки по дням"
+        ordering = ["date"]
+        unique_together = ["date", "user", "campaign", "funnel"]
+        indexes = [
+            models.Index(fields=["campaign", "date"]),
+            models.Index(fields=["user", "date"]),
+        ]
+
+    def __str__(self):
+        return f"{self.date:%d.%m.%Y} — {self.user_id} / {self.campaign_id}"
+
+
+@receiver(post_save, sender=Campaign)
+def create_campaign_stats(sender, instance, created, **kwargs):
+    if created:
+        from apps.campaigns.stats import schedule_campaign_stats_refresh
+        schedule_campaign_stats_refresh(instance.pk)
+
+
+@receiver(post_delete, sender=Lead)
+@receiver(post_save, sender=CampaignOrganization)
+@receiver(post_delete, sender=CampaignOrganization)
+@receiver(post_save, sender=CampaignProgram)
+@receiver(post_delete, sender=CampaignProgram)
+@receiver(post_save, sender=CampaignFunnel)
+@receiver(post_delete, sender=CampaignFunnel)
+def refresh_campaign_stats_on_change(sender, instance, **kwargs):
+    from apps.campaigns.stats import schedule_campaign_stats_refresh
+    schedule_campaign_stats_refresh(instance.campaign_id)
+
+
+@receiver(post_save, sender=Lead)
+def refresh_campaign_stats_on_lead_save(sender, instance, created, **kwargs):
+    # Правка заметок, контакта, менеджера и т.п. сводку не меняет — пересчёт не нужен
+    if not created and not instance.changed_on_save(*Lead.STATS_FIELDS):
+        return
+    from apps.campaigns.stats import schedule_campaign_stats_refresh
+    schedule_campaign_stats_refresh(instance.campaign_id)
+    previous_campaign_id = instance.loaded_value("campaign")
+    if previous_campaign_id and previous_campaign_id != instance.campaign_id:
+        schedule_campaign_stats_refresh(previous_campaign_id)
+
+
+@receiver(post_save, sender="organizations.Organization")
+def refresh_campaign_stats_on_organization_region_change(sender, instance, created, **kwargs):
+    # regions_count берёт регион организации для лидов без своего региона
+    if created or not getattr(instance, "region_changed_on_save", True):
+        return
+    from apps.campaigns.stats import schedule_campaign_stats_refresh
+    campaign_ids = (
+        Lead.objects.filter(organization_id=instance.pk, region__isnull=True)
+        .order_by()
+        .values_list("campaign_id", flat=True)
+        .distinct()
+    )
+    for campaign_id in campaign_ids:
+        schedule_campaign_stats_refresh(campaign_id)
+
+
+@receiver(post_save, sender="funnels.Funnel")
+def refresh_campaign_stats_on_funnel_rename(sender, instance, created, **kwargs):
+    if created:
+        return
+    from apps.campaigns.stats import schedule_campaign_stats_refresh
+    for campaign_id in CampaignFunnel.objects.filter(funnel_id=instance.pk).values_list(
+        "campaign_id", flat=True
+    ):
+        schedule_campaign_stats_refresh(campaign_id)
+
+
+@receiver(post_save, sender=CampaignQueue)
+def rebuild_stage_deadlines_on_queue_save(sender, instance, **kwargs):
+    from apps.campaigns.stage_deadlines import schedule_stage_deadline_rebuild
+    schedule_stage_deadline_rebuild([instance.pk])
+
+
+@receiver(post_delete, sender=CampaignQueue)
+def clear_stage_deadlines_on_queue_delete(sender, instance, **kwargs):
+    # Лиды удалённой очереди уже отвязаны (SET_NULL) — срок стадии без очереди не определён
+    Lead.objects.filter(
+        campaign_id=instance.campaign_id, queue__isnull=True, current_stage_deadline__isnull=False
+    ).update(current_stage_deadline=None)
+
+
+@receiver(post_save, sender=QueueStageDeadline)
+@receiver(post_delete, sender=QueueStageDeadline)
+def rebuild_stage_deadlines_on_override_change(sender, instance, **kwargs):
+    from apps.campaigns.stage_deadlines import schedule_stage_deadline_rebuild
+    schedule_stage_deadline_rebuild([instance.queue_id])
+
+
+@receiver(post_save, sender=CampaignFunnel)
+@receiver(post_delete, sender=CampaignFunnel)
+def rebuild_stage_deadlines_on_campaign_funnel_change(sender, instance, **kwargs):
+    from apps.campaigns.stage_deadlines import schedule_stage_deadline_rebuild
+    schedule_stage_deadline_rebuild(
+        CampaignQueue.objects.filter(campaign_id=instance.campaign_id).values_list("id", flat=True)
+    )
+
+
+@receiver(post_save, sender="funnels.FunnelStage")
+@receiver(post_delete, sender="funnels.FunnelStage")
+def rebuild_stage_deadlines_on_stage_change(sender, instance, **kwargs):
+    from apps.campaigns.stage_deadlines import queue_ids_for_funnel, schedule_stage_deadline_rebuild
+    schedule_stage_deadline_rebuild(queue_ids_for_funnel(instance.funnel_id))
+
+
+@receiver(post_save, sender=Lead)
+def sync_current_stage_deadline(sender, instance, created, **kwargs):
+    if not created and not instance.changed_on_save("queue", "current_stage"):
+        return
+    from apps.campaigns.stage_deadlines import sync_lead_stage_deadline
+    sync_lead_stage_deadline(instance)
+
+
+@receiver(calendar_changed)
+def rebuild_stage_deadlines_on_calendar_change(sender, **kwargs):
+    from apps.campaigns.stage_deadlines import schedule_stage_deadline_rebuild
+    schedule_stage_deadline_rebuild()
+
+
+@receiver(post_save, sender=LeadSubfunnelChecklistValue)
+@receiver(post_delete, sender=LeadSubfunnelChecklistValue)
+def sync_subfunnel_checklist_counters_on_value_change(sender, instance, **kwargs):
+    from apps.campaigns.checklist_counters import sync_subfunnel_checklist_counters
+    sync_subfunnel_checklist_counters(LeadSubfunnel.objects.filter(pk=instance.lead_subfunnel_id))
+
+
+@receiver(post_save, sender=LeadChecklistValue)
+@receiver(post_delete, sender=LeadChecklistValue)
+def sync_lead_checklist_counters_on_value_change(sender, instance, **kwargs):
+    from apps.campaigns.checklist_counters import sync_lead_checklist_counters
+    sync_lead_checklist_counters(Lead.objects.filter(pk=instance.lead_id))
+
+
+@receiver(post_save, sender=Lead)
+def materialize_stage_checklist_on_stage_change(sender, instance, created, **kwargs):
+    if not created and not instance.changed_on_save("current_stage"):
+        return
+    from apps.campaigns.stage_checklists import materialize_stage_checklist
+    materialize_stage_checklist(instance)
+
+
+@receiver(post_save, sender=Lead)
+def sync_lead_checklist_counters_on_stage_change(sender, instance, created, **kwargs):
+    if not created and not instance.changed_on_save("current_stage"):
+        return
+    from apps.campaigns.checklist_counters import sync_lead_checklist_counter
+    sync_lead_checklist_counter(instance)
+
+
+@receiver(post_save, sender="funnels.StageChecklistItem")
+def materialize_stage_checklist_on_item_save(sender, instance, **kwargs):
+    from apps.campaigns.stage_checklists import materialize_stage_checklists
+    materialize_stage_checklists(Lead.objects.filter(current_stage_id=instance.stage_id))
+
+
+@receiver(post_save, sender="funnels.StageChecklistItem")
+def sync_lead_checklist_counters_on_item_save(sender, instance, created, **kwargs):
+    from apps.campaigns.checklist_counters import sync_lead_checklist_counters
+    if created:
+        leads = Lead.objects.filter(current_stage_id=instance.stage_id)
+    else:
+        # Пункт мог перейти на другую стадию — пересчитываем всю воронку
+        leads = Lead.objects.filter(current_stage__funnel_id=instance.stage.funnel_id)
+    sync_lead_checklist_counters(leads)
+
+
+@receiver(post_delete, sender="funnels.StageChecklistItem")
+def sync_lead_checklist_counters_on_item_delete(sender, instance, **kwargs):
+    from apps.campaigns.checklist_counters import sync_lead_checklist_counters
+    sync_lead_checklist_counters(Lead.objects.filter(current_stage_id=instance.stage_id))
@@ -0,0 +1,69 @@
+"""
+Синхронизация вложенных коллекций кампании при обновлении (CampaignCreateSerializer.update):
+входящие строки сопоставляются с существующими по ключу, новые добавляются bulk_create,
+изменившиеся — bulk_update, лишние удаляются одним запросом. Совпадающие строки не
+трогаются: их id и связанные данные (задачи регионов, дедлайны очередей) сохраняются.
+
+bulk_create / bulk_update минуют сигналы моделей — пересчёт сводки кампании и дедлайнов
+планирует вызывающий код.
+"""
+
+from django.utils import timezone
+
+SYNC_BATCH_SIZE = 500
+
+
+def sync_rows(queryset, rows, key_fields, update_fields=()):
+    """
+    Привести строки queryset к rows — несохранённым экземплярам модели с заполненными
+    key_fields и update_fields (имена атрибутов, например "queue_id").
+    При повторе ключа в rows действует последняя строка.
+    Возвращает (объекты по ключу, созданные, изменённые, удалённые).
+    """
+    model = queryset.model
+    update_fields = list(update_fields)
+
+    def key(obj):
+        return tuple(getattr(obj, field) for field in key_fields)
+
+    incoming = {key(row): row for row in rows}
+    existing = {}
+    stale = []
+    for obj in queryset:
+        obj_key = key(obj)
+        if obj_key in incoming and obj_key not in existing:
+            existing[obj_key] = obj
+        else:
+            stale.append(obj)
+
+    created = []
+    changed = []
+    for row_key, row in incoming.items():
+        obj = existing.get(row_key)
+        if obj is None:
+            created.append(row)
+        elif any(getattr(obj, field) != getattr(row, field) for field in update_fields):
+            for field in update_fields:
+                setattr(obj, field, getattr(row, field))
+            changed.append(obj)
+
+    if stale:
+        # Удаление через queryset — с каскадом и сигналами post_delete, как у obj.delete()
+        model.objects.filter(pk__in=[obj.pk for obj in stale]).delete()
+    if created:
+        model.objects.bulk_create(created, batch_size=SYNC_BATCH_SIZE)
+    if changed:
+        touched = [
+            field.attname
+            for field in model._meta.concrete_fields
+            if getattr(field, "auto_now", False)
+        ]
+        now = timezone.now()
+        for obj in changed:
+            for field in touched:
+                setattr(obj, field, now)
+        model.objects.bulk_update(changed, update_fields + touched, batch_size=SYNC_BATCH_SIZE)
+
+    by_key = dict(existing)
+    by_key.update((key(row), row) for row in created)
+    return by_key, created, changed, stale
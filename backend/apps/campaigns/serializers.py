@@ -1,20 +1,27 @@
 import os
 import random
 
+from django.contrib.auth import get_user_model
 from django.db import transaction
-from django.db.models import Sum
+from django.db.models import Count, OuterRef, Prefetch, Subquery, Sum
 from django.db.models.functions import Coalesce
 from django.db.utils import OperationalError, ProgrammingError
 from rest_framework import serializers
 from apps.organizations.models import Contact, OrganizationTag
-from apps.funnels.models import TaskTemplateStage
+from apps.funnels.models import StageChecklistItem, TaskTemplateStage
+from apps.reference.business_calendar import add_business_days_many
 from .models import (
     Campaign, CampaignQueue, CampaignProgram,
     CampaignRegion, CampaignOrganization,
-    CampaignFunnel, QueueStageDeadline,
+    CampaignFunnel, CampaignStats, QueueStageDeadline,
     Lead, LeadChecklistValue, LeadChecklistAttachment, LeadInteraction,
     CampaignSubfunnel, LeadSubfunnel, LeadSubfunnelChecklistValue,
 )
+from .lead_activation import activate_campaign_leads, materialize_lead_subfunnels
+from .nested_sync import sync_rows
+from .sparse_fields import ALL_FIELDS, SparseFieldsMixin
+from .stage_deadlines import schedule_stage_deadline_rebuild, sync_lead_stage_deadlines
+from .stats import schedule_campaign_stats_refresh
 from apps.accounts.serializers import UserShortSerializer
 
 
@@ -363,7 +370,7 @@ class LeadInteractionSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class LeadListSerializer(serializers.ModelSerializer):
+class LeadListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     organization_name = serializers.CharField(
         source="organization.name", read_only=True
     )
@@ -401,6 +408,7 @@ class LeadListSerializer(serializers.ModelSerializer):
             "funnel", "funnel_name",
             "queue", "queue_name",
             "current_stage", "current_stage_name", "current_stage_is_rejection",
+            "current_stage_deadline",
             "manager", "manager_name",
             "primary_contact_specialist", "primary_contact_specialist_name",
             "primary_contact_status", "primary_contact_result",
@@ -415,7 +423,73 @@ class LeadListSerializer(serializers.ModelSerializer):
             "created_at", "updated_at",
         ]
 
+    @classmethod
+    def setup_queryset(cls, queryset, selection=ALL_FIELDS):
+        """
+        select_related, Prefetch и аннотации, с которыми список лидов сериализуется без
+        запросов на каждую строку (число запросов не зависит от размера страницы).
+        Подключается только то, что нужно полям из selection.
+        """
+        wants = selection.wants
+        related = [
+            name for name, fields in (
+                ("organization__region", ("organization_name", "organization_region")),
+                ("region", ("region_name", "organization_region")),
+                ("funnel", ("funnel_name",)),
+                ("current_stage", ("current_stage_name", "current_stage_is_rejection", "checklist_summary")),
+                ("queue", ("queue_name",)),
+                ("manager", ("manager_name",)),
+                ("primary_contact_specialist", ("primary_contact_specialist_name",)),
+                ("primary_contact", ("primary_contact",)),
+            )
+            if wants(*fields)
+        ]
+        if related:
+            queryset = queryset.select_related(*related)
+        if wants("tags", "tag_names"):
+            queryset = queryset.prefetch_related(
+                Prefetch("tags", queryset=OrganizationTag.objects.order_by("name")),
+            )
+        if wants("organization_tags"):
+            queryset = queryset.prefetch_related("organization__tags")
+        if wants("checklist_summary"):
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    "current_stage__checklist_items",
+                    queryset=StageChecklistItem.objects.order_by("order", "id"),
+                ),
+                Prefetch(
+                    "checklist_values",
+                    queryset=LeadChecklistValue.objects.filter(is_completed=True).only(
+                        "id", "lead_id", "checklist_item_id"
+                    ),
+                    to_attr="completed_checklist_values",
+                ),
+            )
+        if wants("tasks_summary"):
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    "subfunnels",
+                    queryset=LeadSubfunnel.objects.filter(is_available=True).select_related(
+                        "campaign_subfunnel__template",
+                        "current_template_stage",
+                    ),
+                    to_attr="available_subfunnels",
+                ),
+            )
+        if wants("last_interaction"):
+            last_interaction = LeadInteraction.objects.filter(lead_id=OuterRef("pk")).order_by("-date", "-id")
+            queryset = queryset.annotate(
+                last_interaction_contact_person=Subquery(last_interaction.values("contact_person")[:1]),
+                last_interaction_date=Subquery(last_interaction.values("date")[:1]),
+                last_interaction_channel=Subquery(last_interaction.values("channel")[:1]),
+                last_interaction_result=Subquery(last_interaction.values("result")[:1]),
+            )
+        return queryset
+
     def get_tag_names(self, obj):
+        if "tags" in getattr(obj, "_prefetched_objects_cache", {}):
+            return [tag.name for tag in obj.tags.all()]
         return list(obj.tags.order_by("name").values_list("name", flat=True))
 
     def get_organization_tags(self, obj):
@@ -446,42 +520,40 @@ class LeadListSerializer(serializers.ModelSerializer):
         return None
 
     def get_checklist_progress(self, obj):
-        if not obj.current_stage:
+        if not obj.current_stage_id:
             return None
-        total = obj.current_stage.checklist_items.count()
-        completed = obj.checklist_values.filter(
-            checklist_item__stage=obj.current_stage,
-            is_completed=True,
-        ).count()
-        return {"total": total, "completed": completed}
+        return {"total": obj.stage_checklist_total, "completed": obj.stage_checklist_completed}
 
     def get_checklist_summary(self, obj):
         if not obj.current_stage:
             return []
-        items = obj.current_stage.checklist_items.order_by("order")
-        completed_ids = set(
-            obj.checklist_values.filter(
-                checklist_item__stage=obj.current_stage,
-                is_completed=True,
-            ).values_list("checklist_item_id", flat=True)
-        )
+        items = sorted(obj.current_stage.checklist_items.all(), key=lambda item: (item.order, item.id))
+        completed = getattr(obj, "completed_checklist_values", None)
+        if completed is None:
+            completed_ids = set(
+                obj.checklist_values.filter(
+                    checklist_item__stage=obj.current_stage,
+                    is_completed=True,
+                ).values_list("checklist_item_id", flat=True)
+            )
+        else:
+            completed_ids = {value.checklist_item_id for value in completed}
         return [
             {"text": item.text, "done": item.id in completed_ids}
             for item in items
         ]
 
     def get_tasks_summary(self, obj):
-        rows = obj.subfunnels.select_related(
-            "campaign_subfunnel__template",
-            "current_template_stage",
-        ).prefetch_related("checklist_values")
+        rows = getattr(obj, "available_subfunnels", None)
+        if rows is None:
+            rows = obj.subfunnels.filter(is_available=True).select_related(
+                "campaign_subfunnel__template",
+                "current_template_stage",
+            )
         result = []
         for row in rows:
-            if not row.is_available:
-                continue
-            values = list(row.checklist_values.all())
-            total = len(values)
-            completed = sum(1 for v in values if v.is_completed)
+            total = row.checklist_total
+            completed = row.checklist_completed
             result.append({
                 "id": row.id,
                 "template_name": row.campaign_subfunnel.template.name,
@@ -493,7 +565,17 @@ class LeadListSerializer(serializers.ModelSerializer):
         return result
 
     def get_last_interaction(self, obj):
-        interaction = obj.interactions.order_by("-date").first()
+        if hasattr(obj, "last_interaction_date"):
+            if obj.last_interaction_date is None:
+                return None
+            interaction = LeadInteraction(
+                contact_person=obj.last_interaction_contact_person,
+                date=obj.last_interaction_date,
+                channel=obj.last_interaction_channel,
+                result=obj.last_interaction_result,
+            )
+        else:
+            interaction = obj.interactions.order_by("-date").first()
         if not interaction:
             return None
         return {
@@ -565,9 +647,10 @@ class LeadDetailSerializer(LeadListSerializer):
         if not obj.funnel:
             return []
         stages = obj.funnel.stages.order_by("order")
+        deadlines = obj.get_stage_deadlines()
         result = []
         for stage in stages:
-            deadline_date = obj.get_stage_deadline(stage)
+            deadline_date = deadlines.get(stage.id)
             result.append({
                 "stage_id": stage.id,
                 "stage_name": stage.name,
@@ -669,6 +752,8 @@ class LeadSubfunnelSerializer(serializers.ModelSerializer):
             "completed_at",
             "is_available",
             "forwarded_from",
+            "checklist_total",
+            "checklist_completed",
             "checklist_values",
         ]
 
@@ -817,7 +902,15 @@ def campaign_demand_summary_dict(obj):
     }
 
 
-class CampaignListSerializer(serializers.ModelSerializer):
+def campaign_stats_or_none(obj):
+    """Строка CampaignStats кампании; None — сводка ещё не построена (считаем по-старому)."""
+    try:
+        return obj.stats
+    except CampaignStats.DoesNotExist:
+        return None
+
+
+class CampaignListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     status_display = serializers.CharField(
         source="get_status_display", read_only=True
     )
@@ -836,9 +929,9 @@ class CampaignListSerializer(serializers.ModelSerializer):
     )
     created_by_name = serializers.SerializerMethodField()
     responsible_name = serializers.SerializerMethodField()
-    total_demand = serializers.IntegerField(read_only=True)
-    organizations_count = serializers.IntegerField(read_only=True)
-    leads_count = serializers.IntegerField(read_only=True)
+    total_demand = serializers.SerializerMethodField()
+    organizations_count = serializers.SerializerMethodField()
+    leads_count = serializers.SerializerMethodField()
     programs_count = serializers.SerializerMethodField()
     regions_count = serializers.SerializerMethodField()
     funnel_names = serializers.SerializerMethodField()
@@ -871,8 +964,46 @@ class CampaignListSerializer(serializers.ModelSerializer):
             "created_at", "updated_at",
         ]
 
+    # Поля-счётчики из CampaignStats (одна строка на кампанию)
+    STATS_FIELDS = (
+        "total_demand", "organizations_count", "leads_count", "programs_count",
+        "regions_count", "funnel_names", "demand_summary",
+    )
+
+    @classmethod
+    def setup_queryset(cls, queryset, selection=ALL_FIELDS):
+        """
+        Связи и prefetch для списка кампаний — только для выбранных полей. Агрегаты
+        читаются из CampaignStats, без выборки лидов и JOIN-агрегатов по ним.
+        """
+        wants = selection.wants
+        related = [
+            name for name, fields in (
+                ("stats", cls.STATS_FIELDS),
+                ("federal_operator", ("federal_operator_name", "federal_operator_short_name")),
+                ("project", ("project_name",)),
+                ("acting_organization", ("acting_organization_name",)),
+                ("created_by", ("created_by_name",)),
+                ("responsible", ("responsible_name",)),
+            )
+            if wants(*fields)
+        ]
+        if related:
+            queryset = queryset.select_related(*related)
+        prefetch = [
+            name for name, fields in (
+                ("tags", ("tags", "tag_names")),
+                ("federal_operators", ("federal_operators", "federal_operator_names")),
+                ("queues__stage_deadlines", ("queue_period_start", "queue_period_end", "queue_periods")),
+            )
+            if wants(*fields)
+        ]
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
+
     def get_tag_names(self, obj):
-        return list(obj.tags.order_by("name").values_list("name", flat=True))
+        return [t.name for t in obj.tags.all()]
 
     def get_federal_operator_short_name(self, obj):
         fo = obj.federal_operator
@@ -882,7 +1013,7 @@ class CampaignListSerializer(serializers.ModelSerializer):
         return s or None
 
     def get_federal_operator_names(self, obj):
-        return list(obj.federal_operators.values_list("name", flat=True))
+        return [o.name for o in obj.federal_operators.all()]
 
     def get_created_by_name(self, obj):
         return str(obj.created_by) if obj.created_by else None
@@ -890,26 +1021,38 @@ class CampaignListSerializer(serializers.ModelSerializer):
     def get_responsible_name(self, obj):
         return str(obj.responsible) if obj.responsible else None
 
+    _stats = staticmethod(campaign_stats_or_none)
+
+    def get_total_demand(self, obj):
+        stats = self._stats(obj)
+        return stats.demand_plan if stats else obj.total_demand
+
+    def get_organizations_count(self, obj):
+        stats = self._stats(obj)
+        return stats.organizations_count if stats else obj.organizations_count
+
+    def get_leads_count(self, obj):
+        stats = self._stats(obj)
+        return stats.leads_count if stats else obj.leads_count
+
     @staticmethod
-    def _add_business_days(start, days):
-        from datetime import timedelta
-        if not start or not days:
-            return None
-        current = start
-        remaining = days
-        while remaining > 0:
-            current += timedelta(days=1)
-            if current.weekday() < 5:
-                remaining -= 1
-        return current
+    def _queue_end_dates(obj):
+        """{queue_id: дата окончания} — старт очереди + сумма сроков этапов в рабочих днях."""
+        queues = [q for q in obj.queues.all() if q.start_date]
+        totals = [sum(sd.deadline_days for sd in q.stage_deadlines.all()) for q in queues]
+        ends = add_business_days_many([q.start_date for q in queues], totals)
+        return {
+            q.id: (end if total else None)
+            for q, total, end in zip(queues, totals, ends)
+        }
 
     def get_queue_periods(self, obj):
         result = []
-        for q in obj.queues.prefetch_related("stage_deadlines").order_by("queue_number"):
+        end_dates = self._queue_end_dates(obj)
+        for q in obj.queues.all():
             if not q.start_date:
                 continue
-            total_days = sum(sd.deadline_days for sd in q.stage_deadlines.all())
-            end_date = self._add_business_days(q.start_date, total_days)
+            end_date = end_dates.get(q.id)
             result.append({
                 "name": q.name or f"Очередь {q.queue_number}",
                 "queue_number": q.queue_number,
@@ -924,20 +1067,19 @@ class CampaignListSerializer(serializers.ModelSerializer):
 
     def get_queue_period_end(self, obj):
         # compute from stage deadlines, not manually set end_date
-        ends = []
-        for q in obj.queues.prefetch_related("stage_deadlines").all():
-            if not q.start_date:
-                continue
-            total_days = sum(sd.deadline_days for sd in q.stage_deadlines.all())
-            end = self._add_business_days(q.start_date, total_days)
-            if end:
-                ends.append(end)
+        ends = [end for end in self._queue_end_dates(obj).values() if end]
         return max(ends).isoformat() if ends else None
 
     def get_programs_count(self, obj):
+        stats = self._stats(obj)
+        if stats:
+            return stats.programs_count
         return obj.campaign_programs.count()
 
     def get_regions_count(self, obj):
+        stats = self._stats(obj)
+        if stats:
+            return stats.regions_count
         return (
             obj.leads
             .annotate(_region=Coalesce("region_id", "organization__region_id"))
@@ -948,13 +1090,19 @@ class CampaignListSerializer(serializers.ModelSerializer):
         )
 
     def get_funnel_names(self, obj):
+        stats = self._stats(obj)
+        if stats:
+            return list(stats.funnel_names or [])
         return list(obj.funnels.values_list("name", flat=True))
 
     def get_demand_summary(self, obj):
+        stats = self._stats(obj)
+        if stats:
+            return stats.demand_summary()
         return campaign_demand_summary_dict(obj)
 
 
-class CampaignDetailSerializer(serializers.ModelSerializer):
+class CampaignDetailSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     status_display = serializers.CharField(
         source="get_status_display", read_only=True
     )
@@ -980,15 +1128,27 @@ class CampaignDetailSerializer(serializers.ModelSerializer):
     organizations = CampaignOrganizationSerializer(many=True, read_only=True)
     leads = LeadListSerializer(many=True, read_only=True)
     subfunnels = CampaignSubfunnelSerializer(many=True, read_only=True)
-    total_demand = serializers.IntegerField(read_only=True)
-    organizations_count = serializers.IntegerField(read_only=True)
-    leads_count = serializers.IntegerField(read_only=True)
+    total_demand = serializers.SerializerMethodField()
+    organizations_count = serializers.SerializerMethodField()
+    leads_count = serializers.SerializerMethodField()
+    regions_count = serializers.SerializerMethodField()
+    campaign_regions_count = serializers.SerializerMethodField()
+    programs_count = serializers.SerializerMethodField()
+    managers = serializers.SerializerMethodField()
     demand_summary = serializers.SerializerMethodField()
     tags = serializers.PrimaryKeyRelatedField(
         many=True, queryset=OrganizationTag.objects.all(), required=False,
     )
     tag_names = serializers.SerializerMethodField()
 
+    # ?expand=<ключ> → поле с полным вложенным списком (по умолчанию — только шапка и счётчики;
+    # сами списки отдают /campaigns/{id}/leads/, /organizations/, /regions/)
+    EXPANDABLE_FIELDS = {
+        "leads": "leads",
+        "organizations": "organizations",
+        "regions": "campaign_regions",
+    }
+
     class Meta:
         model = Campaign
         fields = [
@@ -1006,13 +1166,72 @@ class CampaignDetailSerializer(serializers.ModelSerializer):
             "campaign_programs", "campaign_regions",
             "organizations", "leads", "subfunnels",
             "total_demand", "organizations_count", "leads_count",
+            "regions_count", "campaign_regions_count", "programs_count",
+            "managers",
             "demand_summary",
             "tags", "tag_names",
             "created_at", "updated_at",
         ]
 
+    @classmethod
+    def setup_queryset(cls, queryset, selection=ALL_FIELDS):
+        """Связи и prefetch карточки кампании для выбранных полей и ?expand= списков."""
+        wants = selection.wants
+        related = [
+            name for name, fields in (
+                ("stats", CampaignListSerializer.STATS_FIELDS + ("campaign_regions_count",)),
+                ("federal_operator", ("federal_operator_name", "federal_operator_short_name")),
+                ("project", ("project_name",)),
+                ("acting_organization", ("acting_organization_name",)),
+                ("created_by", ("created_by_name",)),
+                ("responsible", ("responsible_name",)),
+            )
+            if wants(*fields)
+        ]
+        if related:
+            queryset = queryset.select_related(*related)
+        prefetch = [
+            name for name, fields in (
+                ("tags", ("tags", "tag_names")),
+                ("federal_operators", ("federal_operators", "federal_operator_names")),
+                ("queues__stage_deadlines", ("queues",)),
+                ("campaign_funnels__funnel", ("campaign_funnels",)),
+                ("campaign_programs__program__profession", ("campaign_programs", "managers")),
+                ("subfunnels__template", ("subfunnels",)),
+                ("subfunnels__role", ("subfunnels",)),
+                ("subfunnels__default_assignee", ("subfunnels",)),
+            )
+            if wants(*fields)
+        ]
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        expand = {
+            key for key in cls.expanded_keys(selection)
+            if selection.includes(cls.EXPANDABLE_FIELDS[key])
+        }
+        if "regions" in expand:
+            queryset = queryset.prefetch_related(
+                "campaign_regions__region__federal_district",
+                "campaign_regions__queue",
+                "campaign_regions__manager",
+                "campaign_regions__primary_contact_specialist",
+            )
+        if "organizations" in expand:
+            queryset = queryset.prefetch_related(
+                "organizations__organization__region",
+                "organizations__organization__tags",
+                "organizations__manager",
+            )
+        if "leads" in expand:
+            queryset = queryset.prefetch_related(
+                Prefetch("leads", queryset=LeadListSerializer.setup_queryset(Lead.objects.all()))
+            )
+        return queryset
+
+    _stats = staticmethod(campaign_stats_or_none)
+
     def get_tag_names(self, obj):
-        return list(obj.tags.order_by("name").values_list("name", flat=True))
+        return [t.name for t in obj.tags.all()]
 
     def get_federal_operator_short_name(self, obj):
         fo = obj.federal_operator
@@ -1022,7 +1241,7 @@ class CampaignDetailSerializer(serializers.ModelSerializer):
         return s or None
 
     def get_federal_operator_names(self, obj):
-        return list(obj.federal_operators.values_list("name", flat=True))
+        return [o.name for o in obj.federal_operators.all()]
 
     def get_created_by_name(self, obj):
         return str(obj.created_by) if obj.created_by else None
@@ -1030,7 +1249,70 @@ class CampaignDetailSerializer(serializers.ModelSerializer):
     def get_responsible_name(self, obj):
         return str(obj.responsible) if obj.responsible else None
 
+    def get_total_demand(self, obj):
+        stats = self._stats(obj)
+        return stats.demand_plan if stats else obj.total_demand
+
+    def get_organizations_count(self, obj):
+        stats = self._stats(obj)
+        return stats.organizations_count if stats else obj.organizations_count
+
+    def get_leads_count(self, obj):
+        stats = self._stats(obj)
+        return stats.leads_count if stats else obj.leads_count
+
+    def get_regions_count(self, obj):
+        stats = self._stats(obj)
+        if stats:
+            return stats.regions_count
+        return (
+            obj.leads
+            .annotate(_region=Coalesce("region_id", "organization__region_id"))
+            .exclude(_region__isnull=True)
+            .values("_region")
+            .distinct()
+            .count()
+        )
+
+    def get_campaign_regions_count(self, obj):
+        return obj.campaign_regions.count()
+
+    def get_programs_count(self, obj):
+        return len(obj.campaign_programs.all())
+
+    def get_managers(self, obj):
+        """Менеджеры программ, регионов, заказчиков и лидов кампании с числом лидов и программ."""
+        lead_counts = dict(
+            obj.leads.filter(manager__isnull=False)
+            .order_by()
+            .values("manager_id")
+            .annotate(n=Count("id"))
+            .values_list("manager_id", "n")
+        )
+        program_counts = {}
+        for program in obj.campaign_programs.all():
+            if program.manager_id:
+                program_counts[program.manager_id] = program_counts.get(program.manager_id, 0) + 1
+        manager_ids = set(lead_counts) | set(program_counts)
+        for related in (obj.campaign_regions, obj.organizations):
+            manager_ids.update(
+                related.filter(manager__isnull=False).values_list("manager_id", flat=True)
+            )
+        managers = sorted(get_user_model().objects.filter(id__in=manager_ids), key=str)
+        return [
+            {
+                "id": manager.id,
+                "name": str(manager),
+                "leads_count": lead_counts.get(manager.id, 0),
+                "programs_count": program_counts.get(manager.id, 0),
+            }
+            for manager in managers
+        ]
+
     def get_demand_summary(self, obj):
+        stats = self._stats(obj)
+        if stats:
+            return stats.demand_summary()
         return campaign_demand_summary_dict(obj)
 
 
@@ -1348,23 +1630,67 @@ class CampaignCreateSerializer(serializers.ModelSerializer):
             # keep m2m in sync for legacy writes using single federal_operator
             instance.federal_operators.set([instance.federal_operator_id])
 
+        # Коллекции сверяются с текущими строками (nested_sync): неизменённые строки и их id
+        # сохраняются. Очереди — первыми, чтобы регионы и лиды ссылались на актуальные очереди.
+        collections_changed = False
+        deadline_queue_ids = set()
+
         if funnel_ids is not None:
-            instance.campaign_funnels.all().delete()
-            for fid in funnel_ids:
-                CampaignFunnel.objects.create(campaign=instance, funnel_id=fid)
+            _, created, _, stale = sync_rows(
+                instance.campaign_funnels.all(),
+                [CampaignFunnel(campaign=instance, funnel_id=fid) for fid in funnel_ids],
+                ("funnel_id",),
+            )
+            if created or stale:
+                collections_changed = True
+                deadline_queue_ids.update(instance.queues.values_list("id", flat=True))
 
         if program_ids is not None:
-            instance.campaign_programs.all().delete()
-            for pid in program_ids:
-                CampaignProgram.objects.create(campaign=instance, program_id=pid)
+            _, created, _, stale = sync_rows(
+                instance.campaign_programs.all(),
+                [CampaignProgram(campaign=instance, program_id=pid) for pid in program_ids],
+                ("program_id",),
+            )
+            collections_changed = collections_changed or bool(created or stale)
+
+        if queues_data is not None:
+            queue_rows = []
+            deadline_data = {}
+            for q_data in queues_data:
+                stage_deadlines = q_data.pop("stage_deadlines", [])
+                q_data.pop("campaign", None)
+                queue_rows.append(CampaignQueue(campaign=instance, **q_data))
+                deadline_data[q_data["queue_number"]] = stage_deadlines
+            queues_by_key, created, changed, _ = sync_rows(
+                instance.queues.all(),
+                queue_rows,
+                ("queue_number",),
+                ("name", "start_date", "end_date"),
+            )
+            deadline_queue_ids.update(queue.pk for queue in created + changed)
+            _, created, changed, stale = sync_rows(
+                QueueStageDeadline.objects.filter(queue__campaign=instance),
+                [
+                    QueueStageDeadline(
+                        queue=queues_by_key[(queue_number,)],
+                        funnel_stage_id=sd["funnel_stage_id"],
+                        deadline_days=sd["deadline_days"],
+                    )
+                    for queue_number, stage_deadlines in deadline_data.items()
+                    for sd in stage_deadlines
+                ],
+                ("queue_id", "funnel_stage_id"),
+                ("deadline_days",),
+            )
+            deadline_queue_ids.update(row.queue_id for row in created + changed + stale)
 
         if region_data is not None:
-            instance.campaign_regions.all().delete()
             queue_map_for_regions = {q.queue_number: q for q in instance.queues.order_by("queue_number")}
+            region_rows = []
             for rd in region_data:
                 queue_number = rd.get("queue_number")
                 queue = queue_map_for_regions.get(queue_number) if queue_number else None
-                CampaignRegion.objects.create(
+                region_rows.append(CampaignRegion(
                     campaign=instance,
                     region_id=rd["region_id"],
                     queue=queue,
@@ -1372,117 +1698,46 @@ class CampaignCreateSerializer(serializers.ModelSerializer):
                     primary_contact_specialist_id=rd.get("specialist_id"),
                     demand_quota=rd.get("demand_quota") or 0,
                     search_task=rd.get("search_task") or "",
-                )
+                ))
+            sync_rows(
+                instance.campaign_regions.all(),
+                region_rows,
+                ("region_id",),
+                ("queue_id", "manager_id", "primary_contact_specialist_id", "demand_quota", "search_task"),
+            )
 
         if organization_ids is not None:
-            instance.organizations.all().delete()
-            for oid in organization_ids:
-                CampaignOrganization.objects.create(campaign=instance, organization_id=oid)
-
-        if queues_data is not None:
-            instance.queues.all().delete()
-            queue_map = {}
-            for q_data in queues_data:
-                stage_deadlines = q_data.pop("stage_deadlines", [])
-                q_data.pop("campaign", None)
-                queue = CampaignQueue.objects.create(campaign=instance, **q_data)
-                queue_map[queue.queue_number] = queue
-                for sd in stage_deadlines:
-                    QueueStageDeadline.objects.create(
-                        queue=queue,
-                        funnel_stage_id=sd["funnel_stage_id"],
-                        deadline_days=sd["deadline_days"],
-                    )
+            _, created, _, stale = sync_rows(
+                instance.organizations.all(),
+                [CampaignOrganization(campaign=instance, organization_id=oid) for oid in organization_ids],
+                ("organization_id",),
+            )
+            collections_changed = collections_changed or bool(created or stale)
 
         if lead_data is not None:
-            from apps.organizations.models import Organization as OrgModel
             self._split_forecast_across_leads(
                 lead_data,
                 forecast_demand_mode,
                 forecast_total_goal,
                 forecast_queue_goals or {},
             )
-            queue_map = {q.queue_number: q for q in instance.queues.order_by("queue_number")}
-            first_queue = instance.queues.order_by("queue_number").first()
-
-            default_funnel = instance.campaign_funnels.order_by("id").first()
-            default_funnel_id = default_funnel.funnel_id if default_funnel else None
-
-            resolved = []
-            for ld in lead_data:
-                q_num = ld.get("queue_number", 1)
-                queue = queue_map.get(q_num, first_queue)
-                funnel_id = ld.get("funnel_id") or default_funnel_id
-
-                if not funnel_id:
-                    continue
-
-                org_id = ld.get("organization_id")
-                if not org_id:
-                    org_name = ld.get("organization_name", "")
-                    org = OrgModel.objects.filter(name=org_name).first() \
-                        or OrgModel.objects.filter(short_name=org_name).first()
-                    if org:
-                        org_id = org.id
-                    else:
-                        # Temporary generated INN for imported organizations without explicit INN.
-                        generated_inn = str(random.randint(10**11, 10**12 - 1))
-                        while OrgModel.objects.filter(inn=generated_inn).exists():
-                            generated_inn = str(random.randint(10**11, 10**12 - 1))
-                        org = OrgModel.objects.create(
-                            name=org_name,
-                            short_name=org_name[:200],
-                            inn=generated_inn,
-                        )
-                        org_id = org.id
-
-                if not org_id:
-                    continue
-
-                region_id = ld.get("region_id")
-                if region_id is None:
-                    region_id = (
-                        OrgModel.objects.filter(id=org_id)
-                        .values_list("region_id", flat=True)
-                        .first()
-                    )
-
-                resolved.append({
-                    "organization_id": org_id,
-                    "funnel_id": funnel_id,
-                    "region_id": region_id,
-                    "queue": queue,
-                    "manager_id": ld.get("manager_id"),
-                    "specialist_id": ld.get("specialist_id"),
-                    "forecast_demand": ld.get("forecast_demand"),
-                })
-
-            incoming_keys = {
-                (r["organization_id"], r["funnel_id"], r["region_id"])
-                for r in resolved
-            }
-
-            for lead in list(instance.leads.all()):
-                if (lead.organization_id, lead.funnel_id, lead.region_id) not in incoming_keys:
-                    lead.delete()
-
-            for r in resolved:
-                Lead.objects.update_or_create(
-                    campaign=instance,
-                    organization_id=r["organization_id"],
-                    funnel_id=r["funnel_id"],
-                    region_id=r["region_id"],
-                    defaults={
-                        "queue": r["queue"],
-                        "manager_id": r["manager_id"],
-                        "primary_contact_specialist_id": r["specialist_id"],
-                        "forecast_demand": r["forecast_demand"],
-                    },
-                )
+            _, created, changed, stale = sync_rows(
+                instance.leads.all(),
+                self._resolve_lead_rows(instance, lead_data),
+                ("organization_id", "funnel_id", "region_id"),
+                ("queue_id", "manager_id", "primary_contact_specialist_id", "forecast_demand"),
+            )
+            collections_changed = collections_changed or bool(created or changed or stale)
+            # Новые лиды — без стадии, им срок не нужен; у изменённых могла смениться очередь
+            sync_lead_stage_deadlines(Lead.objects.filter(id__in=[lead.pk for lead in changed]))
 
             if instance.status == "active":
                 self._activate_leads(instance)
 
+        if collections_changed:
+            schedule_campaign_stats_refresh(instance.pk)
+        schedule_stage_deadline_rebuild(deadline_queue_ids)
+
         if manager_assignments is not None:
             for assignment in manager_assignments:
                 level = assignment.get("level")
@@ -1521,6 +1776,80 @@ class CampaignCreateSerializer(serializers.ModelSerializer):
 
         return instance
 
+    @staticmethod
+    def _resolve_lead_rows(campaign, lead_data):
+        """
+        Несохранённые лиды из lead_data для sync_rows: очередь по номеру, воронка по умолчанию,
+        организация по id или названию (новая, если не найдена), регион организации.
+        """
+        from apps.organizations.models import Organization as OrgModel
+
+        queue_map = {q.queue_number: q for q in campaign.queues.order_by("queue_number")}
+        first_queue = next(iter(queue_map.values()), None)
+        default_funnel = campaign.campaign_funnels.order_by("id").first()
+        default_funnel_id = default_funnel.funnel_id if default_funnel else None
+
+        names = {
+            ld.get("organization_name", "")
+            for ld in lead_data
+            if not ld.get("organization_id") and (ld.get("funnel_id") or default_funnel_id)
+        }
+        orgs_by_name = {}
+        orgs_by_short_name = {}
+        if names:
+            for org_id, name in OrgModel.objects.filter(name__in=names).order_by("name", "id").values_list("id", "name"):
+                orgs_by_name.setdefault(name, org_id)
+            for org_id, short_name in (
+                OrgModel.objects.filter(short_name__in=names).order_by("name", "id").values_list("id", "short_name")
+            ):
+                orgs_by_short_name.setdefault(short_name, org_id)
+
+        resolved = []
+        for ld in lead_data:
+            q_num = ld.get("queue_number", 1)
+            queue = queue_map.get(q_num, first_queue)
+            funnel_id = ld.get("funnel_id") or default_funnel_id
+
+            if not funnel_id:
+                continue
+
+            org_id = ld.get("organization_id")
+            if not org_id:
+                org_name = ld.get("organization_name", "")
+                org_id = orgs_by_name.get(org_name) or orgs_by_short_name.get(org_name)
+                if not org_id:
+                    # Temporary generated INN for imported organizations without explicit INN.
+                    generated_inn = str(random.randint(10**11, 10**12 - 1))
+                    while OrgModel.objects.filter(inn=generated_inn).exists():
+                        generated_inn = str(random.randint(10**11, 10**12 - 1))
+                    org = OrgModel.objects.create(
+                        name=org_name,
+                        short_name=org_name[:200],
+                        inn=generated_inn,
+                    )
+                    org_id = orgs_by_name[org_name] = org.id
+
+            resolved.append((ld, org_id, funnel_id, queue))
+
+        missing_region_org_ids = {org_id for ld, org_id, _, _ in resolved if ld.get("region_id") is None}
+        org_regions = dict(
+            OrgModel.objects.filter(id__in=missing_region_org_ids).values_list("id", "region_id")
+        ) if missing_region_org_ids else {}
+
+        return [
+            Lead(
+                campaign=campaign,
+                organization_id=org_id,
+                funnel_id=funnel_id,
+                region_id=ld["region_id"] if ld.get("region_id") is not None else org_regions.get(org_id),
+                queue=queue,
+                manager_id=ld.get("manager_id"),
+                primary_contact_specialist_id=ld.get("specialist_id"),
+                forecast_demand=ld.get("forecast_demand"),
+            )
+            for ld, org_id, funnel_id, queue in resolved
+        ]
+
     @staticmethod
     def _upsert_campaign_subfunnels(campaign, rows):
         if rows is None:
@@ -1615,90 +1944,12 @@ class CampaignCreateSerializer(serializers.ModelSerializer):
 
     @staticmethod
     def _activate_leads(campaign):
-        """Set first non-rejection stage + create checklist values for all leads."""
-        from .collect_tasks import get_entry_funnel_stage_for_lead
-
-        for lead in campaign.leads.filter(current_stage__isnull=True).select_related("funnel"):
-            first_stage = get_entry_funnel_stage_for_lead(lead.funnel)
-            if first_stage:
-                lead.current_stage = first_stage
-                if first_stage.primary_contact_specialist_id and not lead.primary_contact_specialist_id:
-                    lead.primary_contact_specialist_id = first_stage.primary_contact_specialist_id
-                lead.save(
-                    update_fields=[
-                        "current_stage",
-                        "primary_contact_specialist",
-                        "updated_at",
-                    ]
-                )
-                for item in first_stage.checklist_items.all():
-                    LeadChecklistValue.objects.get_or_create(
-                        lead=lead,
-                        checklist_item=item,
-                        defaults={
-                            "primary_contact_specialist_id": (
-                                item.primary_contact_specialist_id
-                                or lead.primary_contact_specialist_id
-                            )
-                        },
-                    )
-            CampaignCreateSerializer._materialize_lead_subfunnels(lead)
+        """Лиды без стадии — на входную стадию воронки, с чек-листом стадии и задачами подворонок."""
+        return activate_campaign_leads(campaign)
 
     @staticmethod
     def _materialize_lead_subfunnels(lead, source: str = ""):
-        subfunnels = lead.campaign.subfunnels.filter(is_active=True)
-        if source == "collect_import":
-            subfunnels = subfunnels.filter(template__auto_create_on_collect_import=True)
-        subfunnels = subfunnels.select_related(
-            "template",
-            "binding",
-            "default_assignee",
-        ).prefetch_related("template__items")
-        for sub in subfunnels:
-            stages = list(CampaignCreateSerializer._ensure_default_template_stages(sub.template))
-            default_stage = stages[0] if stages else None
-            defaults = {
-                "assignee_id": sub.default_assignee_id,
-                "current_template_stage_id": default_stage.id if default_stage else None,
-                "status": LeadSubfunnel.Status.BACKLOG,
-                "is_available": True,
-            }
-            if sub.binding and sub.binding.binding_type == "stage_range_checklist":
-                defaults["is_available"] = bool(
-                    lead.current_stage_id
-                    and sub.binding.from_stage_id
-                    and sub.binding.to_stage_id
-                    and sub.binding.from_stage.order <= lead.current_stage.order <= sub.binding.to_stage.order
-                )
-            lead_sub, _ = LeadSubfunnel.objects.get_or_create(
-                campaign_subfunnel=sub,
-                lead=lead,
-                defaults=defaults,
-            )
-            if not lead_sub.current_template_stage_id and default_stage:
-                lead_sub.current_template_stage_id = default_stage.id
-                lead_sub.status = LeadSubfunnel.normalize_status(lead_sub.status)
-                lead_sub.save(update_fields=["current_template_stage", "status", "updated_at"])
-            for item in sub.template.items.all():
-                LeadSubfunnelChecklistValue.objects.get_or_create(
-                    lead_subfunnel=lead_sub,
-                    template_item=item,
-                    defaults={"assignee_id": item.default_specialist_id or lead_sub.assignee_id},
-                )
-
-    @staticmethod
-    def _ensure_default_template_stages(template):
-        qs = template.stages.order_by("order", "id")
-        if qs.exists():
-            return qs
-        TaskTemplateStage.objects.bulk_create(
-            [
-                TaskTemplateStage(template=template, name="К выполнению", order=0, is_terminal=False),
-                TaskTemplateStage(template=template, name="В работе", order=1, is_terminal=False),
-                TaskTemplateStage(template=template, name="Готово", order=2, is_terminal=True),
-            ]
-        )
-        return template.stages.order_by("order", "id")
+        return materialize_lead_subfunnels(lead.campaign, Lead.objects.filter(pk=lead.pk), source=source)
 
     @staticmethod
     def _stage_for_legacy_status(stages, legacy_status):
@@ -0,0 +1,90 @@
+"""
+Выборочные поля ответа: ?fields=id,name — только перечисленные поля, ?omit=tasks_summary —
+все, кроме перечисленных, ?expand=leads — поля, которые отдаются только по запросу
+(EXPANDABLE_FIELDS сериализатора; ?expand=all — все такие поля).
+
+Неотданные поля удаляются из сериализатора, поэтому их SerializerMethodField не вычисляются.
+Сериализаторы со своим setup_queryset(queryset, selection) подключают к queryset только те
+select_related / prefetch / аннотации, которые нужны выбранным полям.
+"""
+
+from rest_framework.permissions import SAFE_METHODS
+
+
+def _parse_names(raw):
+    return {part.strip() for part in str(raw or "").split(",") if part.strip()}
+
+
+class FieldSelection:
+    """Разобранные ?fields= / ?omit= / ?expand=; fields=None — все поля."""
+
+    def __init__(self, fields=None, omit=(), expand=()):
+        self.fields = frozenset(fields) if fields is not None else None
+        self.omit = frozenset(omit)
+        self.expand = frozenset(expand)
+
+    @classmethod
+    def from_query_params(cls, params):
+        return cls(
+            fields=_parse_names(params.get("fields")) or None,
+            omit=_parse_names(params.get("omit")),
+            expand={name.lower() for name in _parse_names(params.get("expand"))},
+        )
+
+    def includes(self, name):
+        return (self.fields is None or name in self.fields) and name not in self.omit
+
+    def wants(self, *names):
+        """Нужно ли хотя бы одно из полей (для решения, что подгружать в queryset)."""
+        return any(self.includes(name) for name in names)
+
+
+ALL_FIELDS = FieldSelection()
+
+
+class SparseFieldsMixin:
+    """
+    Сериализатор с выборкой полей: field_selection=FieldSelection(...) в конструкторе.
+    Без него отдаются все поля, кроме EXPANDABLE_FIELDS.
+    """
+    ALWAYS_INCLUDED = ("id",)
+    # ключ ?expand= → имя поля, которое отдаётся только по запросу
+    EXPANDABLE_FIELDS = {}
+    EXPAND_ALL = "all"
+
+    def __init__(self, *args, field_selection=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.field_selection = field_selection or ALL_FIELDS
+        expand = self.expanded_keys(self.field_selection)
+        for key, field_name in self.EXPANDABLE_FIELDS.items():
+            if key not in expand:
+                self.fields.pop(field_name, None)
+        for name in list(self.fields):
+            if name not in self.ALWAYS_INCLUDED and not self.field_selection.includes(name):
+                self.fields.pop(name)
+
+    @classmethod
+    def expanded_keys(cls, selection):
+        """Ключи EXPANDABLE_FIELDS, запрошенные через ?expand=."""
+        if cls.EXPAND_ALL in selection.expand:
+            return set(cls.EXPANDABLE_FIELDS)
+        return set(selection.expand) & set(cls.EXPANDABLE_FIELDS)
+
+
+class SparseFieldsViewMixin:
+    """
+    Передаёт выборку из ?fields= / ?omit= / ?expand= сериализатору ответа на GET.
+    На запись выборка не применяется — сериализатор принимает и отдаёт все поля.
+    """
+
+    def get_field_selection(self):
+        if self.request is None or self.request.method not in SAFE_METHODS:
+            return ALL_FIELDS
+        if not hasattr(self, "_field_selection"):
+            self._field_selection = FieldSelection.from_query_params(self.request.query_params)
+        return self._field_selection
+
+    def get_serializer(self, *args, **kwargs):
+        if issubclass(self.get_serializer_class(), SparseFieldsMixin):
+            kwargs.setdefault("field_selection", self.get_field_selection())
+        return super().get_serializer(*args, **kwargs)
@@ -0,0 +1,72 @@
+"""
+Значения чек-листа текущей стадии лида (LeadChecklistValue) создаются один раз — при смене
+стадии (сигнал в models.py) или появлении пункта на стадии — одним bulk_create с
+ignore_conflicts: уже существующие пары (лид, пункт) не трогаются. Чтение лида ничего не пишет.
+
+Пакетные операции, минующие сигналы (queryset.update стадии, bulk_create лидов),
+вызывают materialize_stage_checklists сами; для старых данных — команда
+materialize_stage_checklists.
+"""
+
+from apps.funnels.models import StageChecklistItem
+
+from .models import LeadChecklistValue
+
+MATERIALIZE_CHUNK_SIZE = 1000
+
+
+def _items_by_stage(stage_ids):
+    items = {}
+    for item in StageChecklistItem.objects.filter(stage_id__in=stage_ids).values(
+        "id", "stage_id", "primary_contact_specialist_id"
+    ):
+        items.setdefault(item["stage_id"], []).append(item)
+    return items
+
+
+def _create_values(rows, items):
+    """rows — (lead_id, current_stage_id, primary_contact_specialist_id)."""
+    values = [
+        LeadChecklistValue(
+            lead_id=lead_id,
+            checklist_item_id=item["id"],
+            primary_contact_specialist_id=item["primary_contact_specialist_id"] or specialist_id,
+        )
+        for lead_id, stage_id, specialist_id in rows
+        for item in items.get(stage_id, ())
+    ]
+    if values:
+        LeadChecklistValue.objects.bulk_create(
+            values, ignore_conflicts=True, batch_size=MATERIALIZE_CHUNK_SIZE
+        )
+    return len(values)
+
+
+def materialize_stage_checklist(lead):
+    """Недостающие значения чек-листа текущей стадии одного лида."""
+    if not lead.current_stage_id:
+        return 0
+    return _create_values(
+        [(lead.pk, lead.current_stage_id, lead.primary_contact_specialist_id)],
+        _items_by_stage([lead.current_stage_id]),
+    )
+
+
+def materialize_stage_checklists(leads):
+    """
+    То же для queryset лидов — пачками по MATERIALIZE_CHUNK_SIZE.
+    Возвращает число пар (лид, пункт), отправленных в bulk_create (включая существующие).
+    """
+    rows = leads.filter(current_stage__isnull=False).order_by("pk").values_list(
+        "pk", "current_stage_id", "primary_contact_specialist_id"
+    )
+    total = 0
+    chunk = []
+    for row in rows.iterator(chunk_size=MATERIALIZE_CHUNK_SIZE):
+        chunk.append(row)
+        if len(chunk) == MATERIALIZE_CHUNK_SIZE:
+            total += _create_values(chunk, _items_by_stage({r[1] for r in chunk}))
+            chunk = []
+    if chunk:
+        total += _create_values(chunk, _items_by_stage({r[1] for r in chunk}))
+    return total
@@ -0,0 +1,169 @@
+"""Даты дедлайнов стадий по очередям (QueueStageDeadlineDate) и их копия в Lead.current_stage_deadline."""
+
+import threading
+
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+
+from apps.funnels.models import FunnelStage
+from apps.reference.business_calendar import add_business_days_many
+
+from .models import (
+    CampaignFunnel,
+    CampaignQueue,
+    Lead,
+    QueueStageDeadline,
+    QueueStageDeadlineDate,
+)
+
+REBUILD_CHUNK_SIZE = 1000
+
+_pending = threading.local()
+
+
+def _pending_state():
+    state = getattr(_pending, "state", None)
+    if state is None:
+        state = _pending.state = {"all": False, "queue_ids": set()}
+    return state
+
+
+def _current_stage_deadline_subquery():
+    return Subquery(
+        QueueStageDeadlineDate.objects.filter(
+            queue_id=OuterRef("queue_id"),
+            funnel_stage_id=OuterRef("current_stage_id"),
+        ).values("deadline_date")[:1]
+    )
+
+
+def sync_lead_stage_deadlines(leads):
+    """Один UPDATE: Lead.current_stage_deadline из таблицы дедлайнов для переданного queryset лидов."""
+    return leads.update(current_stage_deadline=_current_stage_deadline_subquery())
+
+
+def sync_lead_stage_deadline(lead):
+    """Обновить current_stage_deadline одного лида (после смены очереди или стадии)."""
+    deadline = None
+    if lead.queue_id and lead.current_stage_id:
+        deadline = (
+            QueueStageDeadlineDate.objects.filter(
+                queue_id=lead.queue_id, funnel_stage_id=lead.current_stage_id
+            )
+            .values_list("deadline_date", flat=True)
+            .first()
+        )
+    if deadline != lead.current_stage_deadline:
+        Lead.objects.filter(pk=lead.pk).update(current_stage_deadline=deadline)
+        lead.current_stage_deadline = deadline
+
+
+def _build_rows(queues):
+    campaign_ids = {q["campaign_id"] for q in queues}
+    funnels_by_campaign = {}
+    for campaign_id, funnel_id in CampaignFunnel.objects.filter(
+        campaign_id__in=campaign_ids
+    ).values_list("campaign_id", "funnel_id"):
+        funnels_by_campaign.setdefault(campaign_id, set()).add(funnel_id)
+    # Лиды могут быть в воронке, не привязанной к кампании
+    for campaign_id, funnel_id in (
+        Lead.objects.filter(campaign_id__in=campaign_ids)
+        .order_by()
+        .values_list("campaign_id", "funnel_id")
+        .distinct()
+    ):
+        funnels_by_campaign.setdefault(campaign_id, set()).add(funnel_id)
+
+    funnel_ids = set().union(*funnels_by_campaign.values()) if funnels_by_campaign else set()
+    stages_by_funnel = {}
+    for stage_id, funnel_id, days in FunnelStage.objects.filter(
+        funnel_id__in=funnel_ids
+    ).values_list("id", "funnel_id", "deadline_days"):
+        stages_by_funnel.setdefault(funnel_id, {})[stage_id] = days
+
+    overrides = {}
+    for queue_id, stage_id, days in QueueStageDeadline.objects.filter(
+        queue_id__in=[q["id"] for q in queues]
+    ).values_list("queue_id", "funnel_stage_id", "deadline_days"):
+        overrides.setdefault(queue_id, {})[stage_id] = days
+
+    pairs, starts, days_list = [], [], []
+    for q in queues:
+        if not q["start_date"]:
+            continue
+        stage_days = {}
+        for funnel_id in funnels_by_campaign.get(q["campaign_id"], ()):
+            stage_days.update(stages_by_funnel.get(funnel_id, {}))
+        stage_days.update(overrides.get(q["id"], {}))
+        for stage_id, days in stage_days.items():
+            if not days:
+                continue
+            pairs.append((q["id"], stage_id))
+            starts.append(q["start_date"])
+            days_list.append(days)
+
+    return [
+        QueueStageDeadlineDate(queue_id=queue_id, funnel_stage_id=stage_id, deadline_date=deadline)
+        for (queue_id, stage_id), deadline in zip(pairs, add_business_days_many(starts, days_list))
+    ]
+
+
+def rebuild_stage_deadline_dates(queue_ids=None):
+    """
+    Пересобрать даты дедлайнов для очередей (None — для всех) и обновить
+    Lead.current_stage_deadline у их лидов. Возвращает число строк таблицы.
+    """
+    queues = CampaignQueue.objects.order_by("id")
+    if queue_ids is not None:
+        queues = queues.filter(id__in=list(queue_ids))
+    queues = list(queues.values("id", "campaign_id", "start_date"))
+    ids = [q["id"] for q in queues]
+    rows = _build_rows(queues) if queues else []
+    with transaction.atomic():
+        stale = QueueStageDeadlineDate.objects.all()
+        if queue_ids is not None:
+            stale = stale.filter(queue_id__in=ids)
+        stale.delete()
+        QueueStageDeadlineDate.objects.bulk_create(rows, batch_size=REBUILD_CHUNK_SIZE)
+        leads = Lead.objects.all() if queue_ids is None else Lead.objects.filter(queue_id__in=ids)
+        sync_lead_stage_deadlines(leads)
+    return len(rows)
+
+
+def _flush_pending_stage_deadlines():
+    state = _pending_state()
+    if not state["all"] and not state["queue_ids"]:
+        return
+    queue_ids = None if state["all"] else list(state["queue_ids"])
+    state["all"] = False
+    state["queue_ids"].clear()
+    rebuild_stage_deadline_dates(queue_ids)
+
+
+def schedule_stage_deadline_rebuild(queue_ids=None):
+    """
+    Отметить очереди (None — все) для пересборки дедлайнов после коммита транзакции.
+    Несколько изменений в одной транзакции дают одну пересборку.
+    """
+    state = _pending_state()
+    if queue_ids is None:
+        state["all"] = True
+    else:
+        queue_ids = {qid for qid in queue_ids if qid}
+        if not queue_ids:
+            return
+        state["queue_ids"].update(queue_ids)
+    transaction.on_commit(_flush_pending_stage_deadlines)
+
+
+def queue_ids_for_funnel(funnel_id):
+    """Очереди кампаний, где используется воронка (привязка к кампании или лиды)."""
+    campaign_ids = set(
+        CampaignFunnel.objects.filter(funnel_id=funnel_id).values_list("campaign_id", flat=True)
+    )
+    campaign_ids.update(
+        Lead.objects.filter(funnel_id=funnel_id).order_by().values_list("campaign_id", flat=True).distinct()
+    )
+    return list(
+        CampaignQueue.objects.filter(campaign_id__in=campaign_ids).values_list("id", flat=True)
+    )
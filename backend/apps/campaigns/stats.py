@@ -0,0 +1,157 @@
+"""
+Сводка кампании (CampaignStats): пересчёт агрегатов по лидам, организациям, программам и воронкам.
+
+Сводка не ведётся приращениями: при изменении данных кампании все её показатели считаются
+заново несколькими GROUP BY по этой кампании — один раз после коммита транзакции
+(schedule_campaign_stats_refresh). Число регионов лидов — COUNT(DISTINCT), его нельзя
+поддерживать сложением и вычитанием без отдельного счётчика по регионам.
+"""
+
+import threading
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce
+from django.db.utils import OperationalError, ProgrammingError
+
+from .models import (
+    Campaign,
+    CampaignFunnel,
+    CampaignOrganization,
+    CampaignProgram,
+    CampaignStats,
+    Lead,
+)
+
+REFRESH_CHUNK_SIZE = 500
+
+_STATS_UPDATE_FIELDS = [
+    "demand_plan",
+    "demand_declared_collected",
+    "demand_declared_quota",
+    "demand_list_collected",
+    "demand_list_quota",
+    "leads_count",
+    "organizations_count",
+    "regions_count",
+    "programs_count",
+    "funnel_names",
+    "updated_at",
+]
+
+_pending = threading.local()
+
+
+def _pending_ids():
+    ids = getattr(_pending, "ids", None)
+    if ids is None:
+        ids = _pending.ids = set()
+    return ids
+
+
+def _chunks(values, size):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _build_stats_rows(campaign_ids):
+    rows = {cid: CampaignStats(campaign_id=cid, funnel_names=[]) for cid in campaign_ids}
+
+    lead_totals = (
+        Lead.objects.filter(campaign_id__in=campaign_ids)
+        .order_by()
+        .values("campaign_id")
+        .annotate(
+            plan=Sum("forecast_demand"),
+            cd=Sum("demand_collected_declared"),
+            qd=Sum("demand_quota_declared"),
+            cl=Sum("demand_collected_list"),
+            ql=Sum("demand_quota_list"),
+            leads=Count("id"),
+        )
+    )
+    for it in lead_totals:
+        row = rows[it["campaign_id"]]
+        row.demand_plan = int(it["plan"] or 0)
+        row.demand_declared_collected = int(it["cd"] or 0)
+        row.demand_declared_quota = int(it["qd"] or 0)
+        row.demand_list_collected = int(it["cl"] or 0)
+        row.demand_list_quota = int(it["ql"] or 0)
+        row.leads_count = it["leads"]
+
+    region_counts = (
+        Lead.objects.filter(campaign_id__in=campaign_ids)
+        .annotate(_region=Coalesce("region_id", "organization__region_id"))
+        .exclude(_region__isnull=True)
+        .order_by()
+        .values("campaign_id")
+        .annotate(n=Count("_region", distinct=True))
+    )
+    for it in region_counts:
+        rows[it["campaign_id"]].regions_count = it["n"]
+
+    for model, attr in (
+        (CampaignOrganization, "organizations_count"),
+        (CampaignProgram, "programs_count"),
+    ):
+        counts = (
+            model.objects.filter(campaign_id__in=campaign_ids)
+            .order_by()
+            .values("campaign_id")
+            .annotate(n=Count("id"))
+        )
+        for it in counts:
+            setattr(rows[it["campaign_id"]], attr, it["n"])
+
+    funnel_rows = (
+        CampaignFunnel.objects.filter(campaign_id__in=campaign_ids)
+        .order_by("funnel__name", "funnel_id")
+        .values_list("campaign_id", "funnel__name")
+    )
+    for cid, name in funnel_rows:
+        rows[cid].funnel_names.append(name)
+
+    return list(rows.values())
+
+
+def refresh_campaign_stats(campaign_ids=None):
+    """Пересчитать сводку для указанных кампаний (None — для всех). Возвращает число строк."""
+    campaigns = Campaign.objects.order_by("id")
+    if campaign_ids is not None:
+        campaigns = campaigns.filter(id__in=list(campaign_ids))
+    existing_ids = list(campaigns.values_list("id", flat=True))
+    refreshed = 0
+    for chunk in _chunks(existing_ids, REFRESH_CHUNK_SIZE):
+        stats_rows = _build_stats_rows(chunk)
+        CampaignStats.objects.bulk_create(
+            stats_rows,
+            update_conflicts=True,
+            unique_fields=["campaign"],
+            update_fields=_STATS_UPDATE_FIELDS,
+        )
+        refreshed += len(stats_rows)
+    return refreshed
+
+
+def _flush_pending_campaign_stats():
+    ids = _pending_ids()
+    if not ids:
+        return
+    campaign_ids = list(ids)
+    ids.clear()
+    try:
+        refresh_campaign_stats(campaign_ids)
+    except (OperationalError, ProgrammingError):
+        # Таблица сводки ещё не создана (миграции не применены) — не блокируем основное действие
+        pass
+
+
+def schedule_campaign_stats_refresh(campaign_id):
+    """
+    Отметить кампанию для пересчёта сводки после коммита текущей транзакции.
+    Несколько изменений в одной транзакции дают один пересчёт на кампанию.
+    """
+    if not campaign_id:
+        return
+    _pending_ids().add(campaign_id)
+    transaction.on_commit(_flush_pending_campaign_stats)
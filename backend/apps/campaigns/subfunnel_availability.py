@@ -0,0 +1,35 @@
+"""
+Доступность задач подворонок лида (LeadSubfunnel.is_available) по текущей стадии лида:
+задача с привязкой «к диапазону стадий» доступна, пока стадия лида внутри диапазона,
+остальные — всегда. Пересчёт для любого набора задач — двумя UPDATE.
+"""
+
+from django.db.models import F, Q
+from django.utils import timezone
+
+from apps.funnels.models import SubfunnelTemplateBinding
+
+
+def _available_q():
+    binding = "campaign_subfunnel__binding__"
+    return ~Q(**{f"{binding}binding_type": SubfunnelTemplateBinding.BindingType.STAGE_RANGE_CHECKLIST}) | Q(
+        **{
+            f"{binding}from_stage__isnull": False,
+            f"{binding}to_stage__isnull": False,
+            f"{binding}from_stage__order__lte": F("lead__current_stage__order"),
+            f"{binding}to_stage__order__gte": F("lead__current_stage__order"),
+        }
+    )
+
+
+def refresh_subfunnel_availability(subfunnels):
+    """
+    Пересчитать is_available для queryset задач (учитываются только задачи лидов со стадией).
+    Возвращает число изменённых задач.
+    """
+    subfunnels = subfunnels.filter(lead__current_stage__isnull=False)
+    now = timezone.now()
+    available = _available_q()
+    opened = subfunnels.filter(available, is_available=False).update(is_available=True, updated_at=now)
+    closed = subfunnels.filter(is_available=True).exclude(available).update(is_available=False, updated_at=now)
+    return opened + closed
@@ -0,0 +1,21 @@
+"""
+Сравнение set-based реализаций с прежними построчными (legacy_*.py): оба варианта выполняются
+на одних и тех же данных, каждый — в откатываемой транзакции, сравниваются снимки состояния.
+"""
+
+from django.db import transaction
+
+
+class _Rollback(Exception):
+    pass
+
+
+def state_after(action, snapshot):
+    """Выполнить action(), вернуть (результат action, snapshot()) и откатить все изменения."""
+    try:
+        with transaction.atomic():
+            result = action()
+            state = snapshot()
+            raise _Rollback
+    except _Rollback:
+        return result, state
@@ -0,0 +1,48 @@
+"""Общие данные для тестов кампаний: регионы, воронка со стадиями, кампания с лидами."""
+
+from django.contrib.auth import get_user_model
+
+from apps.campaigns.models import Campaign, CampaignFunnel, CampaignOrganization, CampaignQueue, Lead
+from apps.funnels.models import Funnel, FunnelStage
+from apps.organizations.models import Organization
+from apps.reference.models import FederalDistrict, Region
+
+
+def make_admin(username="admin"):
+    User = get_user_model()
+    return User.objects.create_user(username=username, password="x", role=User.Role.ADMIN)
+
+
+def make_regions(count=3):
+    district = FederalDistrict.objects.create(name="Центральный", code="CFD")
+    return [Region.objects.create(name=f"Регион {i}", federal_district=district) for i in range(count)]
+
+
+def make_funnel(name="Воронка", stages=3):
+    funnel = Funnel.objects.create(name=name)
+    return funnel, [
+        FunnelStage.objects.create(funnel=funnel, name=f"{name}: стадия {i}", order=i)
+        for i in range(1, stages + 1)
+    ]
+
+
+def make_campaign(name="Кампания", *, funnel, stage, regions, leads=3, manager=None):
+    """Кампания с очередью и leads лидами (по одной организации на лид)."""
+    campaign = Campaign.objects.create(name=name)
+    CampaignFunnel.objects.create(campaign=campaign, funnel=funnel)
+    queue = CampaignQueue.objects.create(campaign=campaign, queue_number=1, name="Очередь 1")
+    for i in range(leads):
+        organization = Organization.objects.create(
+            name=f"{name}: организация {i}", region=regions[i % len(regions)]
+        )
+        CampaignOrganization.objects.create(campaign=campaign, organization=organization)
+        Lead.objects.create(
+            campaign=campaign,
+            organization=organization,
+            funnel=funnel,
+            queue=queue,
+            current_stage=stage,
+            manager=manager,
+            forecast_demand=i + 1,
+        )
+    return campaign, queue
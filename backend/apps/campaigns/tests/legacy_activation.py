@@ -0,0 +1,82 @@
+"""
+Прежняя активация лидов (CampaignCreateSerializer._activate_leads и
+_materialize_lead_subfunnels до lead_activation.py) — эталон для test_lead_activation:
+save() каждого лида с сигналами стадии и get_or_create задач и значений чек-листа по одной строке.
+"""
+
+from apps.campaigns.collect_tasks import get_entry_funnel_stage_for_lead
+from apps.campaigns.models import LeadSubfunnel, LeadSubfunnelChecklistValue
+from apps.funnels.models import TaskTemplateStage
+
+
+def _legacy_ensure_default_template_stages(template):
+    qs = template.stages.order_by("order", "id")
+    if qs.exists():
+        return qs
+    TaskTemplateStage.objects.bulk_create(
+        [
+            TaskTemplateStage(template=template, name="К выполнению", order=0, is_terminal=False),
+            TaskTemplateStage(template=template, name="В работе", order=1, is_terminal=False),
+            TaskTemplateStage(template=template, name="Готово", order=2, is_terminal=True),
+        ]
+    )
+    return template.stages.order_by("order", "id")
+
+
+def legacy_materialize_lead_subfunnels(lead, source=""):
+    subfunnels = lead.campaign.subfunnels.filter(is_active=True)
+    if source == "collect_import":
+        subfunnels = subfunnels.filter(template__auto_create_on_collect_import=True)
+    subfunnels = subfunnels.select_related(
+        "template",
+        "binding",
+        "default_assignee",
+    ).prefetch_related("template__items")
+    for sub in subfunnels:
+        stages = list(_legacy_ensure_default_template_stages(sub.template))
+        default_stage = stages[0] if stages else None
+        defaults = {
+            "assignee_id": sub.default_assignee_id,
+            "current_template_stage_id": default_stage.id if default_stage else None,
+            "status": LeadSubfunnel.Status.BACKLOG,
+            "is_available": True,
+        }
+        if sub.binding and sub.binding.binding_type == "stage_range_checklist":
+            defaults["is_available"] = bool(
+                lead.current_stage_id
+                and sub.binding.from_stage_id
+                and sub.binding.to_stage_id
+                and sub.binding.from_stage.order <= lead.current_stage.order <= sub.binding.to_stage.order
+            )
+        lead_sub, _ = LeadSubfunnel.objects.get_or_create(
+            campaign_subfunnel=sub,
+            lead=lead,
+            defaults=defaults,
+        )
+        if not lead_sub.current_template_stage_id and default_stage:
+            lead_sub.current_template_stage_id = default_stage.id
+            lead_sub.status = LeadSubfunnel.normalize_status(lead_sub.status)
+            lead_sub.save(update_fields=["current_template_stage", "status", "updated_at"])
+        for item in sub.template.items.all():
+            LeadSubfunnelChecklistValue.objects.get_or_create(
+                lead_subfunnel=lead_sub,
+                template_item=item,
+                defaults={"assignee_id": item.default_specialist_id or lead_sub.assignee_id},
+            )
+
+
+def legacy_activate_leads(campaign):
+    for lead in campaign.leads.filter(current_stage__isnull=True).select_related("funnel"):
+        first_stage = get_entry_funnel_stage_for_lead(lead.funnel)
+        if first_stage:
+            lead.current_stage = first_stage
+            if first_stage.primary_contact_specialist_id and not lead.primary_contact_specialist_id:
+                lead.primary_contact_specialist_id = first_stage.primary_contact_specialist_id
+            lead.save(
+                update_fields=[
+                    "current_stage",
+                    "primary_contact_specialist",
+                    "updated_at",
+                ]
+            )
+        legacy_materialize_lead_subfunnels(lead)
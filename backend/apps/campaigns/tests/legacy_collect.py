@@ -0,0 +1,199 @@
+"""
+Прежние построчные реализации кампании сбора — эталоны для test_collect_link и
+test_collect_tasks: привязка организаций (_link_orgs_to_collect_campaign, get_or_create и
+save() лида на каждую организацию) и синхронизация задач регионов (_sync_region_tasks).
+"""
+
+from collections import defaultdict
+
+from apps.campaigns.collect_tasks import _is_collect_stage_subfunnel, get_entry_funnel_stage_for_lead
+from apps.campaigns.models import CampaignOrganization, Lead, LeadSubfunnel
+from apps.funnels.models import TaskTemplateStage
+from apps.organizations.models import Contact, Organization
+
+from .legacy_activation import legacy_materialize_lead_subfunnels
+
+
+def legacy_link_orgs_to_collect_campaign(
+    campaign,
+    organization_ids,
+    errors,
+    campaign_region_id=None,
+    organization_contact_map=None,
+    source_lead_id=None,
+    source_transfer_comment="",
+):
+    campaign_regions_qs = campaign.campaign_regions.select_related("queue", "region")
+    if campaign_region_id:
+        campaign_regions_qs = campaign_regions_qs.filter(id=campaign_region_id)
+        if not campaign_regions_qs.exists():
+            errors.append("Выбранный регион задачи не принадлежит кампании.")
+            return {"leads_created": 0, "leads_by_region": {}, "linked_ids": []}
+    campaign_regions = {cr.region_id: cr for cr in campaign_regions_qs}
+
+    funnel_link = campaign.campaign_funnels.select_related("funnel").first()
+    if not funnel_link:
+        errors.append("У кампании не выбрана воронка.")
+        return {"leads_created": 0, "leads_by_region": {}, "linked_ids": []}
+
+    funnel = funnel_link.funnel
+    entry_stage = get_entry_funnel_stage_for_lead(funnel)
+    first_queue = campaign.queues.order_by("queue_number").first()
+    leads_created = 0
+    skipped_wrong_region = 0
+    leads_by_region = defaultdict(int)
+    linked_ids = set()
+    source_org_name = None
+    source_lead_defaults = None
+    source_transfer_comment = (source_transfer_comment or "").strip()
+    if source_lead_id:
+        source_lead = (
+            Lead.objects.select_related("organization", "queue")
+            .filter(id=source_lead_id, campaign=campaign)
+            .only(
+                "id",
+                "organization__name",
+                "queue_id",
+                "manager_id",
+                "primary_contact_specialist_id",
+            )
+            .first()
+        )
+        if source_lead and source_lead.organization_id and source_lead.organization:
+            source_org_name = source_lead.organization.name
+            source_lead_defaults = source_lead
+        else:
+            errors.append("Лид-источник для передачи не найден в этой кампании.")
+
+    for org_id in organization_ids:
+        try:
+            org = Organization.objects.get(id=org_id)
+        except Organization.DoesNotExist:
+            continue
+        if campaign_regions and org.region_id not in campaign_regions:
+            skipped_wrong_region += 1
+            continue
+        cr = campaign_regions.get(org.region_id)
+        queue = (cr.queue if cr else None) or (source_lead_defaults.queue if source_lead_defaults else None) or first_queue
+        lead, created = Lead.objects.get_or_create(
+            campaign=campaign,
+            organization_id=org.id,
+            funnel_id=funnel.id,
+            region_id=org.region_id,
+            defaults={
+                "queue": queue,
+                "manager_id": (cr.manager_id if cr else None) or (source_lead_defaults.manager_id if source_lead_defaults else None),
+                "primary_contact_specialist_id": (
+                    (cr.primary_contact_specialist_id if cr else None)
+                    or (source_lead_defaults.primary_contact_specialist_id if source_lead_defaults else None)
+                ),
+            },
+        )
+        update_fields = []
+        if entry_stage and lead.current_stage_id != entry_stage.id:
+            lead.current_stage = entry_stage
+            update_fields.append("current_stage")
+        if (
+            entry_stage
+            and entry_stage.primary_contact_specialist_id
+            and not lead.primary_contact_specialist_id
+        ):
+            lead.primary_contact_specialist_id = entry_stage.primary_contact_specialist_id
+            update_fields.append("primary_contact_specialist")
+        if update_fields:
+            lead.save(update_fields=update_fields + ["updated_at"])
+        selected_contact_id = None
+        if organization_contact_map:
+            selected_contact_id = organization_contact_map.get(org.id)
+        if selected_contact_id:
+            contact = (
+                Contact.objects.filter(id=selected_contact_id, organization_id=org.id)
+                .only("id")
+                .first()
+            )
+            if contact:
+                if lead.primary_contact_id != contact.id:
+                    lead.primary_contact_id = contact.id
+                    lead.save(update_fields=["primary_contact", "updated_at"])
+            else:
+                errors.append(
+                    f"Контакт {selected_contact_id} не найден в организации {org.name}."
+                )
+        CampaignOrganization.objects.get_or_create(campaign=campaign, organization_id=org.id)
+        if source_org_name:
+            transfer_note = f"Передано от организации: {source_org_name}"
+            if source_transfer_comment:
+                transfer_note = f"{transfer_note}. Комментарий: {source_transfer_comment}"
+            current_notes = (lead.notes or "").strip()
+            if not current_notes.startswith(transfer_note):
+                lead.notes = f"{transfer_note}\n{current_notes}".strip() if current_notes else transfer_note
+                lead.save(update_fields=["notes", "updated_at"])
+        legacy_materialize_lead_subfunnels(lead, source="collect_import")
+        if created:
+            leads_created += 1
+            leads_by_region[org.region_id] += 1
+        linked_ids.add(org.id)
+
+    if skipped_wrong_region:
+        errors.append(
+            f"Организаций вне регионов кампании (лиды не созданы): {skipped_wrong_region}"
+        )
+    return {
+        "leads_created": leads_created,
+        "leads_by_region": dict(leads_by_region),
+        "linked_ids": list(linked_ids),
+    }
+
+
+def _legacy_default_template_stage(subfunnel):
+    return (
+        TaskTemplateStage.objects.filter(template_id=subfunnel.template_id)
+        .order_by("order", "id")
+        .first()
+    )
+
+
+def legacy_sync_region_tasks(campaign):
+    """Прежний collect_tasks._sync_region_tasks: get_or_create и delete() по одной задаче региона."""
+    regions = list(campaign.campaign_regions.all())
+    collect_stage_by_funnel_id = {}
+    for funnel in campaign.funnels.prefetch_related("stages").all():
+        collect_stage = funnel.stages.filter(is_collect_stage=True).order_by("order", "id").first()
+        if collect_stage:
+            collect_stage_by_funnel_id[funnel.id] = collect_stage
+
+    active_subfunnels = list(
+        campaign.subfunnels.filter(is_active=True).select_related(
+            "template",
+            "binding",
+            "binding__target_stage",
+            "binding__from_stage",
+            "binding__to_stage",
+        )
+    )
+
+    valid_pairs = set()
+    for sub in active_subfunnels:
+        collect_stage = collect_stage_by_funnel_id.get(sub.funnel_id)
+        if not _is_collect_stage_subfunnel(sub, collect_stage):
+            continue
+        default_stage = _legacy_default_template_stage(sub)
+        defaults = {
+            "assignee_id": sub.default_assignee_id,
+            "current_template_stage": default_stage,
+            "status": LeadSubfunnel.Status.BACKLOG,
+            "is_available": True,
+        }
+        for region in regions:
+            valid_pairs.add((sub.id, region.id))
+            LeadSubfunnel.objects.get_or_create(
+                campaign_subfunnel=sub,
+                campaign_region=region,
+                defaults=defaults,
+            )
+
+    for row in LeadSubfunnel.objects.filter(campaign_region__campaign=campaign).select_related(
+        "campaign_subfunnel", "campaign_region"
+    ):
+        if (row.campaign_subfunnel_id, row.campaign_region_id) not in valid_pairs:
+            row.delete()
@@ -0,0 +1,54 @@
+"""
+Прежний перевод лидов на стадию (LeadViewSet.bulk_update до set-based версии) — эталон для
+test_lead_bulk_stage: save() каждого лида с сигналами стадии и пересчёт доступности задач
+подворонок по одной строке.
+"""
+
+from apps.campaigns.models import Lead
+
+
+def _legacy_refresh_subfunnel_availability(lead):
+    if not lead.current_stage_id:
+        return
+    rows = lead.subfunnels.select_related(
+        "campaign_subfunnel__binding__from_stage",
+        "campaign_subfunnel__binding__to_stage",
+    )
+    for row in rows:
+        binding = row.campaign_subfunnel.binding
+        new_availability = True
+        if binding and binding.binding_type == "stage_range_checklist":
+            if not binding.from_stage_id or not binding.to_stage_id:
+                new_availability = False
+            else:
+                stage_order = lead.current_stage.order
+                new_availability = binding.from_stage.order <= stage_order <= binding.to_stage.order
+        if row.is_available != new_availability:
+            row.is_available = new_availability
+            row.save(update_fields=["is_available", "updated_at"])
+
+
+def legacy_bulk_move_to_stage(id_list, target_stage):
+    rows = list(Lead.objects.filter(id__in=id_list))
+    updated = 0
+    skipped = []
+
+    for row in rows:
+        if target_stage is not None and row.funnel_id != target_stage.funnel_id:
+            skipped.append({"id": row.id, "reason": "Стадия не принадлежит воронке лида."})
+            continue
+        row.current_stage = target_stage
+        update_fields = ["current_stage", "updated_at"]
+        if (
+            target_stage is not None
+            and not row.primary_contact_specialist_id
+            and target_stage.primary_contact_specialist_id
+        ):
+            row.primary_contact_specialist_id = target_stage.primary_contact_specialist_id
+            update_fields.append("primary_contact_specialist")
+        row.save(update_fields=update_fields)
+        if target_stage is not None:
+            _legacy_refresh_subfunnel_availability(row)
+        updated += 1
+
+    return {"updated": updated, "skipped": skipped, "requested": len(id_list)}
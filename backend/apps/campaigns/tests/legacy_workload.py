@@ -0,0 +1,416 @@
+"""
+Прежняя реализация дашборда загрузки (цикл по лидам и задачам в Python) — эталон для
+test_workload: SQL-версия в apps.campaigns.workload должна отдавать тот же ответ.
+
+Отличие от исходного кода: активность пункта чек-листа берётся только из completed_at
+(поля LeadChecklistValue.updated_at нет — старый код падал на периоде).
+"""
+
+from collections import defaultdict
+
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.campaigns.models import Lead, LeadSubfunnel
+from apps.campaigns.workload import (
+    _bump_workload_task_stats,
+    _empty_activity_by_period_bucket,
+    _empty_workload_task_stats,
+)
+
+
+def legacy_workload_dashboard(role, campaign_id=None, funnel_id=None, user_id=None, date_from=None, date_to=None):
+    def _date_in_range(d):
+        if not d:
+            return False
+        if date_from and d < date_from:
+            return False
+        if date_to and d > date_to:
+            return False
+        return True
+
+    def _dt_in_range(dt):
+        return _date_in_range(timezone.localtime(dt).date()) if dt else False
+
+    def _is_open_on_period_end(created_at, completed_at=None):
+        if not date_to:
+            return False
+        if timezone.localtime(created_at).date() > date_to:
+            return False
+        if not completed_at:
+            return True
+        return timezone.localtime(completed_at).date() > date_to
+
+    has_period = bool(date_from or date_to)
+    today = timezone.localdate()
+    now = timezone.now()
+
+    def _bump_activity_status(activity_map, date_obj, status):
+        if not date_obj:
+            return
+        if has_period and not _date_in_range(date_obj):
+            return
+        normalized = LeadSubfunnel.normalize_status(status)
+        if normalized not in {
+            LeadSubfunnel.Status.BACKLOG,
+            LeadSubfunnel.Status.IN_PROGRESS,
+            LeadSubfunnel.Status.PAUSED,
+            LeadSubfunnel.Status.REJECTED,
+            LeadSubfunnel.Status.DONE,
+        }:
+            return
+        key = date_obj.isoformat()
+        bucket = activity_map[key]
+        bucket["date"] = key
+        bucket[normalized] += 1
+
+    bucket = defaultdict(
+        lambda: {
+            "user_id": None,
+            "user_name": None,
+            "role": None,
+            "active_leads": 0,
+            "pending_checklist": 0,
+            "overdue_stage": 0,
+            "overdue_checklist": 0,
+            "tasks_in_progress": 0,
+            "tasks_overdue": 0,
+        }
+    )
+
+    managers_map = defaultdict(
+        lambda: {
+            "user_id": None,
+            "user_name": None,
+            "campaigns": defaultdict(
+                lambda: {"campaign_id": None, "campaign_name": None, "leads": []}
+            ),
+        }
+    )
+
+    def _specialist_campaign_bucket():
+        return {
+            "campaign_id": None,
+            "campaign_name": None,
+            "stats": _empty_workload_task_stats(),
+            "templates": defaultdict(
+                lambda: {
+                    "template_id": None,
+                    "template_name": None,
+                    "stats": _empty_workload_task_stats(),
+                }
+            ),
+        }
+
+    specialists_map = defaultdict(
+        lambda: {
+            "user_id": None,
+            "user_name": None,
+            "campaigns": defaultdict(_specialist_campaign_bucket),
+        }
+    )
+    activity_by_period = defaultdict(_empty_activity_by_period_bucket)
+    chart_data = {
+        scope: {
+            "by_campaign": defaultdict(
+                lambda: {"campaign_id": None, "campaign_name": None, "in_progress": 0, "overdue": 0, "done_in_period": 0}
+            ),
+            "by_user": defaultdict(
+                lambda: {"user_id": None, "user_name": None, "in_progress": 0, "overdue": 0}
+            ),
+            "status_pie": defaultdict(int),
+        }
+        for scope in ("manager", "specialist")
+    }
+
+    def add_row(user_obj, role_key, active=0, pending=0, overdue_stage=0, overdue_checklist=0, tasks_in_progress=0, tasks_overdue=0):
+        if not user_obj:
+            return
+        if user_id and user_obj.id != user_id:
+            return
+        row = bucket[(role_key, user_obj.id)]
+        row["user_id"] = user_obj.id
+        row["user_name"] = str(user_obj)
+        row["role"] = role_key
+        row["active_leads"] += active
+        row["pending_checklist"] += pending
+        row["overdue_stage"] += overdue_stage
+        row["overdue_checklist"] += overdue_checklist
+        row["tasks_in_progress"] += tasks_in_progress
+        row["tasks_overdue"] += tasks_overdue
+
+    leads_qs = Lead.objects.select_related(
+        "campaign",
+        "funnel",
+        "organization",
+        "current_stage",
+        "manager",
+        "primary_contact_specialist",
+        "current_stage__primary_contact_specialist",
+    ).prefetch_related(
+        "checklist_values__checklist_item__primary_contact_specialist",
+        "checklist_values__primary_contact_specialist",
+    )
+    if campaign_id:
+        leads_qs = leads_qs.filter(campaign_id=campaign_id)
+    if funnel_id:
+        leads_qs = leads_qs.filter(funnel_id=funnel_id)
+
+    leads = [
+        lead
+        for lead in leads_qs
+        if lead.current_stage_id and not lead.current_stage.is_rejection
+    ]
+
+    for lead in leads:
+        stage_deadline = lead.current_stage_deadline
+        stage_overdue = bool(stage_deadline and stage_deadline < today)
+        stage_items = [
+            v
+            for v in lead.checklist_values.all()
+            if v.checklist_item.stage_id == lead.current_stage_id
+        ]
+        pending_items = [v for v in stage_items if not v.is_completed]
+
+        if has_period:
+            lead_active = (
+                _dt_in_range(lead.updated_at)
+                or any(_dt_in_range(v.completed_at) for v in stage_items)
+                or _date_in_range(stage_deadline)
+                or _is_open_on_period_end(lead.created_at)
+            )
+            if not lead_active:
+                continue
+
+        if role in ("all", "manager"):
+            add_row(
+                lead.manager,
+                "manager",
+                active=1,
+                pending=len(pending_items),
+                overdue_stage=1 if stage_overdue else 0,
+                overdue_checklist=len(pending_items) if stage_overdue else 0,
+            )
+            if lead.manager and (not user_id or lead.manager_id == user_id):
+                mgr = managers_map[lead.manager_id]
+                mgr["user_id"] = lead.manager_id
+                mgr["user_name"] = str(lead.manager)
+                mgr_campaign = mgr["campaigns"][lead.campaign_id]
+                mgr_campaign["campaign_id"] = lead.campaign_id
+                mgr_campaign["campaign_name"] = lead.campaign.name
+                mgr_campaign["leads"].append(
+                    {
+                        "lead_id": lead.id,
+                        "organization_name": lead.organization.name if lead.organization else f"Лид {lead.id}",
+                        "stage_name": lead.current_stage.name if lead.current_stage else None,
+                        "stage_deadline": stage_deadline.isoformat() if stage_deadline else None,
+                        "stage_overdue": stage_overdue,
+                        "pending_checklist": len(pending_items),
+                        "overdue_checklist": len(pending_items) if stage_overdue else 0,
+                    }
+                )
+                mgr_chart_campaign = chart_data["manager"]["by_campaign"][lead.campaign_id]
+                mgr_chart_campaign["campaign_id"] = lead.campaign_id
+                mgr_chart_campaign["campaign_name"] = lead.campaign.name
+                mgr_chart_campaign["in_progress"] += 1
+                mgr_chart_campaign["overdue"] += 1 if stage_overdue else 0
+                mgr_chart_user = chart_data["manager"]["by_user"][lead.manager_id]
+                mgr_chart_user["user_id"] = lead.manager_id
+                mgr_chart_user["user_name"] = str(lead.manager)
+                mgr_chart_user["in_progress"] += 1
+                mgr_chart_user["overdue"] += 1 if stage_overdue else 0
+                chart_data["manager"]["status_pie"]["overdue" if stage_overdue else "in_progress"] += 1
+
+        if role in ("all", "specialist"):
+            lead_specialist = (
+                lead.primary_contact_specialist
+                or lead.current_stage.primary_contact_specialist
+            )
+            add_row(
+                lead_specialist,
+                "specialist",
+                active=1,
+                overdue_stage=1 if stage_overdue else 0,
+            )
+            for value in pending_items:
+                specialist = (
+                    value.primary_contact_specialist
+                    or value.checklist_item.primary_contact_specialist
+                    or lead_specialist
+                )
+                add_row(
+                    specialist,
+                    "specialist",
+                    pending=1,
+                    overdue_checklist=1 if stage_overdue else 0,
+                )
+
+    task_rows = LeadSubfunnel.objects.select_related(
+        "lead__campaign",
+        "campaign_region__campaign",
+        "campaign_subfunnel__template",
+        "assignee",
+    )
+    if campaign_id:
+        task_rows = task_rows.filter(
+            Q(lead__campaign_id=campaign_id) | Q(campaign_region__campaign_id=campaign_id)
+        )
+    if funnel_id:
+        task_rows = task_rows.filter(campaign_subfunnel__funnel_id=funnel_id)
+    if user_id:
+        task_rows = task_rows.filter(assignee_id=user_id)
+
+    for task in task_rows:
+        if not task.assignee_id:
+            continue
+        is_done = task.status == LeadSubfunnel.Status.DONE
+        is_overdue = bool(task.due_at and task.due_at < now and not is_done)
+        campaign_obj = task.lead.campaign if task.lead_id else (task.campaign_region.campaign if task.campaign_region_id else None)
+        if not campaign_obj:
+            continue
+
+        activity_dt = (
+            task.completed_at
+            if is_done and task.completed_at
+            else (task.updated_at or task.started_at or task.created_at)
+        )
+        if activity_dt:
+            activity_status = LeadSubfunnel.Status.DONE if is_done else task.status
+            _bump_activity_status(
+                activity_by_period,
+                timezone.localtime(activity_dt).date(),
+                activity_status,
+            )
+
+        if has_period:
+            task_active = (
+                _dt_in_range(task.updated_at)
+                or _dt_in_range(task.started_at)
+                or _dt_in_range(task.completed_at)
+                or _is_open_on_period_end(task.created_at, task.completed_at if is_done else None)
+            )
+            if not task_active:
+                continue
+
+        if role in ("all", "specialist"):
+            add_row(
+                task.assignee,
+                "specialist",
+                pending=0 if is_done else 1,
+                overdue_checklist=1 if is_overdue else 0,
+                tasks_in_progress=0 if is_done else 1,
+                tasks_overdue=1 if is_overdue else 0,
+            )
+            specialist_item = specialists_map[task.assignee_id]
+            specialist_item["user_id"] = task.assignee_id
+            specialist_item["user_name"] = str(task.assignee)
+            sp_campaign = specialist_item["campaigns"][campaign_obj.id]
+            sp_campaign["campaign_id"] = campaign_obj.id
+            sp_campaign["campaign_name"] = campaign_obj.name
+            template = task.campaign_subfunnel.template if task.campaign_subfunnel else None
+            template_id = template.id if template else 0
+            sp_template = sp_campaign["templates"][template_id]
+            sp_template["template_id"] = template_id
+            sp_template["template_name"] = template.name if template else "Без шаблона"
+            _bump_workload_task_stats(sp_campaign["stats"], task.status, is_overdue)
+            _bump_workload_task_stats(sp_template["stats"], task.status, is_overdue)
+
+            sp_chart_campaign = chart_data["specialist"]["by_campaign"][campaign_obj.id]
+            sp_chart_campaign["campaign_id"] = campaign_obj.id
+            sp_chart_campaign["campaign_name"] = campaign_obj.name
+            if is_done:
+                if _dt_in_range(task.completed_at):
+                    sp_chart_campaign["done_in_period"] += 1
+            else:
+                sp_chart_campaign["in_progress"] += 1
+                sp_chart_campaign["overdue"] += 1 if is_overdue else 0
+            sp_chart_user = chart_data["specialist"]["by_user"][task.assignee_id]
+            sp_chart_user["user_id"] = task.assignee_id
+            sp_chart_user["user_name"] = str(task.assignee)
+            if not is_done:
+                sp_chart_user["in_progress"] += 1
+                sp_chart_user["overdue"] += 1 if is_overdue else 0
+            chart_data["specialist"]["status_pie"][LeadSubfunnel.normalize_status(task.status)] += 1
+
+    rows = sorted(
+        bucket.values(),
+        key=lambda x: (
+            x["role"] or "",
+            -(x["tasks_overdue"] + x["overdue_stage"] + x["overdue_checklist"]),
+            -(x["tasks_in_progress"] + x["active_leads"] + x["pending_checklist"]),
+            x["user_name"] or "",
+        ),
+    )
+    totals = {
+        key: sum(r[key] for r in rows)
+        for key in (
+            "active_leads", "pending_checklist", "overdue_stage",
+            "overdue_checklist", "tasks_in_progress", "tasks_overdue",
+        )
+    }
+
+    managers = []
+    for item in managers_map.values():
+        campaigns = []
+        for campaign_item in item["campaigns"].values():
+            campaign_item["leads"] = sorted(
+                campaign_item["leads"],
+                key=lambda lead_row: (
+                    0 if lead_row["stage_overdue"] else 1,
+                    lead_row["stage_deadline"] or "9999-99-99",
+                    lead_row["organization_name"],
+                ),
+            )
+            campaigns.append(campaign_item)
+        campaigns.sort(key=lambda c: c["campaign_name"] or "")
+        managers.append({"user_id": item["user_id"], "user_name": item["user_name"], "campaigns": campaigns})
+    managers.sort(key=lambda x: x["user_name"] or "")
+
+    specialists = []
+    for item in specialists_map.values():
+        campaigns = []
+        overdue_total = 0
+        for campaign_item in item["campaigns"].values():
+            campaign_item["templates"] = sorted(
+                campaign_item["templates"].values(),
+                key=lambda tpl: tpl["template_name"] or "",
+            )
+            overdue_total += campaign_item["stats"]["overdue"]
+            campaigns.append(campaign_item)
+        campaigns.sort(key=lambda c: c["campaign_name"] or "")
+        specialists.append(
+            {
+                "user_id": item["user_id"],
+                "user_name": item["user_name"],
+                "campaigns": campaigns,
+                "overdue_total": overdue_total,
+            }
+        )
+    specialists.sort(key=lambda x: x["user_name"] or "")
+
+    active_chart_scope = "specialist" if role == "specialist" else "manager"
+    charts_source = chart_data[active_chart_scope]
+    charts = {
+        "scope": active_chart_scope,
+        "by_campaign": sorted(charts_source["by_campaign"].values(), key=lambda x: x["campaign_name"] or ""),
+        "by_user": sorted(charts_source["by_user"].values(), key=lambda x: x["user_name"] or ""),
+        "by_day": sorted(activity_by_period.values(), key=lambda x: x["date"] or ""),
+        "status_pie": [{"status": status_key, "count": count} for status_key, count in charts_source["status_pie"].items()],
+    }
+
+    return {
+        "rows": rows,
+        "totals": totals,
+        "managers": managers,
+        "specialists": specialists,
+        "charts": charts,
+        "meta": {
+            "role": role,
+            "campaign": campaign_id,
+            "funnel": funnel_id,
+            "user": user_id,
+            "date_from": date_from.isoformat() if date_from else None,
+            "date_to": date_to.isoformat() if date_to else None,
+            "period_mode": "activity",
+        },
+    }
@@ -0,0 +1,119 @@
+from rest_framework.test import APITestCase
+
+from apps.campaigns.models import CampaignOrganization, CampaignRegion, Lead, LeadChecklistValue
+from apps.funnels.models import StageChecklistItem
+
+from .factories import make_admin, make_campaign, make_funnel, make_regions
+
+
+class AssignManagersTests(APITestCase):
+    """assign-managers: последнее назначение на цель побеждает, updated — число изменённых строк."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_admin()
+        cls.first, cls.second = make_admin("first"), make_admin("second")
+        cls.regions = make_regions(3)
+        funnel, cls.stages = make_funnel(stages=2)
+        cls.items = [StageChecklistItem.objects.create(stage=cls.stages[0], text="Пункт", order=1)]
+        cls.campaign, _ = make_campaign(funnel=funnel, stage=cls.stages[0], regions=cls.regions, leads=3)
+        for region in cls.regions[:2]:
+            CampaignRegion.objects.create(campaign=cls.campaign, region=region)
+        cls.leads = list(Lead.objects.filter(campaign=cls.campaign).order_by("id"))
+        other_funnel, other_stages = make_funnel("Чужая", stages=1)
+        cls.other_campaign, _ = make_campaign(
+            "Чужая кампания", funnel=other_funnel, stage=other_stages[0], regions=cls.regions, leads=1
+        )
+        cls.other_lead = Lead.objects.get(campaign=cls.other_campaign)
+        cls.other_stage = other_stages[0]
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def assign(self, assignments):
+        response = self.client.post(
+            f"/api/campaigns/{self.campaign.id}/assign-managers/", {"assignments": assignments}, format="json"
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()["updated"]
+
+    def managers(self, queryset, field="manager_id"):
+        return dict(queryset.values_list("pk", field))
+
+    def test_duplicate_targets_count_once_and_last_wins(self):
+        a, b, c = self.leads
+        updated = self.assign(
+            [
+                {"level": "lead", "target_id": a.id, "manager_id": self.first.id},
+                {"level": "lead", "target_id": b.id, "manager_id": self.first.id},
+                {"level": "lead", "target_id": a.id, "manager_id": self.second.id},
+                {"level": "lead", "target_id": str(b.id), "manager_id": None},
+                {"level": "lead", "target_id": c.id, "manager_id": self.first.id},
+                {"level": "lead", "target_id": c.id, "manager_id": self.first.id},
+                # Та же цель на другом уровне — отдельное назначение
+                {"level": "lead_specialist", "target_id": a.id, "manager_id": self.first.id},
+            ]
+        )
+        self.assertEqual(updated, 4)
+        self.assertEqual(
+            self.managers(Lead.objects.filter(campaign=self.campaign)),
+            {a.id: self.second.id, b.id: None, c.id: self.first.id},
+        )
+        self.assertEqual(Lead.objects.get(pk=a.pk).primary_contact_specialist_id, self.first.id)
+
+    def test_foreign_missing_and_invalid_targets_are_not_counted(self):
+        updated = self.assign(
+            [
+                {"level": "lead", "target_id": self.other_lead.id, "manager_id": self.first.id},
+                {"level": "lead", "target_id": 999999, "manager_id": self.first.id},
+                {"level": "stage_specialist", "target_id": self.other_stage.id, "manager_id": self.first.id},
+                {"level": "unknown", "target_id": self.leads[0].id, "manager_id": self.first.id},
+                {"level": "lead", "manager_id": self.first.id},
+                {"level": "region", "target_id": self.regions[2].id, "manager_id": self.first.id},
+            ]
+        )
+        self.assertEqual(updated, 0)
+        self.assertIsNone(Lead.objects.get(pk=self.other_lead.pk).manager_id)
+        self.assertFalse(Lead.objects.filter(manager__isnull=False).exists())
+
+    def test_each_level_counts_rows_it_changes(self):
+        lead = self.leads[0]
+        checklist_values = LeadChecklistValue.objects.filter(lead__campaign=self.campaign)
+        self.assertEqual(checklist_values.count(), 3)
+        payload = [
+            {"level": "region", "target_id": region.id, "manager_id": self.first.id} for region in self.regions[:2]
+        ]
+        payload += [
+            {"level": "region_specialist", "target_id": self.regions[0].id, "manager_id": self.second.id},
+            {"level": "organization", "target_id": lead.organization_id, "manager_id": self.first.id},
+            {"level": "stage_specialist", "target_id": self.stages[1].id, "manager_id": self.second.id},
+            {"level": "checklist_specialist", "target_id": self.items[0].id, "manager_id": self.second.id},
+        ]
+        payload += [
+            {"level": "lead_checklist_specialist", "target_id": value_id, "manager_id": self.first.id}
+            for value_id in checklist_values.values_list("id", flat=True)
+        ]
+        self.assertEqual(self.assign(payload), 2 + 1 + 1 + 1 + 1 + 3)
+        regions = CampaignRegion.objects.filter(campaign=self.campaign)
+        self.assertEqual(set(self.managers(regions).values()), {self.first.id})
+        self.assertEqual(
+            self.managers(regions, "primary_contact_specialist_id"),
+            {region.pk: (self.second.id if region.region_id == self.regions[0].id else None) for region in regions},
+        )
+        self.assertEqual(
+            CampaignOrganization.objects.get(campaign=self.campaign, organization_id=lead.organization_id).manager_id,
+            self.first.id,
+        )
+        self.assertEqual(
+            set(self.managers(checklist_values, "primary_contact_specialist_id").values()), {self.first.id}
+        )
+
+    def test_one_update_per_level_and_manager(self):
+        payload = [
+            {"level": "lead", "target_id": lead.id, "manager_id": manager.id}
+            for lead in self.leads
+            for manager in (self.second, self.first)
+        ] * 20
+        # Запрос кампании, SAVEPOINT/RELEASE транзакции и один UPDATE на (level, manager_id)
+        with self.assertNumQueries(4):
+            self.assertEqual(self.assign(payload), 3)
@@ -0,0 +1,57 @@
+from datetime import timedelta
+
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.campaigns.models import Lead, LeadInteraction
+from apps.organizations.models import OrganizationTag
+
+from .factories import make_admin, make_campaign, make_funnel, make_regions
+
+
+class CampaignDetailTests(APITestCase):
+    def setUp(self):
+        self.user = make_admin()
+        self.client.force_authenticate(self.user)
+        funnel, stages = make_funnel()
+        self.campaign, _ = make_campaign(
+            funnel=funnel, stage=stages[0], regions=make_regions(2), leads=4, manager=self.user
+        )
+        self.leads = list(Lead.objects.filter(campaign=self.campaign).order_by("id"))
+
+    def get_leads(self, **params):
+        response = self.client.get(f"/api/campaigns/{self.campaign.id}/leads/", params)
+        self.assertEqual(response.status_code, 200)
+        return sorted(item["id"] for item in response.data["results"])
+
+    def test_header_has_counters_and_managers_without_lists(self):
+        response = self.client.get(f"/api/campaigns/{self.campaign.id}/")
+        self.assertEqual(response.status_code, 200)
+        for field in ("leads", "organizations", "campaign_regions"):
+            self.assertNotIn(field, response.data)
+        self.assertEqual(response.data["leads_count"], 4)
+        self.assertEqual(
+            response.data["managers"],
+            [{"id": self.user.id, "name": str(self.user), "leads_count": 4, "programs_count": 0}],
+        )
+
+    def test_leads_filter_by_lead_or_organization_tag(self):
+        lead_tag = OrganizationTag.objects.create(name="лид", slug="lead-tag")
+        org_tag = OrganizationTag.objects.create(name="организация", slug="org-tag")
+        self.leads[0].tags.add(lead_tag)
+        self.leads[1].organization.tags.add(org_tag)
+        self.assertEqual(
+            self.get_leads(tags=f"{lead_tag.id},{org_tag.id}"),
+            [self.leads[0].id, self.leads[1].id],
+        )
+
+    def test_leads_filter_by_days_since_last_touch(self):
+        now = timezone.now()
+        for lead, days_ago in ((self.leads[0], 1), (self.leads[1], 10), (self.leads[2], 30)):
+            LeadInteraction.objects.create(
+                lead=lead, contact_person="Иванов", date=now - timedelta(days=days_ago)
+            )
+        recent, week_old, month_old, untouched = (lead.id for lead in self.leads)
+        self.assertEqual(self.get_leads(touch_max_days=10), [recent, week_old])
+        self.assertEqual(self.get_leads(touch_min_days=10), [week_old, month_old, untouched])
+        self.assertEqual(self.get_leads(touch_min_days=5, touch_max_days=20), [week_old])
@@ -0,0 +1,209 @@
+from datetime import date, timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.campaigns.models import CampaignQueue, CampaignStats, Lead, LeadInteraction, QueueStageDeadline
+from apps.campaigns.nested_sync import sync_rows
+
+from .factories import make_admin, make_campaign, make_funnel, make_regions
+
+
+def _add_interaction(lead):
+    return LeadInteraction.objects.create(lead=lead, contact_person="Иванов", date=timezone.now())
+
+
+class SyncRowsTests(TestCase):
+    def setUp(self):
+        self.funnel, self.stages = make_funnel()
+        self.campaign, self.queue = make_campaign(
+            funnel=self.funnel, stage=self.stages[0], regions=make_regions(2), leads=3
+        )
+        self.second_queue = CampaignQueue.objects.create(campaign=self.campaign, queue_number=2, name="Очередь 2")
+        self.leads = list(Lead.objects.filter(campaign=self.campaign).order_by("id"))
+        # Время изменения в прошлом: bulk_update должен сдвинуть его сам (auto_now)
+        Lead.objects.filter(campaign=self.campaign).update(updated_at=timezone.now() - timedelta(days=1))
+
+    def rows(self, leads, queue_ids=None):
+        return [
+            Lead(
+                campaign=self.campaign,
+                organization_id=lead.organization_id,
+                funnel_id=lead.funnel_id,
+                region_id=lead.region_id,
+                queue_id=(queue_ids or {}).get(lead.pk, lead.queue_id),
+                manager_id=lead.manager_id,
+                primary_contact_specialist_id=lead.primary_contact_specialist_id,
+                forecast_demand=lead.forecast_demand,
+            )
+            for lead in leads
+        ]
+
+    def sync(self, rows):
+        return sync_rows(
+            self.campaign.leads.all(),
+            rows,
+            ("organization_id", "funnel_id", "region_id"),
+            ("queue_id", "manager_id", "primary_contact_specialist_id", "forecast_demand"),
+        )
+
+    def test_unchanged_rows_keep_ids_and_dependent_data(self):
+        interaction = _add_interaction(self.leads[0])
+        before = {lead.pk: lead.updated_at for lead in Lead.objects.filter(campaign=self.campaign)}
+        by_key, created, changed, stale = self.sync(self.rows(self.leads))
+        self.assertEqual((created, changed, stale), ([], [], []))
+        self.assertEqual({obj.pk for obj in by_key.values()}, set(before))
+        self.assertEqual(
+            {lead.pk: lead.updated_at for lead in Lead.objects.filter(campaign=self.campaign)}, before
+        )
+        self.assertTrue(LeadInteraction.objects.filter(pk=interaction.pk).exists())
+
+    def test_changed_rows_are_updated_in_place_with_auto_now(self):
+        moved, untouched = self.leads[0], self.leads[1]
+        stamp = Lead.objects.get(pk=untouched.pk).updated_at
+        _, created, changed, stale = self.sync(
+            self.rows(self.leads, {moved.pk: self.second_queue.pk})
+        )
+        self.assertEqual((created, stale), ([], []))
+        self.assertEqual([obj.pk for obj in changed], [moved.pk])
+        moved = Lead.objects.get(pk=moved.pk)
+        self.assertEqual(moved.queue_id, self.second_queue.pk)
+        self.assertGreater(moved.updated_at, stamp)
+        self.assertEqual(Lead.objects.get(pk=untouched.pk).updated_at, stamp)
+
+    def test_removed_rows_are_deleted_with_cascade(self):
+        removed = self.leads[2]
+        interaction = _add_interaction(removed)
+        _, created, changed, stale = self.sync(self.rows(self.leads[:2]))
+        self.assertEqual((created, changed), ([], []))
+        self.assertEqual([obj.pk for obj in stale], [removed.pk])
+        self.assertFalse(Lead.objects.filter(pk=removed.pk).exists())
+        self.assertFalse(LeadInteraction.objects.filter(pk=interaction.pk).exists())
+        self.assertEqual(Lead.objects.filter(campaign=self.campaign).count(), 2)
+
+    def test_duplicate_key_last_row_wins(self):
+        rows = self.rows(self.leads) + self.rows(self.leads[:1], {self.leads[0].pk: self.second_queue.pk})
+        _, created, changed, stale = self.sync(rows)
+        self.assertEqual((created, stale), ([], []))
+        self.assertEqual([obj.pk for obj in changed], [self.leads[0].pk])
+        self.assertEqual(Lead.objects.get(pk=self.leads[0].pk).queue_id, self.second_queue.pk)
+
+    def test_new_rows_are_created(self):
+        removed = self.leads[2]
+        Lead.objects.filter(pk=removed.pk).delete()
+        by_key, created, changed, stale = self.sync(self.rows(self.leads))
+        self.assertEqual((changed, stale), ([], []))
+        self.assertEqual(len(created), 1)
+        self.assertIsNotNone(created[0].pk)
+        self.assertEqual(created[0].organization_id, removed.organization_id)
+        self.assertEqual(len(by_key), 3)
+
+
+class CampaignUpdateTests(APITestCase):
+    """PATCH кампании сверяет вложенные коллекции с текущими строками, а не пересоздаёт их."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_admin()
+        cls.funnel, cls.stages = make_funnel()
+        cls.campaign, cls.queue = make_campaign(
+            funnel=cls.funnel, stage=cls.stages[0], regions=make_regions(2), leads=3
+        )
+        cls.queue.start_date = date(2026, 3, 2)
+        cls.queue.save()
+        # Регион лида — как у организации: так его проставляет импорт и _resolve_lead_rows
+        for lead in Lead.objects.filter(campaign=cls.campaign).select_related("organization"):
+            lead.region_id = lead.organization.region_id
+            lead.save(update_fields=["region"])
+        cls.deadline = QueueStageDeadline.objects.create(
+            queue=cls.queue, funnel_stage=cls.stages[1], deadline_days=5
+        )
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+        self.leads = list(Lead.objects.filter(campaign=self.campaign).order_by("id"))
+
+    def lead_data(self, leads):
+        return [
+            {
+                "organization_id": lead.organization_id,
+                "funnel_id": lead.funnel_id,
+                "region_id": lead.region_id,
+                "queue_number": 1,
+                "forecast_demand": lead.forecast_demand,
+            }
+            for lead in leads
+        ]
+
+    def queues(self, **changes):
+        queue = {
+            "queue_number": 1,
+            "name": self.queue.name,
+            "start_date": self.queue.start_date.isoformat(),
+            "end_date": None,
+            "stage_deadlines": [{"funnel_stage_id": self.stages[1].id, "deadline_days": 5}],
+        }
+        queue.update(changes)
+        return [queue]
+
+    def patch(self, payload):
+        """PATCH с подменёнными планировщиками пересчёта: (ответ, мок сводки, мок дедлайнов)."""
+        with (
+            mock.patch("apps.campaigns.serializers.schedule_campaign_stats_refresh") as stats,
+            mock.patch("apps.campaigns.serializers.schedule_stage_deadline_rebuild") as deadlines,
+        ):
+            response = self.client.patch(f"/api/campaigns/{self.campaign.id}/", payload, format="json")
+        self.assertEqual(response.status_code, 200, response.content)
+        return stats, deadlines
+
+    def rebuilt_queue_ids(self, deadlines):
+        return {qid for call in deadlines.call_args_list for qid in call.args[0]}
+
+    def test_unchanged_payload_keeps_rows_and_schedules_nothing(self):
+        interaction = _add_interaction(self.leads[0])
+        stats, deadlines = self.patch({"queues": self.queues(), "lead_data": self.lead_data(self.leads)})
+        self.assertEqual(
+            list(Lead.objects.filter(campaign=self.campaign).order_by("id").values_list("id", flat=True)),
+            [lead.pk for lead in self.leads],
+        )
+        self.assertTrue(LeadInteraction.objects.filter(pk=interaction.pk).exists())
+        self.assertEqual(CampaignQueue.objects.get(campaign=self.campaign).pk, self.queue.pk)
+        self.assertTrue(QueueStageDeadline.objects.filter(pk=self.deadline.pk, deadline_days=5).exists())
+        stats.assert_not_called()
+        self.assertEqual(self.rebuilt_queue_ids(deadlines), set())
+
+    def test_queue_and_deadline_changes_schedule_rebuild(self):
+        stats, deadlines = self.patch(
+            {"queues": self.queues(stage_deadlines=[{"funnel_stage_id": self.stages[1].id, "deadline_days": 8}])}
+        )
+        self.assertTrue(QueueStageDeadline.objects.filter(pk=self.deadline.pk, deadline_days=8).exists())
+        self.assertEqual(self.rebuilt_queue_ids(deadlines), {self.queue.pk})
+        stats.assert_not_called()
+
+        _, deadlines = self.patch({"queues": self.queues(start_date="2026-04-01")})
+        self.assertEqual(CampaignQueue.objects.get(pk=self.queue.pk).start_date, date(2026, 4, 1))
+        self.assertEqual(self.rebuilt_queue_ids(deadlines), {self.queue.pk})
+
+    def test_removed_lead_is_deleted_and_stats_refresh_scheduled(self):
+        removed = self.leads[2]
+        interaction = _add_interaction(removed)
+        stats, _ = self.patch({"lead_data": self.lead_data(self.leads[:2])})
+        self.assertFalse(Lead.objects.filter(pk=removed.pk).exists())
+        self.assertFalse(LeadInteraction.objects.filter(pk=interaction.pk).exists())
+        self.assertEqual(
+            set(Lead.objects.filter(campaign=self.campaign).values_list("id", flat=True)),
+            {lead.pk for lead in self.leads[:2]},
+        )
+        stats.assert_called_once_with(self.campaign.pk)
+
+    def test_stats_refresh_runs_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                f"/api/campaigns/{self.campaign.id}/",
+                {"lead_data": self.lead_data(self.leads[:1])},
+                format="json",
+            )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(CampaignStats.objects.get(campaign=self.campaign).leads_count, 1)
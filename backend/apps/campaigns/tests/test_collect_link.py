@@ -0,0 +1,194 @@
+from datetime import date
+
+from django.test import TestCase
+
+from apps.campaigns.models import (
+    CampaignOrganization,
+    CampaignQueue,
+    CampaignRegion,
+    CampaignSubfunnel,
+    Lead,
+    LeadChecklistValue,
+    LeadSubfunnel,
+    LeadSubfunnelChecklistValue,
+    QueueStageDeadline,
+)
+from apps.campaigns.views import _link_orgs_to_collect_campaign
+from apps.funnels.models import StageChecklistItem, SubfunnelTemplate, SubfunnelTemplateItem, TaskTemplateStage
+from apps.organizations.models import Contact, Organization
+
+from .equivalence import state_after
+from .factories import make_admin, make_campaign, make_funnel, make_regions
+from .legacy_collect import legacy_link_orgs_to_collect_campaign
+
+
+class CollectLinkEquivalenceTests(TestCase):
+    """Set-based привязка организаций к кампании сбора совпадает с прежней построчной."""
+
+    @classmethod
+    def setUpTestData(cls):
+        specialist = make_admin("specialist")
+        region_manager = make_admin("region_manager")
+        region_specialist = make_admin("region_specialist")
+        regions = make_regions(3)
+
+        cls.funnel, stages = make_funnel(stages=4)
+        stages[0].is_collect_stage = True
+        stages[0].save()
+        stages[1].primary_contact_specialist = specialist
+        stages[1].save()
+        for stage in stages:
+            StageChecklistItem.objects.create(stage=stage, text=f"{stage.name}: пункт", order=1)
+
+        cls.campaign, queue = make_campaign(funnel=cls.funnel, stage=stages[1], regions=regions, leads=1)
+        cls.source_lead = Lead.objects.get(campaign=cls.campaign)
+        queue.start_date = date(2026, 3, 2)
+        queue.save()
+        second_queue = CampaignQueue.objects.create(
+            campaign=cls.campaign, queue_number=2, name="Очередь 2", start_date=date(2026, 4, 1)
+        )
+        for q in (queue, second_queue):
+            for stage, days in zip(stages, (2, 5, 9, 14)):
+                QueueStageDeadline.objects.create(queue=q, funnel_stage=stage, deadline_days=days)
+        CampaignRegion.objects.create(
+            campaign=cls.campaign,
+            region=regions[0],
+            queue=second_queue,
+            manager=region_manager,
+            primary_contact_specialist=region_specialist,
+        )
+        cls.bare_region = CampaignRegion.objects.create(campaign=cls.campaign, region=regions[1])
+
+        def org(name, region):
+            return Organization.objects.create(name=name, region=region)
+
+        cls.new_a = org("Новая А", regions[0])
+        cls.new_b = org("Новая Б", regions[1])
+        cls.existing = org("Уже в кампании", regions[0])
+        cls.on_entry = org("Уже на входной стадии", regions[1])
+        cls.outside = org("Вне регионов", regions[2])
+        Lead.objects.create(
+            campaign=cls.campaign,
+            organization=cls.existing,
+            funnel=cls.funnel,
+            region=regions[0],
+            queue=queue,
+            current_stage=stages[2],
+            notes="Старая заметка",
+        )
+        Lead.objects.create(
+            campaign=cls.campaign,
+            organization=cls.on_entry,
+            funnel=cls.funnel,
+            region=regions[1],
+            queue=queue,
+            current_stage=stages[1],
+            primary_contact_specialist=region_manager,
+        )
+        cls.contact_a = Contact.objects.create(organization=cls.new_a, last_name="Иванов")
+        cls.foreign_contact = Contact.objects.create(organization=cls.new_b, last_name="Петров")
+
+        auto_template = SubfunnelTemplate.objects.create(
+            name="Первичный звонок", slug="first-call", auto_create_on_collect_import=True
+        )
+        TaskTemplateStage.objects.create(template=auto_template, name="Новая", order=0)
+        SubfunnelTemplateItem.objects.create(template=auto_template, title="Позвонить", order=0)
+        manual_template = SubfunnelTemplate.objects.create(name="Выезд", slug="visit")
+        SubfunnelTemplateItem.objects.create(template=manual_template, title="Согласовать", order=0)
+        for template in (auto_template, manual_template):
+            CampaignSubfunnel.objects.create(
+                campaign=cls.campaign, funnel=cls.funnel, template=template, default_assignee=region_manager
+            )
+
+    def snapshot(self):
+        leads = Lead.objects.filter(campaign=self.campaign)
+        return {
+            # Лиды — по организации: id новых лидов в двух прогонах не обязаны совпадать
+            "leads": sorted(
+                leads.values_list(
+                    "organization_id",
+                    "region_id",
+                    "queue_id",
+                    "manager_id",
+                    "primary_contact_specialist_id",
+                    "current_stage_id",
+                    "primary_contact_id",
+                    "notes",
+                    "current_stage_deadline",
+                    "stage_checklist_total",
+                    "stage_checklist_completed",
+                ),
+                key=str,
+            ),
+            "checklist": sorted(
+                LeadChecklistValue.objects.filter(lead__in=leads).values_list(
+                    "lead__organization_id", "checklist_item_id", "is_completed"
+                )
+            ),
+            "organizations": sorted(
+                CampaignOrganization.objects.filter(campaign=self.campaign).values_list("organization_id", flat=True)
+            ),
+            "tasks": sorted(
+                LeadSubfunnel.objects.filter(lead__in=leads).values_list(
+                    "campaign_subfunnel_id",
+                    "lead__organization_id",
+                    "assignee_id",
+                    "current_template_stage_id",
+                    "status",
+                    "is_available",
+                    "checklist_total",
+                ),
+                key=str,
+            ),
+            "task_checklist": sorted(
+                LeadSubfunnelChecklistValue.objects.filter(lead_subfunnel__lead__in=leads).values_list(
+                    "lead_subfunnel__campaign_subfunnel_id",
+                    "lead_subfunnel__lead__organization_id",
+                    "template_item_id",
+                    "assignee_id",
+                ),
+                key=str,
+            ),
+        }
+
+    def run_link(self, link, organization_ids, **kwargs):
+        errors = []
+        result = link(self.campaign, organization_ids, errors, **kwargs)
+        return {**result, "linked_ids": sorted(result["linked_ids"]), "errors": errors}
+
+    def test_matches_per_organization_implementation(self):
+        organization_ids = [
+            self.new_a.id,
+            self.new_b.id,
+            self.existing.id,
+            self.on_entry.id,
+            self.outside.id,
+            999999,
+            self.new_b.id,
+            self.outside.id,
+        ]
+        scenarios = {
+            "все регионы кампании": {},
+            "регион задачи": {"campaign_region_id": self.bare_region.id},
+            "чужой регион задачи": {"campaign_region_id": 999999},
+            "передача с контактами": {
+                "organization_contact_map": {
+                    self.new_a.id: self.contact_a.id,
+                    self.existing.id: self.foreign_contact.id,
+                },
+                "source_lead_id": self.source_lead.id,
+                "source_transfer_comment": " уточнить потребность ",
+            },
+            "лид-источник не найден": {"source_lead_id": 999999},
+        }
+        for name, kwargs in scenarios.items():
+            with self.subTest(name):
+                legacy = state_after(
+                    lambda: self.run_link(legacy_link_orgs_to_collect_campaign, organization_ids, **kwargs),
+                    self.snapshot,
+                )
+                current = state_after(
+                    lambda: self.run_link(_link_orgs_to_collect_campaign, organization_ids, **kwargs),
+                    self.snapshot,
+                )
+                self.assertEqual(current, legacy)
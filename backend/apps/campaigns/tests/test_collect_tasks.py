@@ -0,0 +1,121 @@
+from django.test import TestCase
+
+from apps.campaigns.collect_tasks import _sync_region_tasks
+from apps.campaigns.models import CampaignFunnel, CampaignRegion, CampaignSubfunnel, LeadSubfunnel
+from apps.funnels.models import SubfunnelTemplate, SubfunnelTemplateBinding, TaskTemplateStage
+
+from .equivalence import state_after
+from .factories import make_admin, make_campaign, make_funnel, make_regions
+from .legacy_collect import legacy_sync_region_tasks
+
+Binding = SubfunnelTemplateBinding.BindingType
+
+
+class RegionTaskSyncEquivalenceTests(TestCase):
+    """Синхронизация задач регионов разностью множеств совпадает с прежней построчной."""
+
+    @classmethod
+    def setUpTestData(cls):
+        assignee = make_admin("assignee")
+        regions = make_regions(3)
+        cls.funnel, stages = make_funnel(stages=5)
+        collect_stage = stages[1]
+        collect_stage.is_collect_stage = True
+        collect_stage.save()
+        other_funnel, other_stages = make_funnel("Без сбора", stages=2)
+
+        cls.campaign, _ = make_campaign(funnel=cls.funnel, stage=stages[0], regions=regions, leads=0)
+        CampaignFunnel.objects.create(campaign=cls.campaign, funnel=other_funnel)
+        cls.regions = [CampaignRegion.objects.create(campaign=cls.campaign, region=region) for region in regions]
+
+        template = SubfunnelTemplate.objects.create(name="Поиск", slug="search")
+        for order in (1, 0):
+            TaskTemplateStage.objects.create(template=template, name=f"Этап {order}", order=order)
+        bare_template = SubfunnelTemplate.objects.create(name="Без этапов", slug="bare")
+        canonical = SubfunnelTemplate.objects.create(name="Сбор", slug="lead-search-and-capture")
+
+        def subfunnel(template, funnel=cls.funnel, is_active=True, assignee=None, **binding):
+            return CampaignSubfunnel.objects.create(
+                campaign=cls.campaign,
+                funnel=funnel,
+                template=template,
+                is_active=is_active,
+                default_assignee=assignee,
+                binding=(
+                    SubfunnelTemplateBinding.objects.create(funnel=funnel, template=template, **binding)
+                    if binding
+                    else None
+                ),
+            )
+
+        cls.subfunnels = {
+            "к стадии сбора": subfunnel(
+                template, assignee=assignee, binding_type=Binding.STAGE, target_stage=collect_stage
+            ),
+            "к другой стадии": subfunnel(template, binding_type=Binding.STAGE, target_stage=stages[3]),
+            "к пункту стадии сбора": subfunnel(
+                bare_template, binding_type=Binding.CHECKLIST_ITEM, target_stage=collect_stage
+            ),
+            "диапазон со сбором": subfunnel(
+                template, binding_type=Binding.STAGE_RANGE_CHECKLIST, from_stage=stages[0], to_stage=stages[2]
+            ),
+            "диапазон без сбора": subfunnel(
+                template, binding_type=Binding.STAGE_RANGE_CHECKLIST, from_stage=stages[2], to_stage=stages[4]
+            ),
+            "незакрытый диапазон": subfunnel(
+                template, binding_type=Binding.STAGE_RANGE_CHECKLIST, from_stage=stages[0]
+            ),
+            "канонический без привязки": subfunnel(canonical),
+            "без привязки": subfunnel(bare_template),
+            "неактивная": subfunnel(
+                template, is_active=False, binding_type=Binding.STAGE, target_stage=collect_stage
+            ),
+            "воронка без сбора": subfunnel(
+                template, funnel=other_funnel, binding_type=Binding.STAGE, target_stage=other_stages[0]
+            ),
+        }
+        # Уже существующие задачи: подходящая (в работе — не должна измениться) и лишние
+        for name, status in (
+            ("к стадии сбора", LeadSubfunnel.Status.IN_PROGRESS),
+            ("без привязки", LeadSubfunnel.Status.BACKLOG),
+            ("неактивная", LeadSubfunnel.Status.BACKLOG),
+        ):
+            LeadSubfunnel.objects.create(
+                campaign_subfunnel=cls.subfunnels[name], campaign_region=cls.regions[0], status=status
+            )
+
+    def snapshot(self):
+        return sorted(
+            LeadSubfunnel.objects.filter(campaign_region__campaign=self.campaign).values_list(
+                "campaign_subfunnel_id",
+                "campaign_region_id",
+                "assignee_id",
+                "current_template_stage_id",
+                "status",
+                "is_available",
+                "checklist_total",
+            ),
+            key=str,
+        )
+
+    def test_matches_per_task_implementation(self):
+        def retire_subfunnel():
+            self.subfunnels["диапазон со сбором"].is_active = False
+            self.subfunnels["диапазон со сбором"].save()
+            CampaignRegion.objects.filter(pk=self.regions[2].pk).delete()
+
+        scenarios = {
+            "первая синхронизация": lambda sync: sync(self.campaign),
+            "повторный запуск": lambda sync: (sync(self.campaign), sync(self.campaign)),
+            "подворонка отключена, регион удалён": lambda sync: (
+                sync(self.campaign),
+                retire_subfunnel(),
+                sync(self.campaign),
+            ),
+        }
+        for name, scenario in scenarios.items():
+            with self.subTest(name):
+                _, legacy = state_after(lambda: scenario(legacy_sync_region_tasks), self.snapshot)
+                _, current = state_after(lambda: scenario(_sync_region_tasks), self.snapshot)
+                self.assertEqual(current, legacy)
+                self.assertTrue(current)
@@ -0,0 +1,113 @@
+import base64
+import json
+
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.campaigns.keyset import encode_cursor
+from apps.campaigns.models import Lead
+from apps.organizations.models import Contact, Organization
+
+from .factories import make_admin, make_campaign, make_funnel, make_regions
+
+
+def _raw_cursor(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+
+
+class KeysetPaginationTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_admin()
+        funnel, stages = make_funnel()
+        cls.campaign, _ = make_campaign(funnel=funnel, stage=stages[0], regions=make_regions(2), leads=7)
+        # Все лиды созданы «в одну микросекунду»: порядок решает только id
+        Lead.objects.update(created_at=timezone.now())
+        for i in range(5):
+            organization = Organization.objects.create(name="Одинаковое название")
+            for current in (True, False):
+                Contact.objects.create(
+                    organization=organization, last_name="Петров", first_name="Иван", current=current
+                )
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def walk(self, url):
+        """Все страницы по next: id строк в порядке выдачи."""
+        ids = []
+        pages = 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.content)
+            body = response.json()
+            ids.extend(row["id"] for row in body["results"])
+            url = body["next"]
+            pages += 1
+            self.assertLess(pages, 50)
+        return ids
+
+    def test_leads_with_equal_created_at_are_paged_by_id(self):
+        ids = self.walk("/api/leads/?cursor=&page_size=2")
+        expected = list(Lead.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_organizations_with_equal_names_are_paged_by_id(self):
+        ids = self.walk("/api/organizations/?cursor=&page_size=2")
+        expected = list(Organization.objects.order_by("name", "id").values_list("id", flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_contacts_with_ties_on_several_keys(self):
+        ids = self.walk("/api/contacts/?cursor=&page_size=3")
+        expected = list(
+            Contact.objects.order_by("-current", "last_name", "first_name", "id").values_list("id", flat=True)
+        )
+        self.assertEqual(ids, expected)
+
+    def test_count_only_on_request(self):
+        body = self.client.get("/api/leads/?cursor=&page_size=2").json()
+        self.assertNotIn("count", body)
+        body = self.client.get("/api/leads/?cursor=&page_size=2&with_count=1").json()
+        self.assertEqual(body["count"], 7)
+        self.assertNotIn("with_count", body["next"])
+
+    def test_invalid_cursors_are_rejected(self):
+        lead = Lead.objects.order_by("id").first()
+        for cursor in (
+            "не-курсор",
+            "!!!",
+            base64.urlsafe_b64encode(b"{not json").decode(),
+            _raw_cursor({"created_at": "2026-01-01"}),
+            _raw_cursor([lead.created_at.isoformat()]),
+            _raw_cursor([lead.created_at.isoformat(), lead.id, 1]),
+            _raw_cursor(["вчера", lead.id]),
+            _raw_cursor([lead.created_at.isoformat(), "abc"]),
+        ):
+            with self.subTest(cursor=cursor):
+                response = self.client.get("/api/leads/", {"cursor": cursor})
+                self.assertEqual(response.status_code, 400, response.content)
+
+    def test_tampered_cursor_values_are_rejected(self):
+        """Список или объект на месте значения ключа — 400, а не падение в lookup поля."""
+        lead = Lead.objects.order_by("id").first()
+        organization = Organization.objects.order_by("id").first()
+        contact = Contact.objects.order_by("id").first()
+        cases = (
+            ("/api/leads/", [[lead.created_at.isoformat()], lead.id]),
+            ("/api/leads/", [lead.created_at.isoformat(), {"id": lead.id}]),
+            ("/api/organizations/", [organization.name, [organization.id]]),
+            ("/api/organizations/", [{"name": organization.name}, organization.id]),
+            ("/api/contacts/", [True, ["Петров"], "Иван", contact.id]),
+            ("/api/contacts/", [True, "Петров", "Иван", {"$gt": 0}]),
+        )
+        for url, values in cases:
+            with self.subTest(url=url, values=values):
+                response = self.client.get(url, {"cursor": _raw_cursor(values)})
+                self.assertEqual(response.status_code, 400, response.content)
+
+    def test_cursor_of_last_row_returns_empty_page(self):
+        lead = Lead.objects.order_by("created_at", "id").first()
+        cursor = encode_cursor([lead.created_at, lead.id])
+        body = self.client.get("/api/leads/", {"cursor": cursor}).json()
+        self.assertEqual(body["results"], [])
+        self.assertIsNone(body["next"])
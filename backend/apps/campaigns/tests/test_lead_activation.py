@@ -0,0 +1,169 @@
+from datetime import date
+
+from django.test import TestCase
+
+from apps.campaigns.lead_activation import activate_campaign_leads
+from apps.campaigns.models import (
+    CampaignSubfunnel,
+    Lead,
+    LeadChecklistValue,
+    LeadSubfunnel,
+    LeadSubfunnelChecklistValue,
+    QueueStageDeadline,
+)
+from apps.funnels.models import (
+    StageChecklistItem,
+    SubfunnelTemplate,
+    SubfunnelTemplateBinding,
+    SubfunnelTemplateItem,
+    TaskTemplateStage,
+)
+from apps.organizations.models import Organization
+
+from .equivalence import state_after
+from .factories import make_admin, make_campaign, make_funnel, make_regions
+from .legacy_activation import legacy_activate_leads
+
+
+class LeadActivationEquivalenceTests(TestCase):
+    """Активация лидов на уровне кампании оставляет то же состояние, что прежний цикл по лидам."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.specialist = make_admin("specialist")
+        cls.assignee = make_admin("assignee")
+        cls.item_specialist = make_admin("item_specialist")
+        regions = make_regions(2)
+
+        # Воронка со стадией сбора первой: входная — вторая, у неё специалист
+        cls.funnel, stages = make_funnel(stages=4)
+        stages[0].is_collect_stage = True
+        stages[0].save()
+        stages[1].primary_contact_specialist = cls.specialist
+        stages[1].save()
+        # Только отказная стадия и стадия сбора: входная — стадия сбора (запасной вариант)
+        fallback_funnel, fallback_stages = make_funnel("Сбор", stages=2)
+        fallback_stages[0].is_rejection = True
+        fallback_stages[0].save()
+        fallback_stages[1].is_collect_stage = True
+        fallback_stages[1].save()
+        # Без входной стадии: лиды остаются без стадии, но получают задачи
+        closed_funnel, closed_stages = make_funnel("Отказ", stages=1)
+        closed_stages[0].is_rejection = True
+        closed_stages[0].save()
+        for stage in (*stages, *fallback_stages):
+            StageChecklistItem.objects.create(stage=stage, text=f"{stage.name}: пункт", order=1)
+
+        cls.campaign, queue = make_campaign(funnel=cls.funnel, stage=None, regions=regions, leads=4)
+        queue.start_date = date(2026, 3, 2)
+        queue.save()
+        for stage, days in zip(stages, (2, 5, 9, 14)):
+            QueueStageDeadline.objects.create(queue=queue, funnel_stage=stage, deadline_days=days)
+        leads = list(Lead.objects.filter(campaign=cls.campaign).order_by("id"))
+        leads[0].primary_contact_specialist = cls.assignee
+        leads[0].save()
+        leads[1].current_stage = stages[2]
+        leads[1].save()
+        for funnel in (fallback_funnel, closed_funnel):
+            Lead.objects.create(
+                campaign=cls.campaign,
+                organization=Organization.objects.create(name=f"Организация: {funnel.name}", region=regions[0]),
+                funnel=funnel,
+                queue=queue,
+            )
+
+        staged_template = SubfunnelTemplate.objects.create(name="Звонок", slug="call")
+        for order in range(2):
+            TaskTemplateStage.objects.create(template=staged_template, name=f"Этап {order}", order=order)
+        SubfunnelTemplateItem.objects.create(template=staged_template, title="Позвонить", order=0)
+        SubfunnelTemplateItem.objects.create(
+            template=staged_template, title="Записать итог", order=1, default_specialist=cls.item_specialist
+        )
+        bare_template = SubfunnelTemplate.objects.create(name="Письмо", slug="letter")
+        SubfunnelTemplateItem.objects.create(template=bare_template, title="Отправить", order=0)
+
+        range_binding = SubfunnelTemplateBinding.objects.create(
+            funnel=cls.funnel,
+            template=staged_template,
+            binding_type=SubfunnelTemplateBinding.BindingType.STAGE_RANGE_CHECKLIST,
+            from_stage=stages[1],
+            to_stage=stages[2],
+        )
+        late_binding = SubfunnelTemplateBinding.objects.create(
+            funnel=cls.funnel,
+            template=staged_template,
+            binding_type=SubfunnelTemplateBinding.BindingType.STAGE_RANGE_CHECKLIST,
+            from_stage=stages[3],
+            to_stage=stages[3],
+        )
+        CampaignSubfunnel.objects.create(
+            campaign=cls.campaign,
+            funnel=cls.funnel,
+            template=staged_template,
+            binding=range_binding,
+            default_assignee=cls.assignee,
+        )
+        CampaignSubfunnel.objects.create(
+            campaign=cls.campaign, funnel=cls.funnel, template=staged_template, binding=late_binding
+        )
+        bare = CampaignSubfunnel.objects.create(campaign=cls.campaign, funnel=cls.funnel, template=bare_template)
+        CampaignSubfunnel.objects.create(
+            campaign=cls.campaign, funnel=cls.funnel, template=staged_template, is_active=False
+        )
+        # Задача, созданная раньше без этапа, — получает первый этап шаблона
+        LeadSubfunnel.objects.create(campaign_subfunnel=bare, lead=leads[2], status=LeadSubfunnel.Status.IN_PROGRESS)
+
+    def snapshot(self):
+        leads = Lead.objects.filter(campaign=self.campaign)
+        return {
+            "leads": list(
+                leads.order_by("id").values_list(
+                    "id",
+                    "current_stage_id",
+                    "primary_contact_specialist_id",
+                    "current_stage_deadline",
+                    "stage_checklist_total",
+                    "stage_checklist_completed",
+                )
+            ),
+            "checklist": sorted(
+                LeadChecklistValue.objects.filter(lead__in=leads).values_list(
+                    "lead_id", "checklist_item_id", "is_completed"
+                )
+            ),
+            # Этапы шаблонов — по (шаблон, порядок): стандартные этапы создаются в каждом прогоне
+            "template_stages": sorted(
+                TaskTemplateStage.objects.values_list("template_id", "order", "name", "is_terminal")
+            ),
+            "tasks": sorted(
+                LeadSubfunnel.objects.filter(lead__in=leads).values_list(
+                    "campaign_subfunnel_id",
+                    "lead_id",
+                    "assignee_id",
+                    "current_template_stage__template_id",
+                    "current_template_stage__order",
+                    "status",
+                    "is_available",
+                    "checklist_total",
+                    "checklist_completed",
+                ),
+                key=str,
+            ),
+            "task_checklist": sorted(
+                LeadSubfunnelChecklistValue.objects.filter(lead_subfunnel__lead__in=leads).values_list(
+                    "lead_subfunnel__campaign_subfunnel_id",
+                    "lead_subfunnel__lead_id",
+                    "template_item_id",
+                    "assignee_id",
+                    "is_completed",
+                ),
+                key=str,
+            ),
+        }
+
+    def test_matches_per_lead_implementation(self):
+        _, legacy_state = state_after(lambda: legacy_activate_leads(self.campaign), self.snapshot)
+        activated, state = state_after(lambda: activate_campaign_leads(self.campaign), self.snapshot)
+        self.assertEqual(state, legacy_state)
+        # Переведены все лиды без стадии, кроме воронки без входной стадии
+        self.assertEqual(activated, 4)
@@ -0,0 +1,135 @@
+from datetime import date
+
+from rest_framework.test import APITestCase
+
+from apps.campaigns.models import (
+    CampaignSubfunnel,
+    Lead,
+    LeadChecklistValue,
+    LeadSubfunnel,
+    QueueStageDeadline,
+)
+from apps.funnels.models import StageChecklistItem, SubfunnelTemplate, SubfunnelTemplateBinding
+from apps.organizations.models import Organization
+
+from .equivalence import state_after
+from .factories import make_admin, make_campaign, make_funnel, make_regions
+from .legacy_lead_stage import legacy_bulk_move_to_stage
+
+
+class LeadBulkStageEquivalenceTests(APITestCase):
+    """Set-based перевод лидов на стадию оставляет то же состояние, что прежний цикл по лидам."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_admin()
+        cls.specialist = make_admin("specialist")
+        cls.funnel, cls.stages = make_funnel(stages=4)
+        cls.stages[2].primary_contact_specialist = cls.specialist
+        cls.stages[2].save()
+        for stage in cls.stages:
+            for order in (1, 2):
+                StageChecklistItem.objects.create(stage=stage, text=f"{stage.name}: пункт {order}", order=order)
+        regions = make_regions(2)
+        cls.campaign, queue = make_campaign(funnel=cls.funnel, stage=cls.stages[0], regions=regions, leads=6)
+        queue.start_date = date(2026, 3, 2)
+        queue.save()
+        for stage, days in zip(cls.stages, (2, 5, 9, 14)):
+            QueueStageDeadline.objects.create(queue=queue, funnel_stage=stage, deadline_days=days)
+
+        leads = list(Lead.objects.filter(campaign=cls.campaign).order_by("id"))
+        # Разные исходные стадии, без стадии и с уже назначенным специалистом; save() — чтобы
+        # чек-листы, счётчики и сроки исходного состояния были согласованы, как в рабочей базе
+        for lead, stage in zip(leads[1:4], (cls.stages[1], cls.stages[2], None)):
+            lead.current_stage = stage
+            lead.save()
+        leads[4].primary_contact_specialist = cls.user
+        leads[4].save()
+
+        template = SubfunnelTemplate.objects.create(name="Звонок", slug="call")
+        bindings = [
+            SubfunnelTemplateBinding.objects.create(
+                funnel=cls.funnel,
+                template=template,
+                binding_type=SubfunnelTemplateBinding.BindingType.STAGE_RANGE_CHECKLIST,
+                from_stage=cls.stages[1],
+                to_stage=cls.stages[2],
+            ),
+            SubfunnelTemplateBinding.objects.create(
+                funnel=cls.funnel,
+                template=template,
+                binding_type=SubfunnelTemplateBinding.BindingType.STAGE_RANGE_CHECKLIST,
+                from_stage=cls.stages[1],
+            ),
+            SubfunnelTemplateBinding.objects.create(
+                funnel=cls.funnel,
+                template=template,
+                binding_type=SubfunnelTemplateBinding.BindingType.STAGE,
+                target_stage=cls.stages[3],
+            ),
+        ]
+        for binding in bindings:
+            subfunnel = CampaignSubfunnel.objects.create(
+                campaign=cls.campaign, funnel=cls.funnel, template=template, binding=binding
+            )
+            LeadSubfunnel.objects.bulk_create(
+                [
+                    LeadSubfunnel(campaign_subfunnel=subfunnel, lead=lead, is_available=bool(i % 2))
+                    for i, lead in enumerate(leads)
+                ]
+            )
+
+        other_funnel, other_stages = make_funnel("Другая воронка")
+        cls.foreign = Lead.objects.create(
+            campaign=cls.campaign,
+            organization=Organization.objects.create(name="Чужая воронка", region=regions[0]),
+            funnel=other_funnel,
+            current_stage=other_stages[0],
+        )
+        cls.ids = [lead.pk for lead in leads] + [cls.foreign.pk]
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def snapshot(self):
+        """Состояние лидов, чек-листов и задач. Журнал стадий не сравнивается: прежний цикл его не вёл."""
+        leads = Lead.objects.filter(id__in=self.ids).order_by("id")
+        return {
+            "leads": list(
+                leads.values_list(
+                    "id",
+                    "current_stage_id",
+                    "primary_contact_specialist_id",
+                    "current_stage_deadline",
+                    "stage_checklist_total",
+                    "stage_checklist_completed",
+                )
+            ),
+            "checklist": sorted(
+                LeadChecklistValue.objects.filter(lead__in=leads).values_list(
+                    "lead_id", "checklist_item_id", "is_completed"
+                )
+            ),
+            "subfunnels": sorted(
+                LeadSubfunnel.objects.filter(lead__in=leads).values_list("id", "is_available")
+            ),
+        }
+
+    def move(self, target_stage):
+        response = self.client.post(
+            "/api/leads/bulk-update/",
+            {"ids": self.ids, "current_stage": target_stage.id if target_stage else None},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_matches_per_lead_implementation(self):
+        for target_stage in (*self.stages, None):
+            with self.subTest(stage=target_stage and target_stage.name):
+                legacy_response, legacy_state = state_after(
+                    lambda: legacy_bulk_move_to_stage(self.ids, target_stage), self.snapshot
+                )
+                response, state = state_after(lambda: self.move(target_stage), self.snapshot)
+                self.assertEqual(state, legacy_state)
+                self.assertEqual(response, legacy_response)
@@ -0,0 +1,99 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.campaigns.models import CampaignSubfunnel, Lead, LeadChecklistValue, LeadInteraction, LeadSubfunnel
+from apps.funnels.models import StageChecklistItem, SubfunnelTemplate, TaskTemplateStage
+from apps.organizations.models import Contact, OrganizationTag
+
+from .factories import make_admin, make_campaign, make_funnel, make_regions
+
+
+class LeadListQueryCountTests(APITestCase):
+    """Число запросов списка лидов не зависит от числа лидов на странице."""
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.user = make_admin()
+        specialist = User.objects.create_user(username="specialist", first_name="Анна", last_name="Иванова")
+        regions = make_regions(2)
+        cls.funnel, stages = make_funnel()
+        for order in range(3):
+            StageChecklistItem.objects.create(stage=stages[0], text=f"Пункт {order}", order=order)
+        template = SubfunnelTemplate.objects.create(name="Письмо", slug="letter")
+        template_stage = TaskTemplateStage.objects.create(template=template, name="Подготовка", order=1)
+        tags = [
+            OrganizationTag.objects.create(name=f"Тег {i}", slug=f"tag-{i}") for i in range(3)
+        ]
+        cls.campaigns = {}
+        for size in (5, 50):
+            campaign, _ = make_campaign(
+                f"Кампания {size}", funnel=cls.funnel, stage=stages[0], regions=regions, leads=size,
+                manager=cls.user,
+            )
+            cls.campaigns[size] = campaign
+            subfunnel = CampaignSubfunnel.objects.create(campaign=campaign, funnel=cls.funnel, template=template)
+            for i, lead in enumerate(Lead.objects.filter(campaign=campaign).select_related("organization")):
+                contact = Contact.objects.create(organization=lead.organization, last_name=f"Контакт {i}")
+                lead.organization.tags.add(tags[i % 3])
+                Lead.objects.filter(pk=lead.pk).update(
+                    primary_contact=contact, primary_contact_specialist=specialist, region=regions[0]
+                )
+                lead.tags.add(tags[i % 3], tags[(i + 1) % 3])
+                LeadChecklistValue.objects.filter(lead=lead, checklist_item__order=0).update(
+                    is_completed=True, completed_at=timezone.now()
+                )
+                for days in (1, 2):
+                    LeadInteraction.objects.create(
+                        lead=lead,
+                        contact=contact,
+                        contact_person=f"Контакт {i}",
+                        date=timezone.now() - timedelta(days=days),
+                        channel=LeadInteraction.Channel.PHONE,
+                    )
+                LeadSubfunnel.objects.create(
+                    campaign_subfunnel=subfunnel,
+                    lead=lead,
+                    current_template_stage=template_stage,
+                    assignee=specialist,
+                )
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def count_queries(self, size, params=""):
+        campaign = self.campaigns[size]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(f"/api/leads/?campaign={campaign.id}&page_size=100{params}")
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual(len(results), size)
+        return len(ctx), results
+
+    def test_seeded_rows_fill_every_nested_field(self):
+        _, results = self.count_queries(5)
+        for row in results:
+            self.assertEqual(len(row["tags"]), 2)
+            self.assertTrue(row["organization_tags"])
+            self.assertEqual(len(row["checklist_summary"]), 3)
+            self.assertEqual(len(row["tasks_summary"]), 1)
+            self.assertIsNotNone(row["last_interaction"])
+            self.assertIsNotNone(row["primary_contact"])
+
+    def test_page_mode_query_count_is_constant(self):
+        self.assertEqual(self.count_queries(5)[0], self.count_queries(50)[0])
+
+    def test_cursor_mode_query_count_is_constant(self):
+        self.assertEqual(self.count_queries(5, "&cursor=")[0], self.count_queries(50, "&cursor=")[0])
+
+    def test_tag_filter_query_count_is_constant(self):
+        tag_ids = ",".join(str(pk) for pk in OrganizationTag.objects.values_list("pk", flat=True))
+        self.assertEqual(
+            self.count_queries(5, f"&cursor=&tags={tag_ids}")[0],
+            self.count_queries(50, f"&cursor=&tags={tag_ids}")[0],
+        )
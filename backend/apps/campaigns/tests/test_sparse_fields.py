@@ -0,0 +1,63 @@
+from rest_framework.test import APITestCase
+
+from apps.campaigns.serializers import LeadListSerializer
+
+from .factories import make_admin, make_campaign, make_funnel, make_regions
+
+
+class SparseFieldsTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_admin()
+        funnel, stages = make_funnel()
+        cls.campaign, _ = make_campaign(funnel=funnel, stage=stages[0], regions=make_regions(1), leads=2)
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def lead_rows(self, **params):
+        response = self.client.get("/api/leads/", params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()["results"]
+
+    def test_fields_selects_listed_fields_and_id(self):
+        rows = self.lead_rows(fields="organization_name,tasks_summary")
+        self.assertEqual(set(rows[0]), {"id", "organization_name", "tasks_summary"})
+
+    def test_unknown_names_in_fields_are_ignored(self):
+        rows = self.lead_rows(fields="organization_name,нет_такого,  ,current_stage_name")
+        self.assertEqual(set(rows[0]), {"id", "organization_name", "current_stage_name"})
+
+    def test_fields_with_only_unknown_names_leaves_id(self):
+        self.assertEqual(set(self.lead_rows(fields="bogus")[0]), {"id"})
+
+    def test_omit_ignores_unknown_names(self):
+        rows = self.lead_rows(omit="bogus,tasks_summary")
+        self.assertEqual(set(rows[0]), set(LeadListSerializer.Meta.fields) - {"tasks_summary"})
+
+    def test_empty_fields_means_all_fields(self):
+        rows = self.lead_rows(fields=",")
+        self.assertEqual(set(rows[0]), set(LeadListSerializer.Meta.fields))
+
+    def test_id_cannot_be_omitted(self):
+        self.assertIn("id", self.lead_rows(omit="id")[0])
+
+    def test_unknown_expand_keys_are_ignored(self):
+        url = f"/api/campaigns/{self.campaign.id}/"
+        body = self.client.get(url, {"expand": "bogus"}).json()
+        self.assertNotIn("leads", body)
+        self.assertNotIn("campaign_regions", body)
+        body = self.client.get(url, {"expand": "LEADS,bogus"}).json()
+        self.assertEqual(len(body["leads"]), 2)
+        self.assertNotIn("organizations", body)
+        body = self.client.get(url, {"expand": "all"}).json()
+        self.assertIn("organizations", body)
+        self.assertIn("campaign_regions", body)
+
+    def test_selection_does_not_apply_to_writes(self):
+        lead_id = self.lead_rows()[0]["id"]
+        response = self.client.patch(
+            f"/api/leads/{lead_id}/?fields=bogus", {"notes": "перезвонить"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.json()["notes"], "перезвонить")
@@ -0,0 +1,122 @@
+from datetime import date
+
+from django.test import TestCase
+
+from apps.campaigns.models import CampaignQueue, Lead, QueueStageDeadline, QueueStageDeadlineDate
+from apps.campaigns.stage_deadlines import rebuild_stage_deadline_dates
+from apps.reference.business_calendar import add_business_days, reset_calendar_cache
+from apps.reference.models import ProductionCalendar
+
+from .factories import make_campaign, make_funnel, make_regions
+
+
+class StageDeadlineRebuildTests(TestCase):
+    """Даты дедлайнов пересобираются после коммита при смене очереди, сроков стадий и календаря."""
+
+    @classmethod
+    def setUpTestData(cls):
+        regions = make_regions(1)
+        cls.funnel, cls.stages = make_funnel(stages=3)
+        for stage, days in zip(cls.stages, (3, 0, 10)):
+            stage.deadline_days = days
+            stage.save()
+        cls.campaign, cls.queue = make_campaign(funnel=cls.funnel, stage=cls.stages[0], regions=regions, leads=2)
+        cls.queue.start_date = date(2026, 3, 2)
+        cls.queue.save()
+        # Очередь другой кампании с той же воронкой и очередь без даты старта
+        cls.other_campaign, cls.other_queue = make_campaign(
+            "Соседняя", funnel=cls.funnel, stage=cls.stages[2], regions=regions, leads=1
+        )
+        cls.other_queue.start_date = date(2026, 4, 1)
+        cls.other_queue.save()
+        cls.undated_queue = CampaignQueue.objects.create(campaign=cls.campaign, queue_number=2, name="Очередь 2")
+        rebuild_stage_deadline_dates()
+
+    def setUp(self):
+        reset_calendar_cache()
+        self.addCleanup(reset_calendar_cache)
+
+    def dates(self, queue):
+        return dict(
+            QueueStageDeadlineDate.objects.filter(queue=queue).values_list("funnel_stage_id", "deadline_date")
+        )
+
+    def expected(self, queue, overrides=None):
+        queue.refresh_from_db()
+        days = {stage.id: stage.deadline_days for stage in self.stages}
+        days.update({stage.id: value for stage, value in (overrides or {}).items()})
+        return {
+            stage_id: add_business_days(queue.start_date, value) for stage_id, value in days.items() if value
+        }
+
+    def lead_deadlines(self, queue):
+        return set(Lead.objects.filter(queue=queue).values_list("current_stage_deadline", flat=True))
+
+    def test_rebuild_fills_dates_and_lead_deadlines(self):
+        self.assertEqual(self.dates(self.queue), self.expected(self.queue))
+        self.assertEqual(self.dates(self.other_queue), self.expected(self.other_queue))
+        self.assertEqual(self.dates(self.undated_queue), {})
+        self.assertEqual(self.lead_deadlines(self.queue), {add_business_days(date(2026, 3, 2), 3)})
+        self.assertEqual(self.lead_deadlines(self.other_queue), {add_business_days(date(2026, 4, 1), 10)})
+
+    def test_queue_start_date_change(self):
+        before = self.dates(self.other_queue)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.queue.start_date = date(2026, 5, 4)
+            self.queue.save()
+        expected = self.expected(self.queue)
+        self.assertEqual(self.dates(self.queue), expected)
+        self.assertEqual(self.lead_deadlines(self.queue), {expected[self.stages[0].id]})
+        self.assertEqual(self.dates(self.other_queue), before)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.queue.start_date = None
+            self.queue.save()
+        self.assertEqual(self.dates(self.queue), {})
+        self.assertEqual(self.lead_deadlines(self.queue), {None})
+
+    def test_override_add_change_delete(self):
+        first, second = self.stages[0], self.stages[1]
+        with self.captureOnCommitCallbacks(execute=True):
+            override = QueueStageDeadline.objects.create(queue=self.queue, funnel_stage=first, deadline_days=7)
+            QueueStageDeadline.objects.create(queue=self.queue, funnel_stage=second, deadline_days=4)
+        expected = self.expected(self.queue, {first: 7, second: 4})
+        self.assertEqual(self.dates(self.queue), expected)
+        self.assertEqual(self.lead_deadlines(self.queue), {expected[first.id]})
+        # Переопределение очереди не задевает другую кампанию с той же воронкой
+        self.assertEqual(self.dates(self.other_queue), self.expected(self.other_queue))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            override.deadline_days = 0
+            override.save()
+        self.assertNotIn(first.id, self.dates(self.queue))
+        self.assertEqual(self.lead_deadlines(self.queue), {None})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            override.delete()
+        self.assertEqual(self.dates(self.queue), self.expected(self.queue, {second: 4}))
+        self.assertEqual(self.lead_deadlines(self.queue), {add_business_days(date(2026, 3, 2), 3)})
+
+    def test_stage_deadline_days_change_rebuilds_queues_of_funnel(self):
+        stage = self.stages[2]
+        with self.captureOnCommitCallbacks(execute=True):
+            stage.deadline_days = 15
+            stage.save()
+        for queue in (self.queue, self.other_queue):
+            with self.subTest(queue=queue.name):
+                self.assertEqual(self.dates(queue)[stage.id], add_business_days(queue.start_date, 15))
+        self.assertEqual(self.lead_deadlines(self.other_queue), {add_business_days(date(2026, 4, 1), 15)})
+
+    def test_calendar_change_rebuilds_all_queues(self):
+        before = add_business_days(date(2026, 3, 2), 3)
+        with self.captureOnCommitCallbacks(execute=True):
+            ProductionCalendar.objects.create(date=date(2026, 3, 3), day_type=ProductionCalendar.DayType.HOLIDAY)
+        after = add_business_days(date(2026, 3, 2), 3)
+        self.assertEqual(after, date(2026, 3, 6))
+        self.assertNotEqual(after, before)
+        self.assertEqual(self.dates(self.queue), self.expected(self.queue))
+        self.assertEqual(self.lead_deadlines(self.queue), {after})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ProductionCalendar.objects.filter(date=date(2026, 3, 3)).delete()
+        self.assertEqual(self.lead_deadlines(self.queue), {before})
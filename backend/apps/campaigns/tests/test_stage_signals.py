@@ -0,0 +1,66 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from apps.campaigns.models import Lead, LeadChecklistValue
+from apps.funnels.models import StageChecklistItem
+
+from .factories import make_campaign, make_funnel, make_regions
+
+STAGE_HANDLERS = (
+    "apps.campaigns.stage_checklists.materialize_stage_checklist",
+    "apps.campaigns.checklist_counters.sync_lead_checklist_counter",
+    "apps.campaigns.stage_deadlines.sync_lead_stage_deadline",
+)
+
+
+class LeadStageSignalsTests(TestCase):
+    def setUp(self):
+        self.funnel, self.stages = make_funnel()
+        for stage in self.stages:
+            StageChecklistItem.objects.create(stage=stage, text=f"{stage.name}: пункт", order=1)
+        self.campaign, self.queue = make_campaign(
+            funnel=self.funnel, stage=self.stages[0], regions=make_regions(1), leads=1
+        )
+        self.lead = Lead.objects.get(campaign=self.campaign)
+
+    def patch_handlers(self):
+        patchers = [mock.patch(target) for target in STAGE_HANDLERS]
+        mocks = [patcher.start() for patcher in patchers]
+        for patcher in patchers:
+            self.addCleanup(patcher.stop)
+        return mocks
+
+    def test_full_save_without_stage_change_skips_stage_sync(self):
+        mocks = self.patch_handlers()
+        lead = Lead.objects.get(pk=self.lead.pk)
+        lead.notes = "перезвонить"
+        lead.save()
+        lead.save(update_fields=["current_stage", "notes"])
+        for handler in mocks:
+            self.assertFalse(handler.called, handler)
+
+    def test_stage_change_runs_stage_sync(self):
+        mocks = self.patch_handlers()
+        lead = Lead.objects.get(pk=self.lead.pk)
+        lead.current_stage = self.stages[1]
+        lead.save()
+        for handler in mocks:
+            self.assertEqual(handler.call_count, 1, handler)
+
+    def test_queue_change_syncs_deadline_only(self):
+        materialize, counter, deadline = self.patch_handlers()
+        lead = Lead.objects.get(pk=self.lead.pk)
+        lead.queue = None
+        lead.save()
+        self.assertFalse(materialize.called)
+        self.assertFalse(counter.called)
+        self.assertEqual(deadline.call_count, 1)
+
+    def test_stage_change_materializes_checklist(self):
+        lead = Lead.objects.get(pk=self.lead.pk)
+        lead.current_stage = self.stages[1]
+        lead.save()
+        self.assertTrue(
+            LeadChecklistValue.objects.filter(lead=lead, checklist_item__stage=self.stages[1]).exists()
+        )
@@ -0,0 +1,51 @@
+from django.test import TestCase
+
+from apps.campaigns.models import CampaignStats, Lead
+from apps.organizations.models import Organization
+
+from .factories import make_campaign, make_funnel, make_regions
+
+
+class CampaignStatsSignalsTests(TestCase):
+    def setUp(self):
+        self.regions = make_regions(3)
+        self.funnel, self.stages = make_funnel()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.campaign, _ = make_campaign(
+                funnel=self.funnel, stage=self.stages[0], regions=self.regions, leads=2
+            )
+        self.lead = Lead.objects.filter(campaign=self.campaign).order_by("id").first()
+
+    def stats(self):
+        return CampaignStats.objects.get(campaign=self.campaign)
+
+    def test_lead_save_without_aggregated_changes_is_not_scheduled(self):
+        lead = Lead.objects.get(pk=self.lead.pk)
+        lead.notes = "позвонить позже"
+        with self.captureOnCommitCallbacks() as callbacks:
+            lead.save()
+            lead.save(update_fields=["notes", "updated_at"])
+        self.assertEqual(callbacks, [])
+
+    def test_lead_demand_change_refreshes_stats(self):
+        lead = Lead.objects.get(pk=self.lead.pk)
+        lead.forecast_demand = 40
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            lead.save()
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(self.stats().demand_plan, 42)
+
+    def test_organization_region_change_refreshes_regions_count(self):
+        self.assertEqual(self.stats().regions_count, 2)
+        for organization in Organization.objects.filter(leads__campaign=self.campaign):
+            organization.region = self.regions[2]
+            with self.captureOnCommitCallbacks(execute=True):
+                organization.save()
+        self.assertEqual(self.stats().regions_count, 1)
+
+    def test_organization_save_without_region_change_is_not_scheduled(self):
+        organization = Organization.objects.get(pk=self.lead.organization_id)
+        organization.notes = "без изменений региона"
+        with self.captureOnCommitCallbacks() as callbacks:
+            organization.save()
+        self.assertEqual(callbacks, [])
@@ -0,0 +1,133 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from apps.campaigns.models import (
+    Campaign,
+    CampaignFunnel,
+    CampaignSubfunnel,
+    Lead,
+    LeadSubfunnel,
+    LeadSubfunnelChecklistValue,
+)
+from apps.funnels.models import (
+    SubfunnelTemplate,
+    SubfunnelTemplateBinding,
+    SubfunnelTemplateItem,
+    TaskTemplateStage,
+)
+from apps.organizations.models import Organization
+
+from .equivalence import state_after
+from .factories import make_admin, make_funnel
+
+LEADS = 1000
+TASKS_PER_LEAD = 5
+# Малый набор — задачи первых лидов; число запросов не должно зависеть от размера набора
+SMALL_LEADS = 2
+
+
+def statement_count(queries):
+    """
+    Число запросов; подряд идущие пакеты одного bulk_create (INSERT в ту же таблицу)
+    считаются одним — размер пакета в SQLite ограничен числом параметров запроса.
+    """
+    count, previous_insert = 0, None
+    for query in queries:
+        sql = query["sql"]
+        insert = sql.split(" (", 1)[0] if sql.startswith("INSERT INTO") else None
+        if insert is None or insert != previous_insert:
+            count += 1
+        previous_insert = insert
+    return count
+
+
+class TaskBulkActionsQueryCountTests(APITestCase):
+    """bulk-update и bulk-checklist выполняют одно и то же число запросов для 10 и 5 000 задач."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_admin()
+        cls.specialist = get_user_model().objects.create_user(username="specialist")
+        funnel, cls.stages = make_funnel()
+        campaign = Campaign.objects.create(name="Кампания")
+        CampaignFunnel.objects.create(campaign=campaign, funnel=funnel)
+        organizations = Organization.objects.bulk_create(
+            [Organization(name=f"Организация {i}") for i in range(LEADS)]
+        )
+        Lead.objects.bulk_create(
+            [
+                Lead(campaign=campaign, organization=organization, funnel=funnel, current_stage=cls.stages[0])
+                for organization in organizations
+            ]
+        )
+        template = SubfunnelTemplate.objects.create(name="Задача", slug="task")
+        cls.task_stages = [
+            TaskTemplateStage.objects.create(template=template, name=f"Этап {i}", order=i, is_terminal=i == 2)
+            for i in range(3)
+        ]
+        cls.item = SubfunnelTemplateItem.objects.create(template=template, title="Пункт")
+        subfunnels = [
+            CampaignSubfunnel.objects.create(
+                campaign=campaign,
+                funnel=funnel,
+                template=template,
+                binding=SubfunnelTemplateBinding.objects.create(
+                    funnel=funnel,
+                    template=template,
+                    binding_type=SubfunnelTemplateBinding.BindingType.STAGE,
+                    advance_lead_on_task_stage_forward=True,
+                ),
+            )
+            for _ in range(TASKS_PER_LEAD)
+        ]
+        tasks = LeadSubfunnel.objects.bulk_create(
+            [
+                LeadSubfunnel(campaign_subfunnel=subfunnel, lead=lead, current_template_stage=cls.task_stages[0])
+                for subfunnel in subfunnels
+                for lead in Lead.objects.all()
+            ]
+        )
+        LeadSubfunnelChecklistValue.objects.bulk_create(
+            [LeadSubfunnelChecklistValue(lead_subfunnel=task, template_item=cls.item) for task in tasks]
+        )
+        cls.ids = list(LeadSubfunnel.objects.values_list("id", flat=True))
+        small_leads = Lead.objects.order_by("id")[:SMALL_LEADS]
+        cls.small_ids = list(LeadSubfunnel.objects.filter(lead__in=small_leads).values_list("id", flat=True))
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def post(self, action, ids, payload):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(f"/api/lead-subfunnels/{action}/", {"ids": ids, **payload}, format="json")
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json(), statement_count(queries.captured_queries)
+
+    def counted_post(self, action, payload):
+        """Сначала малый набор (с откатом), затем все задачи — число запросов должно совпасть."""
+        small_queries, _ = state_after(lambda: self.post(action, self.small_ids, payload)[1], lambda: None)
+        body, queries = self.post(action, self.ids, payload)
+        self.assertEqual(
+            queries,
+            small_queries,
+            f"{action}: {queries} запросов на {len(self.ids)} задач и {small_queries} на {len(self.small_ids)}",
+        )
+        return body
+
+    def test_reassign(self):
+        self.assertEqual(len(self.ids), LEADS * TASKS_PER_LEAD)
+        body = self.counted_post("bulk-update", {"assignee": self.specialist.id})
+        self.assertEqual(body["updated"], len(self.ids))
+        self.assertEqual(LeadSubfunnel.objects.filter(assignee=self.specialist).count(), len(self.ids))
+
+    def test_terminal_stage_advances_each_lead_once(self):
+        body = self.counted_post("bulk-update", {"stage_id": self.task_stages[2].id})
+        self.assertEqual(body["updated"], len(self.ids))
+        self.assertEqual(Lead.objects.filter(current_stage=self.stages[1]).count(), LEADS)
+
+    def test_checklist(self):
+        body = self.counted_post("bulk-checklist", {"template_item_id": self.item.id, "is_completed": True})
+        self.assertEqual(body["updated_values"], len(self.ids))
+        self.assertEqual(LeadSubfunnel.objects.filter(checklist_completed=1).count(), len(self.ids))
@@ -0,0 +1,107 @@
+from datetime import timedelta
+
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.campaigns.models import Lead, LeadActivityLog, LeadChecklistValue, LeadInteraction
+from apps.funnels.models import StageChecklistItem
+
+from .factories import make_admin, make_campaign, make_funnel, make_regions
+
+
+class LeadTimelineTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_admin()
+        funnel, stages = make_funnel()
+        first = StageChecklistItem.objects.create(stage=stages[0], text="Позвонить", order=1)
+        second = StageChecklistItem.objects.create(stage=stages[0], text="Отправить письмо", order=2)
+        third = StageChecklistItem.objects.create(stage=stages[0], text="Согласовать", order=3)
+        same_text = StageChecklistItem.objects.create(stage=stages[1], text="Позвонить", order=1)
+        make_campaign(funnel=funnel, stage=stages[0], regions=make_regions(1), leads=1)
+        cls.lead = Lead.objects.get()
+
+        # Группа событий в одну секунду: взаимодействия, журнал и отметки чек-листа
+        cls.second = timezone.now().replace(microsecond=0) - timedelta(days=1)
+        for micro in (0, 0, 300_000, 700_000):
+            LeadInteraction.objects.create(
+                lead=cls.lead, contact_person="Иванов", date=cls.second + timedelta(microseconds=micro)
+            )
+        for event_type, summary in (
+            (LeadActivityLog.EventType.STAGE, "Стадия: 1 → 2"),
+            (LeadActivityLog.EventType.CHECKLIST, "Отмечен пункт «Отправить письмо»"),
+        ):
+            log = LeadActivityLog.objects.create(lead=cls.lead, event_type=event_type, summary=summary)
+            LeadActivityLog.objects.filter(pk=log.pk).update(created_at=cls.second)
+        LeadChecklistValue.objects.create(lead=cls.lead, checklist_item=same_text)
+        completed = {
+            first: cls.second + timedelta(microseconds=100_000),
+            same_text: cls.second + timedelta(microseconds=200_000),
+            # Уже в журнале в ту же секунду — синтетической записи не будет
+            second: cls.second + timedelta(microseconds=500_000),
+            third: cls.second,
+        }
+        for item, at in completed.items():
+            LeadChecklistValue.objects.filter(lead=cls.lead, checklist_item=item).update(
+                is_completed=True, completed_at=at
+            )
+        # Более ранние события за пределами группы
+        for days in (2, 3):
+            LeadInteraction.objects.create(
+                lead=cls.lead, contact_person="Петров", date=cls.second - timedelta(days=days)
+            )
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+        self.url = f"/api/leads/{self.lead.id}/timeline/"
+
+    def full_timeline(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def paged_timeline(self, page_size, **params):
+        items = []
+        response = self.client.get(self.url, {"cursor": "", "page_size": page_size, **params})
+        while True:
+            self.assertEqual(response.status_code, 200, response.content)
+            body = response.json()
+            self.assertLessEqual(len(body["results"]), page_size)
+            items.extend(body["results"])
+            if not body["next"]:
+                return items
+            self.assertLess(len(items), 100)
+            response = self.client.get(body["next"])
+
+    def keys(self, items):
+        return [(item["kind"], item["id"]) for item in items]
+
+    def test_synthetic_checklist_entries_are_deduplicated(self):
+        summaries = [item["summary"] for item in self.full_timeline() if item["kind"] == "checklist"]
+        # «Позвонить» двух стадий в одну секунду — одна запись, «Отправить письмо» — из журнала
+        self.assertEqual(summaries.count("Отмечен пункт «Позвонить»"), 1)
+        self.assertEqual(summaries.count("Отмечен пункт «Отправить письмо»"), 1)
+        self.assertEqual(summaries.count("Отмечен пункт «Согласовать»"), 1)
+
+    def test_full_timeline_is_newest_first(self):
+        items = self.full_timeline()
+        # 6 взаимодействий, 2 записи журнала, 2 синтетические отметки
+        self.assertEqual(len(items), 10)
+        ats = [item["at"] for item in items]
+        self.assertEqual(ats, sorted(ats, reverse=True))
+
+    def test_cursor_pages_split_same_second_group(self):
+        expected = self.keys(self.full_timeline())
+        for page_size in (1, 2, 3, 4, 5):
+            with self.subTest(page_size=page_size):
+                self.assertEqual(self.keys(self.paged_timeline(page_size)), expected)
+
+    def test_cursor_pages_with_kind_filter(self):
+        expected = self.keys(self.full_timeline(kind="interaction,checklist"))
+        self.assertEqual(self.keys(self.paged_timeline(2, kind="interaction,checklist")), expected)
+
+    def test_invalid_cursor_is_rejected(self):
+        for cursor in ("мусор", "WyJ4IiwxLDFd"):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(self.url, {"cursor": cursor})
+                self.assertEqual(response.status_code, 400, response.content)
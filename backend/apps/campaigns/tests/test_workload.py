@@ -0,0 +1,182 @@
+import random
+from io import StringIO
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.campaigns.models import (
+    Campaign,
+    CampaignFunnel,
+    CampaignRegion,
+    CampaignSubfunnel,
+    Lead,
+    LeadChecklistValue,
+    LeadSubfunnel,
+)
+from apps.campaigns.models import WorkloadDailySnapshot
+from apps.campaigns.workload import build_workload_dashboard, write_workload_snapshots
+from apps.funnels.models import StageChecklistItem, SubfunnelTemplate
+
+from .factories import make_campaign, make_funnel, make_regions
+from .legacy_workload import legacy_workload_dashboard
+
+
+def seed_workload(seed=5):
+    """Лиды с менеджерами, специалистами, сроками стадий и чек-листами, задачи подворонок."""
+    rnd = random.Random(seed)
+    User = get_user_model()
+    users = [
+        User.objects.create_user(username=f"user{i}", first_name=f"Имя{i}", last_name=f"Фамилия{i}")
+        for i in range(5)
+    ]
+    regions = make_regions(3)
+    funnel, stages = make_funnel()
+    for stage in stages:
+        stage.primary_contact_specialist = rnd.choice([None, users[3]])
+        stage.save()
+        for order in range(3):
+            StageChecklistItem.objects.create(
+                stage=stage,
+                text=f"{stage.name}: пункт {order}",
+                order=order,
+                primary_contact_specialist=rnd.choice([None, None, users[4]]),
+            )
+    first, _ = make_campaign("Кампания 1", funnel=funnel, stage=stages[0], regions=regions, leads=12)
+    second = Campaign.objects.create(name="Кампания 2")
+    CampaignFunnel.objects.create(campaign=second, funnel=funnel)
+    organizations = [lead.organization for lead in Lead.objects.filter(campaign=first).order_by("id")]
+    for i in range(8):
+        Lead.objects.create(
+            campaign=second, organization=organizations[i], funnel=funnel, current_stage=stages[i % 3]
+        )
+    rejection = funnel.stages.get(is_rejection=True)
+    Lead.objects.create(
+        campaign=second, organization=organizations[9], funnel=funnel, current_stage=rejection, manager=users[0]
+    )
+
+    now = timezone.now()
+    today = timezone.localdate()
+    for lead in Lead.objects.order_by("id"):
+        Lead.objects.filter(pk=lead.pk).update(
+            manager=rnd.choice([None, users[0], users[1]]),
+            primary_contact_specialist=rnd.choice([None, users[2], users[3]]),
+            current_stage_deadline=rnd.choice([None, today - timedelta(days=3), today + timedelta(days=4)]),
+            updated_at=now - timedelta(days=rnd.randint(0, 30)),
+            created_at=now - timedelta(days=rnd.randint(0, 40)),
+        )
+    for value in LeadChecklistValue.objects.order_by("id"):
+        completed = rnd.random() < 0.4
+        LeadChecklistValue.objects.filter(pk=value.pk).update(
+            is_completed=completed,
+            completed_at=now - timedelta(days=rnd.randint(0, 30)) if completed else None,
+            primary_contact_specialist=rnd.choice([None, None, users[1]]),
+        )
+
+    templates = [SubfunnelTemplate.objects.create(name=f"Шаблон {i}", slug=f"template-{i}") for i in range(2)]
+    statuses = [status for status, _ in LeadSubfunnel.Status.choices]
+    campaign_region = CampaignRegion.objects.create(campaign=second, region=regions[0])
+    for campaign in (first, second):
+        for template in templates:
+            subfunnel = CampaignSubfunnel.objects.create(campaign=campaign, funnel=funnel, template=template)
+            for lead in Lead.objects.filter(campaign=campaign).order_by("id"):
+                if rnd.random() >= 0.7:
+                    continue
+                task = LeadSubfunnel.objects.create(
+                    campaign_subfunnel=subfunnel,
+                    lead=lead,
+                    status=rnd.choice(statuses),
+                    assignee=rnd.choice([None, *users]),
+                )
+                LeadSubfunnel.objects.filter(pk=task.pk).update(
+                    updated_at=now - timedelta(days=rnd.randint(0, 30), hours=rnd.randint(0, 23)),
+                    created_at=now - timedelta(days=rnd.randint(10, 50)),
+                    started_at=rnd.choice([None, now - timedelta(days=rnd.randint(0, 30))]),
+                    completed_at=rnd.choice(
+                        [None, now - timedelta(days=rnd.randint(0, 30), hours=rnd.randint(0, 23))]
+                    ),
+                    due_at=rnd.choice([None, now - timedelta(days=2), now + timedelta(days=2)]),
+                )
+            if campaign == second:
+                LeadSubfunnel.objects.create(
+                    campaign_subfunnel=subfunnel,
+                    campaign_region=campaign_region,
+                    status=LeadSubfunnel.Status.IN_PROGRESS,
+                    assignee=users[2],
+                    due_at=now - timedelta(days=1),
+                )
+    return {"users": users, "funnel": funnel, "campaigns": (first, second)}
+
+
+def _normalized(payload):
+    # Порядок секторов круговой диаграммы не задан ни в старой, ни в новой версии
+    payload["charts"]["status_pie"] = sorted(payload["charts"]["status_pie"], key=lambda x: x["status"])
+    return payload
+
+
+class WorkloadDashboardRegressionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = seed_workload()
+
+    def filter_cases(self):
+        users = self.data["users"]
+        first, second = self.data["campaigns"]
+        today = timezone.localdate()
+        return [
+            {},
+            {"campaign_id": second.id},
+            {"funnel_id": self.data["funnel"].id},
+            {"user_id": users[0].id},
+            {"user_id": users[2].id},
+            {"date_from": today - timedelta(days=10)},
+            {"date_to": today - timedelta(days=15)},
+            {
+                "campaign_id": first.id,
+                "date_from": today - timedelta(days=20),
+                "date_to": today - timedelta(days=5),
+            },
+        ]
+
+    def test_matches_legacy_implementation(self):
+        for role in ("all", "manager", "specialist", "unknown"):
+            for filters in self.filter_cases():
+                with self.subTest(role=role, **filters):
+                    self.assertEqual(
+                        _normalized(build_workload_dashboard(role, **filters)),
+                        _normalized(legacy_workload_dashboard(role, **filters)),
+                    )
+
+    def test_seed_covers_every_section(self):
+        payload = legacy_workload_dashboard("all")
+        self.assertTrue(payload["managers"])
+        self.assertTrue(payload["specialists"])
+        self.assertTrue(payload["charts"]["by_day"])
+        self.assertTrue(any(row["overdue_checklist"] for row in payload["rows"]))
+
+    def test_days_missed_by_snapshots_are_counted_live(self):
+        today = timezone.localdate()
+        # Снимки за [-25, -18] и [-12, -3]: пропущены ночи -17..-13, дни до -25 и -2..сегодня
+        write_workload_snapshots(today - timedelta(days=25), today - timedelta(days=18))
+        write_workload_snapshots(today - timedelta(days=12), today - timedelta(days=3))
+        for filters in self.filter_cases():
+            with self.subTest(**filters):
+                self.assertEqual(
+                    build_workload_dashboard("all", **filters)["charts"]["by_day"],
+                    legacy_workload_dashboard("all", **filters)["charts"]["by_day"],
+                )
+
+    def test_snapshot_command_backfills_missed_nights(self):
+        today = timezone.localdate()
+        write_workload_snapshots(today - timedelta(days=12), today - timedelta(days=12))
+        call_command("snapshot_workload", stdout=StringIO())
+        written = set(
+            WorkloadDailySnapshot.objects.filter(date__gt=today - timedelta(days=12)).values_list("date", flat=True)
+        )
+        legacy = legacy_workload_dashboard(
+            "all", date_from=today - timedelta(days=11), date_to=today - timedelta(days=1)
+        )
+        expected = {row["date"] for row in legacy["charts"]["by_day"]}
+        self.assertEqual({day.isoformat() for day in written}, expected)
@@ -0,0 +1,220 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.campaigns.models import CampaignSubfunnel, Lead, LeadSubfunnel
+from apps.funnels.models import SubfunnelTemplate, TaskTemplateStage
+
+from .factories import make_admin, make_campaign, make_funnel, make_regions
+from .test_keyset import _raw_cursor
+
+URL = "/api/campaigns/subfunnel-workspace/"
+ORDERING = ("-updated_at", "-id")
+
+
+class SubfunnelWorkspacePaginationTests(APITestCase):
+    """Колонки канбана постранично по своим курсорам, итоги колонок, keyset-страницы таблицы."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_admin()
+        funnel, stages = make_funnel()
+        cls.campaign, _ = make_campaign(funnel=funnel, stage=stages[0], regions=make_regions(1), leads=12)
+        template = SubfunnelTemplate.objects.create(name="Задача", slug="task")
+        cls.stages = [
+            TaskTemplateStage.objects.create(template=template, name=f"Этап {i}", order=i) for i in range(2)
+        ]
+        subfunnel = CampaignSubfunnel.objects.create(campaign=cls.campaign, funnel=funnel, template=template)
+        # 7 карточек на первом этапе, 3 — на втором, 2 — без этапа
+        placement = [cls.stages[0]] * 7 + [cls.stages[1]] * 3 + [None] * 2
+        LeadSubfunnel.objects.bulk_create(
+            [
+                LeadSubfunnel(campaign_subfunnel=subfunnel, lead=lead, current_template_stage=stage)
+                for lead, stage in zip(Lead.objects.order_by("id"), placement)
+            ]
+        )
+        # Одинаковое время у половины карточек — порядок внутри группы решает id
+        tied = list(LeadSubfunnel.objects.order_by("id").values_list("id", flat=True)[::2])
+        LeadSubfunnel.objects.filter(id__in=tied).update(updated_at=timezone.now())
+        cls.columns = {
+            f"stage-{cls.stages[0].id}": LeadSubfunnel.objects.filter(current_template_stage=cls.stages[0]),
+            f"stage-{cls.stages[1].id}": LeadSubfunnel.objects.filter(current_template_stage=cls.stages[1]),
+            "stage-unassigned": LeadSubfunnel.objects.filter(current_template_stage__isnull=True),
+        }
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def get(self, **params):
+        response = self.client.get(URL, {"campaign": self.campaign.id, **params})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def expected_ids(self, queryset):
+        return list(queryset.order_by(*ORDERING).values_list("id", flat=True))
+
+    def test_first_page_per_column_with_totals(self):
+        body = self.get(limit=3)
+        kanban = {column["status"]: column for column in body["kanban"]}
+        self.assertEqual(set(kanban), set(self.columns))
+        for key, queryset in self.columns.items():
+            with self.subTest(column=key):
+                column = kanban[key]
+                self.assertEqual(column["total"], queryset.count())
+                self.assertEqual([item["id"] for item in column["items"]], self.expected_ids(queryset)[:3])
+                self.assertEqual(column["next_cursor"] is not None, queryset.count() > 3)
+        self.assertEqual(len(body["table"]), 3 + 3 + 2)
+        self.assertEqual(body["totals"]["all"], 12)
+
+    def test_column_cursor_pages_cover_column_in_order(self):
+        body = self.get(limit=3)
+        for column in body["kanban"]:
+            with self.subTest(column=column["status"]):
+                ids = [item["id"] for item in column["items"]]
+                cursor = column["next_cursor"]
+                while cursor:
+                    page = self.get(limit=3, column=column["status"], cursor=cursor)
+                    self.assertEqual(page["column"], column["status"])
+                    self.assertLessEqual(len(page["items"]), 3)
+                    ids.extend(item["id"] for item in page["items"])
+                    cursor = page["next_cursor"]
+                    self.assertLess(len(ids), 20)
+                self.assertEqual(ids, self.expected_ids(self.columns[column["status"]]))
+
+    def test_table_keyset_pages(self):
+        ids = []
+        body = self.get(view_mode="table", limit=5)
+        while True:
+            self.assertLessEqual(len(body["table"]), 5)
+            ids.extend(item["id"] for item in body["table"])
+            if not body["next_cursor"]:
+                break
+            self.assertLess(len(ids), 20)
+            body = self.get(view_mode="table", limit=5, cursor=body["next_cursor"])
+        self.assertEqual(ids, self.expected_ids(LeadSubfunnel.objects.all()))
+
+    def test_without_limit_returns_every_card(self):
+        body = self.get()
+        self.assertEqual(len(body["table"]), 12)
+        self.assertNotIn("total", body["kanban"][0])
+
+    def test_invalid_cursor_is_rejected(self):
+        for params in (
+            {"view_mode": "table", "limit": 5, "cursor": "мусор"},
+            {"limit": 5, "column": f"stage-{self.stages[0].id}", "cursor": "WyJ4IiwxXQ"},
+            {"view_mode": "table", "limit": 5, "cursor": _raw_cursor([["2026-01-01"], 1])},
+            {"limit": 5, "column": "stage-unassigned", "cursor": _raw_cursor(["2026-01-01", {"id": 1}])},
+        ):
+            with self.subTest(params=params):
+                response = self.client.get(URL, {"campaign": self.campaign.id, **params})
+                self.assertEqual(response.status_code, 400, response.content)
+
+
+def payload_totals(cards):
+    """Итоги прежним способом — проходами по списку карточек ответа."""
+    Status = LeadSubfunnel.Status
+    return {
+        "all": len(cards),
+        "overdue": sum(1 for card in cards if card["is_overdue"]),
+        "backlog": sum(1 for card in cards if card["status"] == Status.BACKLOG),
+        "in_progress": sum(1 for card in cards if card["status"] == Status.IN_PROGRESS),
+        "paused": sum(1 for card in cards if card["status"] == Status.PAUSED),
+        "rejected": sum(1 for card in cards if card["status"] == Status.REJECTED),
+        "done": sum(1 for card in cards if card["status"] == Status.DONE),
+    }
+
+
+class SubfunnelWorkspaceAggregateTests(APITestCase):
+    """Итоги по статусам и колонкам из агрегатов БД совпадают с подсчётом по карточкам; v2 восстанавливает v1."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_admin()
+        funnel, stages = make_funnel()
+        cls.campaign, _ = make_campaign(funnel=funnel, stage=stages[0], regions=make_regions(1), leads=16)
+        template = SubfunnelTemplate.objects.create(name="Задача", slug="task")
+        active = [TaskTemplateStage.objects.create(template=template, name=f"Этап {i}", order=i) for i in range(2)]
+        retired = TaskTemplateStage.objects.create(template=template, name="Снятый", order=5, is_active=False)
+        subfunnel = CampaignSubfunnel.objects.create(campaign=cls.campaign, funnel=funnel, template=template)
+        Status = LeadSubfunnel.Status
+        now = timezone.now()
+        past, future = now - timedelta(days=2), now + timedelta(days=2)
+        # Все статусы, включая устаревшие и неизвестный; просрочка только у незавершённых
+        cards = [
+            (active[0], Status.BACKLOG, past),
+            (active[0], Status.TODO, past),
+            (active[0], Status.IN_PROGRESS, future),
+            (active[0], Status.IN_PROGRESS, past),
+            (active[0], Status.DONE, past),
+            (active[1], Status.PAUSED, None),
+            (active[1], Status.BLOCKED, past),
+            (active[1], Status.REJECTED, past),
+            (active[1], Status.DONE, None),
+            (active[1], "archived", future),
+            (retired, Status.IN_PROGRESS, past),
+            (retired, Status.BACKLOG, None),
+            (None, Status.DONE, past),
+            (None, Status.TODO, None),
+            (None, "archived", past),
+            (None, Status.PAUSED, future),
+        ]
+        LeadSubfunnel.objects.bulk_create(
+            [
+                LeadSubfunnel(
+                    campaign_subfunnel=subfunnel, lead=lead, current_template_stage=stage, status=status, due_at=due_at
+                )
+                for lead, (stage, status, due_at) in zip(Lead.objects.order_by("id"), cards)
+            ]
+        )
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def get(self, **params):
+        response = self.client.get(URL, {"campaign": self.campaign.id, **params})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_status_totals_match_card_counts(self):
+        full = self.get()
+        self.assertEqual(len(full["table"]), 16)
+        self.assertEqual(full["totals"], payload_totals(full["table"]))
+        # Итоги не зависят от того, сколько карточек отдано страницей
+        for params in ({"limit": 2}, {"limit": 2, "view_mode": "table"}):
+            with self.subTest(params=params):
+                self.assertEqual(self.get(**params)["totals"], full["totals"])
+        for status_value in ("in_progress", "done"):
+            with self.subTest(status=status_value):
+                body = self.get(status=status_value)
+                self.assertEqual(body["totals"], payload_totals(body["table"]))
+
+    def test_column_totals_match_card_counts(self):
+        expected = Counter(card["board_stage_key"] for card in self.get()["table"])
+        self.assertEqual(expected["stage-unassigned"], 6)
+        body = self.get(limit=2)
+        self.assertEqual({column["status"]: column["total"] for column in body["kanban"]}, dict(expected))
+        self.assertEqual([column["status"] for column in body["columns"]][-1], "stage-unassigned")
+
+    def test_v2_rebuilds_v1_response(self):
+        for params in ({}, {"limit": 2}, {"limit": 3, "view_mode": "table"}):
+            with self.subTest(params=params):
+                v1 = self.get(**params)
+                v2 = self.get(format="v2", **params)
+                self.assertEqual(v2["format"], "v2")
+                cards = {int(card_id): card for card_id, card in v2["cards"].items()}
+                self.assertEqual([cards[card_id] for card_id in v2["table"]], v1["table"])
+                self.assertEqual(v2["totals"], v1["totals"])
+                self.assertEqual(v2.get("next_cursor"), v1.get("next_cursor"))
+                for column, kanban_column in zip(v2["columns"], v1["kanban"], strict=True):
+                    self.assertEqual(column["status"], kanban_column["status"])
+                    self.assertEqual([cards[card_id] for card_id in column["ids"]], kanban_column["items"])
+                    self.assertEqual(column.get("total"), kanban_column.get("total"))
+                    self.assertEqual(column.get("next_cursor"), kanban_column.get("next_cursor"))
+                items_by_stage = {
+                    column["status"]: [cards[card_id] for card_id in column["ids"]]
+                    for column in v2["columns"]
+                    if column["ids"]
+                }
+                self.assertEqual(items_by_stage, v1["items_by_stage"])
@@ -0,0 +1,182 @@
+"""
+Лента лида (/leads/{id}/timeline/): взаимодействия, журнал активности (стадии, чек-лист) и
+отметки чек-листа по completed_at, для которых в журнале нет той же записи (одинаковые отметки
+в одну секунду показываются один раз).
+
+Фильтры ?kind= / ?contact= и условие курсора — в SQL; каждый источник читается по индексу
+(лид, дата) не более чем на страницу вперёд, строки сливаются по (at, source, event_id),
+затем события страницы догружаются по id. С курсором первая страница стоит одинаково
+для любого числа событий лида.
+"""
+
+from django.db.models import CharField, Exists, F, IntegerField, OuterRef, Value
+from django.db.models.functions import Concat, Left, TruncSecond
+
+from .keyset import encode_cursor, keyset_filter
+from .models import LeadActivityLog, LeadChecklistValue, LeadInteraction
+from .serializers import LeadInteractionSerializer
+
+SOURCE_INTERACTION = 0
+SOURCE_ACTIVITY = 1
+SOURCE_CHECKLIST = 2
+
+# Новые сверху; при равном времени — взаимодействия, журнал, отметки чек-листа
+TIMELINE_ORDERING = ("-at", "source", "-event_id")
+
+# Синтетические отметки чек-листа получают id со сдвигом, чтобы не пересекаться с журналом
+CHECKLIST_ID_OFFSET = 10_000_000
+
+_LOGGED_KINDS = (LeadActivityLog.EventType.CHECKLIST, LeadActivityLog.EventType.STAGE)
+
+
+def _event_columns(queryset, kind, source, at):
+    return queryset.annotate(
+        kind=kind,
+        source=Value(source, output_field=IntegerField()),
+        event_id=F("id"),
+        at=F(at),
+    ).values("kind", "source", "event_id", "at")
+
+
+def _interaction_events(lead, kinds, contact_id):
+    if kinds and "interaction" not in kinds:
+        return None
+    qs = LeadInteraction.objects.filter(lead=lead)
+    if contact_id is not None:
+        qs = qs.filter(contact_id=contact_id)
+    return _event_columns(
+        qs, Value("interaction", output_field=CharField()), SOURCE_INTERACTION, "date"
+    )
+
+
+def _activity_events(lead, kinds, contact_id):
+    # В журнале нет контакта — при ?contact= его записи не показываются
+    if contact_id is not None:
+        return None
+    qs = LeadActivityLog.objects.filter(lead=lead)
+    if kinds:
+        qs = qs.filter(event_type__in=kinds)
+    return _event_columns(qs, F("event_type"), SOURCE_ACTIVITY, "created_at")
+
+
+def _checklist_events(lead, kinds, contact_id):
+    if kinds and "checklist" not in kinds:
+        return None
+    completed = LeadChecklistValue.objects.filter(
+        lead=lead, completed_at__isnull=False, is_completed=True
+    )
+    qs = completed
+    if contact_id is not None:
+        qs = qs.filter(contact_id=contact_id)
+    # Та же отметка уже в журнале: тот же текст и та же секунда
+    summary = Left(
+        Concat(Value("Отмечен пункт «"), "checklist_item__text", Value("»"), output_field=CharField()),
+        500,
+    )
+    logged = LeadActivityLog.objects.filter(
+        lead_id=OuterRef("lead_id"),
+        event_type__in=_LOGGED_KINDS,
+        summary=OuterRef("_summary"),
+    ).annotate(_second=TruncSecond("created_at")).filter(_second=OuterRef("_second"))
+    # Из отметок с тем же текстом в ту же секунду (пункты разных стадий) остаётся первая по id
+    earlier = completed.filter(
+        checklist_item__text=OuterRef("checklist_item__text"), id__lt=OuterRef("id")
+    ).annotate(_second=TruncSecond("completed_at")).filter(_second=OuterRef("_second"))
+    qs = qs.annotate(_summary=summary, _second=TruncSecond("completed_at")).exclude(
+        Exists(logged) | Exists(earlier)
+    )
+    return _event_columns(
+        qs, Value("checklist", output_field=CharField()), SOURCE_CHECKLIST, "completed_at"
+    )
+
+
+def _event_rows(lead, kinds, contact_id, cursor, limit):
+    parts = [
+        part
+        for part in (
+            _interaction_events(lead, kinds, contact_id),
+            _activity_events(lead, kinds, contact_id),
+            _checklist_events(lead, kinds, contact_id),
+        )
+        if part is not None
+    ]
+    if cursor:
+        parts = [keyset_filter(part, TIMELINE_ORDERING, cursor) for part in parts]
+    rows = []
+    for part in parts:
+        part = part.order_by(*TIMELINE_ORDERING)
+        # Странице хватает limit + 1 строк из каждого источника (индекс по лиду и дате)
+        rows.extend(part[: limit + 1] if limit is not None else part)
+    rows.sort(key=lambda row: (row["source"], -row["event_id"]))
+    rows.sort(key=lambda row: row["at"], reverse=True)
+    return rows[: limit + 1] if limit is not None else rows
+
+
+def _user_name(user):
+    return str(user) if user else None
+
+
+def _timeline_items(rows):
+    ids = {SOURCE_INTERACTION: [], SOURCE_ACTIVITY: [], SOURCE_CHECKLIST: []}
+    for row in rows:
+        ids[row["source"]].append(row["event_id"])
+    interactions = (
+        LeadInteraction.objects.select_related("created_by", "contact").in_bulk(ids[SOURCE_INTERACTION])
+        if ids[SOURCE_INTERACTION] else {}
+    )
+    logs = (
+        LeadActivityLog.objects.select_related("created_by").in_bulk(ids[SOURCE_ACTIVITY])
+        if ids[SOURCE_ACTIVITY] else {}
+    )
+    values = (
+        LeadChecklistValue.objects.select_related("checklist_item", "completed_by").in_bulk(
+            ids[SOURCE_CHECKLIST]
+        )
+        if ids[SOURCE_CHECKLIST] else {}
+    )
+    items = []
+    for row in rows:
+        if row["source"] == SOURCE_INTERACTION:
+            interaction = interactions[row["event_id"]]
+            items.append({
+                "kind": "interaction",
+                "id": interaction.pk,
+                "at": interaction.date.isoformat(),
+                "data": LeadInteractionSerializer(interaction).data,
+            })
+        elif row["source"] == SOURCE_ACTIVITY:
+            log = logs[row["event_id"]]
+            items.append({
+                "kind": log.event_type,
+                "id": log.pk,
+                "at": log.created_at.isoformat(),
+                "summary": log.summary,
+                "created_by_name": _user_name(log.created_by),
+            })
+        else:
+            value = values[row["event_id"]]
+            item = {
+                "kind": "checklist",
+                "id": CHECKLIST_ID_OFFSET + value.pk,
+                "at": value.completed_at.isoformat(),
+                "summary": f"Отмечен пункт «{value.checklist_item.text}»",
+                "created_by_name": _user_name(value.completed_by),
+            }
+            if value.contact_id:
+                item["contact_id"] = value.contact_id
+            items.append(item)
+    return items
+
+
+def lead_timeline(lead, kinds=None, contact_id=None, cursor=None, limit=None):
+    """
+    События ленты лида, новые сверху: (элементы, курсор следующей страницы или None).
+    Без limit — вся лента; ValueError, если курсор повреждён.
+    """
+    rows = _event_rows(lead, kinds, contact_id, cursor, limit)
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([last["at"], last["source"], last["event_id"]])
+    return _timeline_items(rows), next_cursor
@@ -1,12 +1,8 @@
-from datetime import date, timedelta
+from datetime import date
+
+from apps.reference.business_calendar import add_business_days as _calendar_add_business_days
 
 
 def add_business_days(start: date, days: int) -> date:
-    """Add N business days (Mon-Fri) to a start date."""
-    current = start
-    added = 0
-    while added < days:
-        current += timedelta(days=1)
-        if current.weekday() < 5:
-            added += 1
-    return current
+    """Add N business days to a start date (production calendar: weekends, holidays, transfers)."""
+    return _calendar_add_business_days(start, days)
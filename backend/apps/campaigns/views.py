@@ -2,14 +2,19 @@ from django.utils import timezone
 from django.utils.dateparse import parse_date, parse_datetime
 from django.http import HttpResponse
 import io
-from collections import defaultdict
-from django.db.models import Count, Sum, Value, Q
+from datetime import datetime, time, timedelta
+from collections import Counter, defaultdict
+from django.db import transaction
+from django.db.models import Count, OuterRef, Q, Subquery, Value
 from django.db.models.functions import Coalesce
 from django.db.utils import OperationalError, ProgrammingError
 from rest_framework import viewsets, status, serializers
 from rest_framework.decorators import action
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.pagination import CursorPagination
 from rest_framework.response import Response
-from openpyxl import Workbook, load_workbook
+from rest_framework.utils.urls import replace_query_param
+from openpyxl import Workbook
 
 from .models import (
     Campaign, CampaignQueue, CampaignProgram,
@@ -21,8 +26,18 @@ from .models import (
     LeadSubfunnel,
     LeadSubfunnelChecklistValue,
 )
+from .checklist_counters import sync_lead_checklist_counters, sync_subfunnel_checklist_counters
+from .keyset import KeysetPagination
+from .lead_activation import materialize_lead_subfunnels
+from .sparse_fields import SparseFieldsMixin, SparseFieldsViewMixin
+from .stage_checklists import MATERIALIZE_CHUNK_SIZE, materialize_stage_checklists
+from .stage_deadlines import sync_lead_stage_deadlines
+from .stats import schedule_campaign_stats_refresh
+from .subfunnel_availability import refresh_subfunnel_availability
+from .timeline import lead_timeline
 from .task_workflow import TASK_WORKFLOW_STATUS_VALUES
-from .db_compat import lead_table_has_quota_split_columns
+from .workload import build_workload_dashboard
+from . import workspace
 from apps.funnels.models import StageChecklistItem, FunnelStage, SubfunnelTemplate
 from .serializers import (
     CampaignListSerializer, CampaignDetailSerializer,
@@ -54,6 +69,73 @@ def _parse_bulk_ids(raw_ids):
         )
 
 
+def _query_param_ids(params, name):
+    """?name=1,2,3 → [1, 2, 3]; нечисловые значения отбрасываются."""
+    raw = params.get(name)
+    if not raw:
+        return []
+    return [int(x) for x in str(raw).split(",") if x.strip().isdigit()]
+
+
+def _query_param_int(params, name):
+    """?name=5 → 5; пусто или не число — None."""
+    raw = str(params.get(name) or "").strip()
+    return int(raw) if raw.isdigit() else None
+
+
+def _filter_leads_by_last_touch(queryset, *, min_days=None, max_days=None):
+    """
+    Фильтр по дням с последнего взаимодействия (календарных, от сегодняшней даты):
+    min_days — не меньше (лиды без касаний проходят), max_days — не больше (только с касаниями).
+    """
+    if min_days is None and max_days is None:
+        return queryset
+    today = timezone.localdate()
+    last_touch = LeadInteraction.objects.filter(lead_id=OuterRef("pk")).order_by("-date", "-id")
+    queryset = queryset.annotate(_last_touch_date=Subquery(last_touch.values("date")[:1]))
+    if min_days is not None:
+        queryset = queryset.filter(
+            Q(_last_touch_date__isnull=True)
+            | Q(_last_touch_date__lt=_local_day_start(today - timedelta(days=min_days - 1)))
+        )
+    if max_days is not None:
+        queryset = queryset.filter(
+            _last_touch_date__gte=_local_day_start(today - timedelta(days=max_days))
+        )
+    return queryset
+
+
+def _local_day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+class CampaignNestedCursorPagination(CursorPagination):
+    """Keyset-пагинация вложенных списков кампании (лиды, организации, регионы) по id."""
+    page_size = 50
+    max_page_size = 500
+    page_size_query_param = "page_size"
+    ordering = "id"
+
+
+WORKSPACE_MAX_LIMIT = 500
+
+
+class WorkspaceContentNegotiation(DefaultContentNegotiation):
+    """?format=v1/v2 у рабочего места подворонок — версия ответа, а не рендерер DRF."""
+
+    def filter_renderers(self, renderers, format):
+        if format in workspace.RESPONSE_FORMATS:
+            return renderers
+        return super().filter_renderers(renderers, format)
+
+
+def _workspace_limit(raw):
+    """?limit= рабочего места подворонок: карточек на колонку/страницу (None — без пагинации)."""
+    if not raw or not str(raw).isdigit() or int(raw) <= 0:
+        return None
+    return min(int(raw), WORKSPACE_MAX_LIMIT)
+
+
 def _normalize_cell(value):
     if value is None:
         return ""
@@ -125,38 +207,6 @@ def _build_leads_demand_import_column_map(header_values):
     return out
 
 
-def _empty_workload_task_stats():
-    return {
-        "total": 0,
-        "backlog": 0,
-        "in_progress": 0,
-        "paused": 0,
-        "rejected": 0,
-        "done": 0,
-        "overdue": 0,
-    }
-
-
-def _empty_activity_by_period_bucket():
-    return {
-        "date": None,
-        "backlog": 0,
-        "in_progress": 0,
-        "paused": 0,
-        "rejected": 0,
-        "done": 0,
-    }
-
-
-def _bump_workload_task_stats(stats, status, is_overdue):
-    stats["total"] += 1
-    normalized = LeadSubfunnel.normalize_status(status)
-    if normalized in stats:
-        stats[normalized] += 1
-    if is_overdue:
-        stats["overdue"] += 1
-
-
 def _log_lead_activity(lead, user, event_type, summary):
     if not summary:
         return
@@ -172,69 +222,42 @@ def _log_lead_activity(lead, user, event_type, summary):
         pass
 
 
-def _extract_forwarded_from_notes(notes):
-    first_line = ((notes or "").splitlines() or [""])[0].strip()
-    prefix = "Передано от организации:"
-    if not first_line.startswith(prefix):
-        return None
-    value = first_line[len(prefix):].strip()
-    if ". Комментарий:" in value:
-        value = value.split(". Комментарий:", 1)[0].strip()
-    return value or None
-
-
-def _append_synthetic_checklist_from_values(lead, items):
-    """Добавляет в ленту отметки по чек-листу из completed_at, если в журнале нет той же записи."""
-    existing = set()
-    for it in items:
-        if it.get("kind") in ("checklist", "stage"):
-            existing.add((it.get("summary", ""), (it.get("at") or "")[:19]))
-
-    for cv in (
-        lead.checklist_values.select_related("checklist_item", "completed_by")
-        .filter(completed_at__isnull=False, is_completed=True)
-    ):
-        text = cv.checklist_item.text
-        summary = f"Отмечен пункт «{text}»"
-        at_str = cv.completed_at.isoformat()
-        sig = (summary, at_str[:19])
-        if sig in existing:
-            continue
-        existing.add(sig)
-        u = cv.completed_by
-        row = {
-            "kind": "checklist",
-            "id": 10_000_000 + cv.pk,
-            "at": at_str,
-            "summary": summary,
-            "created_by_name": str(u) if u else None,
-        }
-        if cv.contact_id:
-            row["contact_id"] = cv.contact_id
-        items.append(row)
-
-
-def _filter_timeline_items(items, kinds, contact_id):
-    """Фильтр ?kind=interaction,stage&contact=12 — по контакту только события, где он указан."""
-    if not kinds and contact_id is None:
-        return items
-    out = []
-    for it in items:
-        k = it.get("kind")
-        if kinds and k not in kinds:
-            continue
-        if contact_id is not None:
-            if k == "interaction":
-                cid = (it.get("data") or {}).get("contact")
-                if cid != contact_id:
-                    continue
-            elif k == "checklist":
-                if it.get("contact_id") != contact_id:
-                    continue
-            else:
-                continue
-        out.append(it)
-    return out
+# Уровни assign-managers: level → (назначения в кампании, поле цели, назначаемое поле)
+_MANAGER_ASSIGNMENT_LEVELS = {
+    "program": (lambda campaign: CampaignProgram.objects.filter(campaign=campaign), "program_id", "manager_id"),
+    "region": (lambda campaign: CampaignRegion.objects.filter(campaign=campaign), "region_id", "manager_id"),
+    "organization": (
+        lambda campaign: CampaignOrganization.objects.filter(campaign=campaign),
+        "organization_id",
+        "manager_id",
+    ),
+    "lead": (lambda campaign: Lead.objects.filter(campaign=campaign), "id", "manager_id"),
+    "region_specialist": (
+        lambda campaign: CampaignRegion.objects.filter(campaign=campaign),
+        "region_id",
+        "primary_contact_specialist_id",
+    ),
+    "lead_specialist": (
+        lambda campaign: Lead.objects.filter(campaign=campaign),
+        "id",
+        "primary_contact_specialist_id",
+    ),
+    "stage_specialist": (
+        lambda campaign: FunnelStage.objects.filter(funnel__campaigns=campaign),
+        "id",
+        "primary_contact_specialist_id",
+    ),
+    "checklist_specialist": (
+        lambda campaign: StageChecklistItem.objects.filter(stage__funnel__campaigns=campaign),
+        "id",
+        "primary_contact_specialist_id",
+    ),
+    "lead_checklist_specialist": (
+        lambda campaign: LeadChecklistValue.objects.filter(lead__campaign=campaign),
+        "id",
+        "primary_contact_specialist_id",
+    ),
+}
 
 
 _COMMUNICATION_STATUS_BY_STEP = {
@@ -281,38 +304,41 @@ def _sync_primary_contact_status_from_checklist(value):
         lead.save(update_fields=["primary_contact_status", "updated_at"])
 
 
-def _organization_ids_from_xlsx_bytes(raw: bytes, import_kind: str):
-    from apps.organizations.views import _xlsx_rows, _find_organization_by_ref, _normalize_cell
+def _organization_ids_from_xlsx(uploaded_file, import_kind: str):
+    from apps.organizations.views import _ImportLookup, _XlsxImportReader, _normalize_cell
 
-    rows = _xlsx_rows(io.BytesIO(raw), import_kind=import_kind)
     ids = []
     seen = set()
     last_org_ref = ""
-    for _line_no, row in rows:
-        if import_kind == "contacts":
-            org_raw = _normalize_cell(row.get("organization")) or last_org_ref
-        else:
-            org_raw = _normalize_cell(row.get("organization") or row.get("name") or row.get("inn"))
-        if not org_raw:
-            continue
-        last_org_ref = org_raw
-        found, _, _ = _find_organization_by_ref(org_raw)
-        if found and found.id not in seen:
-            seen.add(found.id)
-            ids.append(found.id)
+    lookup = _ImportLookup()
+    with _XlsxImportReader(uploaded_file, import_kind=import_kind) as reader:
+        for chunk in reader.chunks():
+            for _line_no, row in chunk:
+                if import_kind == "contacts":
+                    org_raw = _normalize_cell(row.get("organization")) or last_org_ref
+                else:
+                    org_raw = _normalize_cell(row.get("organization") or row.get("name") or row.get("inn"))
+                if not org_raw:
+                    continue
+                last_org_ref = org_raw
+                found, _, _ = lookup.organization_by_ref(org_raw)
+                if found and found.id not in seen:
+                    seen.add(found.id)
+                    ids.append(found.id)
     return ids
 
 
-def _run_registry_import_xlsx(viewset_cls, request, raw: bytes, filename: str, extra_data=None):
+def _run_registry_import_xlsx(viewset_cls, request, uploaded_file, extra_data=None):
+    """Импорт реестра тем же действием import_xlsx; загрузка передаётся как есть, без чтения в память."""
     from rest_framework.test import APIRequestFactory, force_authenticate
 
-    bio = io.BytesIO(raw)
-    bio.name = filename
     factory = APIRequestFactory()
     data = {"update_existing": "true", "source": "bulk", **(extra_data or {})}
     req = factory.post("/import-xlsx/", data, format="multipart")
-    req.FILES["file"] = bio
+    req.FILES["file"] = uploaded_file
     req.user = request.user
+    # Внутри фонового задания — прогресс пакета виден по заданию
+    req.import_job = getattr(request, "import_job", None)
     force_authenticate(req, user=request.user)
     view = viewset_cls.as_view({"post": "import_xlsx"})
     return view(req)
@@ -327,6 +353,12 @@ def _link_orgs_to_collect_campaign(
     source_lead_id=None,
     source_transfer_comment="",
 ):
+    """
+    Привязать организации к кампании сбора: лиды на входной стадии воронки, организации
+    кампании и недостающие задачи подворонок. Организации и выбранные контакты
+    читаются одним запросом, лиды и организации кампании создаются пачками, существующие
+    лиды обновляются групповыми UPDATE.
+    """
     from apps.organizations.models import Contact, Organization
 
     from .collect_tasks import get_entry_funnel_stage_for_lead
@@ -346,11 +378,10 @@ def _link_orgs_to_collect_campaign(
 
     funnel = funnel_link.funnel
     entry_stage = get_entry_funnel_stage_for_lead(funnel)
+    entry_specialist_id = entry_stage.primary_contact_specialist_id if entry_stage else None
     first_queue = campaign.queues.order_by("queue_number").first()
-    leads_created = 0
     skipped_wrong_region = 0
     leads_by_region = defaultdict(int)
-    linked_ids = set()
     source_org_name = None
     source_lead_defaults = None
     source_transfer_comment = (source_transfer_comment or "").strip()
@@ -372,84 +403,141 @@ def _link_orgs_to_collect_campaign(
             source_lead_defaults = source_lead
         else:
             errors.append("Лид-источник для передачи не найден в этой кампании.")
-
-    for org_id in organization_ids:
-        try:
-            org = Organization.objects.get(id=org_id)
-        except Organization.DoesNotExist:
+    transfer_note = None
+    if source_org_name:
+        transfer_note = f"Передано от организации: {source_org_name}"
+        if source_transfer_comment:
+            transfer_note = f"{transfer_note}. Комментарий: {source_transfer_comment}"
+
+    orgs_by_id = Organization.objects.only("id", "name", "region_id").in_bulk(organization_ids)
+    occurrences = Counter(organization_ids)
+    orgs = []
+    for org_id in occurrences:
+        org = orgs_by_id.get(org_id)
+        if org is None:
             continue
         if campaign_regions and org.region_id not in campaign_regions:
-            skipped_wrong_region += 1
+            # Повтор id в списке считается повторно, как и раньше
+            skipped_wrong_region += occurrences[org_id]
+            continue
+        orgs.append(org)
+
+    contact_ids = {}
+    if organization_contact_map:
+        contact_ids = {
+            org.id: organization_contact_map.get(org.id)
+            for org in orgs
+            if organization_contact_map.get(org.id)
+        }
+    contact_orgs = dict(
+        Contact.objects.filter(id__in=set(contact_ids.values())).values_list("id", "organization_id")
+    ) if contact_ids else {}
+    contacts = {}
+    for org in orgs:
+        selected_contact_id = contact_ids.get(org.id)
+        if not selected_contact_id:
             continue
-        cr = campaign_regions.get(org.region_id)
-        queue = (cr.queue if cr else None) or (source_lead_defaults.queue if source_lead_defaults else None) or first_queue
-        lead, created = Lead.objects.get_or_create(
+        if contact_orgs.get(selected_contact_id) == org.id:
+            contacts[org.id] = selected_contact_id
+        else:
+            errors.append(
+                f"Контакт {selected_contact_id} не найден в организации {org.name}."
+            )
+
+    def with_transfer_note(notes):
+        current_notes = (notes or "").strip()
+        if not transfer_note or current_notes.startswith(transfer_note):
+            return notes
+        return f"{transfer_note}\n{current_notes}".strip() if current_notes else transfer_note
+
+    existing = {
+        (lead.organization_id, lead.region_id): lead
+        for lead in Lead.objects.filter(
             campaign=campaign,
-            organization_id=org.id,
-            funnel_id=funnel.id,
-            region_id=org.region_id,
-            defaults={
-                "queue": queue,
-                "manager_id": (cr.manager_id if cr else None) or (source_lead_defaults.manager_id if source_lead_defaults else None),
-                "primary_contact_specialist_id": (
-                    (cr.primary_contact_specialist_id if cr else None)
-                    or (source_lead_defaults.primary_contact_specialist_id if source_lead_defaults else None)
-                ),
-            },
-        )
-        update_fields = []
-        if entry_stage and lead.current_stage_id != entry_stage.id:
-            lead.current_stage = entry_stage
-            update_fields.append("current_stage")
-        if (
-            entry_stage
-            and entry_stage.primary_contact_specialist_id
-            and not lead.primary_contact_specialist_id
-        ):
-            lead.primary_contact_specialist_id = entry_stage.primary_contact_specialist_id
-            update_fields.append("primary_contact_specialist")
-        if update_fields:
-            lead.save(update_fields=update_fields + ["updated_at"])
-        selected_contact_id = None
-        if organization_contact_map:
-            selected_contact_id = organization_contact_map.get(org.id)
-        if selected_contact_id:
-            contact = (
-                Contact.objects.filter(id=selected_contact_id, organization_id=org.id)
-                .only("id")
-                .first()
+            funnel=funnel,
+            organization_id__in=[org.id for org in orgs],
+        ).only("id", "organization_id", "region_id", "primary_contact_id", "notes")
+    }
+    new_leads = []
+    changed_leads = []
+    now = timezone.now()
+    for org in orgs:
+        lead = existing.get((org.id, org.region_id))
+        if lead is None:
+            cr = campaign_regions.get(org.region_id)
+            queue = (cr.queue if cr else None) or (source_lead_defaults.queue if source_lead_defaults else None) or first_queue
+            specialist_id = (
+                (cr.primary_contact_specialist_id if cr else None)
+                or (source_lead_defaults.primary_contact_specialist_id if source_lead_defaults else None)
             )
-            if contact:
-                if lead.primary_contact_id != contact.id:
-                    lead.primary_contact_id = contact.id
-                    lead.save(update_fields=["primary_contact", "updated_at"])
-            else:
-                errors.append(
-                    f"Контакт {selected_contact_id} не найден в организации {org.name}."
-                )
-        CampaignOrganization.objects.get_or_create(campaign=campaign, organization_id=org.id)
-        if source_org_name:
-            transfer_note = f"Передано от организации: {source_org_name}"
-            if source_transfer_comment:
-                transfer_note = f"{transfer_note}. Комментарий: {source_transfer_comment}"
-            current_notes = (lead.notes or "").strip()
-            if not current_notes.startswith(transfer_note):
-                lead.notes = f"{transfer_note}\n{current_notes}".strip() if current_notes else transfer_note
-                lead.save(update_fields=["notes", "updated_at"])
-        CampaignCreateSerializer._materialize_lead_subfunnels(lead, source="collect_import")
-        if created:
-            leads_created += 1
+            new_leads.append(Lead(
+                campaign=campaign,
+                organization_id=org.id,
+                funnel_id=funnel.id,
+                region_id=org.region_id,
+                queue=queue,
+                manager_id=(cr.manager_id if cr else None) or (source_lead_defaults.manager_id if source_lead_defaults else None),
+                primary_contact_specialist_id=specialist_id or entry_specialist_id,
+                current_stage=entry_stage,
+                primary_contact_id=contacts.get(org.id),
+                notes=with_transfer_note("") or "",
+            ))
             leads_by_region[org.region_id] += 1
-        linked_ids.add(org.id)
+            continue
+        contact_id = contacts.get(org.id) or lead.primary_contact_id
+        notes = with_transfer_note(lead.notes)
+        if contact_id != lead.primary_contact_id or notes != lead.notes:
+            lead.primary_contact_id = contact_id
+            lead.notes = notes
+            lead.updated_at = now
+            changed_leads.append(lead)
+
+    existing_ids = [lead.pk for lead in existing.values()]
+    with transaction.atomic():
+        Lead.objects.bulk_create(new_leads, batch_size=MATERIALIZE_CHUNK_SIZE)
+        # Существующие лиды — на входную стадию, без специалиста — специалист стадии
+        moved = Lead.objects.none()
+        if entry_stage:
+            moved = Lead.objects.filter(id__in=existing_ids).exclude(current_stage=entry_stage)
+            moved_ids = list(moved.values_list("id", flat=True))
+            moved = Lead.objects.filter(id__in=moved_ids)
+            moved.update(current_stage=entry_stage, updated_at=now)
+            if entry_specialist_id:
+                Lead.objects.filter(id__in=existing_ids, primary_contact_specialist__isnull=True).update(
+                    primary_contact_specialist_id=entry_specialist_id, updated_at=now
+                )
+        if changed_leads:
+            Lead.objects.bulk_update(
+                changed_leads, ["primary_contact", "notes", "updated_at"], batch_size=MATERIALIZE_CHUNK_SIZE
+            )
+        CampaignOrganization.objects.bulk_create(
+            [CampaignOrganization(campaign=campaign, organization_id=org.id) for org in orgs],
+            ignore_conflicts=True,
+            batch_size=MATERIALIZE_CHUNK_SIZE,
+        )
+
+        # bulk_create и queryset.update минуют сигналы Lead — их действия повторены здесь
+        staged = Lead.objects.filter(id__in=[lead.pk for lead in new_leads]) | moved
+        materialize_stage_checklists(staged)
+        sync_lead_checklist_counters(staged)
+        sync_lead_stage_deadlines(staged)
+        # Как и прежде — для всех привязанных лидов: уже существующие задачи не трогаются
+        materialize_lead_subfunnels(
+            campaign,
+            Lead.objects.filter(id__in=[lead.pk for lead in new_leads] + existing_ids),
+            source="collect_import",
+        )
+        if new_leads or existing_ids:
+            schedule_campaign_stats_refresh(campaign.pk)
 
     if skipped_wrong_region:
         errors.append(
             f"Организаций вне регионов кампании (лиды не созданы): {skipped_wrong_region}"
         )
     return {
-        "leads_created": leads_created,
+        "leads_created": len(new_leads),
         "leads_by_region": dict(leads_by_region),
-        "linked_ids": list(linked_ids),
+        "linked_ids": [org.id for org in orgs],
     }
 
 
@@ -490,53 +578,55 @@ class OrganizationListCaptureRequestSerializer(serializers.Serializer):
     items = OrganizationListCaptureItemSerializer(many=True, allow_empty=False)
 
 
-class CampaignViewSet(viewsets.ModelViewSet):
+class CampaignViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
     filterset_fields = ["status", "federal_operator", "project", "acting_organization", "responsible"]
     search_fields = ["name"]
 
+    NESTED_LIST_ACTIONS = ("add_regions", "add_organizations", "add_leads")
+
+    def _is_nested_list(self):
+        # GET /campaigns/{id}/leads|organizations|regions/: параметры (?search=, ?status=, ?tags=)
+        # фильтруют вложенный список, а не саму кампанию
+        return self.action in self.NESTED_LIST_ACTIONS and self.request.method == "GET"
+
+    def filter_queryset(self, queryset):
+        if self._is_nested_list():
+            return queryset
+        return super().filter_queryset(queryset)
+
     def get_queryset(self):
         qs = Campaign.objects.select_related(
             "federal_operator", "created_by", "responsible"
-        ).prefetch_related(
-            "tags",
-            "queues__stage_deadlines",
-            "campaign_funnels__funnel",
-            "campaign_programs__program__profession",
-            "campaign_regions__region__federal_district",
-            "campaign_regions__queue",
-            "subfunnels__template",
-            "subfunnels__role",
-            "subfunnels__default_assignee",
-            "organizations__organization__region",
-            "organizations__organization__tags",
-            "leads__organization__region",
-            "leads__region",
-            "leads__funnel",
-            "leads__current_stage",
-            "leads__queue",
-            "leads__manager",
-            "leads__primary_contact",
-            "leads__tags",
-            "leads__organization__tags",
         )
+        if self.action == "list":
+            # Список читает агрегаты из CampaignStats — без выборки лидов и JOIN-агрегатов по ним
+            qs = CampaignListSerializer.setup_queryset(
+                Campaign.objects.all(), self.get_field_selection()
+            )
+        elif self.action == "retrieve":
+            qs = CampaignDetailSerializer.setup_queryset(
+                Campaign.objects.all(), self.get_field_selection()
+            )
+        elif self.action in ("update", "partial_update"):
+            qs = qs.prefetch_related("tags", "queues__stage_deadlines")
         tag_ids = self.request.query_params.get("tags")
-        if tag_ids:
+        if tag_ids and not self._is_nested_list():
             ids = [int(x) for x in tag_ids.split(",") if x.strip().isdigit()]
             if ids:
                 qs = qs.filter(tags__id__in=ids).distinct()
         if self.action == "list":
             qs = qs.order_by("-created_at")
-            # Без колонок 0006 annotate даёт SQL error → 500 на проде при пропущенном migrate
-            if lead_table_has_quota_split_columns():
-                qs = qs.annotate(
-                    _d_plan=Coalesce(Sum("leads__forecast_demand"), Value(0)),
-                    _d_cd=Coalesce(Sum("leads__demand_collected_declared"), Value(0)),
-                    _d_cl=Coalesce(Sum("leads__demand_collected_list"), Value(0)),
-                    _d_qd=Coalesce(Sum("leads__demand_quota_declared"), Value(0)),
-                    _d_ql=Coalesce(Sum("leads__demand_quota_list"), Value(0)),
-                )
         return qs
 
+    def _paginate_nested(self, request, qs, serializer_class):
+        paginator = CampaignNestedCursorPagination()
+        page = paginator.paginate_queryset(qs, request, view=self)
+        kwargs = {}
+        if issubclass(serializer_class, SparseFieldsMixin):
+            kwargs["field_selection"] = self.get_field_selection()
+        data = serializer_class(page, many=True, context=self.get_serializer_context(), **kwargs).data
+        return paginator.get_paginated_response(data)
+
     def get_serializer_class(self):
         if self.action == "list":
             return CampaignListSerializer
@@ -563,9 +653,28 @@ class CampaignViewSet(viewsets.ModelViewSet):
             status=status.HTTP_201_CREATED,
         )
 
-    @action(detail=True, methods=["post"], url_path="regions")
+    @action(detail=True, methods=["get", "post"], url_path="regions")
     def add_regions(self, request, pk=None):
         campaign = self.get_object()
+        if request.method == "GET":
+            params = request.query_params
+            qs = CampaignRegion.objects.filter(campaign=campaign).select_related(
+                "region__federal_district", "queue", "manager", "primary_contact_specialist",
+            )
+            for param, lookup in (
+                ("queue", "queue_id__in"),
+                ("manager", "manager_id__in"),
+                ("region", "region_id__in"),
+                ("federal_district", "region__federal_district_id__in"),
+            ):
+                ids = _query_param_ids(params, param)
+                if ids:
+                    qs = qs.filter(**{lookup: ids})
+            search = (params.get("search") or "").strip()
+            if search:
+                qs = qs.filter(region__name__icontains=search)
+            return self._paginate_nested(request, qs, CampaignRegionSerializer)
+
         regions_data = request.data.get("regions", [])
         created = []
         for rd in regions_data:
@@ -584,9 +693,30 @@ class CampaignViewSet(viewsets.ModelViewSet):
             status=status.HTTP_201_CREATED,
         )
 
-    @action(detail=True, methods=["post"], url_path="organizations")
+    @action(detail=True, methods=["get", "post"], url_path="organizations")
     def add_organizations(self, request, pk=None):
         campaign = self.get_object()
+        if request.method == "GET":
+            params = request.query_params
+            qs = CampaignOrganization.objects.filter(campaign=campaign).select_related(
+                "organization__region", "manager",
+            ).prefetch_related("organization__tags")
+            for param, lookup in (
+                ("manager", "manager_id__in"),
+                ("organization", "organization_id__in"),
+                ("region", "organization__region_id__in"),
+            ):
+                ids = _query_param_ids(params, param)
+                if ids:
+                    qs = qs.filter(**{lookup: ids})
+            status_values = [x.strip() for x in (params.get("status") or "").split(",") if x.strip()]
+            if status_values:
+                qs = qs.filter(status__in=status_values)
+            search = (params.get("search") or "").strip()
+            if search:
+                qs = qs.filter(organization__name__icontains=search)
+            return self._paginate_nested(request, qs, CampaignOrganizationSerializer)
+
         org_ids = request.data.get("organization_ids", [])
         created = []
         for oid in org_ids:
@@ -602,9 +732,46 @@ class CampaignViewSet(viewsets.ModelViewSet):
             status=status.HTTP_201_CREATED,
         )
 
-    @action(detail=True, methods=["post"], url_path="leads")
+    @action(detail=True, methods=["get", "post"], url_path="leads")
     def add_leads(self, request, pk=None):
         campaign = self.get_object()
+        if request.method == "GET":
+            params = request.query_params
+            qs = LeadListSerializer.setup_queryset(
+                Lead.objects.filter(campaign=campaign), self.get_field_selection()
+            )
+            for param, lookup in (
+                ("funnel", "funnel_id__in"),
+                ("queue", "queue_id__in"),
+                ("current_stage", "current_stage_id__in"),
+                ("manager", "manager_id__in"),
+                ("organization", "organization_id__in"),
+            ):
+                ids = _query_param_ids(params, param)
+                if ids:
+                    qs = qs.filter(**{lookup: ids})
+            region_ids = _query_param_ids(params, "region")
+            if region_ids:
+                qs = qs.filter(
+                    Q(region_id__in=region_ids)
+                    | Q(region__isnull=True, organization__region_id__in=region_ids)
+                )
+            tag_ids = _query_param_ids(params, "tags")
+            if tag_ids:
+                # Тег лида или его организации — как фильтр на странице кампании
+                qs = qs.filter(
+                    Q(tags__id__in=tag_ids) | Q(organization__tags__id__in=tag_ids)
+                ).distinct()
+            qs = _filter_leads_by_last_touch(
+                qs,
+                min_days=_query_param_int(params, "touch_min_days"),
+                max_days=_query_param_int(params, "touch_max_days"),
+            )
+            search = (params.get("search") or "").strip()
+            if search:
+                qs = qs.filter(organization__name__icontains=search)
+            return self._paginate_nested(request, qs, LeadListSerializer)
+
         lead_data = request.data.get("leads", [])
         first_queue = campaign.queues.order_by("queue_number").first()
         created = []
@@ -641,6 +808,8 @@ class CampaignViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=["post"], url_path="collect-stage-import")
     def collect_stage_import(self, request, pk=None):
         """Импорт организаций и контактов в кампанию с нулевой стадией (по регионам отбора)."""
+        from apps.organizations.import_jobs import enqueue_import_job, wants_background
+        from apps.organizations.models import ImportJob
         from apps.organizations.views import ContactViewSet, OrganizationViewSet
 
         campaign = self.get_object()
@@ -686,6 +855,8 @@ class CampaignViewSet(viewsets.ModelViewSet):
                 {"detail": "Передайте organizations_file и/или contacts_file (.xlsx)."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
+        if wants_background(request):
+            return enqueue_import_job(request, ImportJob.Kind.COLLECT_STAGE, object_id=campaign.pk)
 
         errors = []
         org_import = None
@@ -698,12 +869,10 @@ class CampaignViewSet(viewsets.ModelViewSet):
                     {"detail": "Файл организаций: только .xlsx"},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-            raw_org = org_file.read()
             org_import = _run_registry_import_xlsx(
                 OrganizationViewSet,
                 request,
-                raw_org,
-                org_file.name,
+                org_file,
                 {
                     "default_org_type": request.data.get("default_org_type") or "other",
                     "tag_ids": request.data.get("organization_tag_ids") or "",
@@ -711,7 +880,7 @@ class CampaignViewSet(viewsets.ModelViewSet):
             )
             if org_import.status_code >= 400:
                 return org_import
-            organization_ids = _organization_ids_from_xlsx_bytes(raw_org, "organizations")
+            organization_ids = _organization_ids_from_xlsx(org_file, "organizations")
 
         if contacts_file:
             if not contacts_file.name.lower().endswith(".xlsx"):
@@ -719,12 +888,10 @@ class CampaignViewSet(viewsets.ModelViewSet):
                     {"detail": "Файл контактов: только .xlsx"},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
-            raw_contacts = contacts_file.read()
             contact_import = _run_registry_import_xlsx(
                 ContactViewSet,
                 request,
-                raw_contacts,
-                contacts_file.name,
+                contacts_file,
                 {
                     "default_org_type": request.data.get("default_org_type") or "other",
                     "create_missing_organizations": "true",
@@ -734,7 +901,7 @@ class CampaignViewSet(viewsets.ModelViewSet):
             )
             if contact_import.status_code >= 400:
                 return contact_import
-            contact_org_ids = _organization_ids_from_xlsx_bytes(raw_contacts, "contacts")
+            contact_org_ids = _organization_ids_from_xlsx(contacts_file, "contacts")
             organization_ids = list({*organization_ids, *contact_org_ids})
 
         link_result = _link_orgs_to_collect_campaign(
@@ -995,7 +1162,12 @@ class CampaignViewSet(viewsets.ModelViewSet):
         obj = serializer.save(template_version=serializer.validated_data["template"].version)
         return Response(CampaignSubfunnelSerializer(obj).data, status=status.HTTP_201_CREATED)
 
-    @action(detail=False, methods=["get"], url_path="subfunnel-workspace")
+    @action(
+        detail=False,
+        methods=["get"],
+        url_path="subfunnel-workspace",
+        content_negotiation_class=WorkspaceContentNegotiation,
+    )
     def subfunnel_workspace(self, request):
         campaign_id = request.query_params.get("campaign")
         template_id = request.query_params.get("template") or request.query_params.get("subfunnel")
@@ -1030,6 +1202,17 @@ class CampaignViewSet(viewsets.ModelViewSet):
             rows = rows.filter(assignee_id=int(assignee_id))
         if overdue in ("1", "true", "True"):
             rows = rows.filter(due_at__lt=timezone.now()).exclude(status=LeadSubfunnel.Status.DONE)
+        search = (request.query_params.get("search") or "").strip()
+        if search:
+            rows = rows.filter(
+                Q(lead__organization__name__icontains=search)
+                | Q(campaign_region__region__name__icontains=search)
+                | Q(lead__campaign__name__icontains=search)
+                | Q(campaign_region__campaign__name__icontains=search)
+                | Q(assignee__last_name__icontains=search)
+                | Q(assignee__first_name__icontains=search)
+                | Q(campaign_subfunnel__template__name__icontains=search)
+            )
 
         templates = list(
             rows.values(
@@ -1106,47 +1289,6 @@ class CampaignViewSet(viewsets.ModelViewSet):
             elif status_filter_str.isdigit():
                 rows = rows.filter(current_template_stage_id=int(status_filter_str))
 
-        capture_counts_by_region = {}
-        region_rows = list(
-            rows.filter(
-                campaign_region_id__isnull=False,
-                campaign_subfunnel__template__auto_create_on_collect_import=True,
-            )
-            .values(
-                "campaign_region_id",
-                "campaign_region__campaign_id",
-                "campaign_region__region_id",
-            )
-            .distinct()
-        )
-        region_pairs = {
-            (r["campaign_region__campaign_id"], r["campaign_region__region_id"])
-            for r in region_rows
-            if r["campaign_region__campaign_id"] and r["campaign_region__region_id"]
-        }
-        if region_pairs:
-            pairs_query = Q()
-            for campaign_id_value, region_id_value in region_pairs:
-                pairs_query |= Q(campaign_id=campaign_id_value, region_id=region_id_value)
-            lead_counts = Lead.objects.filter(pairs_query).values("campaign_id", "region_id").annotate(
-                organizations_count=Count("organization_id", distinct=True),
-                contacts_count=Count("primary_contact_id", filter=Q(primary_contact_id__isnull=False), distinct=True),
-            )
-            counts_by_pair = {
-                (it["campaign_id"], it["region_id"]): {
-                    "organizations": it["organizations_count"],
-                    "contacts": it["contacts_count"],
-                }
-                for it in lead_counts
-            }
-            capture_counts_by_region = {
-                r["campaign_region_id"]: counts_by_pair.get(
-                    (r["campaign_region__campaign_id"], r["campaign_region__region_id"]),
-                    {"organizations": 0, "contacts": 0},
-                )
-                for r in region_rows
-            }
-
         stages = []
         if active_template_id is not None:
             stages = list(
@@ -1166,101 +1308,43 @@ class CampaignViewSet(viewsets.ModelViewSet):
             for stage in stages
         ]
         active_stage_ids = {col["stage_id"] for col in columns}
-
-        payload = []
         now = timezone.now()
-        for row in rows:
-            checklist_values = sorted(
-                row.checklist_values.all(),
-                key=lambda v: (v.template_item.order, v.id),
-            )
-            checklist_total = len(checklist_values)
-            checklist_completed = sum(1 for v in checklist_values if v.is_completed)
-            checklist_summary = [
-                {"text": v.template_item.title, "done": v.is_completed}
-                for v in checklist_values
-            ]
-            is_region_task = bool(row.campaign_region_id)
-            if is_region_task:
-                campaign_obj = row.campaign_region.campaign
-                lead_name = f"Регион: {row.campaign_region.region.name}"
-                stage_name = (
-                    campaign_obj.get_operational_stage_display()
-                    if campaign_obj and campaign_obj.operational_stage
-                    else None
-                )
+
+        limit = _workspace_limit(request.query_params.get("limit"))
+        cursor = request.query_params.get("cursor") or None
+        column_param = request.query_params.get("column")
+        try:
+            if limit and column_param:
+                # Догрузка одной колонки канбана по её курсору
+                column_rows = workspace.filter_column(rows, column_param, active_stage_ids)
+                page, next_cursor = workspace.card_page(column_rows, cursor, limit)
+                return Response({
+                    "column": column_param,
+                    "items": workspace.workspace_cards(page, active_stage_ids, now),
+                    "next_cursor": next_cursor,
+                })
+            column_pages = {}
+            table_next_cursor = None
+            if not limit:
+                payload = workspace.workspace_cards(rows, active_stage_ids, now)
+            elif view_mode == "table":
+                page, table_next_cursor = workspace.card_page(rows, cursor, limit)
+                payload = workspace.workspace_cards(page, active_stage_ids, now)
             else:
-                campaign_obj = row.lead.campaign if row.lead else None
-                lead_name = (
-                    row.lead.organization.name
-                    if row.lead and row.lead.organization
-                    else (f"Лид {row.lead_id}" if row.lead_id else "—")
+                column_pages = workspace.first_column_pages(rows, active_stage_ids, limit)
+                payload = workspace.workspace_cards(
+                    [row for items, _ in column_pages.values() for row in items],
+                    active_stage_ids,
+                    now,
                 )
-                stage_name = row.lead.current_stage.name if row.lead and row.lead.current_stage else None
-            show_capture_counts = bool(
-                is_region_task
-                and row.campaign_subfunnel.template.auto_create_on_collect_import
-            )
-            payload.append({
-                "id": row.id,
-                "campaign_id": campaign_obj.id if campaign_obj else None,
-                "campaign_name": campaign_obj.name if campaign_obj else None,
-                "lead_id": row.lead_id,
-                "lead_name": lead_name,
-                "forwarded_from": (
-                    _extract_forwarded_from_notes(row.lead.notes)
-                    if row.lead_id and row.lead
-                    else None
-                ),
-                "is_region_task": is_region_task,
-                "campaign_region_id": row.campaign_region_id,
-                "region_id": row.campaign_region.region_id if row.campaign_region_id else None,
-                "region_name": row.campaign_region.region.name if row.campaign_region_id else None,
-                "stage_name": stage_name,
-                "template_id": row.campaign_subfunnel.template_id,
-                "template_name": row.campaign_subfunnel.template.name,
-                "role_id": row.campaign_subfunnel.role_id,
-                "role_name": row.campaign_subfunnel.role.name if row.campaign_subfunnel.role else None,
-                "assignee_id": row.assignee_id,
-                "assignee_name": str(row.assignee) if row.assignee else None,
-                "status": LeadSubfunnel.normalize_status(row.status),
-                "current_template_stage_id": row.current_template_stage_id,
-                "current_template_stage_name": row.current_template_stage.name if row.current_template_stage else None,
-                "current_template_stage_order": row.current_template_stage.order if row.current_template_stage else None,
-                "board_stage_key": (
-                    f"stage-{row.current_template_stage_id}"
-                    if row.current_template_stage_id in active_stage_ids
-                    else "stage-unassigned"
-                ),
-                "due_at": row.due_at.isoformat() if row.due_at else None,
-                "is_overdue": bool(row.due_at and row.due_at < now and row.status != LeadSubfunnel.Status.DONE),
-                "is_available": row.is_available,
-                "checklist_progress": {
-                    "total": checklist_total,
-                    "completed": checklist_completed,
-                },
-                "checklist_summary": checklist_summary,
-                "show_capture_counts": show_capture_counts,
-                "capture_counts": (
-                    capture_counts_by_region.get(
-                        row.campaign_region_id,
-                        {"organizations": 0, "contacts": 0},
-                    )
-                    if show_capture_counts
-                    else None
-                ),
-            })
-
-        kanban_map = defaultdict(list)
-        for item in payload:
-            workflow_status = LeadSubfunnel.normalize_status(item.get("status"))
-            item["status"] = workflow_status
-            kanban_map[item["board_stage_key"]].append(item)
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
-        if kanban_map.get("stage-unassigned"):
+        column_totals = workspace.column_counts(rows, active_stage_ids)
+        if column_totals.get(workspace.UNASSIGNED_COLUMN):
             columns.append(
                 {
-                    "status": "stage-unassigned",
+                    "status": workspace.UNASSIGNED_COLUMN,
                     "stage_id": None,
                     "stage_name": "Без этапа",
                     "order": 10_000,
@@ -1268,21 +1352,26 @@ class CampaignViewSet(viewsets.ModelViewSet):
                 }
             )
 
-        items_by_stage = {status: items for status, items in kanban_map.items()}
+        kanban_map = defaultdict(list)
+        for item in payload:
+            kanban_map[item["board_stage_key"]].append(item)
+
+        items_by_stage = {stage_key: items for stage_key, items in kanban_map.items()}
         kanban = []
         for col in columns:
             col_status = col["status"]
-            items = kanban_map.get(col_status, [])
-            kanban.append(
-                {
-                    "status": col_status,
-                    "stage_id": col.get("stage_id"),
-                    "stage_name": col["stage_name"],
-                    "items": items,
-                }
-            )
+            column = {
+                "status": col_status,
+                "stage_id": col.get("stage_id"),
+                "stage_name": col["stage_name"],
+                "items": kanban_map.get(col_status, []),
+            }
+            if limit:
+                column["total"] = column_totals.get(col_status, 0)
+                column["next_cursor"] = column_pages.get(col_status, ((), None))[1]
+            kanban.append(column)
 
-        return Response({
+        response = {
             "view_mode": view_mode,
             "templates": template_tabs,
             "active_template_id": active_template_id,
@@ -1290,16 +1379,14 @@ class CampaignViewSet(viewsets.ModelViewSet):
             "items_by_stage": items_by_stage,
             "kanban": kanban,
             "table": payload,
-            "totals": {
-                "all": len(payload),
-                "overdue": sum(1 for i in payload if i["is_overdue"]),
-                "backlog": sum(1 for i in payload if LeadSubfunnel.normalize_status(i["status"]) == LeadSubfunnel.Status.BACKLOG),
-                "in_progress": sum(1 for i in payload if i["status"] == LeadSubfunnel.Status.IN_PROGRESS),
-                "paused": sum(1 for i in payload if i["status"] == LeadSubfunnel.Status.PAUSED),
-                "rejected": sum(1 for i in payload if i["status"] == LeadSubfunnel.Status.REJECTED),
-                "done": sum(1 for i in payload if i["status"] == LeadSubfunnel.Status.DONE),
-            },
-        })
+            "totals": workspace.status_totals(rows, now),
+        }
+        if limit:
+            response["limit"] = limit
+            response["next_cursor"] = table_next_cursor
+        if request.query_params.get("format") == "v2":
+            response = workspace.compact_workspace_response(response)
+        return Response(response)
 
     @action(detail=True, methods=["get"], url_path="leads-demand-import-template")
     def leads_demand_import_template(self, request, pk=None):
@@ -1373,97 +1460,112 @@ class CampaignViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=["post"], url_path="leads-demand-import")
     def leads_demand_import(self, request, pk=None):
+        from apps.organizations.import_jobs import enqueue_import_job, wants_background
+        from apps.organizations.models import ImportJob
+        from apps.organizations.views import _XlsxUpload, _xlsx_row_chunks
+
         campaign = self.get_object()
         file_obj = request.FILES.get("file")
         if not file_obj:
             return Response({"detail": "Файл не передан"}, status=status.HTTP_400_BAD_REQUEST)
         if not file_obj.name.lower().endswith(".xlsx"):
             return Response({"detail": "Поддерживаются только .xlsx файлы"}, status=status.HTTP_400_BAD_REQUEST)
+        if wants_background(request):
+            return enqueue_import_job(request, ImportJob.Kind.LEADS_DEMAND, object_id=campaign.pk)
 
         try:
-            raw = file_obj.read()
-            if not raw:
-                return Response({"detail": "Файл пустой"}, status=status.HTTP_400_BAD_REQUEST)
-            wb = load_workbook(io.BytesIO(raw), data_only=True, read_only=False)
-            ws = wb.active
+            upload = _XlsxUpload(file_obj)
         except Exception as exc:
             return Response(
                 {"detail": f"Не удалось прочитать Excel (.xlsx): {exc}"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        header_values = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), None)
-        col_map = _build_leads_demand_import_column_map(header_values)
-        if "lead_id" not in col_map:
-            return Response(
-                {"detail": "В файле не найден столбец lead_id"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
         updated = 0
         skipped = 0
         errors = []
 
-        for row_no, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
-            if not row:
-                continue
-            lead_id_raw = row[col_map["lead_id"]] if col_map["lead_id"] < len(row) else None
-            lead_id_text = _normalize_cell(lead_id_raw)
-            if not lead_id_text:
-                skipped += 1
-                continue
-            try:
-                lead_id = int(float(lead_id_text)) if "." in lead_id_text else int(lead_id_text)
-            except ValueError:
-                skipped += 1
-                errors.append(f"Строка {row_no}: некорректный lead_id «{lead_id_text}»")
-                continue
-
-            try:
-                lead = campaign.leads.get(id=lead_id)
-            except Lead.DoesNotExist:
-                skipped += 1
-                errors.append(f"Строка {row_no}: лид #{lead_id} не найден в этой кампании")
-                continue
-
-            try:
-                plan = _parse_non_negative_int(
-                    row[col_map["forecast_demand"]] if "forecast_demand" in col_map and col_map["forecast_demand"] < len(row) else None,
-                    field_label="План",
-                )
-                quota_declared = _parse_non_negative_int(
-                    row[col_map["demand_quota_declared"]] if "demand_quota_declared" in col_map and col_map["demand_quota_declared"] < len(row) else None,
-                    field_label="Заявленная",
-                )
-                quota_list = _parse_non_negative_int(
-                    row[col_map["demand_quota_list"]] if "demand_quota_list" in col_map and col_map["demand_quota_list"] < len(row) else None,
-                    field_label="Списочная (факт)",
+        with upload:
+            if upload.workbook is None:
+                return Response({"detail": "Файл пустой"}, status=status.HTTP_400_BAD_REQUEST)
+            ws = upload.workbook.active
+            header_values = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), None)
+            col_map = _build_leads_demand_import_column_map(header_values)
+            if "lead_id" not in col_map:
+                return Response(
+                    {"detail": "В файле не найден столбец lead_id"},
+                    status=status.HTTP_400_BAD_REQUEST,
                 )
-            except ValueError as exc:
-                skipped += 1
-                errors.append(f"Строка {row_no}: {exc}")
-                continue
 
-            update_fields = []
-            if plan is not None and lead.forecast_demand != plan:
-                lead.forecast_demand = plan
-                update_fields.append("forecast_demand")
-            if quota_declared is not None and lead.demand_quota_declared != quota_declared:
-                lead.demand_quota_declared = quota_declared
-                update_fields.append("demand_quota_declared")
-            if quota_list is not None:
-                if lead.demand_quota_list != quota_list:
-                    lead.demand_quota_list = quota_list
-                    update_fields.append("demand_quota_list")
-                if lead.demand_count != quota_list:
-                    lead.demand_count = quota_list
-                    update_fields.append("demand_count")
-
-            if update_fields:
-                lead.save(update_fields=list(dict.fromkeys(update_fields + ["updated_at"])))
-                updated += 1
-            else:
-                skipped += 1
+            def cell(row, key):
+                return row[col_map[key]] if key in col_map and col_map[key] < len(row) else None
+
+            # Лиды пачки читаются одним запросом, пачка сохраняется в одной транзакции
+            for chunk in _xlsx_row_chunks(ws):
+                parsed = []
+                for row_no, row in chunk:
+                    if not row:
+                        continue
+                    lead_id_text = _normalize_cell(cell(row, "lead_id"))
+                    lead_id = None
+                    if lead_id_text:
+                        try:
+                            lead_id = int(float(lead_id_text)) if "." in lead_id_text else int(lead_id_text)
+                        except ValueError:
+                            pass
+                    parsed.append((row_no, row, lead_id_text, lead_id))
+                leads = campaign.leads.in_bulk({lead_id for *_, lead_id in parsed if lead_id is not None})
+
+                with transaction.atomic():
+                    for row_no, row, lead_id_text, lead_id in parsed:
+                        if not lead_id_text:
+                            skipped += 1
+                            continue
+                        if lead_id is None:
+                            skipped += 1
+                            errors.append(f"Строка {row_no}: некорректный lead_id «{lead_id_text}»")
+                            continue
+                        lead = leads.get(lead_id)
+                        if lead is None:
+                            skipped += 1
+                            errors.append(f"Строка {row_no}: лид #{lead_id} не найден в этой кампании")
+                            continue
+
+                        try:
+                            plan = _parse_non_negative_int(cell(row, "forecast_demand"), field_label="План")
+                            quota_declared = _parse_non_negative_int(
+                                cell(row, "demand_quota_declared"),
+                                field_label="Заявленная",
+                            )
+                            quota_list = _parse_non_negative_int(
+                                cell(row, "demand_quota_list"),
+                                field_label="Списочная (факт)",
+                            )
+                        except ValueError as exc:
+                            skipped += 1
+                            errors.append(f"Строка {row_no}: {exc}")
+                            continue
+
+                        update_fields = []
+                        if plan is not None and lead.forecast_demand != plan:
+                            lead.forecast_demand = plan
+                            update_fields.append("forecast_demand")
+                        if quota_declared is not None and lead.demand_quota_declared != quota_declared:
+                            lead.demand_quota_declared = quota_declared
+                            update_fields.append("demand_quota_declared")
+                        if quota_list is not None:
+                            if lead.demand_quota_list != quota_list:
+                                lead.demand_quota_list = quota_list
+                                update_fields.append("demand_quota_list")
+                            if lead.demand_count != quota_list:
+                                lead.demand_count = quota_list
+                                update_fields.append("demand_count")
+
+                        if update_fields:
+                            lead.save(update_fields=list(dict.fromkeys(update_fields + ["updated_at"])))
+                            updated += 1
+                        else:
+                            skipped += 1
 
         return Response(
             {
@@ -1477,60 +1579,26 @@ class CampaignViewSet(viewsets.ModelViewSet):
     def assign_managers(self, request, pk=None):
         campaign = self.get_object()
         assignments = request.data.get("assignments", [])
-        updated = 0
+        # Для одной цели действует последнее назначение; затем цели группируются
+        # по (level, manager_id) — один UPDATE ... WHERE ... IN на группу.
+        # Ключ цели — строка: 5 и "5" из JSON указывают на одну запись
+        latest = {}
         for a in assignments:
             level = a.get("level")
             target_id = a.get("target_id")
-            manager_id = a.get("manager_id")
-
-            if level == "program":
-                CampaignProgram.objects.filter(
-                    campaign=campaign, program_id=target_id
-                ).update(manager_id=manager_id)
-                updated += 1
-            elif level == "region":
-                CampaignRegion.objects.filter(
-                    campaign=campaign, region_id=target_id
-                ).update(manager_id=manager_id)
-                updated += 1
-            elif level == "organization":
-                CampaignOrganization.objects.filter(
-                    campaign=campaign, organization_id=target_id
-                ).update(manager_id=manager_id)
-                updated += 1
-            elif level == "lead":
-                Lead.objects.filter(
-                    campaign=campaign, id=target_id
-                ).update(manager_id=manager_id)
-                updated += 1
-            elif level == "region_specialist":
-                CampaignRegion.objects.filter(
-                    campaign=campaign, region_id=target_id
-                ).update(primary_contact_specialist_id=manager_id)
-                updated += 1
-            elif level == "lead_specialist":
-                Lead.objects.filter(
-                    campaign=campaign, id=target_id
-                ).update(primary_contact_specialist_id=manager_id)
-                updated += 1
-            elif level == "stage_specialist":
-                FunnelStage.objects.filter(
-                    id=target_id,
-                    funnel__campaigns=campaign,
-                ).update(primary_contact_specialist_id=manager_id)
-                updated += 1
-            elif level == "checklist_specialist":
-                StageChecklistItem.objects.filter(
-                    id=target_id,
-                    stage__funnel__campaigns=campaign,
-                ).update(primary_contact_specialist_id=manager_id)
-                updated += 1
-            elif level == "lead_checklist_specialist":
-                LeadChecklistValue.objects.filter(
-                    id=target_id,
-                    lead__campaign=campaign,
-                ).update(primary_contact_specialist_id=manager_id)
-                updated += 1
+            if level in _MANAGER_ASSIGNMENT_LEVELS and target_id is not None:
+                latest[(level, str(target_id))] = a.get("manager_id")
+        groups = defaultdict(list)
+        for (level, target_id), manager_id in latest.items():
+            groups[(level, manager_id)].append(target_id)
+
+        updated = 0
+        with transaction.atomic():
+            for (level, manager_id), target_ids in groups.items():
+                queryset, target_field, assign_field = _MANAGER_ASSIGNMENT_LEVELS[level]
+                updated += queryset(campaign).filter(
+                    **{f"{target_field}__in": target_ids}
+                ).update(**{assign_field: manager_id})
 
         return Response({"updated": updated})
 
@@ -1545,427 +1613,15 @@ class CampaignViewSet(viewsets.ModelViewSet):
         date_from_raw = request.query_params.get("date_from")
         date_to_raw = request.query_params.get("date_to")
 
-        campaign_id_int = int(campaign_id) if campaign_id and str(campaign_id).isdigit() else None
-        funnel_id_int = int(funnel_id) if funnel_id and str(funnel_id).isdigit() else None
-        user_id_int = int(user_id) if user_id and str(user_id).isdigit() else None
-        date_from = parse_date(date_from_raw) if date_from_raw else None
-        date_to = parse_date(date_to_raw) if date_to_raw else None
-
-        def _date_in_range(d):
-            if not d:
-                return False
-            if date_from and d < date_from:
-                return False
-            if date_to and d > date_to:
-                return False
-            return True
-
-        def _dt_in_range(dt):
-            return _date_in_range(timezone.localtime(dt).date()) if dt else False
-
-        def _is_open_on_period_end(created_at, completed_at=None):
-            if not date_to:
-                return False
-            if timezone.localtime(created_at).date() > date_to:
-                return False
-            if not completed_at:
-                return True
-            return timezone.localtime(completed_at).date() > date_to
-
-        has_period = bool(date_from or date_to)
-        today = timezone.localdate()
-        now = timezone.now()
-
-        def _bump_activity_status(activity_map, date_obj, status):
-            if not date_obj:
-                return
-            if has_period and not _date_in_range(date_obj):
-                return
-            normalized = LeadSubfunnel.normalize_status(status)
-            if normalized not in {
-                LeadSubfunnel.Status.BACKLOG,
-                LeadSubfunnel.Status.IN_PROGRESS,
-                LeadSubfunnel.Status.PAUSED,
-                LeadSubfunnel.Status.REJECTED,
-                LeadSubfunnel.Status.DONE,
-            }:
-                return
-            key = date_obj.isoformat()
-            bucket = activity_map[key]
-            bucket["date"] = key
-            bucket[normalized] += 1
-
-        bucket = defaultdict(
-            lambda: {
-                "user_id": None,
-                "user_name": None,
-                "role": None,
-                "active_leads": 0,
-                "pending_checklist": 0,
-                "overdue_stage": 0,
-                "overdue_checklist": 0,
-                "tasks_in_progress": 0,
-                "tasks_overdue": 0,
-            }
-        )
-
-        managers_map = defaultdict(
-            lambda: {
-                "user_id": None,
-                "user_name": None,
-                "campaigns": defaultdict(
-                    lambda: {"campaign_id": None, "campaign_name": None, "leads": []}
-                ),
-            }
-        )
-        def _specialist_campaign_bucket():
-            return {
-                "campaign_id": None,
-                "campaign_name": None,
-                "stats": _empty_workload_task_stats(),
-                "templates": defaultdict(
-                    lambda: {
-                        "template_id": None,
-                        "template_name": None,
-                        "stats": _empty_workload_task_stats(),
-                    }
-                ),
-            }
-
-        specialists_map = defaultdict(
-            lambda: {
-                "user_id": None,
-                "user_name": None,
-                "campaigns": defaultdict(_specialist_campaign_bucket),
-            }
-        )
-        activity_by_period = defaultdict(_empty_activity_by_period_bucket)
-        chart_data = {
-            "manager": {
-                "by_campaign": defaultdict(
-                    lambda: {"campaign_id": None, "campaign_name": None, "in_progress": 0, "overdue": 0, "done_in_period": 0}
-                ),
-                "by_user": defaultdict(
-                    lambda: {"user_id": None, "user_name": None, "in_progress": 0, "overdue": 0}
-                ),
-                "by_day": defaultdict(lambda: {"date": None, "opened": 0, "completed": 0, "overdue": 0}),
-                "status_pie": defaultdict(int),
-            },
-            "specialist": {
-                "by_campaign": defaultdict(
-                    lambda: {"campaign_id": None, "campaign_name": None, "in_progress": 0, "overdue": 0, "done_in_period": 0}
-                ),
-                "by_user": defaultdict(
-                    lambda: {"user_id": None, "user_name": None, "in_progress": 0, "overdue": 0}
-                ),
-                "by_day": defaultdict(lambda: {"date": None, "opened": 0, "completed": 0, "overdue": 0}),
-                "status_pie": defaultdict(int),
-            },
-        }
-
-        def add_row(user_obj, role_key, active=0, pending=0, overdue_stage=0, overdue_checklist=0, tasks_in_progress=0, tasks_overdue=0):
-            if not user_obj:
-                return
-            if user_id_int and user_obj.id != user_id_int:
-                return
-            key = (role_key, user_obj.id)
-            row = bucket[key]
-            row["user_id"] = user_obj.id
-            row["user_name"] = str(user_obj)
-            row["role"] = role_key
-            row["active_leads"] += active
-            row["pending_checklist"] += pending
-            row["overdue_stage"] += overdue_stage
-            row["overdue_checklist"] += overdue_checklist
-            row["tasks_in_progress"] += tasks_in_progress
-            row["tasks_overdue"] += tasks_overdue
-
-        leads_qs = Lead.objects.select_related(
-            "campaign",
-            "funnel",
-            "current_stage",
-            "manager",
-            "primary_contact_specialist",
-            "current_stage__primary_contact_specialist",
-        ).prefetch_related("checklist_values__checklist_item")
-
-        if campaign_id_int:
-            leads_qs = leads_qs.filter(campaign_id=campaign_id_int)
-        if funnel_id_int:
-            leads_qs = leads_qs.filter(funnel_id=funnel_id_int)
-
-        leads = [
-            lead
-            for lead in leads_qs
-            if lead.current_stage_id and not lead.current_stage.is_rejection
-        ]
-
-        for lead in leads:
-            stage_deadline = lead.get_stage_deadline(lead.current_stage)
-            stage_overdue = bool(stage_deadline and stage_deadline < today)
-            stage_items = [
-                v
-                for v in lead.checklist_values.all()
-                if v.checklist_item.stage_id == lead.current_stage_id
-            ]
-            pending_items = [v for v in stage_items if not v.is_completed]
-
-            if has_period:
-                lead_active = (
-                    _dt_in_range(lead.updated_at)
-                    or any(_dt_in_range(v.updated_at) or _dt_in_range(v.completed_at) for v in stage_items)
-                    or _date_in_range(stage_deadline)
-                    or _is_open_on_period_end(lead.created_at)
-                )
-                if not lead_active:
-                    continue
-
-            if role in ("all", "manager"):
-                add_row(
-                    lead.manager,
-                    "manager",
-                    active=1,
-                    pending=len(pending_items),
-                    overdue_stage=1 if stage_overdue else 0,
-                    overdue_checklist=len(pending_items) if stage_overdue else 0,
-                )
-                if lead.manager and (not user_id_int or lead.manager_id == user_id_int):
-                    mgr = managers_map[lead.manager_id]
-                    mgr["user_id"] = lead.manager_id
-                    mgr["user_name"] = str(lead.manager)
-                    mgr_campaign = mgr["campaigns"][lead.campaign_id]
-                    mgr_campaign["campaign_id"] = lead.campaign_id
-                    mgr_campaign["campaign_name"] = lead.campaign.name
-                    mgr_campaign["leads"].append(
-                        {
-                            "lead_id": lead.id,
-                            "organization_name": lead.organization.name if lead.organization else f"Лид {lead.id}",
-                            "stage_name": lead.current_stage.name if lead.current_stage else None,
-                            "stage_deadline": stage_deadline.isoformat() if stage_deadline else None,
-                            "stage_overdue": stage_overdue,
-                            "pending_checklist": len(pending_items),
-                            "overdue_checklist": len(pending_items) if stage_overdue else 0,
-                        }
-                    )
-                    mgr_chart_campaign = chart_data["manager"]["by_campaign"][lead.campaign_id]
-                    mgr_chart_campaign["campaign_id"] = lead.campaign_id
-                    mgr_chart_campaign["campaign_name"] = lead.campaign.name
-                    mgr_chart_campaign["in_progress"] += 1
-                    mgr_chart_campaign["overdue"] += 1 if stage_overdue else 0
-                    mgr_chart_user = chart_data["manager"]["by_user"][lead.manager_id]
-                    mgr_chart_user["user_id"] = lead.manager_id
-                    mgr_chart_user["user_name"] = str(lead.manager)
-                    mgr_chart_user["in_progress"] += 1
-                    mgr_chart_user["overdue"] += 1 if stage_overdue else 0
-                    chart_data["manager"]["status_pie"]["overdue" if stage_overdue else "in_progress"] += 1
-
-            if role in ("all", "specialist"):
-                lead_specialist = (
-                    lead.primary_contact_specialist
-                    or lead.current_stage.primary_contact_specialist
-                )
-                add_row(
-                    lead_specialist,
-                    "specialist",
-                    active=1,
-                    overdue_stage=1 if stage_overdue else 0,
-                )
-                for value in pending_items:
-                    specialist = (
-                        value.primary_contact_specialist
-                        or value.checklist_item.primary_contact_specialist
-                        or lead_specialist
-                    )
-                    add_row(
-                        specialist,
-                        "specialist",
-                        pending=1,
-                        overdue_checklist=1 if stage_overdue else 0,
-                    )
-
-        task_rows = LeadSubfunnel.objects.select_related(
-            "lead__campaign",
-            "lead__funnel",
-            "lead__organization",
-            "campaign_region__campaign",
-            "campaign_region__region",
-            "campaign_subfunnel__template",
-            "campaign_subfunnel__funnel",
-            "current_template_stage",
-            "assignee",
-        )
-        if campaign_id_int:
-            task_rows = task_rows.filter(
-                Q(lead__campaign_id=campaign_id_int) | Q(campaign_region__campaign_id=campaign_id_int)
-            )
-        if funnel_id_int:
-            task_rows = task_rows.filter(campaign_subfunnel__funnel_id=funnel_id_int)
-        if user_id_int:
-            task_rows = task_rows.filter(assignee_id=user_id_int)
-
-        for task in task_rows:
-            if not task.assignee_id:
-                continue
-            is_done = task.status == LeadSubfunnel.Status.DONE
-            is_overdue = bool(task.due_at and task.due_at < now and not is_done)
-            campaign_obj = task.lead.campaign if task.lead_id else (task.campaign_region.campaign if task.campaign_region_id else None)
-            if not campaign_obj:
-                continue
-
-            activity_dt = (
-                task.completed_at
-                if is_done and task.completed_at
-                else (task.updated_at or task.started_at or task.created_at)
-            )
-            if activity_dt:
-                activity_status = LeadSubfunnel.Status.DONE if is_done else task.status
-                _bump_activity_status(
-                    activity_by_period,
-                    timezone.localtime(activity_dt).date(),
-                    activity_status,
-                )
-
-            if has_period:
-                task_active = (
-                    _dt_in_range(task.updated_at)
-                    or _dt_in_range(task.started_at)
-                    or _dt_in_range(task.completed_at)
-                    or _is_open_on_period_end(task.created_at, task.completed_at if is_done else None)
-                )
-                if not task_active:
-                    continue
-
-            if role in ("all", "specialist"):
-                add_row(
-                    task.assignee,
-                    "specialist",
-                    pending=0 if is_done else 1,
-                    overdue_checklist=1 if is_overdue else 0,
-                    tasks_in_progress=0 if is_done else 1,
-                    tasks_overdue=1 if is_overdue else 0,
-                )
-                specialist_item = specialists_map[task.assignee_id]
-                specialist_item["user_id"] = task.assignee_id
-                specialist_item["user_name"] = str(task.assignee)
-                sp_campaign = specialist_item["campaigns"][campaign_obj.id]
-                sp_campaign["campaign_id"] = campaign_obj.id
-                sp_campaign["campaign_name"] = campaign_obj.name
-                template = task.campaign_subfunnel.template if task.campaign_subfunnel else None
-                template_id = template.id if template else 0
-                sp_template = sp_campaign["templates"][template_id]
-                sp_template["template_id"] = template_id
-                sp_template["template_name"] = template.name if template else "Без шаблона"
-                _bump_workload_task_stats(sp_campaign["stats"], task.status, is_overdue)
-                _bump_workload_task_stats(sp_template["stats"], task.status, is_overdue)
-
-                sp_chart_campaign = chart_data["specialist"]["by_campaign"][campaign_obj.id]
-                sp_chart_campaign["campaign_id"] = campaign_obj.id
-                sp_chart_campaign["campaign_name"] = campaign_obj.name
-                if is_done:
-                    if _dt_in_range(task.completed_at):
-                        sp_chart_campaign["done_in_period"] += 1
-                else:
-                    sp_chart_campaign["in_progress"] += 1
-                    sp_chart_campaign["overdue"] += 1 if is_overdue else 0
-                sp_chart_user = chart_data["specialist"]["by_user"][task.assignee_id]
-                sp_chart_user["user_id"] = task.assignee_id
-                sp_chart_user["user_name"] = str(task.assignee)
-                if not is_done:
-                    sp_chart_user["in_progress"] += 1
-                    sp_chart_user["overdue"] += 1 if is_overdue else 0
-                chart_data["specialist"]["status_pie"][LeadSubfunnel.normalize_status(task.status)] += 1
-
-        rows = sorted(
-            bucket.values(),
-            key=lambda x: (
-                x["role"] or "",
-                -(x["tasks_overdue"] + x["overdue_stage"] + x["overdue_checklist"]),
-                -(x["tasks_in_progress"] + x["active_leads"] + x["pending_checklist"]),
-                x["user_name"] or "",
-            ),
-        )
-        totals = {
-            "active_leads": sum(r["active_leads"] for r in rows),
-            "pending_checklist": sum(r["pending_checklist"] for r in rows),
-            "overdue_stage": sum(r["overdue_stage"] for r in rows),
-            "overdue_checklist": sum(r["overdue_checklist"] for r in rows),
-            "tasks_in_progress": sum(r["tasks_in_progress"] for r in rows),
-            "tasks_overdue": sum(r["tasks_overdue"] for r in rows),
-        }
-
-        managers = []
-        for item in managers_map.values():
-            campaigns = []
-            for campaign_item in item["campaigns"].values():
-                campaign_item["leads"] = sorted(
-                    campaign_item["leads"],
-                    key=lambda lead_row: (
-                        0 if lead_row["stage_overdue"] else 1,
-                        lead_row["stage_deadline"] or "9999-99-99",
-                        lead_row["organization_name"],
-                    ),
-                )
-                campaigns.append(campaign_item)
-            campaigns.sort(key=lambda c: c["campaign_name"] or "")
-            managers.append(
-                {
-                    "user_id": item["user_id"],
-                    "user_name": item["user_name"],
-                    "campaigns": campaigns,
-                }
-            )
-        managers.sort(key=lambda x: x["user_name"] or "")
-
-        specialists = []
-        for item in specialists_map.values():
-            campaigns = []
-            overdue_total = 0
-            for campaign_item in item["campaigns"].values():
-                templates = sorted(
-                    campaign_item["templates"].values(),
-                    key=lambda tpl: tpl["template_name"] or "",
-                )
-                campaign_item["templates"] = templates
-                overdue_total += campaign_item["stats"]["overdue"]
-                campaigns.append(campaign_item)
-            campaigns.sort(key=lambda c: c["campaign_name"] or "")
-            specialists.append(
-                {
-                    "user_id": item["user_id"],
-                    "user_name": item["user_name"],
-                    "campaigns": campaigns,
-                    "overdue_total": overdue_total,
-                }
-            )
-        specialists.sort(key=lambda x: x["user_name"] or "")
-
-        active_chart_scope = "specialist" if role == "specialist" else "manager"
-        charts_source = chart_data[active_chart_scope]
-        charts = {
-            "scope": active_chart_scope,
-            "by_campaign": sorted(charts_source["by_campaign"].values(), key=lambda x: x["campaign_name"] or ""),
-            "by_user": sorted(charts_source["by_user"].values(), key=lambda x: x["user_name"] or ""),
-            "by_day": sorted(activity_by_period.values(), key=lambda x: x["date"] or ""),
-            "status_pie": [{"status": status_key, "count": count} for status_key, count in charts_source["status_pie"].items()],
-        }
-
         return Response(
-            {
-                "rows": rows,
-                "totals": totals,
-                "managers": managers,
-                "specialists": specialists,
-                "charts": charts,
-                "meta": {
-                    "role": role,
-                    "campaign": campaign_id_int,
-                    "funnel": funnel_id_int,
-                    "user": user_id_int,
-                    "date_from": date_from.isoformat() if date_from else None,
-                    "date_to": date_to.isoformat() if date_to else None,
-                    "period_mode": "activity",
-                },
-            }
+            build_workload_dashboard(
+                role,
+                campaign_id=int(campaign_id) if campaign_id and str(campaign_id).isdigit() else None,
+                funnel_id=int(funnel_id) if funnel_id and str(funnel_id).isdigit() else None,
+                user_id=int(user_id) if user_id and str(user_id).isdigit() else None,
+                date_from=parse_date(date_from_raw) if date_from_raw else None,
+                date_to=parse_date(date_to_raw) if date_to_raw else None,
+            )
         )
 
     @action(detail=False, methods=["post"], url_path="bulk-update")
@@ -2063,24 +1719,35 @@ class CampaignOrganizationViewSet(viewsets.ModelViewSet):
         )
 
 
-class LeadViewSet(viewsets.ModelViewSet):
-    filterset_fields = ["campaign", "funnel", "queue", "manager", "current_stage"]
+class LeadViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
+    pagination_class = KeysetPagination
+    keyset_ordering = ("-created_at", "-id")
+    filterset_fields = {
+        "campaign": ["exact"],
+        "funnel": ["exact"],
+        "queue": ["exact"],
+        "manager": ["exact"],
+        "current_stage": ["exact"],
+        "current_stage_deadline": ["exact", "lt", "lte", "gt", "gte", "isnull"],
+    }
     search_fields = ["organization__name"]
 
     def get_queryset(self):
-        qs = Lead.objects.select_related(
-            "organization__region", "region", "funnel", "current_stage",
-            "queue", "manager", "primary_contact",
-        ).prefetch_related(
-            "tags",
-            "organization__tags",
-            "checklist_values__checklist_item",
-            "checklist_values__attachments",
-            "interactions",
-            "subfunnels__campaign_subfunnel__template",
-            "subfunnels__current_template_stage",
-            "subfunnels__checklist_values",
-        )
+        if self.action == "list":
+            qs = LeadListSerializer.setup_queryset(Lead.objects.all(), self.get_field_selection())
+        else:
+            qs = Lead.objects.select_related(
+                "organization__region", "region", "funnel", "current_stage",
+                "queue", "manager", "primary_contact",
+            ).prefetch_related(
+                "tags",
+                "organization__tags",
+                "checklist_values__checklist_item",
+                "checklist_values__attachments",
+                "interactions",
+                "subfunnels__campaign_subfunnel__template",
+                "subfunnels__current_template_stage",
+            )
         tag_ids = self.request.query_params.get("tags")
         if tag_ids:
             ids = [int(x) for x in tag_ids.split(",") if x.strip().isdigit()]
@@ -2094,24 +1761,17 @@ class LeadViewSet(viewsets.ModelViewSet):
         return LeadDetailSerializer
 
     def perform_update(self, serializer):
-        super().perform_update(serializer)
+        # Специалист стадии назначается в том же сохранении: значения чек-листа новой стадии
+        # создаются сигналом при сохранении и берут специалиста лида по умолчанию
         lead = serializer.instance
-        if lead.current_stage_id:
-            if (
-                not lead.primary_contact_specialist_id
-                and lead.current_stage.primary_contact_specialist_id
-            ):
-                lead.primary_contact_specialist_id = lead.current_stage.primary_contact_specialist_id
-                lead.save(update_fields=["primary_contact_specialist", "updated_at"])
-            self._ensure_checklist_values(lead, lead.current_stage)
-
-    def retrieve(self, request, *args, **kwargs):
-        instance = self.get_object()
-        if instance.current_stage:
-            self._ensure_checklist_values(instance, instance.current_stage)
-            instance = self.get_queryset().get(pk=instance.pk)
-        serializer = self.get_serializer(instance)
-        return Response(serializer.data)
+        stage = serializer.validated_data.get("current_stage", lead.current_stage)
+        specialist = serializer.validated_data.get(
+            "primary_contact_specialist", lead.primary_contact_specialist
+        )
+        if stage and not specialist and stage.primary_contact_specialist_id:
+            serializer.save(primary_contact_specialist=stage.primary_contact_specialist)
+        else:
+            serializer.save()
 
     @action(detail=True, methods=["get", "post"], url_path="checklist")
     def checklist(self, request, pk=None):
@@ -2300,38 +1960,16 @@ class LeadViewSet(viewsets.ModelViewSet):
         serializer.save(created_by=request.user)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    TIMELINE_PAGE_SIZE = 50
+
     @action(detail=True, methods=["get"], url_path="timeline")
     def timeline(self, request, pk=None):
-        """Единая лента: взаимодействия + смена стадий + чек-лист (по дате)."""
+        """
+        Единая лента: взаимодействия + смена стадий + чек-лист (новые сверху).
+        Без ?cursor — вся лента списком; с ?cursor= (пустой — первая страница) —
+        {"next", "next_cursor", "results"} по ?page_size= событий.
+        """
         lead = self.get_object()
-        items = []
-        for i in lead.interactions.select_related("created_by").order_by("-date", "-created_at"):
-            dt = i.date or i.created_at
-            at_str = dt.isoformat() if dt and hasattr(dt, "isoformat") else (str(dt) if dt else "")
-            items.append({
-                "kind": "interaction",
-                "id": i.pk,
-                "at": at_str,
-                "data": LeadInteractionSerializer(i).data,
-            })
-        try:
-            activity_qs = list(
-                lead.activity_logs.select_related("created_by").all()
-            )
-        except (OperationalError, ProgrammingError):
-            activity_qs = []
-        for log in activity_qs:
-            user = log.created_by
-            items.append({
-                "kind": log.event_type,
-                "id": log.pk,
-                "at": log.created_at.isoformat(),
-                "summary": log.summary,
-                "created_by_name": str(user) if user else None,
-            })
-        _append_synthetic_checklist_from_values(lead, items)
-        items.sort(key=lambda x: x["at"] or "", reverse=True)
-
         kinds_raw = request.query_params.get("kind", "").strip()
         kinds = None
         if kinds_raw:
@@ -2343,8 +1981,28 @@ class LeadViewSet(viewsets.ModelViewSet):
                 contact_id = int(contact_param)
             except (TypeError, ValueError):
                 contact_id = None
-        items = _filter_timeline_items(items, kinds, contact_id)
-        return Response(items)
+        if "cursor" not in request.query_params:
+            items, _ = lead_timeline(lead, kinds=kinds, contact_id=contact_id)
+            return Response(items)
+
+        raw_size = request.query_params.get("page_size", "")
+        limit = self.TIMELINE_PAGE_SIZE
+        if raw_size.isdigit() and int(raw_size) > 0:
+            limit = min(int(raw_size), KeysetPagination.max_page_size)
+        try:
+            items, next_cursor = lead_timeline(
+                lead,
+                kinds=kinds,
+                contact_id=contact_id,
+                cursor=request.query_params.get("cursor") or None,
+                limit=limit,
+            )
+        except ValueError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        next_link = None
+        if next_cursor:
+            next_link = replace_query_param(request.build_absolute_uri(), "cursor", next_cursor)
+        return Response({"next": next_link, "next_cursor": next_cursor, "results": items})
 
     @action(detail=True, methods=["post"], url_path="advance-stage")
     def advance_stage(self, request, pk=None):
@@ -2373,11 +2031,11 @@ class LeadViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-        lead.save(update_fields=["current_stage", "primary_contact_status", "updated_at"])
+        update_fields = ["current_stage", "primary_contact_status", "updated_at"]
         if lead.current_stage.primary_contact_specialist_id:
             lead.primary_contact_specialist_id = lead.current_stage.primary_contact_specialist_id
-            lead.save(update_fields=["primary_contact_specialist", "updated_at"])
-        self._ensure_checklist_values(lead, lead.current_stage)
+            update_fields.append("primary_contact_specialist")
+        lead.save(update_fields=update_fields)
         self._refresh_subfunnel_availability(lead)
         old_name = old_stage.name if old_stage else "—"
         new_name = lead.current_stage.name if lead.current_stage else "—"
@@ -2449,28 +2107,60 @@ class LeadViewSet(viewsets.ModelViewSet):
             except FunnelStage.DoesNotExist:
                 return Response({"detail": "Стадия не найдена."}, status=status.HTTP_404_NOT_FOUND)
 
-        rows = list(self.get_queryset().filter(id__in=id_list))
-        updated = 0
-        skipped = []
+        rows = list(
+            Lead.objects.filter(id__in=id_list).values(
+                "id", "funnel_id", "campaign_id", "current_stage_id", "current_stage__name"
+            )
+        )
+        skipped = [
+            {"id": row["id"], "reason": "Стадия не принадлежит воронке лида."}
+            for row in rows
+            if target_stage is not None and row["funnel_id"] != target_stage.funnel_id
+        ]
+        skipped_ids = {item["id"] for item in skipped}
+        rows = [row for row in rows if row["id"] not in skipped_ids]
+        if rows:
+            self._bulk_move_to_stage(rows, target_stage, request.user)
+        return Response({"updated": len(rows), "skipped": skipped, "requested": len(id_list)})
 
-        for row in rows:
-            if target_stage is not None and row.funnel_id != target_stage.funnel_id:
-                skipped.append({"id": row.id, "reason": "Стадия не принадлежит воронке лида."})
-                continue
-            row.current_stage = target_stage
-            row.save(update_fields=["current_stage", "updated_at"])
+    @staticmethod
+    def _bulk_move_to_stage(rows, target_stage, user, replace_specialist=False, summary_suffix=""):
+        """
+        Перевод лидов на стадию фиксированным числом запросов: UPDATE стадии и специалиста,
+        bulk_create значений чек-листа и записей журнала, пересчёт счётчиков, дедлайнов и
+        доступности задач. queryset.update минует сигналы Lead — их действия повторены здесь.
+        rows — словари id / campaign_id / current_stage_id / current_stage__name.
+        Специалист стадии ставится лидам без специалиста, с replace_specialist — всем.
+        """
+        leads = Lead.objects.filter(id__in=[row["id"] for row in rows])
+        changes = {"current_stage": target_stage, "updated_at": timezone.now()}
+        if target_stage is not None and target_stage.primary_contact_specialist_id:
+            specialist = Value(target_stage.primary_contact_specialist_id)
+            changes["primary_contact_specialist_id"] = (
+                specialist if replace_specialist
+                else Coalesce("primary_contact_specialist_id", specialist)
+            )
+        with transaction.atomic():
+            leads.update(**changes)
+            materialize_stage_checklists(leads)
+            sync_lead_checklist_counters(leads)
+            sync_lead_stage_deadlines(leads)
             if target_stage is not None:
-                if (
-                    not row.primary_contact_specialist_id
-                    and target_stage.primary_contact_specialist_id
-                ):
-                    row.primary_contact_specialist_id = target_stage.primary_contact_specialist_id
-                    row.save(update_fields=["primary_contact_specialist", "updated_at"])
-                self._ensure_checklist_values(row, target_stage)
-                self._refresh_subfunnel_availability(row)
-            updated += 1
-
-        return Response({"updated": updated, "skipped": skipped, "requested": len(id_list)})
+                refresh_subfunnel_availability(LeadSubfunnel.objects.filter(lead__in=leads))
+            new_name = target_stage.name if target_stage else "—"
+            author = user if getattr(user, "is_authenticated", False) else None
+            LeadActivityLog.objects.bulk_create([
+                LeadActivityLog(
+                    lead_id=row["id"],
+                    event_type=LeadActivityLog.EventType.STAGE,
+                    summary=f"{row['current_stage__name'] or '—'} → {new_name}{summary_suffix}"[:500],
+                    created_by=author,
+                )
+                for row in rows
+                if row["current_stage_id"] != (target_stage.id if target_stage else None)
+            ])
+            for campaign_id in {row["campaign_id"] for row in rows}:
+                schedule_campaign_stats_refresh(campaign_id)
 
     @action(detail=False, methods=["post"], url_path="bulk-delete")
     def bulk_delete(self, request):
@@ -2493,7 +2183,6 @@ class LeadViewSet(viewsets.ModelViewSet):
         lead.current_stage = rejection_stage
         lead.primary_contact_status = Lead.PrimaryContactStatus.REJECTED
         lead.save(update_fields=["current_stage", "primary_contact_status", "updated_at"])
-        self._ensure_checklist_values(lead, lead.current_stage)
         self._refresh_subfunnel_availability(lead)
         old_name = old_stage.name if old_stage else "—"
         _log_lead_activity(
@@ -2504,49 +2193,15 @@ class LeadViewSet(viewsets.ModelViewSet):
         )
         return Response(LeadDetailSerializer(lead).data)
 
-    @staticmethod
-    def _ensure_checklist_values(lead, stage):
-        """Create LeadChecklistValue for each StageChecklistItem that doesn't have one yet."""
-        if not stage:
-            return
-        for item in stage.checklist_items.all():
-            LeadChecklistValue.objects.get_or_create(
-                lead=lead,
-                checklist_item=item,
-                defaults={
-                    "primary_contact_specialist_id": (
-                        item.primary_contact_specialist_id
-                        or lead.primary_contact_specialist_id
-                    )
-                },
-            )
-
     @staticmethod
     def _refresh_subfunnel_availability(lead):
-        if not lead.current_stage_id:
-            return
-        rows = lead.subfunnels.select_related(
-            "campaign_subfunnel__binding__from_stage",
-            "campaign_subfunnel__binding__to_stage",
-        )
-        for row in rows:
-            binding = row.campaign_subfunnel.binding
-            new_availability = True
-            if binding and binding.binding_type == "stage_range_checklist":
-                if not binding.from_stage_id or not binding.to_stage_id:
-                    new_availability = False
-                else:
-                    stage_order = lead.current_stage.order
-                    new_availability = (
-                        binding.from_stage.order <= stage_order <= binding.to_stage.order
-                    )
-            if row.is_available != new_availability:
-                row.is_available = new_availability
-                row.save(update_fields=["is_available", "updated_at"])
+        refresh_subfunnel_availability(lead.subfunnels.all())
 
 
 class LeadSubfunnelViewSet(viewsets.ModelViewSet):
     serializer_class = LeadSubfunnelSerializer
+    pagination_class = KeysetPagination
+    keyset_ordering = ("-updated_at", "-id")
     filterset_fields = ["lead", "campaign_subfunnel", "status", "current_template_stage", "assignee", "is_available"]
 
     def get_queryset(self):
@@ -2629,7 +2284,6 @@ class LeadSubfunnelViewSet(viewsets.ModelViewSet):
             lead.primary_contact_specialist_id = lead.current_stage.primary_contact_specialist_id
             update_fields.append("primary_contact_specialist")
         lead.save(update_fields=update_fields)
-        LeadViewSet._ensure_checklist_values(lead, lead.current_stage)
         LeadViewSet._refresh_subfunnel_availability(lead)
         old_name = old_stage.name if old_stage else "—"
         new_name = lead.current_stage.name if lead.current_stage else "—"
@@ -2820,78 +2474,116 @@ class LeadSubfunnelViewSet(viewsets.ModelViewSet):
                 return Response({"detail": "Некорректный status."}, status=status.HTTP_400_BAD_REQUEST)
             bulk_status = LeadSubfunnel.normalize_status(raw_status)
 
-        rows = list(self.get_queryset().filter(id__in=id_list))
-        updated = 0
-        skipped = []
-
-        for row in rows:
-            update_fields = ["updated_at"]
-            prev_stage = row.current_template_stage
-
-            if assignee_provided:
-                assignee = request.data.get("assignee")
-                row.assignee_id = int(assignee) if assignee not in (None, "") else None
-                update_fields.append("assignee")
-
-            if clear_due_at:
-                row.due_at = None
-                update_fields.append("due_at")
-            elif due_at_provided:
-                row.due_at = parsed_due_at
-                update_fields.append("due_at")
-
-            if status_provided:
-                row.status = bulk_status
-                update_fields.append("status")
-                if row.status == LeadSubfunnel.Status.DONE:
-                    row.completed_at = row.completed_at or timezone.now()
-                    update_fields.append("completed_at")
-                elif row.completed_at:
-                    row.completed_at = None
-                    update_fields.append("completed_at")
+        rows = list(
+            LeadSubfunnel.objects.filter(id__in=id_list).values(
+                "id", "lead_id", "campaign_subfunnel__template_id", "current_template_stage__order"
+            )
+        )
+        skipped = [
+            {"id": row["id"], "reason": "Этап не принадлежит шаблону задачи."}
+            for row in rows
+            if target_stage is not None and target_stage.template_id != row["campaign_subfunnel__template_id"]
+        ]
+        skipped_ids = {item["id"] for item in skipped}
+        rows = [row for row in rows if row["id"] not in skipped_ids]
+        if not rows:
+            return Response({"updated": 0, "skipped": skipped, "requested": len(id_list)})
 
-            if stage_id_provided:
-                if target_stage is None:
-                    row.current_template_stage = None
-                    if not status_provided:
-                        row.status = LeadSubfunnel.Status.BACKLOG
-                        update_fields.append("status")
-                    update_fields.append("current_template_stage")
-                elif target_stage.template_id != row.campaign_subfunnel.template_id:
-                    skipped.append({
-                        "id": row.id,
-                        "reason": "Этап не принадлежит шаблону задачи.",
-                    })
-                    continue
-                else:
-                    row.current_template_stage = target_stage
-                    update_fields.append("current_template_stage")
-                    if not status_provided:
-                        row.status = LeadSubfunnel.status_from_stage(target_stage)
-                        update_fields.append("status")
-                    if row.status == LeadSubfunnel.Status.DONE:
-                        row.completed_at = row.completed_at or timezone.now()
-                        update_fields.append("completed_at")
-                    elif row.completed_at:
-                        row.completed_at = None
-                        update_fields.append("completed_at")
-
-            row.save(update_fields=list(dict.fromkeys(update_fields)))
-            if stage_id_provided and target_stage is not None:
-                self._advance_lead_stage_from_task_transition(
-                    row,
-                    request_user=request.user,
-                    from_stage=prev_stage,
-                    to_stage=target_stage,
+        # Все выбранные задачи получают одни и те же значения — один UPDATE
+        now = timezone.now()
+        changes = {"updated_at": now}
+        if assignee_provided:
+            assignee = request.data.get("assignee")
+            try:
+                changes["assignee_id"] = int(assignee) if assignee not in (None, "") else None
+            except (TypeError, ValueError):
+                return Response({"detail": "Некорректный assignee."}, status=status.HTTP_400_BAD_REQUEST)
+        if clear_due_at:
+            changes["due_at"] = None
+        elif due_at_provided:
+            changes["due_at"] = parsed_due_at
+        new_status = bulk_status
+        if stage_id_provided:
+            changes["current_template_stage"] = target_stage
+            if not status_provided:
+                new_status = LeadSubfunnel.status_from_stage(target_stage)
+        if new_status is not None:
+            changes["status"] = new_status
+            # Сброс этапа без status оставляет дату завершения как есть
+            if status_provided or target_stage is not None:
+                changes["completed_at"] = (
+                    Coalesce("completed_at", Value(now))
+                    if new_status == LeadSubfunnel.Status.DONE
+                    else None
                 )
-            updated += 1
+
+        with transaction.atomic():
+            LeadSubfunnel.objects.filter(id__in=[row["id"] for row in rows]).update(**changes)
+            if target_stage is not None:
+                self._bulk_advance_leads_from_task_transition(rows, target_stage, request.user)
 
         return Response({
-            "updated": updated,
+            "updated": len(rows),
             "skipped": skipped,
             "requested": len(id_list),
         })
 
+    @staticmethod
+    def _bulk_advance_leads_from_task_transition(rows, to_stage, request_user=None):
+        """
+        _advance_lead_stage_from_task_transition для пачки задач, переведённых на to_stage:
+        каждый лид сдвигается на следующую стадию один раз, сколько бы его задач ни перешло.
+        rows — словари id / lead_id / current_template_stage__order (этап до перевода).
+        """
+        if not to_stage.is_terminal:
+            return
+        forward_ids = [
+            row["id"]
+            for row in rows
+            if row["lead_id"]
+            and row["current_template_stage__order"] is not None
+            and row["current_template_stage__order"] < to_stage.order
+        ]
+        if not forward_ids:
+            return
+        lead_ids = LeadSubfunnel.objects.filter(
+            id__in=forward_ids,
+            campaign_subfunnel__binding__binding_type=SubfunnelTemplateBinding.BindingType.STAGE,
+            campaign_subfunnel__binding__advance_lead_on_task_stage_forward=True,
+        ).values("lead_id")
+        leads = list(
+            Lead.objects.filter(
+                id__in=lead_ids,
+                funnel__isnull=False,
+                current_stage__isnull=False,
+                current_stage__is_rejection=False,
+            ).values("id", "funnel_id", "campaign_id", "current_stage_id", "current_stage__name")
+        )
+        if not leads:
+            return
+        normal_stages = defaultdict(list)
+        for stage in FunnelStage.objects.filter(
+            funnel_id__in={lead["funnel_id"] for lead in leads}, is_rejection=False
+        ).order_by("order", "id"):
+            normal_stages[stage.funnel_id].append(stage)
+
+        leads_by_next_stage = defaultdict(list)
+        for lead in leads:
+            stages = normal_stages[lead["funnel_id"]]
+            current_idx = next(
+                (i for i, s in enumerate(stages) if s.id == lead["current_stage_id"]), -1
+            )
+            if 0 <= current_idx < len(stages) - 1:
+                leads_by_next_stage[stages[current_idx + 1]].append(lead)
+        for next_stage, group in leads_by_next_stage.items():
+            LeadViewSet._bulk_move_to_stage(
+                group,
+                next_stage,
+                request_user,
+                replace_specialist=True,
+                summary_suffix=" (авто из задачи)",
+            )
+
     @action(detail=False, methods=["post"], url_path="bulk-checklist")
     def bulk_checklist(self, request):
         id_list, err = _parse_bulk_ids(request.data.get("ids"))
@@ -2919,57 +2611,70 @@ class LeadSubfunnelViewSet(viewsets.ModelViewSet):
             return Response({"detail": "Пункт шаблона не найден."}, status=status.HTTP_400_BAD_REQUEST)
 
         rows = list(
-            self.get_queryset()
-            .filter(id__in=id_list)
-            .prefetch_related("checklist_values")
+            LeadSubfunnel.objects.filter(id__in=id_list).values("id", "campaign_subfunnel__template_id")
         )
-        updated_tasks = 0
-        updated_values = 0
         skipped = []
-
+        task_ids = []
         for row in rows:
-            if row.campaign_subfunnel.template_id != template_item.template_id:
+            if row["campaign_subfunnel__template_id"] != template_item.template_id:
                 skipped.append({
-                    "id": row.id,
+                    "id": row["id"],
                     "reason": "Пункт не принадлежит шаблону задачи.",
                 })
-                continue
-            try:
-                value = row.checklist_values.get(template_item_id=template_item.id)
-            except LeadSubfunnelChecklistValue.DoesNotExist:
-                skipped.append({
-                    "id": row.id,
-                    "reason": "Пункт чек-листа не найден для задачи.",
-                })
-                continue
+            else:
+                task_ids.append(row["id"])
+        values = {
+            value["lead_subfunnel_id"]: value
+            for value in LeadSubfunnelChecklistValue.objects.filter(
+                lead_subfunnel_id__in=task_ids, template_item=template_item
+            ).values("id", "lead_subfunnel_id", "is_completed", "text_value")
+        }
+        skipped.extend(
+            {"id": task_id, "reason": "Пункт чек-листа не найден для задачи."}
+            for task_id in task_ids
+            if task_id not in values
+        )
 
-            changed = False
-            if is_completed_provided:
-                new_completed = bool(request.data.get("is_completed"))
-                if value.is_completed != new_completed:
-                    value.is_completed = new_completed
-                    if new_completed:
-                        value.completed_at = timezone.now()
-                        value.completed_by = request.user
-                    else:
-                        value.completed_at = None
-                        value.completed_by = None
-                    changed = True
-
-            if text_value_provided:
-                new_text = request.data.get("text_value") or ""
-                if value.text_value != new_text:
-                    value.text_value = new_text
-                    changed = True
-
-            if changed:
-                value.save()
-                updated_values += 1
-                updated_tasks += 1
+        # Две группы значений — со сменой отметки и только со сменой комментария, по UPDATE на группу
+        new_completed = bool(request.data.get("is_completed")) if is_completed_provided else None
+        new_text = (request.data.get("text_value") or "") if text_value_provided else None
+        toggled, retexted = [], []
+        for value in values.values():
+            if is_completed_provided and value["is_completed"] != new_completed:
+                toggled.append(value)
+            elif text_value_provided and value["text_value"] != new_text:
+                retexted.append(value)
+
+        now = timezone.now()
+        text_changes = {"text_value": new_text} if text_value_provided else {}
+        with transaction.atomic():
+            if toggled:
+                LeadSubfunnelChecklistValue.objects.filter(
+                    id__in=[value["id"] for value in toggled]
+                ).update(
+                    is_completed=new_completed,
+                    completed_at=now if new_completed else None,
+                    completed_by=(
+                        request.user
+                        if new_completed and getattr(request.user, "is_authenticated", False)
+                        else None
+                    ),
+                    updated_at=now,
+                    **text_changes,
+                )
+                # queryset.update минует сигнал пересчёта счётчиков задачи
+                sync_subfunnel_checklist_counters(
+                    LeadSubfunnel.objects.filter(id__in=[value["lead_subfunnel_id"] for value in toggled])
+                )
+            if retexted:
+                LeadSubfunnelChecklistValue.objects.filter(
+                    id__in=[value["id"] for value in retexted]
+                ).update(updated_at=now, **text_changes)
 
+        changed = len(toggled) + len(retexted)
         return Response({
-            "updated_tasks": updated_tasks,
-            "updated_values": updated_values,
+            "updated_tasks": changed,
+            "updated_values": changed,
             "skipped": skipped,
             "requested": len(id_list),
         })
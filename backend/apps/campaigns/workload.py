@@ -0,0 +1,630 @@
+"""
+Дашборд загрузки (workload_dashboard): строки, итоги, графики и разбивки по менеджерам
+и специалистам считаются агрегирующими запросами (GROUP BY, Count(filter=...),
+TruncDate в часовом поясе проекта), без выборки лидов и задач в Python.
+Время ответа зависит от числа пользователей, кампаний и шаблонов, а не лидов;
+построчно выбираются только лиды для раскрытого списка менеджера.
+
+История активности по дням (charts.by_day) берётся из WorkloadDailySnapshot
+(команда snapshot_workload); вживую считаются только дни после последнего снимка.
+"""
+
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Case, Count, Exists, F, Max, OuterRef, Q, Sum, When
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .models import Campaign, Lead, LeadChecklistValue, LeadSubfunnel, WorkloadDailySnapshot
+
+ACTIVITY_STATUSES = (
+    LeadSubfunnel.Status.BACKLOG,
+    LeadSubfunnel.Status.IN_PROGRESS,
+    LeadSubfunnel.Status.PAUSED,
+    LeadSubfunnel.Status.REJECTED,
+    LeadSubfunnel.Status.DONE,
+)
+
+SNAPSHOT_CHUNK_SIZE = 1000
+
+
+def _empty_workload_task_stats():
+    return {
+        "total": 0,
+        "backlog": 0,
+        "in_progress": 0,
+        "paused": 0,
+        "rejected": 0,
+        "done": 0,
+        "overdue": 0,
+    }
+
+
+def _empty_activity_by_period_bucket():
+    return {
+        "date": None,
+        "backlog": 0,
+        "in_progress": 0,
+        "paused": 0,
+        "rejected": 0,
+        "done": 0,
+    }
+
+
+def _bump_workload_task_stats(stats, status, is_overdue, count=1):
+    stats["total"] += count
+    normalized = LeadSubfunnel.normalize_status(status)
+    if normalized in stats:
+        stats[normalized] += count
+    if is_overdue:
+        stats["overdue"] += is_overdue
+
+
+def _day_start(day):
+    """Начало суток day в текущем часовом поясе (границы периода по локальной дате)."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _dt_range_q(field, date_from, date_to):
+    """Аналог «локальная дата field попадает в [date_from, date_to]» в виде условия на datetime."""
+    q = Q(**{f"{field}__isnull": False})
+    if date_from:
+        q &= Q(**{f"{field}__gte": _day_start(date_from)})
+    if date_to:
+        q &= Q(**{f"{field}__lt": _day_start(date_to + timedelta(days=1))})
+    return q
+
+
+def _date_range_q(field, date_from, date_to):
+    q = Q(**{f"{field}__isnull": False})
+    if date_from:
+        q &= Q(**{f"{field}__gte": date_from})
+    if date_to:
+        q &= Q(**{f"{field}__lte": date_to})
+    return q
+
+
+def _assigned_tasks():
+    """Задачи подворонок с исполнителем; _campaign_id — кампания лида или региона кампании."""
+    return (
+        LeadSubfunnel.objects.filter(assignee_id__isnull=False)
+        .annotate(_campaign_id=Coalesce("lead__campaign_id", "campaign_region__campaign_id"))
+        .filter(_campaign_id__isnull=False)
+        .order_by()
+    )
+
+
+def _with_activity_day(tasks, after=None):
+    """
+    Аннотация _day — локальная дата активности задачи: завершение (для готовых)
+    или последнее изменение. after — только дни позже этой даты.
+    """
+    tasks = tasks.annotate(
+        _day=TruncDate(
+            Case(
+                When(
+                    Q(status=LeadSubfunnel.Status.DONE, completed_at__isnull=False),
+                    then=F("completed_at"),
+                ),
+                default=F("updated_at"),
+            ),
+            tzinfo=timezone.get_current_timezone(),
+        )
+    )
+    if after:
+        since = _day_start(after + timedelta(days=1))
+        # Дата активности — одна из двух меток, поэтому отсекаем старые строки по индексам
+        tasks = tasks.filter(Q(updated_at__gte=since) | Q(completed_at__gte=since), _day__gt=after)
+    return tasks
+
+
+def last_snapshot_date():
+    """Последний день, за который есть снимок загрузки (не позже вчерашнего), или None."""
+    last = WorkloadDailySnapshot.objects.aggregate(last=Max("date"))["last"]
+    if last is None:
+        return None
+    return min(last, timezone.localdate() - timedelta(days=1))
+
+
+def _snapshot_gaps(date_from, date_to):
+    """
+    Дни периода [date_from, date_to] со снимками и интервалы [(начало, конец)] без снимков
+    (None — граница не задана), которые дашборд досчитывает вживую: текущий день, дни до
+    первого снимка и ночи, пропущенные cron. День без активности снимка не имеет — его
+    живой подсчёт тоже пуст, так что результат не меняется.
+    """
+    days = WorkloadDailySnapshot.objects.filter(
+        _date_range_q("date", date_from, date_to), date__lt=timezone.localdate()
+    )
+    days = sorted(days.order_by().values_list("date", flat=True).distinct())
+    gaps = []
+    start = date_from
+    for day in days:
+        if start is None or start < day:
+            gaps.append((start, day - timedelta(days=1)))
+        start = day + timedelta(days=1)
+    if not (date_to and start and start > date_to):
+        gaps.append((start, date_to))
+    return days, gaps
+
+
+def write_workload_snapshots(date_from, date_to):
+    """
+    Записать снимки загрузки за дни [date_from, date_to] по текущему состоянию задач
+    (старые снимки этих дней заменяются). Возвращает число записанных строк.
+    """
+    counters = defaultdict(lambda: dict.fromkeys(ACTIVITY_STATUSES, 0))
+    tasks = _with_activity_day(_assigned_tasks(), after=date_from - timedelta(days=1)).filter(
+        _day__lte=date_to
+    )
+    for g in tasks.values(
+        "_day", "assignee_id", "_campaign_id", "campaign_subfunnel__funnel_id", "status"
+    ).annotate(n=Count("id")):
+        key = (g["_day"], g["assignee_id"], g["_campaign_id"], g["campaign_subfunnel__funnel_id"])
+        counters[key][LeadSubfunnel.normalize_status(g["status"])] += g["n"]
+
+    rows = [
+        WorkloadDailySnapshot(date=day, user_id=uid, campaign_id=cid, funnel_id=fid, **counts)
+        for (day, uid, cid, fid), counts in counters.items()
+    ]
+    with transaction.atomic():
+        WorkloadDailySnapshot.objects.filter(date__gte=date_from, date__lte=date_to).delete()
+        WorkloadDailySnapshot.objects.bulk_create(rows, batch_size=SNAPSHOT_CHUNK_SIZE)
+    return len(rows)
+
+
+def build_workload_dashboard(role, campaign_id=None, funnel_id=None, user_id=None, date_from=None, date_to=None):
+    has_period = bool(date_from or date_to)
+    today = timezone.localdate()
+    now = timezone.now()
+    period_end = _day_start(date_to + timedelta(days=1)) if date_to else None
+
+    bucket = defaultdict(
+        lambda: {
+            "user_id": None,
+            "user_name": None,
+            "role": None,
+            "active_leads": 0,
+            "pending_checklist": 0,
+            "overdue_stage": 0,
+            "overdue_checklist": 0,
+            "tasks_in_progress": 0,
+            "tasks_overdue": 0,
+        }
+    )
+
+    managers_map = defaultdict(
+        lambda: {
+            "user_id": None,
+            "user_name": None,
+            "campaigns": defaultdict(
+                lambda: {"campaign_id": None, "campaign_name": None, "leads": []}
+            ),
+        }
+    )
+
+    def _specialist_campaign_bucket():
+        return {
+            "campaign_id": None,
+            "campaign_name": None,
+            "stats": _empty_workload_task_stats(),
+            "templates": defaultdict(
+                lambda: {
+                    "template_id": None,
+                    "template_name": None,
+                    "stats": _empty_workload_task_stats(),
+                }
+            ),
+        }
+
+    specialists_map = defaultdict(
+        lambda: {
+            "user_id": None,
+            "user_name": None,
+            "campaigns": defaultdict(_specialist_campaign_bucket),
+        }
+    )
+    activity_by_period = defaultdict(_empty_activity_by_period_bucket)
+    chart_data = {
+        "manager": {
+            "by_campaign": defaultdict(
+                lambda: {"campaign_id": None, "campaign_name": None, "in_progress": 0, "overdue": 0, "done_in_period": 0}
+            ),
+            "by_user": defaultdict(
+                lambda: {"user_id": None, "user_name": None, "in_progress": 0, "overdue": 0}
+            ),
+            "by_day": defaultdict(lambda: {"date": None, "opened": 0, "completed": 0, "overdue": 0}),
+            "status_pie": defaultdict(int),
+        },
+        "specialist": {
+            "by_campaign": defaultdict(
+                lambda: {"campaign_id": None, "campaign_name": None, "in_progress": 0, "overdue": 0, "done_in_period": 0}
+            ),
+            "by_user": defaultdict(
+                lambda: {"user_id": None, "user_name": None, "in_progress": 0, "overdue": 0}
+            ),
+            "by_day": defaultdict(lambda: {"date": None, "opened": 0, "completed": 0, "overdue": 0}),
+            "status_pie": defaultdict(int),
+        },
+    }
+
+    # ---- Лиды: активные (стадия есть и это не отказ), фильтры кампании/воронки/периода ----
+    leads = Lead.objects.filter(current_stage__isnull=False, current_stage__is_rejection=False)
+    if campaign_id:
+        leads = leads.filter(campaign_id=campaign_id)
+    if funnel_id:
+        leads = leads.filter(funnel_id=funnel_id)
+    if has_period:
+        stage_values_in_period = LeadChecklistValue.objects.filter(
+            lead_id=OuterRef("pk"),
+            checklist_item__stage_id=OuterRef("current_stage_id"),
+        ).filter(_dt_range_q("completed_at", date_from, date_to))
+        lead_active = (
+            _dt_range_q("updated_at", date_from, date_to)
+            | Q(Exists(stage_values_in_period))
+            | _date_range_q("current_stage_deadline", date_from, date_to)
+        )
+        if period_end:
+            lead_active |= Q(created_at__lt=period_end)
+        leads = leads.filter(lead_active)
+    leads = leads.order_by()
+
+    stage_overdue_q = Q(current_stage_deadline__lt=today)
+    pending_value_q = Q(
+        checklist_values__is_completed=False,
+        checklist_values__checklist_item__stage_id=F("current_stage_id"),
+    )
+
+    # (роль, user_id, active, pending, overdue_stage, overdue_checklist, tasks_in_progress, tasks_overdue)
+    row_parts = []
+    # (user_id, campaign_id, template_id, template_name, status, count, overdue)
+    specialist_task_groups = []
+    manager_lead_rows = []
+    manager_groups = []
+
+    if role in ("all", "manager"):
+        managed = leads.filter(manager_id__isnull=False)
+        if user_id:
+            managed = managed.filter(manager_id=user_id)
+        manager_groups = list(
+            managed.values("manager_id", "campaign_id").annotate(
+                active=Count("id", distinct=True),
+                overdue_stage=Count("id", distinct=True, filter=stage_overdue_q),
+                pending=Count("checklist_values", filter=pending_value_q),
+                overdue_checklist=Count("checklist_values", filter=pending_value_q & stage_overdue_q),
+            )
+        )
+        for g in manager_groups:
+            row_parts.append((
+                "manager", g["manager_id"], g["active"], g["pending"],
+                g["overdue_stage"], g["overdue_checklist"], 0, 0,
+            ))
+        manager_lead_rows = list(
+            managed.annotate(pending=Count("checklist_values", filter=pending_value_q))
+            .values(
+                "id", "manager_id", "campaign_id", "organization_id", "organization__name",
+                "current_stage__name", "current_stage_deadline", "pending",
+            )
+            .order_by("-created_at", "-id")
+        )
+
+    if role in ("all", "specialist"):
+        lead_specialists = (
+            leads.annotate(
+                _specialist=Coalesce(
+                    "primary_contact_specialist_id",
+                    "current_stage__primary_contact_specialist_id",
+                )
+            )
+            .filter(_specialist__isnull=False)
+        )
+        if user_id:
+            lead_specialists = lead_specialists.filter(_specialist=user_id)
+        for g in lead_specialists.values("_specialist").annotate(
+            active=Count("id"),
+            overdue_stage=Count("id", filter=stage_overdue_q),
+        ):
+            row_parts.append((
+                "specialist", g["_specialist"], g["active"], 0, g["overdue_stage"], 0, 0, 0,
+            ))
+
+        pending_values = (
+            LeadChecklistValue.objects.filter(
+                lead_id__in=leads.values("id"),
+                is_completed=False,
+                checklist_item__stage_id=F("lead__current_stage_id"),
+            )
+            .annotate(
+                _specialist=Coalesce(
+                    "primary_contact_specialist_id",
+                    "checklist_item__primary_contact_specialist_id",
+                    "lead__primary_contact_specialist_id",
+                    "lead__current_stage__primary_contact_specialist_id",
+                )
+            )
+            .filter(_specialist__isnull=False)
+            .order_by()
+        )
+        if user_id:
+            pending_values = pending_values.filter(_specialist=user_id)
+        for g in pending_values.values("_specialist").annotate(
+            pending=Count("id"),
+            overdue_checklist=Count("id", filter=Q(lead__current_stage_deadline__lt=today)),
+        ):
+            row_parts.append((
+                "specialist", g["_specialist"], 0, g["pending"], 0, g["overdue_checklist"], 0, 0,
+            ))
+
+    # ---- Задачи подворонок ----
+    tasks = _assigned_tasks()
+    if campaign_id:
+        tasks = tasks.filter(
+            Q(lead__campaign_id=campaign_id) | Q(campaign_region__campaign_id=campaign_id)
+        )
+    if funnel_id:
+        tasks = tasks.filter(campaign_subfunnel__funnel_id=funnel_id)
+    if user_id:
+        tasks = tasks.filter(assignee_id=user_id)
+
+    is_done_q = Q(status=LeadSubfunnel.Status.DONE)
+    task_overdue_q = Q(due_at__lt=now) & ~is_done_q
+
+    # История по дням: дни со снимком — из WorkloadDailySnapshot, остальные — вживую
+    snapshot_days, live_gaps = _snapshot_gaps(date_from, date_to)
+    if snapshot_days:
+        snapshots = WorkloadDailySnapshot.objects.filter(date__in=snapshot_days)
+        if campaign_id:
+            snapshots = snapshots.filter(campaign_id=campaign_id)
+        if funnel_id:
+            snapshots = snapshots.filter(funnel_id=funnel_id)
+        if user_id:
+            snapshots = snapshots.filter(user_id=user_id)
+        for g in snapshots.order_by().values("date").annotate(
+            **{status_key: Sum(status_key) for status_key in ACTIVITY_STATUSES}
+        ):
+            key = g["date"].isoformat()
+            day_bucket = activity_by_period[key]
+            day_bucket["date"] = key
+            for status_key in ACTIVITY_STATUSES:
+                day_bucket[status_key] += g[status_key]
+
+    if live_gaps:
+        first_day = live_gaps[0][0]
+        by_day_rows = _with_activity_day(tasks, after=first_day and first_day - timedelta(days=1))
+        gaps_q = Q()
+        for gap_from, gap_to in live_gaps:
+            gaps_q |= _date_range_q("_day", gap_from, gap_to)
+        by_day_rows = by_day_rows.filter(gaps_q)
+        for g in by_day_rows.values("_day", "status").annotate(n=Count("id")):
+            normalized = LeadSubfunnel.normalize_status(g["status"])
+            if normalized not in ACTIVITY_STATUSES:
+                continue
+            key = g["_day"].isoformat()
+            day_bucket = activity_by_period[key]
+            day_bucket["date"] = key
+            day_bucket[normalized] += g["n"]
+
+    if role in ("all", "specialist"):
+        active_tasks = tasks
+        if has_period:
+            task_active = (
+                _dt_range_q("updated_at", date_from, date_to)
+                | _dt_range_q("started_at", date_from, date_to)
+                | _dt_range_q("completed_at", date_from, date_to)
+            )
+            if period_end:
+                task_active |= Q(created_at__lt=period_end) & (
+                    ~is_done_q | Q(completed_at__isnull=True) | Q(completed_at__gte=period_end)
+                )
+            active_tasks = active_tasks.filter(task_active)
+        specialist_task_groups = list(
+            active_tasks.values(
+                "assignee_id",
+                "_campaign_id",
+                "campaign_subfunnel__template_id",
+                "campaign_subfunnel__template__name",
+                "status",
+            ).annotate(
+                n=Count("id"),
+                overdue=Count("id", filter=task_overdue_q),
+                done_in_period=Count(
+                    "id", filter=is_done_q & _dt_range_q("completed_at", date_from, date_to)
+                ),
+            )
+        )
+        for g in specialist_task_groups:
+            in_progress = 0 if g["status"] == LeadSubfunnel.Status.DONE else g["n"]
+            row_parts.append((
+                "specialist", g["assignee_id"], 0, in_progress, 0, g["overdue"], in_progress, g["overdue"],
+            ))
+
+    # ---- Имена: один запрос на пользователей и один на кампании ----
+    user_ids = {part[1] for part in row_parts}
+    user_names = {u.id: str(u) for u in get_user_model().objects.filter(id__in=user_ids)}
+    campaign_ids = {g["campaign_id"] for g in manager_groups} | {
+        g["_campaign_id"] for g in specialist_task_groups
+    }
+    campaign_names = dict(Campaign.objects.filter(id__in=campaign_ids).values_list("id", "name"))
+
+    for role_key, uid, active, pending, overdue_stage, overdue_checklist, tasks_in_progress, tasks_overdue in row_parts:
+        row = bucket[(role_key, uid)]
+        row["user_id"] = uid
+        row["user_name"] = user_names.get(uid)
+        row["role"] = role_key
+        row["active_leads"] += active
+        row["pending_checklist"] += pending
+        row["overdue_stage"] += overdue_stage
+        row["overdue_checklist"] += overdue_checklist
+        row["tasks_in_progress"] += tasks_in_progress
+        row["tasks_overdue"] += tasks_overdue
+
+    mgr_chart = chart_data["manager"]
+    for g in manager_groups:
+        chart_campaign = mgr_chart["by_campaign"][g["campaign_id"]]
+        chart_campaign["campaign_id"] = g["campaign_id"]
+        chart_campaign["campaign_name"] = campaign_names.get(g["campaign_id"])
+        chart_campaign["in_progress"] += g["active"]
+        chart_campaign["overdue"] += g["overdue_stage"]
+        chart_user = mgr_chart["by_user"][g["manager_id"]]
+        chart_user["user_id"] = g["manager_id"]
+        chart_user["user_name"] = user_names.get(g["manager_id"])
+        chart_user["in_progress"] += g["active"]
+        chart_user["overdue"] += g["overdue_stage"]
+        if g["active"] - g["overdue_stage"]:
+            mgr_chart["status_pie"]["in_progress"] += g["active"] - g["overdue_stage"]
+        if g["overdue_stage"]:
+            mgr_chart["status_pie"]["overdue"] += g["overdue_stage"]
+
+    for lead_row in manager_lead_rows:
+        mgr = managers_map[lead_row["manager_id"]]
+        mgr["user_id"] = lead_row["manager_id"]
+        mgr["user_name"] = user_names.get(lead_row["manager_id"])
+        mgr_campaign = mgr["campaigns"][lead_row["campaign_id"]]
+        mgr_campaign["campaign_id"] = lead_row["campaign_id"]
+        mgr_campaign["campaign_name"] = campaign_names.get(lead_row["campaign_id"])
+        stage_deadline = lead_row["current_stage_deadline"]
+        stage_overdue = bool(stage_deadline and stage_deadline < today)
+        mgr_campaign["leads"].append(
+            {
+                "lead_id": lead_row["id"],
+                "organization_name": (
+                    lead_row["organization__name"]
+                    if lead_row["organization_id"]
+                    else f"Лид {lead_row['id']}"
+                ),
+                "stage_name": lead_row["current_stage__name"],
+                "stage_deadline": stage_deadline.isoformat() if stage_deadline else None,
+                "stage_overdue": stage_overdue,
+                "pending_checklist": lead_row["pending"],
+                "overdue_checklist": lead_row["pending"] if stage_overdue else 0,
+            }
+        )
+
+    sp_chart = chart_data["specialist"]
+    for g in specialist_task_groups:
+        uid = g["assignee_id"]
+        cid = g["_campaign_id"]
+        is_done = g["status"] == LeadSubfunnel.Status.DONE
+        specialist_item = specialists_map[uid]
+        specialist_item["user_id"] = uid
+        specialist_item["user_name"] = user_names.get(uid)
+        sp_campaign = specialist_item["campaigns"][cid]
+        sp_campaign["campaign_id"] = cid
+        sp_campaign["campaign_name"] = campaign_names.get(cid)
+        template_id = g["campaign_subfunnel__template_id"] or 0
+        sp_template = sp_campaign["templates"][template_id]
+        sp_template["template_id"] = template_id
+        sp_template["template_name"] = (
+            g["campaign_subfunnel__template__name"] if template_id else "Без шаблона"
+        )
+        _bump_workload_task_stats(sp_campaign["stats"], g["status"], g["overdue"], count=g["n"])
+        _bump_workload_task_stats(sp_template["stats"], g["status"], g["overdue"], count=g["n"])
+
+        chart_campaign = sp_chart["by_campaign"][cid]
+        chart_campaign["campaign_id"] = cid
+        chart_campaign["campaign_name"] = campaign_names.get(cid)
+        chart_user = sp_chart["by_user"][uid]
+        chart_user["user_id"] = uid
+        chart_user["user_name"] = user_names.get(uid)
+        if is_done:
+            chart_campaign["done_in_period"] += g["done_in_period"]
+        else:
+            chart_campaign["in_progress"] += g["n"]
+            chart_campaign["overdue"] += g["overdue"]
+            chart_user["in_progress"] += g["n"]
+            chart_user["overdue"] += g["overdue"]
+        sp_chart["status_pie"][LeadSubfunnel.normalize_status(g["status"])] += g["n"]
+
+    rows = sorted(
+        bucket.values(),
+        key=lambda x: (
+            x["role"] or "",
+            -(x["tasks_overdue"] + x["overdue_stage"] + x["overdue_checklist"]),
+            -(x["tasks_in_progress"] + x["active_leads"] + x["pending_checklist"]),
+            x["user_name"] or "",
+        ),
+    )
+    totals = {
+        "active_leads": sum(r["active_leads"] for r in rows),
+        "pending_checklist": sum(r["pending_checklist"] for r in rows),
+        "overdue_stage": sum(r["overdue_stage"] for r in rows),
+        "overdue_checklist": sum(r["overdue_checklist"] for r in rows),
+        "tasks_in_progress": sum(r["tasks_in_progress"] for r in rows),
+        "tasks_overdue": sum(r["tasks_overdue"] for r in rows),
+    }
+
+    managers = []
+    for item in managers_map.values():
+        campaigns = []
+        for campaign_item in item["campaigns"].values():
+            campaign_item["leads"] = sorted(
+                campaign_item["leads"],
+                key=lambda lead_row: (
+                    0 if lead_row["stage_overdue"] else 1,
+                    lead_row["stage_deadline"] or "9999-99-99",
+                    lead_row["organization_name"],
+                ),
+            )
+            campaigns.append(campaign_item)
+        campaigns.sort(key=lambda c: c["campaign_name"] or "")
+        managers.append(
+            {
+                "user_id": item["user_id"],
+                "user_name": item["user_name"],
+                "campaigns": campaigns,
+            }
+        )
+    managers.sort(key=lambda x: x["user_name"] or "")
+
+    specialists = []
+    for item in specialists_map.values():
+        campaigns = []
+        overdue_total = 0
+        for campaign_item in item["campaigns"].values():
+            templates = sorted(
+                campaign_item["templates"].values(),
+                key=lambda tpl: tpl["template_name"] or "",
+            )
+            campaign_item["templates"] = templates
+            overdue_total += campaign_item["stats"]["overdue"]
+            campaigns.append(campaign_item)
+        campaigns.sort(key=lambda c: c["campaign_name"] or "")
+        specialists.append(
+            {
+                "user_id": item["user_id"],
+                "user_name": item["user_name"],
+                "campaigns": campaigns,
+                "overdue_total": overdue_total,
+            }
+        )
+    specialists.sort(key=lambda x: x["user_name"] or "")
+
+    active_chart_scope = "specialist" if role == "specialist" else "manager"
+    charts_source = chart_data[active_chart_scope]
+    charts = {
+        "scope": active_chart_scope,
+        "by_campaign": sorted(charts_source["by_campaign"].values(), key=lambda x: x["campaign_name"] or ""),
+        "by_user": sorted(charts_source["by_user"].values(), key=lambda x: x["user_name"] or ""),
+        "by_day": sorted(activity_by_period.values(), key=lambda x: x["date"] or ""),
+        "status_pie": [{"status": status_key, "count": count} for status_key, count in charts_source["status_pie"].items()],
+    }
+
+    return {
+        "rows": rows,
+        "totals": totals,
+        "managers": managers,
+        "specialists": specialists,
+        "charts": charts,
+        "meta": {
+            "role": role,
+            "campaign": campaign_id,
+            "funnel": funnel_id,
+            "user": user_id,
+            "date_from": date_from.isoformat() if date_from else None,
+            "date_to": date_to.isoformat() if date_to else None,
+            "period_mode": "activity",
+        },
+    }
@@ -0,0 +1,268 @@
+"""
+Рабочее место по подворонкам (subfunnel_workspace): карточки задач, колонки канбана и итоги.
+
+Счётчики колонок и итоги по статусам считаются агрегатами в БД, поэтому не зависят от того,
+сколько карточек отдаётся. С параметром limit каждая колонка отдаётся первой страницей
+(один запрос с ROW_NUMBER по колонке) и догружается отдельно по своему курсору.
+
+Формат ответа v2 (?format=v2): каждая карточка один раз в cards по id, колонки и таблица
+содержат только списки id.
+"""
+
+from django.db.models import Case, Count, F, IntegerField, Q, Value, When
+from django.db.models.functions import RowNumber
+from django.db.models.expressions import Window
+
+from .keyset import cursor_for, keyset_page
+from .models import Lead, LeadSubfunnel
+
+# Сортировка карточек внутри колонки и в таблице (последнее поле уникально — ключ курсора)
+CARD_ORDERING = ("-updated_at", "-id")
+
+UNASSIGNED_COLUMN = "stage-unassigned"
+
+# Версии формата ответа (?format=): v1 — карточки в table, items_by_stage и kanban; v2 — компактный
+RESPONSE_FORMATS = ("v1", "v2")
+
+_KNOWN_STATUSES = [value for value, _ in LeadSubfunnel.Status.choices]
+
+
+def extract_forwarded_from_notes(notes):
+    first_line = ((notes or "").splitlines() or [""])[0].strip()
+    prefix = "Передано от организации:"
+    if not first_line.startswith(prefix):
+        return None
+    value = first_line[len(prefix):].strip()
+    if ". Комментарий:" in value:
+        value = value.split(". Комментарий:", 1)[0].strip()
+    return value or None
+
+
+def column_key(stage_id, active_stage_ids):
+    return f"stage-{stage_id}" if stage_id in active_stage_ids else UNASSIGNED_COLUMN
+
+
+def filter_column(rows, key, active_stage_ids):
+    """Карточки одной колонки канбана (stage-<id> или stage-unassigned)."""
+    if key == UNASSIGNED_COLUMN:
+        return rows.filter(
+            Q(current_template_stage_id__isnull=True)
+            | ~Q(current_template_stage_id__in=list(active_stage_ids))
+        )
+    tail = key.removeprefix("stage-")
+    if not tail.isdigit() or int(tail) not in active_stage_ids:
+        return rows.none()
+    return rows.filter(current_template_stage_id=int(tail))
+
+
+def column_counts(rows, active_stage_ids):
+    """Число карточек по колонкам — один GROUP BY по этапу шаблона."""
+    counts = {}
+    for row in rows.order_by().values("current_template_stage_id").annotate(n=Count("id")):
+        key = column_key(row["current_template_stage_id"], active_stage_ids)
+        counts[key] = counts.get(key, 0) + row["n"]
+    return counts
+
+
+def status_totals(rows, now):
+    """Итоги по статусам одним агрегатом (устаревшие статусы — как в LeadSubfunnel.normalize_status)."""
+    Status = LeadSubfunnel.Status
+    return rows.order_by().aggregate(
+        all=Count("id"),
+        overdue=Count("id", filter=Q(due_at__lt=now) & ~Q(status=Status.DONE)),
+        backlog=Count(
+            "id",
+            filter=Q(status__in=[Status.BACKLOG, Status.TODO]) | ~Q(status__in=_KNOWN_STATUSES),
+        ),
+        in_progress=Count("id", filter=Q(status=Status.IN_PROGRESS)),
+        paused=Count("id", filter=Q(status__in=[Status.PAUSED, Status.BLOCKED])),
+        rejected=Count("id", filter=Q(status=Status.REJECTED)),
+        done=Count("id", filter=Q(status=Status.DONE)),
+    )
+
+
+def first_column_pages(rows, active_stage_ids, limit):
+    """
+    Первые limit карточек каждой колонки одним запросом (ROW_NUMBER в разрезе колонки).
+    Возвращает {колонка: (карточки, курсор следующей страницы или None)}.
+    """
+    if active_stage_ids:
+        column_expr = Case(
+            When(
+                current_template_stage_id__in=list(active_stage_ids),
+                then=F("current_template_stage_id"),
+            ),
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+    else:
+        column_expr = Value(0, output_field=IntegerField())
+    ranked = rows.annotate(
+        _column_rank=Window(
+            RowNumber(),
+            partition_by=[column_expr],
+            order_by=[F(f.lstrip("-")).desc() if f.startswith("-") else F(f).asc() for f in CARD_ORDERING],
+        )
+    ).filter(_column_rank__lte=limit + 1).order_by(*CARD_ORDERING)
+
+    pages = {}
+    for row in ranked:
+        pages.setdefault(column_key(row.current_template_stage_id, active_stage_ids), []).append(row)
+    result = {}
+    for key, items in pages.items():
+        if len(items) > limit:
+            items = items[:limit]
+            result[key] = (items, cursor_for(items[-1], CARD_ORDERING))
+        else:
+            result[key] = (items, None)
+    return result
+
+
+def card_page(rows, cursor, limit):
+    """Keyset-страница карточек (таблица или одна колонка)."""
+    return keyset_page(rows, CARD_ORDERING, cursor=cursor, limit=limit)
+
+
+def capture_counts_by_region(rows):
+    """
+    Для задач регионов с auto_create_on_collect_import: число организаций и контактов,
+    собранных в лиды по (кампания, регион). Один запрос по переданным карточкам.
+    """
+    region_rows = {
+        row.campaign_region_id: (row.campaign_region.campaign_id, row.campaign_region.region_id)
+        for row in rows
+        if row.campaign_region_id and row.campaign_subfunnel.template.auto_create_on_collect_import
+    }
+    region_pairs = {pair for pair in region_rows.values() if pair[0] and pair[1]}
+    if not region_pairs:
+        return {}
+    pairs_query = Q()
+    for campaign_id_value, region_id_value in region_pairs:
+        pairs_query |= Q(campaign_id=campaign_id_value, region_id=region_id_value)
+    lead_counts = Lead.objects.filter(pairs_query).values("campaign_id", "region_id").annotate(
+        organizations_count=Count("organization_id", distinct=True),
+        contacts_count=Count("primary_contact_id", filter=Q(primary_contact_id__isnull=False), distinct=True),
+    )
+    counts_by_pair = {
+        (it["campaign_id"], it["region_id"]): {
+            "organizations": it["organizations_count"],
+            "contacts": it["contacts_count"],
+        }
+        for it in lead_counts
+    }
+    return {
+        region_id: counts_by_pair.get(pair, {"organizations": 0, "contacts": 0})
+        for region_id, pair in region_rows.items()
+    }
+
+
+def workspace_card(row, active_stage_ids, capture_counts, now):
+    checklist_values = sorted(
+        row.checklist_values.all(),
+        key=lambda v: (v.template_item.order, v.id),
+    )
+    checklist_summary = [
+        {"text": v.template_item.title, "done": v.is_completed}
+        for v in checklist_values
+    ]
+    is_region_task = bool(row.campaign_region_id)
+    if is_region_task:
+        campaign_obj = row.campaign_region.campaign
+        lead_name = f"Регион: {row.campaign_region.region.name}"
+        stage_name = (
+            campaign_obj.get_operational_stage_display()
+            if campaign_obj and campaign_obj.operational_stage
+            else None
+        )
+    else:
+        campaign_obj = row.lead.campaign if row.lead else None
+        lead_name = (
+            row.lead.organization.name
+            if row.lead and row.lead.organization
+            else (f"Лид {row.lead_id}" if row.lead_id else "—")
+        )
+        stage_name = row.lead.current_stage.name if row.lead and row.lead.current_stage else None
+    show_capture_counts = bool(
+        is_region_task
+        and row.campaign_subfunnel.template.auto_create_on_collect_import
+    )
+    return {
+        "id": row.id,
+        "campaign_id": campaign_obj.id if campaign_obj else None,
+        "campaign_name": campaign_obj.name if campaign_obj else None,
+        "lead_id": row.lead_id,
+        "lead_name": lead_name,
+        "forwarded_from": (
+            extract_forwarded_from_notes(row.lead.notes)
+            if row.lead_id and row.lead
+            else None
+        ),
+        "is_region_task": is_region_task,
+        "campaign_region_id": row.campaign_region_id,
+        "region_id": row.campaign_region.region_id if row.campaign_region_id else None,
+        "region_name": row.campaign_region.region.name if row.campaign_region_id else None,
+        "stage_name": stage_name,
+        "template_id": row.campaign_subfunnel.template_id,
+        "template_name": row.campaign_subfunnel.template.name,
+        "role_id": row.campaign_subfunnel.role_id,
+        "role_name": row.campaign_subfunnel.role.name if row.campaign_subfunnel.role else None,
+        "assignee_id": row.assignee_id,
+        "assignee_name": str(row.assignee) if row.assignee else None,
+        "status": LeadSubfunnel.normalize_status(row.status),
+        "current_template_stage_id": row.current_template_stage_id,
+        "current_template_stage_name": row.current_template_stage.name if row.current_template_stage else None,
+        "current_template_stage_order": row.current_template_stage.order if row.current_template_stage else None,
+        "board_stage_key": column_key(row.current_template_stage_id, active_stage_ids),
+        "due_at": row.due_at.isoformat() if row.due_at else None,
+        "is_overdue": bool(row.due_at and row.due_at < now and row.status != LeadSubfunnel.Status.DONE),
+        "is_available": row.is_available,
+        "checklist_progress": {
+            "total": row.checklist_total,
+            "completed": row.checklist_completed,
+        },
+        "checklist_summary": checklist_summary,
+        "show_capture_counts": show_capture_counts,
+        "capture_counts": (
+            capture_counts.get(
+                row.campaign_region_id,
+                {"organizations": 0, "contacts": 0},
+            )
+            if show_capture_counts
+            else None
+        ),
+    }
+
+
+def workspace_cards(rows, active_stage_ids, now):
+    """Карточки для списка объектов LeadSubfunnel (счётчики сбора — одним запросом на всех)."""
+    rows = list(rows)
+    capture_counts = capture_counts_by_region(rows)
+    return [workspace_card(row, active_stage_ids, capture_counts, now) for row in rows]
+
+
+def compact_workspace_response(data):
+    """Ответ v1 → v2: карточки один раз (cards по id), в колонках и таблице — только id."""
+    kanban_by_status = {column["status"]: column for column in data["kanban"]}
+    columns = []
+    for col in data["columns"]:
+        column = dict(col)
+        kanban_column = kanban_by_status.get(col["status"], {})
+        column["ids"] = [item["id"] for item in kanban_column.get("items", ())]
+        for key in ("total", "next_cursor"):
+            if key in kanban_column:
+                column[key] = kanban_column[key]
+        columns.append(column)
+    compact = {
+        "format": "v2",
+        "view_mode": data["view_mode"],
+        "templates": data["templates"],
+        "active_template_id": data["active_template_id"],
+        "columns": columns,
+        "cards": {item["id"]: item for item in data["table"]},
+        "table": [item["id"] for item in data["table"]],
+        "totals": data["totals"],
+    }
+    for key in ("limit", "next_cursor"):
+        if key in data:
+            compact[key] = data[key]
+    return compact
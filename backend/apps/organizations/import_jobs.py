@@ -0,0 +1,252 @@
+"""
+Фоновые импорты без внешнего брокера: очередь — таблица ImportJob, воркер —
+manage.py run_jobs.
+
+Запрос импорта с полем background=true не выполняет импорт: файлы сохраняются в
+хранилище (default_storage), поля формы — в задании, ответ 202 с job_id возвращается сразу.
+Воркер забирает задание атомарным UPDATE (несколько воркеров не возьмут одно задание),
+выполняет тот же обработчик, что и синхронный запрос (запрос воспроизводится через
+APIRequestFactory, как в импорте кампании сбора), и сохраняет его ответ в задании.
+Прогресс импорта реестра пишется в ImportBatch после каждой пачки строк.
+
+Пока задание выполняется, поток воркера раз в HEARTBEAT_INTERVAL отмечает heartbeat_at —
+долгий импорт без пакета (кампания, матрица) тоже виден живым. Задание, воркер которого
+завершился аварийно (kill, OOM, перезапуск), остаётся в статусе «выполняется»: run_jobs
+периодически вызывает fail_stale_import_jobs — задание без отметки дольше таймаута считается
+упавшим, его пакет — прерванным (доступен для отката). Итог задания сохраняется, только если
+задание всё ещё «выполняется» — закрытое проверкой задание не меняет статус.
+"""
+
+import logging
+import os
+import threading
+import uuid
+from datetime import timedelta
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import ImportBatch, ImportJob
+
+logger = logging.getLogger(__name__)
+
+IMPORT_JOB_UPLOAD_DIR = "import_jobs"
+# Задание или пакет без записи прогресса дольше этого считаются оборванными
+STALE_IMPORT_TIMEOUT = timedelta(minutes=30)
+# Как часто воркер отмечает, что задание ещё выполняется, секунд
+HEARTBEAT_INTERVAL = 60
+
+
+def _job_view(kind):
+    """Обработчик импорта для типа задания (импорт внутри — views импортируют этот модуль)."""
+    from apps.campaigns.views import CampaignViewSet
+    from apps.reference.views import DemandMatrixImportApplyView
+
+    from .views import ContactViewSet, OrganizationViewSet
+
+    views = {
+        ImportJob.Kind.ORGANIZATIONS: lambda: OrganizationViewSet.as_view({"post": "import_xlsx"}),
+        ImportJob.Kind.CONTACTS: lambda: ContactViewSet.as_view({"post": "import_xlsx"}),
+        ImportJob.Kind.COLLECT_STAGE: lambda: CampaignViewSet.as_view({"post": "collect_stage_import"}),
+        ImportJob.Kind.LEADS_DEMAND: lambda: CampaignViewSet.as_view({"post": "leads_demand_import"}),
+        ImportJob.Kind.DEMAND_MATRIX: lambda: DemandMatrixImportApplyView.as_view(),
+    }
+    return views[kind]()
+
+
+def wants_background(request) -> bool:
+    """Запрошено фоновое выполнение (и запрос не выполняется уже внутри задания)."""
+    if getattr(request, "import_job", None) is not None:
+        return False
+    raw = request.data.get("background")
+    if raw in (None, ""):
+        raw = request.query_params.get("background")
+    return str(raw or "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def enqueue_import_job(request, kind, *, object_id=None):
+    """Сохранить файлы и поля формы запроса в задание; ответ 202 с id задания."""
+    token = uuid.uuid4().hex
+    files = {}
+    for field, upload in request.FILES.items():
+        name = os.path.basename(upload.name or field)
+        path = default_storage.save(f"{IMPORT_JOB_UPLOAD_DIR}/{token}/{name}", upload)
+        files[field] = {"path": path, "name": upload.name or name}
+    params = {}
+    if hasattr(request.data, "lists"):
+        for key, values in request.data.lists():
+            if key in files or key == "background":
+                continue
+            params[key] = values if len(values) > 1 else values[0]
+    else:
+        params = {key: value for key, value in request.data.items() if key != "background"}
+    job = ImportJob.objects.create(
+        kind=kind,
+        created_by=request.user if request.user.is_authenticated else None,
+        object_id=object_id,
+        params=params,
+        files=files,
+    )
+    return Response(
+        {"job_id": job.id, "status": job.status},
+        status=status.HTTP_202_ACCEPTED,
+    )
+
+
+def attach_import_batch(request, batch):
+    """Связать пакет импорта с заданием, в котором выполняется запрос (для прогресса)."""
+    job = getattr(request, "import_job", None)
+    if job is not None:
+        ImportJob.objects.filter(pk=job.pk).update(batch=batch)
+
+
+def claim_next_import_job():
+    """Взять старейшее задание из очереди; None — очередь пуста."""
+    while True:
+        job_id = (
+            ImportJob.objects.filter(status=ImportJob.Status.QUEUED)
+            .order_by("created_at", "id")
+            .values_list("id", flat=True)
+            .first()
+        )
+        if job_id is None:
+            return None
+        now = timezone.now()
+        claimed = ImportJob.objects.filter(pk=job_id, status=ImportJob.Status.QUEUED).update(
+            status=ImportJob.Status.RUNNING,
+            started_at=now,
+            heartbeat_at=now,
+        )
+        if claimed:
+            return ImportJob.objects.select_related("created_by").get(pk=job_id)
+
+
+class _ImportJobHeartbeat:
+    """
+    Фоновый поток: пока задание выполняется, раз в interval секунд пишет heartbeat_at
+    (своим соединением — обработчик может держать долгую транзакцию).
+    """
+
+    def __init__(self, job, interval):
+        self.job_id = job.pk
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"import-job-{job.pk}-heartbeat", daemon=True)
+
+    def _run(self):
+        try:
+            while not self._stop.wait(self.interval):
+                try:
+                    ImportJob.objects.filter(pk=self.job_id, status=ImportJob.Status.RUNNING).update(
+                        heartbeat_at=timezone.now()
+                    )
+                except Exception:
+                    logger.warning("import job %s: не удалось отметить heartbeat", self.job_id, exc_info=True)
+        finally:
+            connection.close()
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+
+def run_import_job(job):
+    """Выполнить задание обработчиком синхронного импорта и сохранить результат."""
+    from rest_framework.test import APIRequestFactory, force_authenticate
+
+    opened = []
+    heartbeat = _ImportJobHeartbeat(job, HEARTBEAT_INTERVAL)
+    try:
+        if job.created_by is None:
+            raise RuntimeError("Пользователь, запустивший импорт, не найден")
+        req = APIRequestFactory().post("/import-job/", job.params, format="multipart")
+        for field, info in job.files.items():
+            upload = File(default_storage.open(info["path"], "rb"), name=info["name"])
+            opened.append(upload)
+            req.FILES[field] = upload
+        req.user = job.created_by
+        req.import_job = job
+        force_authenticate(req, user=job.created_by)
+        kwargs = {"pk": job.object_id} if job.object_id is not None else {}
+        with heartbeat:
+            response = _job_view(job.kind)(req, **kwargs)
+        job.response_status = response.status_code
+        job.result = getattr(response, "data", None)
+        job.status = (
+            ImportJob.Status.COMPLETED if response.status_code < 400 else ImportJob.Status.FAILED
+        )
+    except Exception as exc:
+        logger.exception("import job %s failed", job.pk)
+        job.status = ImportJob.Status.FAILED
+        job.error = str(exc)
+    finally:
+        for upload in opened:
+            upload.close()
+
+    job.finished_at = timezone.now()
+    saved = ImportJob.objects.filter(pk=job.pk, status=ImportJob.Status.RUNNING).update(
+        status=job.status,
+        response_status=job.response_status,
+        result=job.result,
+        error=job.error,
+        finished_at=job.finished_at,
+    )
+    if not saved:
+        # Задание уже закрыто проверкой оборванных импортов — итог не перезаписывает статус
+        logger.warning("import job %s: задание закрыто до завершения, итог «%s» не сохранён", job.pk, job.status)
+        job.refresh_from_db()
+    # Пакет, который обработчик не довёл до конца, прерван — его можно откатить
+    ImportBatch.objects.filter(jobs=job, status=ImportBatch.Status.PROCESSING).update(
+        status=ImportBatch.Status.INTERRUPTED
+    )
+    for info in job.files.values():
+        try:
+            default_storage.delete(info["path"])
+        except Exception:
+            logger.warning("import job %s: не удалось удалить файл %s", job.pk, info["path"])
+    return job
+
+
+def fail_stale_import_jobs(timeout=STALE_IMPORT_TIMEOUT):
+    """
+    Задания «выполняется» без отметки воркера (heartbeat_at, до первой отметки — started_at)
+    дольше timeout — в «ошибку»; их пакеты, а также пакеты «выполняется» без прогресса дольше
+    timeout вне выполняющихся заданий (в том числе синхронных импортов, оборванных вместе
+    с процессом) — в «прерван». Возвращает (заданий, пакетов).
+    """
+    now = timezone.now()
+    cutoff = now - timeout
+    stale_ids = list(
+        ImportJob.objects.filter(
+            Q(heartbeat_at__lt=cutoff)
+            | Q(heartbeat_at__isnull=True) & (Q(started_at__lt=cutoff) | Q(started_at__isnull=True)),
+            status=ImportJob.Status.RUNNING,
+        ).values_list("id", flat=True)
+    )
+    failed = ImportJob.objects.filter(pk__in=stale_ids, status=ImportJob.Status.RUNNING).update(
+        status=ImportJob.Status.FAILED,
+        error=f"Импорт не отвечает дольше {int(timeout.total_seconds() // 60)} мин — воркер остановлен",
+        finished_at=now,
+    )
+    interrupted = (
+        ImportBatch.objects.filter(
+            Q(jobs__in=stale_ids)
+            | Q(heartbeat_at__lt=cutoff)
+            | Q(heartbeat_at__isnull=True, uploaded_at__lt=cutoff),
+            status=ImportBatch.Status.PROCESSING,
+        )
+        .exclude(jobs__status=ImportJob.Status.RUNNING)
+        .update(status=ImportBatch.Status.INTERRUPTED)
+    )
+    if failed or interrupted:
+        logger.warning("stale imports: %s jobs failed, %s batches interrupted", failed, interrupted)
+    return failed, interrupted
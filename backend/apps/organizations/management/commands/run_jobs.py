@@ -0,0 +1,82 @@
+"""
+Воркер фоновых импортов (ImportJob): забирает задания из очереди и выполняет их.
+
+  python manage.py run_jobs
+  python manage.py run_jobs --once
+  python manage.py run_jobs --poll-interval 5
+  python manage.py run_jobs --stale-after 60
+
+Очередь — таблица в БД, брокер не нужен; можно запустить несколько воркеров —
+задание забирается атомарным UPDATE и выполняется одним из них. Раз в минуту воркер
+закрывает задания и пакеты, оборванные упавшим воркером или процессом (без прогресса
+дольше --stale-after минут): задание — с ошибкой, пакет — прерванным.
+"""
+
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.organizations.import_jobs import (
+    STALE_IMPORT_TIMEOUT,
+    claim_next_import_job,
+    fail_stale_import_jobs,
+    run_import_job,
+)
+
+STALE_SWEEP_INTERVAL = 60
+
+
+class Command(BaseCommand):
+    help = "Выполнять фоновые импорты из очереди ImportJob"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Выполнить задания, которые уже в очереди, и завершиться",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=2.0,
+            help="Пауза между опросами пустой очереди, секунд (по умолчанию 2)",
+        )
+        parser.add_argument(
+            "--stale-after",
+            type=float,
+            default=STALE_IMPORT_TIMEOUT.total_seconds() / 60,
+            help="Через сколько минут без прогресса импорт считается оборванным (по умолчанию 30)",
+        )
+
+    def handle(self, *args, **options):
+        once = options["once"]
+        poll_interval = max(options["poll_interval"], 0.1)
+        stale_after = timedelta(minutes=max(options["stale_after"], 1))
+        processed = 0
+        last_sweep = None
+        try:
+            while True:
+                close_old_connections()
+                if last_sweep is None or time.monotonic() - last_sweep >= STALE_SWEEP_INTERVAL:
+                    failed, interrupted = fail_stale_import_jobs(stale_after)
+                    last_sweep = time.monotonic()
+                    if failed or interrupted:
+                        self.stdout.write(
+                            self.style.WARNING(
+                                f"Оборванные импорты: заданий — {failed}, пакетов — {interrupted}"
+                            )
+                        )
+                job = claim_next_import_job()
+                if job is None:
+                    if once:
+                        break
+                    time.sleep(poll_interval)
+                    continue
+                job = run_import_job(job)
+                processed += 1
+                self.stdout.write(f"{job}")
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f"Выполнено заданий импорта: {processed}"))
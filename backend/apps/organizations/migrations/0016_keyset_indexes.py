@@ -0,0 +1,22 @@
+# Generated by Django 5.1.15 on 2026-10-17 02:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0015_rename_organizatio_batch_i_6f0b0d_idx_organizatio_batch_i_7746db_idx'),
+        ('reference', '0010_productioncalendar'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['-current', 'last_name', 'first_name', 'id'], name='organizatio_current_afc1e2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='organization',
+            index=models.Index(fields=['name', 'id'], name='organizatio_name_e4100c_idx'),
+        ),
+    ]
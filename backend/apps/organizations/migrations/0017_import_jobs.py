@@ -0,0 +1,57 @@
+# Generated by Django 5.1.15 on 2026-10-17 03:07
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0016_keyset_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importbatch',
+            name='error_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Ошибок'),
+        ),
+        migrations.AddField(
+            model_name='importbatch',
+            name='processed_rows',
+            field=models.PositiveIntegerField(default=0, verbose_name='Обработано строк'),
+        ),
+        migrations.AlterField(
+            model_name='importbatch',
+            name='status',
+            field=models.CharField(choices=[('processing', 'Выполняется'), ('completed', 'Завершён'), ('rolled_back', 'Откат выполнен')], default='completed', max_length=20, verbose_name='Статус'),
+        ),
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('organizations', 'Импорт организаций'), ('contacts', 'Импорт контактов'), ('collect_stage', 'Импорт в кампанию сбора'), ('leads_demand', 'Импорт потребности лидов'), ('demand_matrix', 'Применение матрицы потребности')], max_length=30, verbose_name='Тип')),
+                ('status', models.CharField(choices=[('queued', 'В очереди'), ('running', 'Выполняется'), ('completed', 'Завершено'), ('failed', 'Ошибка')], default='queued', max_length=20, verbose_name='Статус')),
+                ('object_id', models.PositiveIntegerField(blank=True, null=True, verbose_name='ID объекта (кампании)')),
+                ('params', models.JSONField(blank=True, default=dict, verbose_name='Поля формы')),
+                ('files', models.JSONField(blank=True, default=dict, verbose_name='Файлы')),
+                ('response_status', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='HTTP-статус результата')),
+                ('result', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True, verbose_name='Результат')),
+                ('error', models.TextField(blank=True, verbose_name='Ошибка')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создано')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Начато')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Завершено')),
+                ('batch', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='organizations.importbatch', verbose_name='Пакет импорта')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='import_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Запустил')),
+            ],
+            options={
+                'verbose_name': 'Задание импорта',
+                'verbose_name_plural': 'Задания импорта',
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='organizatio_status_167380_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.15 on 2026-10-17 03:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0017_import_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importbatch',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Последний прогресс'),
+        ),
+        migrations.AlterField(
+            model_name='importbatch',
+            name='status',
+            field=models.CharField(choices=[('processing', 'Выполняется'), ('completed', 'Завершён'), ('interrupted', 'Прерван'), ('rolled_back', 'Откат выполнен')], default='completed', max_length=20, verbose_name='Статус'),
+        ),
+    ]
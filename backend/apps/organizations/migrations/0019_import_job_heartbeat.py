@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-17 03:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('organizations', '0018_import_batch_interrupted'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Воркер активен'),
+        ),
+    ]
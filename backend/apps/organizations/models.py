@@ -1,6 +1,9 @@
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 
+_NOT_LOADED = object()
+
 
 class OrganizationTag(models.Model):
     class TagType(models.TextChoices):
@@ -115,10 +118,29 @@ class Organization(models.Model):
                 name="organization_inn_unique_when_set",
             ),
         ]
+        indexes = [models.Index(fields=["name", "id"])]
 
     def __str__(self):
         return self.short_name or self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Регион из БД: сводки кампаний пересчитываются только при его смене (campaigns.models)
+        if "region_id" in instance.__dict__:
+            instance._loaded_region_id = instance.region_id
+        return instance
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        saves_region = update_fields is None or bool({"region", "region_id"} & set(update_fields))
+        self.region_changed_on_save = saves_region and (
+            getattr(self, "_loaded_region_id", _NOT_LOADED) != self.region_id
+        )
+        super().save(*args, **kwargs)
+        if saves_region:
+            self._loaded_region_id = self.region_id
+
     @property
     def has_interaction_history(self):
         return self.interactions.exists()
@@ -180,6 +202,7 @@ class Contact(models.Model):
         verbose_name = "Контакт"
         verbose_name_plural = "Контакты"
         ordering = ["-current", "last_name", "first_name"]
+        indexes = [models.Index(fields=["-current", "last_name", "first_name", "id"])]
 
     def __str__(self):
         if self.type == self.ContactType.PERSON:
@@ -259,7 +282,9 @@ class ImportBatch(models.Model):
         CONTACTS = "contacts", "Контакты"
 
     class Status(models.TextChoices):
+        PROCESSING = "processing", "Выполняется"
         COMPLETED = "completed", "Завершён"
+        INTERRUPTED = "interrupted", "Прерван"
         ROLLED_BACK = "rolled_back", "Откат выполнен"
 
     entity_type = models.CharField(
@@ -281,12 +306,16 @@ class ImportBatch(models.Model):
     updated_count = models.PositiveIntegerField(default=0, verbose_name="Обновлено")
     skipped_count = models.PositiveIntegerField(default=0, verbose_name="Пропущено")
     total_rows = models.PositiveIntegerField(default=0, verbose_name="Строк в файле")
+    processed_rows = models.PositiveIntegerField(default=0, verbose_name="Обработано строк")
+    error_count = models.PositiveIntegerField(default=0, verbose_name="Ошибок")
     status = models.CharField(
         max_length=20,
         choices=Status.choices,
         default=Status.COMPLETED,
         verbose_name="Статус",
     )
+    # Время последней записи прогресса: по нему находят импорт, оборвавшийся без ответа
+    heartbeat_at = models.DateTimeField(null=True, blank=True, verbose_name="Последний прогресс")
     rolled_back_at = models.DateTimeField(null=True, blank=True, verbose_name="Дата отката")
     rolled_back_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -349,6 +378,71 @@ class ImportBatchRecord(models.Model):
         return f"{self.get_action_display()} #{target}"
 
 
+class ImportJob(models.Model):
+    """
+    Фоновое выполнение импорта: файлы и поля формы сохраняются при запросе, задание
+    выполняет воркер manage.py run_jobs тем же обработчиком, что и синхронный импорт.
+    """
+
+    class Kind(models.TextChoices):
+        ORGANIZATIONS = "organizations", "Импорт организаций"
+        CONTACTS = "contacts", "Импорт контактов"
+        COLLECT_STAGE = "collect_stage", "Импорт в кампанию сбора"
+        LEADS_DEMAND = "leads_demand", "Импорт потребности лидов"
+        DEMAND_MATRIX = "demand_matrix", "Применение матрицы потребности"
+
+    class Status(models.TextChoices):
+        QUEUED = "queued", "В очереди"
+        RUNNING = "running", "Выполняется"
+        COMPLETED = "completed", "Завершено"
+        FAILED = "failed", "Ошибка"
+
+    kind = models.CharField(max_length=30, choices=Kind.choices, verbose_name="Тип")
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.QUEUED,
+        verbose_name="Статус",
+    )
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="import_jobs",
+        verbose_name="Запустил",
+    )
+    object_id = models.PositiveIntegerField(null=True, blank=True, verbose_name="ID объекта (кампании)")
+    params = models.JSONField(default=dict, blank=True, verbose_name="Поля формы")
+    files = models.JSONField(default=dict, blank=True, verbose_name="Файлы")
+    batch = models.ForeignKey(
+        ImportBatch,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="jobs",
+        verbose_name="Пакет импорта",
+    )
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True, verbose_name="HTTP-статус результата")
+    result = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder, verbose_name="Результат")
+    error = models.TextField(blank=True, verbose_name="Ошибка")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Создано")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Начато")
+    heartbeat_at = models.DateTimeField(null=True, blank=True, verbose_name="Воркер активен")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Завершено")
+
+    class Meta:
+        verbose_name = "Задание импорта"
+        verbose_name_plural = "Задания импорта"
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.pk} ({self.get_status_display()})"
+
+
 class OrganizationInteraction(models.Model):
     class InteractionType(models.TextChoices):
         EMAIL = "email", "Email"
@@ -4,8 +4,12 @@ import unicodedata
 from django.core.exceptions import ValidationError as DjangoValidationError
 from django.core.validators import validate_unicode_slug
 from django.utils.text import slugify
+from django.db.models import Exists, OuterRef
 from rest_framework import serializers
 
+from apps.campaigns.models import Lead, LeadChecklistValue, LeadInteraction
+from apps.campaigns.sparse_fields import ALL_FIELDS, SparseFieldsMixin
+
 from .deletion import contact_deletion_blockers, organization_deletion_blockers
 from .models import (
     Organization,
@@ -13,6 +17,7 @@ from .models import (
     Contact,
     EntityFieldChange,
     ImportBatch,
+    ImportJob,
     OrganizationTag,
     Project,
     ProjectOrganizationMembership,
@@ -80,7 +85,7 @@ def _normalize_inn_digits(value):
     raise serializers.ValidationError("ИНН должен содержать 10 или 12 цифр.")
 
 
-class OrganizationSerializer(serializers.ModelSerializer):
+class OrganizationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     org_type_display = serializers.CharField(
         source="get_org_type_display", read_only=True
     )
@@ -116,6 +121,41 @@ class OrganizationSerializer(serializers.ModelSerializer):
             "created_at", "updated_at",
         ]
 
+    @classmethod
+    def setup_queryset(cls, queryset, selection=ALL_FIELDS):
+        """Связи, prefetch и флаги блокировки удаления — только для выбранных полей."""
+        wants = selection.wants
+        related = [
+            name for name, fields in (
+                ("region", ("region_name",)),
+                ("parent_organization", ("parent_organization_name", "parent_organization_short_name")),
+            )
+            if wants(*fields)
+        ]
+        if related:
+            queryset = queryset.select_related(*related)
+        if wants("has_interaction_history", "last_interaction_date", "interactions_count"):
+            queryset = queryset.prefetch_related("interactions")
+        if wants("tags", "tag_names"):
+            queryset = queryset.prefetch_related("tags")
+        if wants("can_delete", "deletion_block_reasons"):
+            queryset = queryset.annotate(
+                _has_project_membership=Exists(
+                    ProjectOrganizationMembership.objects.filter(
+                        organization=OuterRef("pk")
+                    )
+                ),
+                _has_interaction_history=Exists(
+                    OrganizationInteraction.objects.filter(
+                        organization=OuterRef("pk")
+                    )
+                ),
+                _has_leads=Exists(
+                    Lead.objects.filter(organization=OuterRef("pk"))
+                ),
+            )
+        return queryset
+
     def get_last_interaction_date(self, obj):
         last = obj.interactions.first()
         return last.date if last else None
@@ -131,7 +171,7 @@ class OrganizationSerializer(serializers.ModelSerializer):
         return s or p.name or None
 
     def get_tag_names(self, obj):
-        return list(obj.tags.values_list("name", flat=True))
+        return [tag.name for tag in obj.tags.all()]
 
     def get_can_delete(self, obj):
         return not organization_deletion_blockers(obj)
@@ -198,7 +238,7 @@ class OrganizationSerializer(serializers.ModelSerializer):
         return attrs
 
 
-class ContactSerializer(serializers.ModelSerializer):
+class ContactSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     organization_name = serializers.CharField(
         source="organization.name", read_only=True
     )
@@ -235,8 +275,34 @@ class ContactSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["id", "bitrix_contact_id", "created_at", "updated_at"]
 
+    @classmethod
+    def setup_queryset(cls, queryset, selection=ALL_FIELDS):
+        """Организация, теги и флаги блокировки удаления — только для выбранных полей."""
+        wants = selection.wants
+        if wants("organization_name"):
+            queryset = queryset.select_related("organization")
+        if wants("tags", "tag_names"):
+            queryset = queryset.prefetch_related("tags")
+        if wants("can_delete", "deletion_block_reasons"):
+            queryset = queryset.annotate(
+                _org_has_project_membership=Exists(
+                    ProjectOrganizationMembership.objects.filter(
+                        organization=OuterRef("organization_id")
+                    )
+                ),
+                _has_interaction_history=Exists(
+                    LeadInteraction.objects.filter(contact=OuterRef("pk"))
+                ),
+                _has_lead_links=Exists(
+                    Lead.objects.filter(primary_contact=OuterRef("pk"))
+                ) | Exists(
+                    LeadChecklistValue.objects.filter(contact=OuterRef("pk"))
+                ),
+            )
+        return queryset
+
     def get_tag_names(self, obj):
-        return list(obj.tags.order_by("name").values_list("name", flat=True))
+        return sorted(tag.name for tag in obj.tags.all())
 
     def get_can_delete(self, obj):
         return not contact_deletion_blockers(obj)
@@ -291,6 +357,8 @@ class ImportBatchSerializer(serializers.ModelSerializer):
             "updated_count",
             "skipped_count",
             "total_rows",
+            "processed_rows",
+            "error_count",
             "status",
             "status_display",
             "rolled_back_at",
@@ -299,12 +367,41 @@ class ImportBatchSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
     def get_can_rollback(self, obj):
+        # У прерванного пакета часть строк могла записаться до сохранения счётчиков
+        if obj.status == ImportBatch.Status.INTERRUPTED:
+            return True
         return (
             obj.status == ImportBatch.Status.COMPLETED
             and (obj.created_count > 0 or obj.updated_count > 0)
         )
 
 
+class ImportJobSerializer(serializers.ModelSerializer):
+    kind_display = serializers.CharField(source="get_kind_display", read_only=True)
+    status_display = serializers.CharField(source="get_status_display", read_only=True)
+    batch = ImportBatchSerializer(read_only=True, default=None)
+
+    class Meta:
+        model = ImportJob
+        fields = [
+            "id",
+            "kind",
+            "kind_display",
+            "status",
+            "status_display",
+            "object_id",
+            "batch",
+            "response_status",
+            "result",
+            "error",
+            "created_at",
+            "started_at",
+            "heartbeat_at",
+            "finished_at",
+        ]
+        read_only_fields = fields
+
+
 class OrganizationShortSerializer(serializers.ModelSerializer):
     region_name = serializers.CharField(
         source="region.name", read_only=True, default=None
@@ -0,0 +1,88 @@
+"""
+Прежний поиск по справочникам при импорте реестра (запросы на каждую строку, до
+_ImportLookup) — эталон для test_import_lookup.
+"""
+
+from apps.organizations.models import Organization, OrganizationTag
+from apps.organizations.views import _normalize_cell, _normalize_inn, _split_comma_separated_names
+from apps.reference.models import Region
+
+
+def legacy_find_organization_by_ref(org_ref):
+    ref = _normalize_cell(org_ref)
+    if not ref:
+        return None, "", ""
+    inn = _normalize_inn(ref)
+    if inn:
+        return Organization.objects.filter(inn=inn).first(), "inn", inn
+    qs = Organization.objects.filter(name__iexact=ref)
+    org = qs.first()
+    if org:
+        return org, "name", ref
+    org = Organization.objects.filter(short_name__iexact=ref).first()
+    if org:
+        return org, "name", ref
+    org = Organization.objects.filter(name__icontains=ref).order_by("id").first()
+    return org, "name", ref
+
+
+def legacy_find_organization_for_import(row, org_raw):
+    inn_from_col = _normalize_inn(row.get("inn"))
+    if inn_from_col:
+        org = Organization.objects.filter(inn=inn_from_col).first()
+        if org:
+            return org, "inn", inn_from_col
+
+    ref = _normalize_cell(org_raw)
+    if not ref:
+        return None, "", ""
+
+    inn = _normalize_inn(ref)
+    if inn:
+        org = Organization.objects.filter(inn=inn).first()
+        if org:
+            return org, "inn", inn
+
+    org = Organization.objects.filter(name__iexact=ref).first()
+    if org:
+        return org, "name", ref
+    org = Organization.objects.filter(short_name__iexact=ref).first()
+    if org:
+        return org, "name", ref
+    return None, "", ""
+
+
+def legacy_resolve_region(region_name):
+    name = _normalize_cell(region_name)
+    if not name:
+        return None
+    region = Region.objects.filter(name__iexact=name).first()
+    if region:
+        return region
+    return Region.objects.filter(name__icontains=name).order_by("id").first()
+
+
+def legacy_resolve_tags_by_names(raw, *, for_organization):
+    names = _split_comma_separated_names(raw)
+    if not names:
+        return [], []
+    allowed = [OrganizationTag.TagType.ALL]
+    allowed.append(
+        OrganizationTag.TagType.ORGANIZATIONS
+        if for_organization
+        else OrganizationTag.TagType.CONTACTS
+    )
+    qs = OrganizationTag.objects.filter(tag_type__in=allowed)
+    found = []
+    unknown = []
+    seen_ids = set()
+    for name in names:
+        tag = qs.filter(name__iexact=name).first()
+        if tag is None:
+            tag = qs.filter(slug__iexact=name).first()
+        if tag is None:
+            unknown.append(name)
+        elif tag.id not in seen_ids:
+            seen_ids.add(tag.id)
+            found.append(tag)
+    return found, unknown
@@ -0,0 +1,242 @@
+import io
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+from openpyxl import Workbook
+from rest_framework.response import Response
+from rest_framework.test import APITestCase
+
+from apps.organizations import import_jobs
+from apps.organizations.import_jobs import claim_next_import_job, fail_stale_import_jobs, run_import_job
+from apps.organizations.models import ImportBatch, ImportJob, Organization
+
+
+def _organizations_xlsx(rows):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(("ИНН", "Организация"))
+    for i in range(rows):
+        sheet.append((f"77{i:08d}", f"Организация {i}"))
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return SimpleUploadedFile("orgs.xlsx", buffer.getvalue())
+
+
+class ImportJobLifecycleTests(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username="admin", password="x", role=User.Role.ADMIN)
+        self.client.force_authenticate(self.user)
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def make_batch(self, **kwargs):
+        return ImportBatch.objects.create(
+            entity_type=ImportBatch.EntityType.ORGANIZATIONS,
+            file_name="orgs.xlsx",
+            uploaded_by=self.user,
+            created_count=1,
+            **kwargs,
+        )
+
+    def enqueue(self, rows=3):
+        response = self.client.post(
+            "/api/organizations/import-xlsx/",
+            {"file": _organizations_xlsx(rows), "background": "true"},
+            format="multipart",
+        )
+        self.assertEqual(response.status_code, 202, response.content)
+        return ImportJob.objects.get(pk=response.json()["job_id"])
+
+    def test_background_job_completes_batch(self):
+        job = self.enqueue()
+        run_import_job(claim_next_import_job())
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.Status.COMPLETED)
+        self.assertEqual(job.batch.status, ImportBatch.Status.COMPLETED)
+        self.assertEqual(Organization.objects.count(), 3)
+
+    def test_crashed_import_interrupts_batch(self):
+        self.enqueue()
+        with mock.patch(
+            "apps.organizations.views._save_import_progress", side_effect=RuntimeError("диск заполнен")
+        ), self.assertLogs("apps.organizations.import_jobs", "ERROR"):
+            job = run_import_job(claim_next_import_job())
+        self.assertEqual(job.status, ImportJob.Status.FAILED)
+        batch = ImportJob.objects.get(pk=job.pk).batch
+        self.assertEqual(batch.status, ImportBatch.Status.INTERRUPTED)
+        response = self.client.get(f"/api/import-batches/{batch.id}/")
+        self.assertTrue(response.json()["can_rollback"])
+
+    def test_rollback_rejects_processing_batch(self):
+        batch = self.make_batch(status=ImportBatch.Status.PROCESSING, heartbeat_at=timezone.now())
+        response = self.client.get(f"/api/import-batches/{batch.id}/")
+        self.assertFalse(response.json()["can_rollback"])
+        response = self.client.post(f"/api/import-batches/{batch.id}/rollback/")
+        self.assertEqual(response.status_code, 400)
+        batch.refresh_from_db()
+        self.assertEqual(batch.status, ImportBatch.Status.PROCESSING)
+
+    def test_rollback_of_interrupted_batch(self):
+        batch = self.make_batch(status=ImportBatch.Status.INTERRUPTED)
+        response = self.client.post(f"/api/import-batches/{batch.id}/rollback/")
+        self.assertEqual(response.status_code, 200, response.content)
+        batch.refresh_from_db()
+        self.assertEqual(batch.status, ImportBatch.Status.ROLLED_BACK)
+
+    def test_stale_jobs_and_batches_are_closed(self):
+        long_ago = timezone.now() - timedelta(hours=2)
+        stale_batch = self.make_batch(status=ImportBatch.Status.PROCESSING, heartbeat_at=long_ago)
+        stale_job = ImportJob.objects.create(
+            kind=ImportJob.Kind.ORGANIZATIONS,
+            status=ImportJob.Status.RUNNING,
+            created_by=self.user,
+            started_at=long_ago,
+            batch=stale_batch,
+        )
+        # Давно начато, но воркер отмечает задание — оно живо, его пакет не трогаем,
+        # даже если пачка строк обрабатывается дольше таймаута
+        live_batch = self.make_batch(status=ImportBatch.Status.PROCESSING, heartbeat_at=long_ago)
+        live_job = ImportJob.objects.create(
+            kind=ImportJob.Kind.ORGANIZATIONS,
+            status=ImportJob.Status.RUNNING,
+            created_by=self.user,
+            started_at=long_ago,
+            heartbeat_at=timezone.now(),
+            batch=live_batch,
+        )
+        # Импорт кампании без пакета, идущий дольше таймаута
+        live_without_batch = ImportJob.objects.create(
+            kind=ImportJob.Kind.LEADS_DEMAND,
+            status=ImportJob.Status.RUNNING,
+            created_by=self.user,
+            started_at=long_ago,
+            heartbeat_at=timezone.now(),
+        )
+        stale_without_batch = ImportJob.objects.create(
+            kind=ImportJob.Kind.LEADS_DEMAND,
+            status=ImportJob.Status.RUNNING,
+            created_by=self.user,
+            started_at=long_ago,
+        )
+        # Синхронный импорт, оборванный вместе с процессом: пакет без задания
+        orphan_batch = self.make_batch(status=ImportBatch.Status.PROCESSING, heartbeat_at=long_ago)
+
+        with self.assertLogs("apps.organizations.import_jobs", "WARNING"):
+            self.assertEqual(fail_stale_import_jobs(timedelta(minutes=30)), (2, 2))
+        for job, expected in (
+            (stale_job, ImportJob.Status.FAILED),
+            (live_job, ImportJob.Status.RUNNING),
+            (live_without_batch, ImportJob.Status.RUNNING),
+            (stale_without_batch, ImportJob.Status.FAILED),
+        ):
+            job.refresh_from_db()
+            self.assertEqual(job.status, expected)
+        self.assertTrue(stale_job.error)
+        self.assertIsNotNone(stale_job.finished_at)
+        for batch, expected in (
+            (stale_batch, ImportBatch.Status.INTERRUPTED),
+            (live_batch, ImportBatch.Status.PROCESSING),
+            (orphan_batch, ImportBatch.Status.INTERRUPTED),
+        ):
+            batch.refresh_from_db()
+            self.assertEqual(batch.status, expected)
+
+    def test_swept_job_is_not_resurrected(self):
+        job = self.enqueue()
+
+        def swept_while_running(request, **kwargs):
+            # Проверка оборванных импортов закрыла задание, пока обработчик работал
+            ImportJob.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+            with self.assertLogs("apps.organizations.import_jobs", "WARNING"):
+                fail_stale_import_jobs(timedelta(minutes=30))
+            return Response({"created": 3})
+
+        with mock.patch("apps.organizations.import_jobs._job_view", return_value=swept_while_running), \
+                self.assertLogs("apps.organizations.import_jobs", "WARNING") as logs:
+            result = run_import_job(claim_next_import_job())
+        self.assertIn("итог «completed» не сохранён", logs.output[-1])
+        self.assertEqual(result.status, ImportJob.Status.FAILED)
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.Status.FAILED)
+        self.assertIsNone(job.result)
+
+    def test_run_jobs_sweeps_stale_jobs(self):
+        job = ImportJob.objects.create(
+            kind=ImportJob.Kind.ORGANIZATIONS,
+            status=ImportJob.Status.RUNNING,
+            created_by=self.user,
+            started_at=timezone.now() - timedelta(hours=2),
+        )
+        with self.assertLogs("apps.organizations.import_jobs", "WARNING"):
+            call_command("run_jobs", "--once", stdout=io.StringIO())
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.Status.FAILED)
+
+
+class ImportChunkRetryTests(APITestCase):
+    def setUp(self):
+        User = get_user_model()
+        user = User.objects.create_user(username="admin", password="x", role=User.Role.ADMIN)
+        self.client.force_authenticate(user)
+
+    def test_failed_row_rolls_back_alone(self):
+        save = Organization.save
+
+        def failing_save(organization, *args, **kwargs):
+            if organization.name == "Организация 1":
+                raise RuntimeError("сбой записи")
+            return save(organization, *args, **kwargs)
+
+        with mock.patch.object(Organization, "save", failing_save):
+            response = self.client.post(
+                "/api/organizations/import-xlsx/", {"file": _organizations_xlsx(3)}, format="multipart"
+            )
+        self.assertEqual(response.status_code, 200, response.content)
+        body = response.json()
+        self.assertEqual((body["created"], body["skipped"]), (2, 1))
+        self.assertEqual(body["errors"], ["Строка 3: сбой записи"])
+        self.assertEqual(
+            sorted(Organization.objects.values_list("name", flat=True)), ["Организация 0", "Организация 2"]
+        )
+        batch = ImportBatch.objects.get()
+        self.assertEqual((batch.created_count, batch.records.count()), (2, 2))
+
+
+class ImportJobHeartbeatTests(TransactionTestCase):
+    """Поток воркера отмечает долгое задание без пакета — проверка не считает его оборванным."""
+
+    def test_long_running_job_without_batch_stays_running(self):
+        user = get_user_model().objects.create_user(username="admin", password="x")
+        ImportJob.objects.create(kind=ImportJob.Kind.LEADS_DEMAND, created_by=user, object_id=1)
+        job = claim_next_import_job()
+        long_ago = timezone.now() - timedelta(hours=2)
+        ImportJob.objects.filter(pk=job.pk).update(started_at=long_ago, heartbeat_at=long_ago)
+        swept = []
+
+        def long_import(request, **kwargs):
+            deadline = time.monotonic() + 5
+            while ImportJob.objects.get(pk=job.pk).heartbeat_at == long_ago and time.monotonic() < deadline:
+                time.sleep(0.01)
+            swept.append(fail_stale_import_jobs(timedelta(minutes=30)))
+            return Response({"updated": 1})
+
+        with mock.patch.object(import_jobs, "HEARTBEAT_INTERVAL", 0.01), \
+                mock.patch("apps.organizations.import_jobs._job_view", return_value=long_import):
+            run_import_job(job)
+        self.assertEqual(swept, [(0, 0)])
+        job.refresh_from_db()
+        self.assertEqual(job.status, ImportJob.Status.COMPLETED)
+        self.assertEqual(job.result, {"updated": 1})
+        self.assertGreater(job.heartbeat_at, long_ago)
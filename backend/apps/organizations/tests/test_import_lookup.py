@@ -0,0 +1,135 @@
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+
+from apps.organizations.models import Organization, OrganizationTag
+from apps.organizations.views import _ImportLookup
+from apps.reference.models import FederalDistrict, Region
+
+from .legacy_import_lookup import (
+    legacy_find_organization_by_ref,
+    legacy_find_organization_for_import,
+    legacy_resolve_region,
+    legacy_resolve_tags_by_names,
+)
+
+
+def _ids(result):
+    org, kind, key = result
+    return (org.pk if org else None, kind, key)
+
+
+class ImportLookupEquivalenceTests(TestCase):
+    """Индексы _ImportLookup находят то же, что прежние запросы на каждую строку."""
+
+    @classmethod
+    def setUpTestData(cls):
+        district = FederalDistrict.objects.create(name="Центральный", code="CFD")
+        for name in ("Москва", "Московская область", "Тверская область", "Moscow Oblast"):
+            Region.objects.create(name=name, federal_district=district)
+        for name, slug, tag_type in (
+            ("Школа", "school", OrganizationTag.TagType.ALL),
+            ("Vuz", "university", OrganizationTag.TagType.ORGANIZATIONS),
+            ("Ключевой", "key-person", OrganizationTag.TagType.CONTACTS),
+        ):
+            OrganizationTag.objects.create(name=name, slug=slug, tag_type=tag_type)
+
+        organizations = (
+            ("Гимназия № 1", "Гимназия 1", "7701000001"),
+            ("Лицей Технополис", "Технополис", "770100000212"),
+            ("Acme Corp", "ACME", None),
+            # Одинаковые наименования: прежний .first() брал первую по ordering = ["name"]
+            ("Школа № 5", "", None),
+            ("Школа № 5", "Школа пять", ""),
+            ("Школа № 15", "", "7701000003"),
+            ("Beta Holding", "Beta", "7701000004"),
+        )
+        for name, short_name, inn in organizations:
+            Organization.objects.create(name=name, short_name=short_name, inn=inn)
+
+    def refs(self):
+        return [
+            "",
+            "   ",
+            "7701000001",
+            " 7701-000-001 ",
+            "770100000212",
+            "7701999999",
+            "12345",
+            7701000004.0,
+            "Гимназия № 1",
+            "Гимназия 1",
+            "acme corp",
+            "ACME CORP",
+            "acme",
+            "Школа № 5",
+            "Школа пять",
+            "Школа",
+            "№ 1",
+            "Corp",
+            "co",
+            "Holding",
+            "Несуществующая",
+        ]
+
+    def test_organization_by_ref_matches_queries(self):
+        lookup = _ImportLookup()
+        for ref in self.refs():
+            with self.subTest(ref=ref):
+                self.assertEqual(
+                    _ids(lookup.organization_by_ref(ref)), _ids(legacy_find_organization_by_ref(ref))
+                )
+
+    def test_organization_for_import_matches_queries(self):
+        lookup = _ImportLookup()
+        for inn in ("", "7701000004", "7701999999", "не ИНН"):
+            for ref in self.refs():
+                with self.subTest(inn=inn, ref=ref):
+                    row = {"inn": inn}
+                    self.assertEqual(
+                        _ids(lookup.organization_for_import(row, ref)),
+                        _ids(legacy_find_organization_for_import(row, ref)),
+                    )
+
+    def test_regions_and_tags_match_queries(self):
+        lookup = _ImportLookup()
+        for name in ("", "Москва", "Московская", "область", "moscow oblast", "oblast", "Якутия"):
+            with self.subTest(region=name):
+                self.assertEqual(lookup.region(name), legacy_resolve_region(name))
+        # Кириллица без учёта регистра — как iexact в PostgreSQL; LIKE в SQLite различает её регистр
+        self.assertEqual(lookup.region("москва"), Region.objects.get(name="Москва"))
+        for raw in ("", "Школа", "school; VUZ", "Vuz, vuz, university", "Ключевой", "key-person, Нет такого"):
+            for for_organization in (True, False):
+                with self.subTest(tags=raw, for_organization=for_organization):
+                    self.assertEqual(
+                        lookup.tags(raw, for_organization=for_organization),
+                        legacy_resolve_tags_by_names(raw, for_organization=for_organization),
+                    )
+
+    def test_inn_index_follows_remember_and_rollback(self):
+        """ИНН уникален в БД: после смены ИНН строкой и её отката индекс совпадает с запросами."""
+        # Двух организаций с одним ИНН не бывает — индексу не нужно выбирать между ними
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Organization.objects.create(name="Дубль", inn="7701000004")
+        lookup = _ImportLookup()
+        gymnasium = Organization.objects.get(inn="7701000001")
+        refs = ["7701000001", "7701000005", "Гимназия № 1", "Новая гимназия"]
+
+        def assert_matches():
+            for ref in refs:
+                with self.subTest(ref=ref):
+                    self.assertEqual(
+                        _ids(lookup.organization_by_ref(ref)), _ids(legacy_find_organization_by_ref(ref))
+                    )
+
+        lookup.begin()
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            # Строка переносит ИНН на новую организацию, а старой даёт другой
+            gymnasium.inn = "7701000005"
+            gymnasium.save()
+            lookup.remember(gymnasium)
+            created = Organization.objects.create(name="Новая гимназия", inn="7701000001")
+            lookup.remember(created)
+            assert_matches()
+            raise RuntimeError("откат строки")
+        lookup.rollback()
+        assert_matches()
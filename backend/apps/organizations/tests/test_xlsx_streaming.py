@@ -0,0 +1,125 @@
+import io
+import tracemalloc
+from datetime import datetime
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase
+from openpyxl import Workbook, load_workbook
+
+from apps.organizations import views
+from apps.organizations.views import XLSX_IMPORT_CHUNK_SIZE, _xlsx_sheet_values, _XlsxImportReader
+
+HEADER = ("Организация", "ФИО", "Должность", "Телефон", "Email", "Комментарий")
+
+
+def _xlsx_upload(rows):
+    """Книга контактов с rows строками (пишется потоково, как большие выгрузки)."""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Контакты")
+    sheet.append(HEADER)
+    for i in range(rows):
+        sheet.append((
+            f"Организация {i % 300}",
+            f"Иванов Иван {i}",
+            "Директор",
+            f"+7 900 {i:07d}",
+            f"user{i}@example.com",
+            f"Комментарий к строке {i}",
+        ))
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return SimpleUploadedFile(
+        "contacts.xlsx",
+        buffer.getvalue(),
+        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    )
+
+
+class XlsxImportReaderStreamingTests(SimpleTestCase):
+    """Чтение листа пачками: пик памяти при обходе не зависит от числа строк."""
+
+    def read_all(self, upload):
+        """(число строк, число пачек, пик памяти при обходе chunks() сверх исходной)."""
+        reader = _XlsxImportReader(upload, import_kind="contacts")
+        rows = chunks = 0
+        tracemalloc.start()
+        try:
+            baseline = tracemalloc.get_traced_memory()[0]
+            for chunk in reader.chunks():
+                self.assertLessEqual(len(chunk), XLSX_IMPORT_CHUNK_SIZE)
+                rows += len(chunk)
+                chunks += 1
+            peak = tracemalloc.get_traced_memory()[1] - baseline
+        finally:
+            tracemalloc.stop()
+            reader.close()
+        self.assertEqual(reader.total_rows, rows)
+        return rows, chunks, peak
+
+    def test_peak_memory_does_not_grow_with_row_count(self):
+        small_rows, small_chunks, small_peak = self.read_all(_xlsx_upload(2 * XLSX_IMPORT_CHUNK_SIZE))
+        large_rows, large_chunks, large_peak = self.read_all(_xlsx_upload(20 * XLSX_IMPORT_CHUNK_SIZE))
+        self.assertEqual((small_rows, large_rows), (2 * XLSX_IMPORT_CHUNK_SIZE, 20 * XLSX_IMPORT_CHUNK_SIZE))
+        self.assertEqual((small_chunks, large_chunks), (2, 20))
+        # В 10 раз больше строк; чтение листа целиком дало бы кратный рост пика
+        self.assertLess(large_peak, small_peak * 1.5, (small_peak, large_peak))
+
+    def test_empty_rows_are_skipped(self):
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(HEADER)
+        sheet.append(("Организация 1", "Иванов Иван"))
+        sheet.append((None, None, None))
+        sheet.append(("", "  "))
+        sheet.append(("Организация 2", "Петров Пётр"))
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+        reader = _XlsxImportReader(SimpleUploadedFile("contacts.xlsx", buffer.getvalue()))
+        try:
+            chunks = list(reader.chunks())
+        finally:
+            reader.close()
+        self.assertEqual([[idx for idx, _ in chunk] for chunk in chunks], [[2, 5]])
+        self.assertEqual(chunks[0][0][1]["organization"], "Организация 1")
+        self.assertEqual(reader.expected_rows, 4)
+
+    def test_streaming_values_match_openpyxl_rows(self):
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(HEADER)
+        sheet.append(("Организация", 12345, 1.5, True, datetime(2026, 3, 1, 10, 30), None, "текст"))
+        sheet["C5"] = "после пропуска"
+        sheet["A6"] = "=1+1"
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+        buffer.seek(0)
+        streamed = load_workbook(buffer, read_only=True).active
+        expected = [
+            (idx, row)
+            for idx, row in enumerate(streamed.iter_rows(min_row=2, values_only=True), start=2)
+            if any(value is not None for value in row)
+        ]
+        actual = [
+            (idx, row + (None,) * (len(expected[0][1]) - len(row)))
+            for idx, row in _xlsx_sheet_values(streamed, 2)
+        ]
+        self.assertEqual(actual, expected)
+
+    def test_public_api_fallback_reads_same_rows(self):
+        upload = _xlsx_upload(30)
+        reader = _XlsxImportReader(upload, import_kind="contacts")
+        try:
+            streamed = list(reader.chunks())
+        finally:
+            reader.close()
+        upload.seek(0)
+        # Внутреннего API openpyxl нет (другая версия) — чтение через публичный iter_rows
+        with mock.patch.object(views, "WorkSheetParser", None):
+            reader = _XlsxImportReader(upload, import_kind="contacts")
+            try:
+                fallback = list(reader.chunks())
+            finally:
+                reader.close()
+        self.assertEqual(fallback, streamed)
+        self.assertEqual(sum(len(chunk) for chunk in fallback), 30)
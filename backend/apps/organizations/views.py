@@ -2,8 +2,14 @@ import io
 import logging
 import json
 import re
+import shutil
+import tempfile
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import partial
 from datetime import timedelta
 
+import openpyxl
 import requests as http_requests
 from openpyxl import Workbook, load_workbook
 from django.conf import settings
@@ -16,12 +22,13 @@ from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
 from django.utils import timezone
 from django.utils.text import slugify
 from apps.reference.models import Region
-from apps.campaigns.models import Lead, LeadChecklistValue, LeadInteraction
+from apps.campaigns.keyset import KeysetPagination
+from apps.campaigns.sparse_fields import SparseFieldsViewMixin
 from .deletion import contact_deletion_blockers, organization_deletion_blockers
+from .import_jobs import attach_import_batch, enqueue_import_job, wants_background
 from .models import (
     Organization,
     OrganizationInteraction,
@@ -29,6 +36,7 @@ from .models import (
     EntityFieldChange,
     ImportBatch,
     ImportBatchRecord,
+    ImportJob,
     OrganizationTag,
     Project,
     ProjectOrganizationMembership,
@@ -40,6 +48,7 @@ from .serializers import (
     OrganizationInteractionSerializer, ContactSerializer,
     EntityFieldChangeSerializer,
     ImportBatchSerializer,
+    ImportJobSerializer,
     OrganizationTagSerializer,
     ProjectSerializer,
     ProjectOrganizationMembershipSerializer,
@@ -69,9 +78,7 @@ BITRIX_COMMUNICATION_UPDATE_ENDPOINTS = ("/api/communication/update/", "/contact
 _CHANGE_SOURCE_VALUES = {item.value for item in EntityFieldChange.Source}
 
 
-class RegistryPagination(PageNumberPagination):
-    page_size = 50
-    max_page_size = 500
+class RegistryPagination(KeysetPagination):
     page_size_query_param = "page_size"
 
 
@@ -178,7 +185,7 @@ def _ensure_default_acting_organization() -> Organization:
     return org
 
 
-def _create_field_change_rows(
+def _field_change_rows(
     *,
     before: dict | None,
     after: dict,
@@ -187,7 +194,7 @@ def _create_field_change_rows(
     changed_by,
     organization: Organization | None = None,
     contact: Contact | None = None,
-):
+) -> list[EntityFieldChange]:
     rows = []
     for field in fields:
         old_value = None if before is None else before.get(field)
@@ -208,6 +215,11 @@ def _create_field_change_rows(
                 changed_by=changed_by,
             )
         )
+    return rows
+
+
+def _create_field_change_rows(**kwargs):
+    rows = _field_change_rows(**kwargs)
     if rows:
         EntityFieldChange.objects.bulk_create(rows)
 
@@ -386,7 +398,7 @@ def _split_comma_separated_names(raw):
     return [p.strip() for p in re.split(r"[,;]+", s) if p.strip()]
 
 
-def _resolve_import_parent_organization(row, line_no, errors, *, existing_org):
+def _resolve_import_parent_organization(row, line_no, errors, *, existing_org, lookup):
     """
     Головная организация для строки импорта подразделения (ИНН или наименование).
     Если колонка пуста и existing_org уже связана с головной — оставляем её.
@@ -403,7 +415,7 @@ def _resolve_import_parent_organization(row, line_no, errors, *, existing_org):
             f"(колонка «Головная организация»: ИНН или наименование юрлица)"
         )
         return None, False
-    parent, _, _ = _find_organization_by_ref(ref)
+    parent, _, _ = lookup.organization_by_ref(ref)
     if parent is None:
         errors.append(f"Строка {line_no}: головная организация не найдена («{ref}»)")
         return None, False
@@ -415,36 +427,6 @@ def _resolve_import_parent_organization(row, line_no, errors, *, existing_org):
     return parent, True
 
 
-def _resolve_tags_by_names(raw, *, for_organization: bool):
-    """
-    Сопоставление OrganizationTag по имени или slug (без учёта регистра имени).
-    for_organization: True — теги сущности organizations + all; иначе contacts + all.
-    """
-    names = _split_comma_separated_names(raw)
-    if not names:
-        return [], []
-    allowed = [OrganizationTag.TagType.ALL]
-    allowed.append(
-        OrganizationTag.TagType.ORGANIZATIONS
-        if for_organization
-        else OrganizationTag.TagType.CONTACTS
-    )
-    qs = OrganizationTag.objects.filter(tag_type__in=allowed)
-    found = []
-    unknown = []
-    seen_ids = set()
-    for name in names:
-        tag = qs.filter(name__iexact=name).first()
-        if tag is None:
-            tag = qs.filter(slug__iexact=name).first()
-        if tag is None:
-            unknown.append(name)
-        elif tag.id not in seen_ids:
-            seen_ids.add(tag.id)
-            found.append(tag)
-    return found, unknown
-
-
 def _extract_tag_ids(raw):
     out = set()
     if raw is None:
@@ -543,33 +525,191 @@ def _pick_import_worksheet(wb, import_kind: str):
     return best_ws
 
 
-def _xlsx_rows(uploaded_file, *, import_kind: str = "contacts"):
+XLSX_IMPORT_CHUNK_SIZE = 500
+
+
+class _XlsxUpload:
     """
-    Читает весь файл в память: openpyxl read_only + некоторые UploadedFile из Django
-    дают сбой при произвольном доступе к ZIP/xlsx.
+    Загруженный .xlsx, открытый для потокового чтения. Загрузка копируется во временный файл
+    (openpyxl read_only и некоторые UploadedFile из Django дают сбой при произвольном доступе
+    к ZIP/xlsx), книга открывается в read_only — строки читаются с диска по мере обхода.
+    workbook = None для пустого файла.
     """
-    if hasattr(uploaded_file, "seek"):
+
+    def __init__(self, uploaded_file):
+        self._file = None
+        self.workbook = None
         try:
-            uploaded_file.seek(0)
-        except (OSError, ValueError, io.UnsupportedOperation):
-            pass
-    raw = uploaded_file.read()
-    if not raw:
-        return []
-    bio = io.BytesIO(raw)
-    wb = load_workbook(bio, data_only=True, read_only=False)
-    ws = _pick_import_worksheet(wb, import_kind)
-    header_values = next(ws.iter_rows(min_row=1, max_row=1, values_only=True), None)
-    col_map = _xlsx_column_map(header_values)
-    rows = []
-    for idx, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
-        item = {}
-        for key, col_idx in col_map.items():
-            if row and col_idx < len(row):
-                item[key] = row[col_idx]
-        if any(_normalize_cell(v) for v in item.values()):
-            rows.append((idx, item))
-    return rows
+            self._open(uploaded_file)
+        except Exception:
+            self.close()
+            raise
+
+    def _open(self, uploaded_file):
+        temporary_file_path = getattr(uploaded_file, "temporary_file_path", None)
+        if temporary_file_path:
+            self._file = open(temporary_file_path(), "rb")
+        else:
+            if hasattr(uploaded_file, "seek"):
+                try:
+                    uploaded_file.seek(0)
+                except (OSError, ValueError, io.UnsupportedOperation):
+                    pass
+            self._file = tempfile.TemporaryFile()
+            if hasattr(uploaded_file, "chunks"):
+                for chunk in uploaded_file.chunks():
+                    self._file.write(chunk)
+            else:
+                shutil.copyfileobj(uploaded_file, self._file)
+            self._file.seek(0)
+        if not self._file.read(1):
+            return
+        self._file.seek(0)
+        self.workbook = load_workbook(self._file, data_only=True, read_only=True)
+
+    def close(self):
+        if self.workbook is not None:
+            self.workbook.close()
+            self.workbook = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# Потоковый разбор листа опирается на внутренний API openpyxl: версия закреплена в
+# requirements.txt. Если в установленной версии его нет — публичный iter_rows(values_only=True)
+# (тоже потоковый, но разобранные <row> копятся в памяти до конца листа).
+try:
+    from openpyxl.worksheet._reader import DATA_TAG, ROW_TAG, WorkSheetParser
+    from openpyxl.xml.functions import iterparse
+except ImportError:
+    WorkSheetParser = None
+
+_STREAMING_SHEET_ATTRS = ("_get_source", "_shared_strings", "_get_row")
+_STREAMING_WORKBOOK_ATTRS = ("data_only", "epoch", "_date_formats", "_timedelta_formats")
+
+if WorkSheetParser is not None:
+
+    class _StreamingSheetParser(WorkSheetParser):
+        """
+        Разбор строк листа read_only-книги. WorkSheetParser.parse() очищает разобранный <row>,
+        но оставляет его в <sheetData> до конца листа — память растёт с числом строк;
+        здесь строка отцепляется сразу после разбора. Остальные элементы листа не нужны.
+        """
+
+        def parse(self):
+            sheet_data = None
+            for event, element in iterparse(self.source, events=("start", "end")):
+                if event == "start":
+                    if element.tag == DATA_TAG:
+                        sheet_data = element
+                elif element.tag == ROW_TAG:
+                    row = self.parse_row(element)
+                    element.clear()
+                    if sheet_data is not None:
+                        sheet_data.remove(element)
+                    yield row
+
+
+def _streaming_sheet_parser(worksheet, source):
+    """Потоковый разборщик read_only-листа; None — лист в памяти или нет нужного API openpyxl."""
+    if WorkSheetParser is None or not hasattr(WorkSheetParser, "parse_row"):
+        return None
+    if not all(hasattr(worksheet, name) for name in _STREAMING_SHEET_ATTRS):
+        return None
+    workbook = worksheet.parent
+    if not all(hasattr(workbook, name) for name in _STREAMING_WORKBOOK_ATTRS):
+        return None
+    try:
+        return _StreamingSheetParser(
+            source,
+            worksheet._shared_strings,
+            data_only=workbook.data_only,
+            epoch=workbook.epoch,
+            date_formats=workbook._date_formats,
+            timedelta_formats=workbook._timedelta_formats,
+        )
+    except TypeError:
+        logger.warning("openpyxl %s: потоковый разбор листа недоступен", getattr(openpyxl, "__version__", "?"))
+        return None
+
+
+def _xlsx_sheet_values(worksheet, min_row):
+    """(номер строки, значения) непустых в файле строк листа, начиная с min_row."""
+    if WorkSheetParser is not None and hasattr(worksheet, "_get_source"):
+        with worksheet._get_source() as source:
+            parser = _streaming_sheet_parser(worksheet, source)
+            if parser is not None:
+                for idx, cells in parser.parse():
+                    if idx >= min_row:
+                        yield idx, worksheet._get_row(cells, values_only=True)
+                return
+    for idx, row in enumerate(worksheet.iter_rows(min_row=min_row, values_only=True), start=min_row):
+        if any(value is not None for value in row):
+            yield idx, row
+
+
+def _xlsx_row_chunks(worksheet, *, min_row: int = 2, size: int = XLSX_IMPORT_CHUNK_SIZE):
+    """Строки листа пачками [(номер строки, значения), ...] — без загрузки листа целиком."""
+    chunk = []
+    for idx, row in _xlsx_sheet_values(worksheet, min_row):
+        chunk.append((idx, row))
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class _XlsxImportReader(_XlsxUpload):
+    """
+    Лист импорта реестра (организации / контакты): лист выбирается по строкам заголовков,
+    непустые строки отдаются пачками по XLSX_IMPORT_CHUNK_SIZE. Ошибки формата файла
+    возникают при создании, до начала импорта.
+    """
+
+    def __init__(self, uploaded_file, *, import_kind: str = "contacts"):
+        self.worksheet = None
+        self.column_map = {}
+        # Строк по размеру листа (с пустыми) — оценка для прогресса до начала импорта
+        self.expected_rows = 0
+        # Число непустых строк — растёт по мере прохода по chunks()
+        self.total_rows = 0
+        super().__init__(uploaded_file)
+        if self.workbook is None:
+            return
+        try:
+            self.worksheet = _pick_import_worksheet(self.workbook, import_kind)
+            header_values = next(self.worksheet.iter_rows(min_row=1, max_row=1, values_only=True), None)
+            self.column_map = _xlsx_column_map(header_values)
+            self.expected_rows = max((self.worksheet.max_row or 1) - 1, 0)
+        except Exception:
+            self.close()
+            raise
+
+    def chunks(self):
+        """Пачки [(номер строки, {ключ колонки: значение}), ...]; пустые строки пропускаются."""
+        if self.worksheet is None:
+            return
+        col_map = self.column_map
+        for raw_chunk in _xlsx_row_chunks(self.worksheet):
+            chunk = []
+            for idx, row in raw_chunk:
+                item = {}
+                for key, col_idx in col_map.items():
+                    if row and col_idx < len(row):
+                        item[key] = row[col_idx]
+                if any(_normalize_cell(v) for v in item.values()):
+                    chunk.append((idx, item))
+            self.total_rows += len(chunk)
+            if chunk:
+                yield chunk
 
 
 def _parse_person_name(full_name):
@@ -586,49 +726,191 @@ def _parse_person_name(full_name):
     return parts[0], parts[1], " ".join(parts[2:])
 
 
-def _find_organization_by_ref(org_ref):
-    ref = _normalize_cell(org_ref)
-    if not ref:
-        return None, "", ""
-    inn = _normalize_inn(ref)
-    if inn:
-        return Organization.objects.filter(inn=inn).first(), "inn", inn
-    qs = Organization.objects.filter(name__iexact=ref)
-    org = qs.first()
-    if org:
-        return org, "name", ref
-    org = Organization.objects.filter(short_name__iexact=ref).first()
-    if org:
+class _ImportLookup:
+    """
+    Справочники импорта реестра в памяти на один пакет: организации по ИНН, наименованию и
+    краткому наименованию (без учёта регистра), регионы и теги — вместо запросов на каждую
+    строку. Организации, созданные или изменённые строкой, вносятся через remember();
+    если строка (или пачка) откатилась, rollback() возвращает индекс к состоянию на begin().
+    Поиск по вхождению в наименование идёт по индексу триграмм (строится при первом
+    обращении). Найденная организация читается из БД по id — строка работает с актуальным
+    экземпляром.
+
+    Индекс ИНН хранит одну организацию на ИНН: непустой ИНН уникален в БД
+    (organization_inn_unique_when_set), так что выбирать между несколькими, как делал
+    filter(inn=...).first(), не из чего. После remember() ИНН указывает на организацию,
+    которая сейчас носит его в БД.
+    """
+
+    def __init__(self):
+        # id → (ИНН, наименование, краткое наименование, наименование в нижнем регистре)
+        self._orgs = {}
+        self._by_inn = {}
+        self._by_name = defaultdict(set)
+        self._by_short_name = defaultdict(set)
+        self._trigrams = None
+        self._journal = {}
+        rows = Organization.objects.order_by().values_list("id", "inn", "name", "short_name")
+        for org_id, inn, name, short_name in rows.iterator(chunk_size=2000):
+            self._index(org_id, inn, name, short_name)
+
+        self._regions = list(Region.objects.order_by("id"))
+        self._region_by_name = {}
+        for region in sorted(self._regions, key=lambda r: (r.name, r.id)):
+            self._region_by_name.setdefault(region.name.casefold(), region)
+        self._tags = list(OrganizationTag.objects.all())
+
+    @staticmethod
+    def _trigrams_of(text):
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    def _index(self, org_id, inn, name, short_name):
+        name_key = (name or "").casefold()
+        self._orgs[org_id] = (inn or "", name or "", short_name or "", name_key)
+        if inn:
+            self._by_inn[inn] = org_id
+        if name_key:
+            self._by_name[name_key].add(org_id)
+        if short_name:
+            self._by_short_name[short_name.casefold()].add(org_id)
+        if self._trigrams is not None:
+            for gram in self._trigrams_of(name_key):
+                self._trigrams[gram].append(org_id)
+
+    def _unindex(self, org_id):
+        entry = self._orgs.pop(org_id, None)
+        if entry is None:
+            return
+        inn, _, short_name, name_key = entry
+        if inn and self._by_inn.get(inn) == org_id:
+            del self._by_inn[inn]
+        self._by_name.get(name_key, set()).discard(org_id)
+        self._by_short_name.get(short_name.casefold(), set()).discard(org_id)
+        # Списки триграмм не чистятся: кандидаты всё равно проверяются по текущему наименованию
+
+    def begin(self):
+        self._journal = {}
+
+    def remember(self, organization):
+        """Внести созданную или изменённую организацию (после save)."""
+        org_id = organization.pk
+        if org_id not in self._journal:
+            self._journal[org_id] = self._orgs.get(org_id)
+        self._unindex(org_id)
+        self._index(org_id, organization.inn, organization.name, organization.short_name)
+
+    def rollback(self):
+        for org_id, entry in self._journal.items():
+            self._unindex(org_id)
+            if entry is not None:
+                self._index(org_id, *entry[:3])
+        self._journal = {}
+
+    @staticmethod
+    def _get(org_id):
+        return Organization.objects.filter(pk=org_id).first() if org_id else None
+
+    def _by_exact_name(self, ref):
+        key = ref.casefold()
+        for index in (self._by_name, self._by_short_name):
+            ids = index.get(key)
+            if ids:
+                # Как .first() при ordering = ["name"]
+                return self._get(min(ids, key=lambda org_id: (self._orgs[org_id][1], org_id)))
+        return None
+
+    def _containing(self, ref):
+        key = ref.casefold()
+        if len(key) < 3:
+            candidates = self._orgs
+        else:
+            if self._trigrams is None:
+                self._trigrams = defaultdict(list)
+                for org_id, entry in self._orgs.items():
+                    for gram in self._trigrams_of(entry[3]):
+                        self._trigrams[gram].append(org_id)
+            candidates = min((self._trigrams.get(gram, ()) for gram in self._trigrams_of(key)), key=len)
+        matches = [
+            org_id
+            for org_id in candidates
+            if org_id in self._orgs and key in self._orgs[org_id][3]
+        ]
+        return self._get(min(matches)) if matches else None
+
+    def organization_by_ref(self, org_ref):
+        """ИНН, точное наименование / краткое наименование, затем вхождение в наименование."""
+        ref = _normalize_cell(org_ref)
+        if not ref:
+            return None, "", ""
+        inn = _normalize_inn(ref)
+        if inn:
+            return self._get(self._by_inn.get(inn)), "inn", inn
+        org = self._by_exact_name(ref)
+        if org is None:
+            org = self._containing(ref)
         return org, "name", ref
-    org = Organization.objects.filter(name__icontains=ref).order_by("id").first()
-    return org, "name", ref
 
+    def organization_for_import(self, row, org_raw):
+        """Сначала ИНН из колонки, затем org_raw как ИНН/точное имя."""
+        inn_from_col = _normalize_inn(row.get("inn"))
+        if inn_from_col:
+            org = self._get(self._by_inn.get(inn_from_col))
+            if org:
+                return org, "inn", inn_from_col
 
-def _find_organization_for_import(row, org_raw):
-    """Поиск организации при импорте: сначала ИНН из колонки, затем org_raw как ИНН/точное имя."""
-    inn_from_col = _normalize_inn(row.get("inn"))
-    if inn_from_col:
-        org = Organization.objects.filter(inn=inn_from_col).first()
-        if org:
-            return org, "inn", inn_from_col
+        ref = _normalize_cell(org_raw)
+        if not ref:
+            return None, "", ""
 
-    ref = _normalize_cell(org_raw)
-    if not ref:
-        return None, "", ""
+        inn = _normalize_inn(ref)
+        if inn:
+            org = self._get(self._by_inn.get(inn))
+            if org:
+                return org, "inn", inn
 
-    inn = _normalize_inn(ref)
-    if inn:
-        org = Organization.objects.filter(inn=inn).first()
+        org = self._by_exact_name(ref)
         if org:
-            return org, "inn", inn
+            return org, "name", ref
+        return None, "", ""
 
-    org = Organization.objects.filter(name__iexact=ref).first()
-    if org:
-        return org, "name", ref
-    org = Organization.objects.filter(short_name__iexact=ref).first()
-    if org:
-        return org, "name", ref
-    return None, "", ""
+    def region(self, region_name):
+        name = _normalize_cell(region_name)
+        if not name:
+            return None
+        key = name.casefold()
+        region = self._region_by_name.get(key)
+        if region:
+            return region
+        return next((r for r in self._regions if key in r.name.casefold()), None)
+
+    def tags(self, raw, *, for_organization: bool):
+        """
+        Сопоставление OrganizationTag по имени или slug (без учёта регистра).
+        for_organization: True — теги сущности organizations + all; иначе contacts + all.
+        Возвращает (найденные теги, неизвестные имена).
+        """
+        names = _split_comma_separated_names(raw)
+        if not names:
+            return [], []
+        allowed = {
+            OrganizationTag.TagType.ALL,
+            OrganizationTag.TagType.ORGANIZATIONS if for_organization else OrganizationTag.TagType.CONTACTS,
+        }
+        candidates = [tag for tag in self._tags if tag.tag_type in allowed]
+        found = []
+        unknown = []
+        seen_ids = set()
+        for name in names:
+            key = name.casefold()
+            tag = next((t for t in candidates if t.name.casefold() == key), None)
+            if tag is None:
+                tag = next((t for t in candidates if t.slug.casefold() == key), None)
+            if tag is None:
+                unknown.append(name)
+            elif tag.id not in seen_ids:
+                seen_ids.add(tag.id)
+                found.append(tag)
+        return found, unknown
 
 
 def _restore_organization_state(organization: Organization, snapshot: dict):
@@ -670,19 +952,544 @@ def _restore_contact_state(contact: Contact, snapshot: dict):
     contact.tags.set(tag_ids)
 
 
-def _track_import_record(batch: ImportBatch, *, organization=None, contact=None, action: str, before=None):
-    ImportBatchRecord.objects.create(
-        batch=batch,
+IMPORT_AUDIT_BATCH_SIZE = 2000
+
+
+class _ImportAuditBuffer:
+    """
+    Журнал изменений (EntityFieldChange) и записи пакета (ImportBatchRecord) импорта:
+    копятся по строкам пачки и пишутся flush() несколькими bulk_create в той же
+    транзакции, что и сама пачка. rollback() отбрасывает накопленное с последнего begin().
+    """
+
+    def __init__(self, batch: ImportBatch):
+        self.batch = batch
+        self._changes = []
+        self._records = []
+        self._mark = (0, 0)
+
+    def add_field_changes(self, **kwargs):
+        self._changes.extend(_field_change_rows(**kwargs))
+
+    def add_record(self, *, organization=None, contact=None, action: str, before=None):
+        self._records.append(
+            ImportBatchRecord(
+                batch=self.batch,
+                organization=organization,
+                contact=contact,
+                action=action,
+                snapshot=before or {},
+            )
+        )
+
+    def begin(self):
+        self._mark = (len(self._changes), len(self._records))
+
+    def rollback(self):
+        del self._changes[self._mark[0]:]
+        del self._records[self._mark[1]:]
+
+    def flush(self):
+        if self._changes:
+            EntityFieldChange.objects.bulk_create(self._changes, batch_size=IMPORT_AUDIT_BATCH_SIZE)
+        if self._records:
+            ImportBatchRecord.objects.bulk_create(self._records, batch_size=IMPORT_AUDIT_BATCH_SIZE)
+        self._changes = []
+        self._records = []
+        self._mark = (0, 0)
+
+
+def _save_import_progress(batch: ImportBatch, reader, *, created, updated, skipped, errors, done=False):
+    """Счётчики пакета после очередной пачки строк; done — импорт завершён."""
+    batch.processed_rows = reader.total_rows
+    batch.created_count = created
+    batch.updated_count = updated
+    batch.skipped_count = skipped
+    batch.error_count = len(errors)
+    batch.heartbeat_at = timezone.now()
+    update_fields = [
+        "processed_rows", "created_count", "updated_count", "skipped_count", "error_count", "heartbeat_at",
+    ]
+    if done:
+        batch.total_rows = reader.total_rows
+        batch.status = ImportBatch.Status.COMPLETED
+        update_fields += ["total_rows", "status"]
+    batch.save(update_fields=update_fields)
+
+
+@contextmanager
+def _interrupt_import_batch_on_error(batch: ImportBatch):
+    """Импорт оборвался исключением — пакет помечается прерванным (его можно откатить)."""
+    try:
+        yield
+    except BaseException:
+        ImportBatch.objects.filter(pk=batch.pk, status=ImportBatch.Status.PROCESSING).update(
+            status=ImportBatch.Status.INTERRUPTED
+        )
+        raise
+
+
+class _ImportState:
+    """
+    Счётчики и ошибки импорта реестра. begin() запоминает их перед пачкой строк,
+    rollback() возвращает — пачка, откатившаяся целиком, повторяется с того же состояния.
+    """
+
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.skipped = 0
+        self.errors = []
+        self._mark = None
+
+    def _snapshot(self):
+        return self.created, self.updated, self.skipped, len(self.errors)
+
+    def _restore(self, mark):
+        self.created, self.updated, self.skipped, error_count = mark
+        del self.errors[error_count:]
+
+    def begin(self):
+        self._mark = self._snapshot()
+
+    def rollback(self):
+        self._restore(self._mark)
+
+    def save_progress(self, batch: ImportBatch, reader, *, done=False):
+        _save_import_progress(
+            batch,
+            reader,
+            created=self.created,
+            updated=self.updated,
+            skipped=self.skipped,
+            errors=self.errors,
+            done=done,
+        )
+
+
+class _ContactImportState(_ImportState):
+    """Плюс то, что строки контактов наследуют от предыдущих: организация и последний контакт."""
+
+    def __init__(self):
+        super().__init__()
+        self.last_org_ref = ""
+        self.last_contact_by_org = {}
+
+    def _snapshot(self):
+        return super()._snapshot(), self.last_org_ref, dict(self.last_contact_by_org)
+
+    def _restore(self, mark):
+        counters, self.last_org_ref, self.last_contact_by_org = mark
+        super()._restore(counters)
+
+
+def _run_import_chunk(chunk, process_row, lookup: _ImportLookup, audit: _ImportAuditBuffer, state: _ImportState):
+    """
+    Пачка строк — одна транзакция без точек сохранения на строку. Если строка упала,
+    пачка откатывается и повторяется с точкой сохранения на каждую строку — ошибка
+    откатывает только свою строку и попадает в state.errors.
+    """
+    state.begin()
+    for savepoints in (False, True):
+        lookup.begin()
+        audit.begin()
+        try:
+            with transaction.atomic():
+                for line_no, row in chunk:
+                    if savepoints:
+                        lookup.begin()
+                        audit.begin()
+                    try:
+                        with transaction.atomic(savepoint=savepoints):
+                            process_row(line_no, row)
+                    except Exception as exc:
+                        if not savepoints:
+                            raise
+                        lookup.rollback()
+                        audit.rollback()
+                        state.skipped += 1
+                        state.errors.append(f"Строка {line_no}: {exc}")
+                audit.flush()
+            return
+        except Exception:
+            if savepoints:
+                raise
+            lookup.rollback()
+            audit.rollback()
+            state.rollback()
+
+
+def _import_organization_row(
+    line_no,
+    row,
+    *,
+    lookup: _ImportLookup,
+    audit: _ImportAuditBuffer,
+    state: _ImportState,
+    source,
+    actor,
+    default_org_type,
+    imported_tags,
+    update_existing,
+):
+    """Строка импорта организаций: создать или обновить организацию, теги и журнал."""
+    org_raw = _normalize_cell(row.get("organization") or row.get("name") or row.get("inn"))
+    if not org_raw:
+        state.skipped += 1
+        return
+
+    inn_from_col = _normalize_inn(row.get("inn"))
+    found, ref_kind, ref_value = lookup.organization_for_import(row, org_raw)
+    org_name = org_raw if ref_kind == "name" else _trim_for_model_field(
+        Organization, "name", row.get("organization") or ""
+    )
+    if not org_name and ref_kind == "inn":
+        org_name = f"Организация {ref_value}"
+    inn = inn_from_col or (ref_value if ref_kind == "inn" else "")
+    short_name = _trim_for_model_field(Organization, "short_name", row.get("short_name"))
+
+    row_ot_raw = row.get("org_type")
+    cell_ot_text = _normalize_cell(row_ot_raw) if row_ot_raw is not None else ""
+    row_resolved_ot = _resolve_org_type_from_cell(row_ot_raw)
+    if cell_ot_text and row_resolved_ot is None:
+        state.errors.append(f"Строка {line_no}: неизвестный тип организации «{cell_ot_text}»")
+    effective_org_type = row_resolved_ot if row_resolved_ot else default_org_type
+
+    row_tag_objs, unk_org_tags = lookup.tags(row.get("organization_tags"), for_organization=True)
+    for u in unk_org_tags:
+        state.errors.append(f"Строка {line_no}: неизвестный тег «{u}»")
+    merged_tag_by_id = {t.id: t for t in imported_tags}
+    for t in row_tag_objs:
+        merged_tag_by_id[t.id] = t
+    merged_tag_objs = list(merged_tag_by_id.values())
+
+    organization = found
+    before = None
+    is_new = False
+    is_branch = effective_org_type == Organization.OrgType.COMPANY_BRANCH
+
+    parent_for_branch = None
+    if is_branch:
+        parent_for_branch, p_ok = _resolve_import_parent_organization(
+            row, line_no, state.errors, existing_org=found, lookup=lookup
+        )
+        if not p_ok:
+            state.skipped += 1
+            return
+
+    if organization is None:
+        if is_branch:
+            org_name_final = (
+                _trim_for_model_field(Organization, "name", row.get("organization") or "") or org_raw
+            )
+            if not org_name_final:
+                state.skipped += 1
+                state.errors.append(f"Строка {line_no}: укажите наименование подразделения")
+                return
+            organization = Organization(
+                name=org_name_final,
+                short_name=short_name or "",
+                inn=None,
+                org_type=effective_org_type,
+                parent_organization=parent_for_branch,
+            )
+            is_new = True
+        elif not inn:
+            state.skipped += 1
+            state.errors.append(
+                f"Строка {line_no}: не удалось создать организацию без ИНН ({org_raw}); "
+                f"для подразделения задайте тип «подразделение»/«company_branch» "
+                f"и колонку «Головная организация» (ИНН или наименование юрлица)"
+            )
+            return
+        else:
+            if not org_name:
+                org_name = f"Организация {inn}"
+            organization = Organization(
+                name=org_name,
+                short_name=short_name or "",
+                inn=inn,
+                org_type=effective_org_type,
+            )
+            is_new = True
+    else:
+        before = _capture_organization_state(organization)
+        if not update_existing:
+            state.skipped += 1
+            return
+
+    region = lookup.region(row.get("region"))
+    description = _normalize_cell(row.get("comment") or row.get("description"))
+
+    if org_name:
+        organization.name = org_name
+    if inn and not is_branch:
+        organization.inn = inn
+    if is_branch:
+        organization.inn = None
+        organization.parent_organization = parent_for_branch
+    organization.org_type = effective_org_type
+    if region:
+        organization.region = region
+    if description:
+        organization.description = description
+    if short_name:
+        organization.short_name = short_name
+
+    organization.save()
+    lookup.remember(organization)
+
+    if merged_tag_objs:
+        merged_ids = set(organization.tags.values_list("id", flat=True))
+        merged_ids.update(t.id for t in merged_tag_objs)
+        organization.tags.set(sorted(merged_ids))
+
+    after = _capture_organization_state(organization)
+    audit.add_field_changes(
+        before=before,
+        after=after,
+        fields=_ORGANIZATION_AUDIT_FIELDS,
+        source=source,
+        changed_by=actor,
+        organization=organization,
+    )
+
+    if is_new:
+        state.created += 1
+        audit.add_record(
+            organization=organization,
+            action=ImportBatchRecord.Action.CREATED,
+        )
+    else:
+        state.updated += 1
+        audit.add_record(
+            organization=organization,
+            action=ImportBatchRecord.Action.UPDATED,
+            before=before,
+        )
+
+
+def _import_contact_row(
+    line_no,
+    row,
+    *,
+    lookup: _ImportLookup,
+    audit: _ImportAuditBuffer,
+    state: _ContactImportState,
+    source,
+    actor,
+    default_org_type,
+    default_contact_type,
+    create_missing_orgs,
+    org_tags,
+    contact_tags,
+):
+    """
+    Строка импорта контактов: организация (пустая ячейка — из предыдущей строки, при
+    create_missing_orgs — создаётся по ИНН), затем контакт с тегами и журналом.
+    """
+    org_raw = _normalize_cell(row.get("organization"))
+    if not org_raw:
+        org_raw = state.last_org_ref
+    if not org_raw:
+        state.skipped += 1
+        return
+    state.last_org_ref = org_raw
+
+    row_ot_raw_early = row.get("org_type")
+    cell_ot_early = _normalize_cell(row_ot_raw_early) if row_ot_raw_early is not None else ""
+    row_resolved_ot_early = _resolve_org_type_from_cell(row_ot_raw_early)
+    if cell_ot_early and row_resolved_ot_early is None:
+        state.errors.append(f"Строка {line_no}: неизвестный тип организации «{cell_ot_early}»")
+    effective_new_org_type = row_resolved_ot_early if row_resolved_ot_early else default_org_type
+
+    organization, ref_kind, ref_value = lookup.organization_for_import(row, org_raw)
+    if organization is None and create_missing_orgs:
+        inn_for_create = _normalize_inn(row.get("inn")) or (
+            ref_value if ref_kind == "inn" else _normalize_inn(org_raw)
+        )
+        if inn_for_create:
+            region = lookup.region(row.get("region"))
+            short_for_org = _normalize_cell(row.get("short_name"))
+            organization = Organization.objects.create(
+                name=f"Организация {inn_for_create}",
+                short_name=short_for_org,
+                inn=inn_for_create,
+                org_type=effective_new_org_type,
+                region=region,
+            )
+            lookup.remember(organization)
+            org_after = _capture_organization_state(organization)
+            audit.add_field_changes(
+                before=None,
+                after=org_after,
+                fields=_ORGANIZATION_AUDIT_FIELDS,
+                source=source,
+                changed_by=actor,
+                organization=organization,
+            )
+            audit.add_record(
+                organization=organization,
+                action=ImportBatchRecord.Action.CREATED,
+            )
+
+    if organization is None:
+        state.errors.append(f"Строка {line_no}: организация не найдена ({org_raw})")
+        state.skipped += 1
+        return
+
+    if row_resolved_ot_early:
+        organization.org_type = row_resolved_ot_early
+        organization.save(update_fields=["org_type"])
+
+    row_org_tags, unk_org_tags = lookup.tags(row.get("organization_tags"), for_organization=True)
+    for u in unk_org_tags:
+        state.errors.append(f"Строка {line_no}: неизвестный тег организации «{u}»")
+
+    merged_org_tag_ids = set(organization.tags.values_list("id", flat=True))
+    merged_org_tag_ids.update(t.id for t in org_tags)
+    merged_org_tag_ids.update(t.id for t in row_org_tags)
+    if merged_org_tag_ids:
+        organization.tags.set(sorted(merged_org_tag_ids))
+
+    row_contact_tags, unk_contact_tags = lookup.tags(row.get("contact_tags"), for_organization=False)
+    for u in unk_contact_tags:
+        state.errors.append(f"Строка {line_no}: неизвестный тег контакта «{u}»")
+
+    comment = _normalize_cell(row.get("comment"))
+    position = _trim_for_model_field(Contact, "position", row.get("position"))
+    ext_from_col = _trim_for_model_field(Contact, "phone_extension", row.get("phone_extension"))
+    phone_cell = row.get("phone")
+    if ext_from_col:
+        phone = _trim_for_model_field(Contact, "phone", phone_cell)
+        phone_extension = ext_from_col
+    else:
+        phone_main, ext_parsed = _split_phone_extension_from_combined(phone_cell)
+        phone = _trim_for_model_field(Contact, "phone", phone_main)
+        phone_extension = _trim_for_model_field(Contact, "phone_extension", ext_parsed)
+    email = _trim_for_model_field(Contact, "email", row.get("email"))
+    messenger_link = _normalize_cell(row.get("messenger_link"))
+    messenger_type = _normalize_cell(row.get("messenger_type"))
+    messenger_value = ""
+    if messenger_link and messenger_type:
+        messenger_value = f"{messenger_type}: {messenger_link}"
+    elif messenger_link:
+        messenger_value = messenger_link
+    elif messenger_type:
+        messenger_value = messenger_type
+
+    fio = _normalize_cell(row.get("full_name"))
+    last_name, first_name, middle_name = _parse_person_name(fio)
+    department_name = _trim_for_model_field(Contact, "department_name", row.get("department_name"))
+    contact_type = default_contact_type
+    if not fio and department_name:
+        contact_type = Contact.ContactType.DEPARTMENT
+
+    base_qs = Contact.objects.filter(organization=organization)
+    existing = None
+    if not fio and not department_name and organization.id in state.last_contact_by_org:
+        existing = Contact.objects.filter(id=state.last_contact_by_org[organization.id]).first()
+    elif contact_type == Contact.ContactType.DEPARTMENT and department_name:
+        existing = base_qs.filter(
+            type=Contact.ContactType.DEPARTMENT,
+            department_name__iexact=department_name,
+        ).first()
+    elif any([last_name, first_name, middle_name]):
+        existing = base_qs.filter(
+            type=contact_type,
+            last_name__iexact=last_name,
+            first_name__iexact=first_name,
+            middle_name__iexact=middle_name,
+        ).first()
+    elif phone:
+        existing = base_qs.filter(phone=phone).first()
+
+    contact = existing
+    before = _capture_contact_state(existing) if existing else None
+    is_new = existing is None
+    if contact is None:
+        contact = Contact(
+            organization=organization,
+            type=contact_type,
+        )
+
+    if any([last_name, first_name, middle_name]):
+        contact.last_name = _trim_for_model_field(Contact, "last_name", last_name)
+        contact.first_name = _trim_for_model_field(Contact, "first_name", first_name)
+        contact.middle_name = _trim_for_model_field(Contact, "middle_name", middle_name)
+    if department_name:
+        contact.department_name = department_name
+    if position:
+        contact.position = position
+    if comment:
+        contact.comment = comment
+    if phone:
+        contact.phone = phone
+    if phone_extension:
+        contact.phone_extension = phone_extension
+    if email:
+        contact.email = email
+    if messenger_value:
+        contact.messenger = _trim_for_model_field(Contact, "messenger", messenger_value)
+    contact.type = contact_type
+
+    if not any(
+        [
+            contact.last_name,
+            contact.first_name,
+            contact.middle_name,
+            contact.department_name,
+            contact.phone,
+            contact.phone_extension,
+            contact.email,
+            contact.messenger,
+        ]
+    ):
+        state.skipped += 1
+        return
+
+    contact.save()
+
+    merged_contact_tag_objs = list({t.id: t for t in contact_tags + row_contact_tags}.values())
+    if merged_contact_tag_objs:
+        merged_contact_tag_ids = set(contact.tags.values_list("id", flat=True))
+        merged_contact_tag_ids.update(t.id for t in merged_contact_tag_objs)
+        contact.tags.set(sorted(merged_contact_tag_ids))
+
+    after = _capture_contact_state(contact)
+    audit.add_field_changes(
+        before=before,
+        after=after,
+        fields=_CONTACT_AUDIT_FIELDS,
+        source=source,
+        changed_by=actor,
         organization=organization,
         contact=contact,
-        action=action,
-        snapshot=before or {},
     )
+    if is_new:
+        state.created += 1
+        audit.add_record(
+            contact=contact,
+            action=ImportBatchRecord.Action.CREATED,
+        )
+    else:
+        state.updated += 1
+        audit.add_record(
+            contact=contact,
+            action=ImportBatchRecord.Action.UPDATED,
+            before=before,
+        )
+    state.last_contact_by_org[organization.id] = contact.id
 
 
 def _rollback_import_batch(batch: ImportBatch, actor):
     if batch.status == ImportBatch.Status.ROLLED_BACK:
         return {"detail": "Импорт уже откатан."}, status.HTTP_400_BAD_REQUEST
+    if batch.status == ImportBatch.Status.PROCESSING:
+        return (
+            {"detail": "Импорт ещё выполняется — откат станет доступен после его завершения."},
+            status.HTTP_400_BAD_REQUEST,
+        )
 
     records = list(
         batch.records.select_related("organization", "contact").order_by("-id")
@@ -757,16 +1564,6 @@ def _rollback_import_batch(batch: ImportBatch, actor):
     }, status.HTTP_200_OK
 
 
-def _resolve_region(region_name):
-    name = _normalize_cell(region_name)
-    if not name:
-        return None
-    region = Region.objects.filter(name__iexact=name).first()
-    if region:
-        return region
-    return Region.objects.filter(name__icontains=name).order_by("id").first()
-
-
 def _extract_bitrix_contact_id(data):
     if isinstance(data, dict):
         raw = data.get("id")
@@ -870,16 +1667,17 @@ def _mirror_bitrix_contact_to_local(organization_inn, bitrix_response, request_p
     return contact, "ok"
 
 
-class OrganizationViewSet(viewsets.ModelViewSet):
+class OrganizationViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
     serializer_class = OrganizationSerializer
     pagination_class = RegistryPagination
+    keyset_ordering = ("name", "id")
     filterset_fields = ["org_type", "region", "parent_organization", "is_our_side"]
     search_fields = ["name", "short_name", "inn"]
 
     def get_queryset(self):
-        qs = Organization.objects.select_related(
-            "region", "parent_organization"
-        ).prefetch_related("interactions")
+        qs = OrganizationSerializer.setup_queryset(
+            Organization.objects.all(), self.get_field_selection()
+        )
 
         has_history = self.request.query_params.get("has_history")
         if has_history is not None:
@@ -914,22 +1712,6 @@ class OrganizationViewSet(viewsets.ModelViewSet):
         if project_id or role:
             qs = qs.distinct()
 
-        qs = qs.annotate(
-            _has_project_membership=Exists(
-                ProjectOrganizationMembership.objects.filter(
-                    organization=OuterRef("pk")
-                )
-            ),
-            _has_interaction_history=Exists(
-                OrganizationInteraction.objects.filter(
-                    organization=OuterRef("pk")
-                )
-            ),
-            _has_leads=Exists(
-                Lead.objects.filter(organization=OuterRef("pk"))
-            ),
-        )
-
         return qs
 
     def perform_destroy(self, instance):
@@ -987,6 +1769,8 @@ class OrganizationViewSet(viewsets.ModelViewSet):
             return Response({"detail": "Файл не передан"}, status=status.HTTP_400_BAD_REQUEST)
         if not file_obj.name.lower().endswith(".xlsx"):
             return Response({"detail": "Поддерживаются только .xlsx файлы"}, status=status.HTTP_400_BAD_REQUEST)
+        if wants_background(request):
+            return enqueue_import_job(request, ImportJob.Kind.ORGANIZATIONS)
 
         try:
             source = _normalize_change_source(
@@ -1008,7 +1792,7 @@ class OrganizationViewSet(viewsets.ModelViewSet):
             )
 
         try:
-            rows = _xlsx_rows(file_obj, import_kind="organizations")
+            reader = _XlsxImportReader(file_obj, import_kind="organizations")
         except Exception as exc:
             logger.exception("organizations import_xlsx: не удалось разобрать файл")
             return Response(
@@ -1016,184 +1800,46 @@ class OrganizationViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        created = 0
-        updated = 0
-        skipped = 0
-        errors = []
         actor = request.user if request.user.is_authenticated else None
         batch = ImportBatch.objects.create(
             entity_type=ImportBatch.EntityType.ORGANIZATIONS,
             file_name=file_obj.name,
             uploaded_by=actor,
-            total_rows=len(rows),
+            total_rows=reader.expected_rows,
+            status=ImportBatch.Status.PROCESSING,
+            heartbeat_at=timezone.now(),
         )
+        attach_import_batch(request, batch)
+
+        lookup = _ImportLookup()
+        audit = _ImportAuditBuffer(batch)
+        state = _ImportState()
+        process_row = partial(
+            _import_organization_row,
+            lookup=lookup,
+            audit=audit,
+            state=state,
+            source=source,
+            actor=actor,
+            default_org_type=default_org_type,
+            imported_tags=imported_tags,
+            update_existing=update_existing,
+        )
+        with reader, _interrupt_import_batch_on_error(batch):
+            for chunk in reader.chunks():
+                _run_import_chunk(chunk, process_row, lookup, audit, state)
+                state.save_progress(batch, reader)
 
-        for line_no, row in rows:
-            org_raw = _normalize_cell(
-                row.get("organization") or row.get("name") or row.get("inn")
-            )
-            if not org_raw:
-                skipped += 1
-                continue
-
-            try:
-                with transaction.atomic():
-                    inn_from_col = _normalize_inn(row.get("inn"))
-                    found, ref_kind, ref_value = _find_organization_for_import(row, org_raw)
-                    org_name = org_raw if ref_kind == "name" else _trim_for_model_field(
-                        Organization, "name", row.get("organization") or ""
-                    )
-                    if not org_name and ref_kind == "inn":
-                        org_name = f"Организация {ref_value}"
-                    inn = inn_from_col or (ref_value if ref_kind == "inn" else "")
-                    short_name = _trim_for_model_field(Organization, "short_name", row.get("short_name"))
-
-                    row_ot_raw = row.get("org_type")
-                    cell_ot_text = _normalize_cell(row_ot_raw) if row_ot_raw is not None else ""
-                    row_resolved_ot = _resolve_org_type_from_cell(row_ot_raw)
-                    if cell_ot_text and row_resolved_ot is None:
-                        errors.append(
-                            f"Строка {line_no}: неизвестный тип организации «{cell_ot_text}»"
-                        )
-                    effective_org_type = row_resolved_ot if row_resolved_ot else default_org_type
-
-                    row_tag_objs, unk_org_tags = _resolve_tags_by_names(
-                        row.get("organization_tags"), for_organization=True
-                    )
-                    for u in unk_org_tags:
-                        errors.append(f"Строка {line_no}: неизвестный тег «{u}»")
-                    merged_tag_by_id = {t.id: t for t in imported_tags}
-                    for t in row_tag_objs:
-                        merged_tag_by_id[t.id] = t
-                    merged_tag_objs = list(merged_tag_by_id.values())
-
-                    organization = found
-                    before = None
-                    is_new = False
-                    is_branch = effective_org_type == Organization.OrgType.COMPANY_BRANCH
-
-                    parent_for_branch = None
-                    if is_branch:
-                        parent_for_branch, p_ok = _resolve_import_parent_organization(
-                            row, line_no, errors, existing_org=found
-                        )
-                        if not p_ok:
-                            skipped += 1
-                            continue
-
-                    if organization is None:
-                        if is_branch:
-                            org_name_final = (
-                                _trim_for_model_field(
-                                    Organization, "name", row.get("organization") or ""
-                                )
-                                or org_raw
-                            )
-                            if not org_name_final:
-                                skipped += 1
-                                errors.append(
-                                    f"Строка {line_no}: укажите наименование подразделения"
-                                )
-                                continue
-                            organization = Organization(
-                                name=org_name_final,
-                                short_name=short_name or "",
-                                inn=None,
-                                org_type=effective_org_type,
-                                parent_organization=parent_for_branch,
-                            )
-                            is_new = True
-                        elif not inn:
-                            skipped += 1
-                            errors.append(
-                                f"Строка {line_no}: не удалось создать организацию без ИНН ({org_raw}); "
-                                f"для подразделения задайте тип «подразделение»/«company_branch» "
-                                f"и колонку «Головная организация» (ИНН или наименование юрлица)"
-                            )
-                            continue
-                        else:
-                            if not org_name:
-                                org_name = f"Организация {inn}"
-                            organization = Organization(
-                                name=org_name,
-                                short_name=short_name or "",
-                                inn=inn,
-                                org_type=effective_org_type,
-                            )
-                            is_new = True
-                    else:
-                        before = _capture_organization_state(organization)
-                        if not update_existing:
-                            skipped += 1
-                            continue
-
-                    region = _resolve_region(row.get("region"))
-                    description = _normalize_cell(row.get("comment") or row.get("description"))
-
-                    if org_name:
-                        organization.name = org_name
-                    if inn and not is_branch:
-                        organization.inn = inn
-                    if is_branch:
-                        organization.inn = None
-                        organization.parent_organization = parent_for_branch
-                    organization.org_type = effective_org_type
-                    if region:
-                        organization.region = region
-                    if description:
-                        organization.description = description
-                    if short_name:
-                        organization.short_name = short_name
-
-                    organization.save()
-
-                    if merged_tag_objs:
-                        merged_ids = set(organization.tags.values_list("id", flat=True))
-                        merged_ids.update(t.id for t in merged_tag_objs)
-                        organization.tags.set(sorted(merged_ids))
-
-                    after = _capture_organization_state(organization)
-                    _create_field_change_rows(
-                        before=before,
-                        after=after,
-                        fields=_ORGANIZATION_AUDIT_FIELDS,
-                        source=source,
-                        changed_by=actor,
-                        organization=organization,
-                    )
-
-                    if is_new:
-                        created += 1
-                        _track_import_record(
-                            batch,
-                            organization=organization,
-                            action=ImportBatchRecord.Action.CREATED,
-                        )
-                    else:
-                        updated += 1
-                        _track_import_record(
-                            batch,
-                            organization=organization,
-                            action=ImportBatchRecord.Action.UPDATED,
-                            before=before,
-                        )
-            except Exception as exc:
-                skipped += 1
-                errors.append(f"Строка {line_no}: {exc}")
-
-        batch.created_count = created
-        batch.updated_count = updated
-        batch.skipped_count = skipped
-        batch.save(update_fields=["created_count", "updated_count", "skipped_count"])
+        state.save_progress(batch, reader, done=True)
 
         return Response(
             {
                 "batch_id": batch.id,
-                "created": created,
-                "updated": updated,
-                "skipped": skipped,
-                "total_rows": len(rows),
-                "errors": errors[:200],
+                "created": state.created,
+                "updated": state.updated,
+                "skipped": state.skipped,
+                "total_rows": reader.total_rows,
+                "errors": state.errors[:200],
             }
         )
 
@@ -1270,9 +1916,10 @@ class OrganizationInteractionViewSet(viewsets.ModelViewSet):
         serializer.save(**data)
 
 
-class ContactViewSet(viewsets.ModelViewSet):
+class ContactViewSet(SparseFieldsViewMixin, viewsets.ModelViewSet):
     serializer_class = ContactSerializer
     pagination_class = RegistryPagination
+    keyset_ordering = ("-current", "last_name", "first_name", "id")
     filterset_fields = ["organization", "type", "current", "is_manager"]
     search_fields = [
         "first_name",
@@ -1286,7 +1933,7 @@ class ContactViewSet(viewsets.ModelViewSet):
     ]
 
     def get_queryset(self):
-        qs = Contact.objects.select_related("organization").prefetch_related("tags")
+        qs = ContactSerializer.setup_queryset(Contact.objects.all(), self.get_field_selection())
         org_name = self.request.query_params.get("organization_name")
         if org_name:
             qs = qs.filter(organization__name__icontains=org_name)
@@ -1297,22 +1944,6 @@ class ContactViewSet(viewsets.ModelViewSet):
             if ids:
                 qs = qs.filter(tags__id__in=ids).distinct()
 
-        qs = qs.annotate(
-            _org_has_project_membership=Exists(
-                ProjectOrganizationMembership.objects.filter(
-                    organization=OuterRef("organization_id")
-                )
-            ),
-            _has_interaction_history=Exists(
-                LeadInteraction.objects.filter(contact=OuterRef("pk"))
-            ),
-            _has_lead_links=Exists(
-                Lead.objects.filter(primary_contact=OuterRef("pk"))
-            ) | Exists(
-                LeadChecklistValue.objects.filter(contact=OuterRef("pk"))
-            ),
-        )
-
         return qs
 
     def perform_destroy(self, instance):
@@ -1372,6 +2003,8 @@ class ContactViewSet(viewsets.ModelViewSet):
             return Response({"detail": "Файл не передан"}, status=status.HTTP_400_BAD_REQUEST)
         if not file_obj.name.lower().endswith(".xlsx"):
             return Response({"detail": "Поддерживаются только .xlsx файлы"}, status=status.HTTP_400_BAD_REQUEST)
+        if wants_background(request):
+            return enqueue_import_job(request, ImportJob.Kind.CONTACTS)
 
         source = _normalize_change_source(
             _form_data_scalar(request.data, "source") or EntityFieldChange.Source.BULK
@@ -1394,7 +2027,7 @@ class ContactViewSet(viewsets.ModelViewSet):
         contact_tags = list(OrganizationTag.objects.filter(id__in=contact_tag_ids))
 
         try:
-            rows = _xlsx_rows(file_obj, import_kind="contacts")
+            reader = _XlsxImportReader(file_obj, import_kind="contacts")
         except Exception as exc:
             logger.exception("contacts import_xlsx: не удалось разобрать файл")
             return Response(
@@ -1407,254 +2040,43 @@ class ContactViewSet(viewsets.ModelViewSet):
             entity_type=ImportBatch.EntityType.CONTACTS,
             file_name=file_obj.name,
             uploaded_by=actor,
-            total_rows=len(rows),
-        )
-
-        created = 0
-        updated = 0
-        skipped = 0
-        errors = []
-        last_org_ref = ""
-        last_contact_by_org = {}
-
-        for line_no, row in rows:
-            org_raw = _normalize_cell(row.get("organization"))
-            if not org_raw:
-                org_raw = last_org_ref
-            if not org_raw:
-                skipped += 1
-                continue
-            last_org_ref = org_raw
-
-            try:
-                with transaction.atomic():
-                    row_ot_raw_early = row.get("org_type")
-                    cell_ot_early = (
-                        _normalize_cell(row_ot_raw_early) if row_ot_raw_early is not None else ""
-                    )
-                    row_resolved_ot_early = _resolve_org_type_from_cell(row_ot_raw_early)
-                    if cell_ot_early and row_resolved_ot_early is None:
-                        errors.append(
-                            f"Строка {line_no}: неизвестный тип организации «{cell_ot_early}»"
-                        )
-                    effective_new_org_type = (
-                        row_resolved_ot_early if row_resolved_ot_early else default_org_type
-                    )
-
-                    organization, ref_kind, ref_value = _find_organization_for_import(row, org_raw)
-                    if organization is None and create_missing_orgs:
-                        inn_for_create = _normalize_inn(row.get("inn")) or (
-                            ref_value if ref_kind == "inn" else _normalize_inn(org_raw)
-                        )
-                        if inn_for_create:
-                            region = _resolve_region(row.get("region"))
-                            short_for_org = _normalize_cell(row.get("short_name"))
-                            organization = Organization.objects.create(
-                                name=f"Организация {inn_for_create}",
-                                short_name=short_for_org,
-                                inn=inn_for_create,
-                                org_type=effective_new_org_type,
-                                region=region,
-                            )
-                            org_after = _capture_organization_state(organization)
-                            _create_field_change_rows(
-                                before=None,
-                                after=org_after,
-                                fields=_ORGANIZATION_AUDIT_FIELDS,
-                                source=source,
-                                changed_by=actor,
-                                organization=organization,
-                            )
-                            _track_import_record(
-                                batch,
-                                organization=organization,
-                                action=ImportBatchRecord.Action.CREATED,
-                            )
-
-                    if organization is None:
-                        errors.append(f"Строка {line_no}: организация не найдена ({org_raw})")
-                        skipped += 1
-                        continue
-
-                    if row_resolved_ot_early:
-                        organization.org_type = row_resolved_ot_early
-                        organization.save(update_fields=["org_type"])
-
-                    row_org_tags, unk_org_tags = _resolve_tags_by_names(
-                        row.get("organization_tags"), for_organization=True
-                    )
-                    for u in unk_org_tags:
-                        errors.append(
-                            f"Строка {line_no}: неизвестный тег организации «{u}»"
-                        )
-
-                    merged_org_tag_ids = set(organization.tags.values_list("id", flat=True))
-                    merged_org_tag_ids.update(t.id for t in org_tags)
-                    merged_org_tag_ids.update(t.id for t in row_org_tags)
-                    if merged_org_tag_ids:
-                        organization.tags.set(sorted(merged_org_tag_ids))
-
-                    row_contact_tags, unk_contact_tags = _resolve_tags_by_names(
-                        row.get("contact_tags"), for_organization=False
-                    )
-                    for u in unk_contact_tags:
-                        errors.append(f"Строка {line_no}: неизвестный тег контакта «{u}»")
-
-                    comment = _normalize_cell(row.get("comment"))
-                    position = _trim_for_model_field(Contact, "position", row.get("position"))
-                    ext_from_col = _trim_for_model_field(
-                        Contact, "phone_extension", row.get("phone_extension")
-                    )
-                    phone_cell = row.get("phone")
-                    if ext_from_col:
-                        phone = _trim_for_model_field(Contact, "phone", phone_cell)
-                        phone_extension = ext_from_col
-                    else:
-                        phone_main, ext_parsed = _split_phone_extension_from_combined(phone_cell)
-                        phone = _trim_for_model_field(Contact, "phone", phone_main)
-                        phone_extension = _trim_for_model_field(
-                            Contact, "phone_extension", ext_parsed
-                        )
-                    email = _trim_for_model_field(Contact, "email", row.get("email"))
-                    messenger_link = _normalize_cell(row.get("messenger_link"))
-                    messenger_type = _normalize_cell(row.get("messenger_type"))
-                    messenger_value = ""
-                    if messenger_link and messenger_type:
-                        messenger_value = f"{messenger_type}: {messenger_link}"
-                    elif messenger_link:
-                        messenger_value = messenger_link
-                    elif messenger_type:
-                        messenger_value = messenger_type
-
-                    fio = _normalize_cell(row.get("full_name"))
-                    last_name, first_name, middle_name = _parse_person_name(fio)
-                    department_name = _trim_for_model_field(
-                        Contact, "department_name", row.get("department_name")
-                    )
-                    contact_type = default_contact_type
-                    if not fio and department_name:
-                        contact_type = Contact.ContactType.DEPARTMENT
-
-                    base_qs = Contact.objects.filter(organization=organization)
-                    existing = None
-                    if not fio and not department_name and organization.id in last_contact_by_org:
-                        existing = Contact.objects.filter(
-                            id=last_contact_by_org[organization.id]
-                        ).first()
-                    elif contact_type == Contact.ContactType.DEPARTMENT and department_name:
-                        existing = base_qs.filter(
-                            type=Contact.ContactType.DEPARTMENT,
-                            department_name__iexact=department_name,
-                        ).first()
-                    elif any([last_name, first_name, middle_name]):
-                        existing = base_qs.filter(
-                            type=contact_type,
-                            last_name__iexact=last_name,
-                            first_name__iexact=first_name,
-                            middle_name__iexact=middle_name,
-                        ).first()
-                    elif phone:
-                        existing = base_qs.filter(phone=phone).first()
-
-                    contact = existing
-                    before = _capture_contact_state(existing) if existing else None
-                    is_new = existing is None
-                    if contact is None:
-                        contact = Contact(
-                            organization=organization,
-                            type=contact_type,
-                        )
-
-                    if any([last_name, first_name, middle_name]):
-                        contact.last_name = _trim_for_model_field(Contact, "last_name", last_name)
-                        contact.first_name = _trim_for_model_field(Contact, "first_name", first_name)
-                        contact.middle_name = _trim_for_model_field(Contact, "middle_name", middle_name)
-                    if department_name:
-                        contact.department_name = department_name
-                    if position:
-                        contact.position = position
-                    if comment:
-                        contact.comment = comment
-                    if phone:
-                        contact.phone = phone
-                    if phone_extension:
-                        contact.phone_extension = phone_extension
-                    if email:
-                        contact.email = email
-                    if messenger_value:
-                        contact.messenger = _trim_for_model_field(Contact, "messenger", messenger_value)
-                    contact.type = contact_type
-
-                    if not any(
-                        [
-                            contact.last_name,
-                            contact.first_name,
-                            contact.middle_name,
-                            contact.department_name,
-                            contact.phone,
-                            contact.phone_extension,
-                            contact.email,
-                            contact.messenger,
-                        ]
-                    ):
-                        skipped += 1
-                        continue
-
-                    contact.save()
-
-                    merged_contact_tag_objs = list(
-                        {t.id: t for t in contact_tags + row_contact_tags}.values()
-                    )
-                    if merged_contact_tag_objs:
-                        merged_contact_tag_ids = set(
-                            contact.tags.values_list("id", flat=True)
-                        )
-                        merged_contact_tag_ids.update(t.id for t in merged_contact_tag_objs)
-                        contact.tags.set(sorted(merged_contact_tag_ids))
-
-                    after = _capture_contact_state(contact)
-                    _create_field_change_rows(
-                        before=before,
-                        after=after,
-                        fields=_CONTACT_AUDIT_FIELDS,
-                        source=source,
-                        changed_by=actor,
-                        organization=organization,
-                        contact=contact,
-                    )
-                    if is_new:
-                        created += 1
-                        _track_import_record(
-                            batch,
-                            contact=contact,
-                            action=ImportBatchRecord.Action.CREATED,
-                        )
-                    else:
-                        updated += 1
-                        _track_import_record(
-                            batch,
-                            contact=contact,
-                            action=ImportBatchRecord.Action.UPDATED,
-                            before=before,
-                        )
-                    last_contact_by_org[organization.id] = contact.id
-            except Exception as exc:
-                skipped += 1
-                errors.append(f"Строка {line_no}: {exc}")
+            total_rows=reader.expected_rows,
+            status=ImportBatch.Status.PROCESSING,
+            heartbeat_at=timezone.now(),
+        )
+        attach_import_batch(request, batch)
+
+        lookup = _ImportLookup()
+        audit = _ImportAuditBuffer(batch)
+        state = _ContactImportState()
+        process_row = partial(
+            _import_contact_row,
+            lookup=lookup,
+            audit=audit,
+            state=state,
+            source=source,
+            actor=actor,
+            default_org_type=default_org_type,
+            default_contact_type=default_contact_type,
+            create_missing_orgs=create_missing_orgs,
+            org_tags=org_tags,
+            contact_tags=contact_tags,
+        )
+        with reader, _interrupt_import_batch_on_error(batch):
+            for chunk in reader.chunks():
+                _run_import_chunk(chunk, process_row, lookup, audit, state)
+                state.save_progress(batch, reader)
 
-        batch.created_count = created
-        batch.updated_count = updated
-        batch.skipped_count = skipped
-        batch.save(update_fields=["created_count", "updated_count", "skipped_count"])
+        state.save_progress(batch, reader, done=True)
 
         return Response(
             {
                 "batch_id": batch.id,
-                "created": created,
-                "updated": updated,
-                "skipped": skipped,
-                "total_rows": len(rows),
-                "errors": errors[:200],
+                "created": state.created,
+                "updated": state.updated,
+                "skipped": state.skipped,
+                "total_rows": reader.total_rows,
+                "errors": state.errors[:200],
             }
         )
 
@@ -1724,6 +2146,20 @@ class ImportBatchViewSet(viewsets.ReadOnlyModelViewSet):
         return Response(payload, status=code)
 
 
+class ImportJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """Состояние фоновых импортов (опрос по job_id): статус, прогресс пакета, результат."""
+
+    serializer_class = ImportJobSerializer
+    pagination_class = RegistryPagination
+    filterset_fields = ["kind", "status"]
+
+    def get_queryset(self):
+        qs = ImportJob.objects.select_related("created_by", "batch").order_by("-created_at", "-id")
+        if not getattr(self.request.user, "is_admin_role", False):
+            qs = qs.filter(created_by=self.request.user)
+        return qs
+
+
 class OrganizationTagViewSet(viewsets.ModelViewSet):
     serializer_class = OrganizationTagSerializer
     permission_classes = [IsAuthenticated]
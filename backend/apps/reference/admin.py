@@ -2,7 +2,7 @@ from django.contrib import admin, messages
 from .models import (
     FederalDistrict, Region, Profession, ProfessionDemandStatus,
     ProfessionDemandStatusHistory, ProfessionApprovalStatus, Program, FederalOperator, Contract,
-    ContractProgram, Quota, DemandImport, DemandImportSnapshot,
+    ContractProgram, Quota, DemandImport, DemandImportSnapshot, ProductionCalendar,
 )
 
 
@@ -231,3 +231,11 @@ class DemandImportAdmin(admin.ModelAdmin):
 class QuotaAdmin(admin.ModelAdmin):
     list_display = ["federal_operator", "program", "region", "year", "total", "used"]
     list_filter = ["year", "federal_operator"]
+
+
+@admin.register(ProductionCalendar)
+class ProductionCalendarAdmin(admin.ModelAdmin):
+    list_display = ["date", "day_type", "note"]
+    list_filter = ["day_type"]
+    search_fields = ["note"]
+    date_hierarchy = "date"
@@ -0,0 +1,257 @@
+"""
+Производственный календарь: арифметика рабочих дней с учётом праздников РФ и переносов.
+
+Для диапазона лет строится массив накопленного числа рабочих дней и список рабочих дат,
+поэтому add/diff/between считаются за O(1) — два обращения к массивам, без перебора дней.
+Пакетные варианты (*_many) строят диапазон один раз и считают список дат за один проход.
+
+Базовое правило — пн–пт без нерабочих праздников ст. 112 ТК РФ. Для лет, загруженных
+в ProductionCalendar (команда load_production_calendar), переносы берутся из БД: нерабочие
+дни и рабочие выходные оттуда применяются поверх базового правила. Для остальных лет
+праздник, совпавший с выходным (кроме январских), переносится на следующий рабочий день.
+"""
+
+import threading
+import time
+from array import array
+from calendar import isleap
+from datetime import date, timedelta
+
+from django.db.utils import OperationalError, ProgrammingError
+from django.dispatch import Signal
+
+# Нерабочие праздничные дни, ст. 112 ТК РФ: (месяц, день)
+STATUTORY_HOLIDAYS = (
+    (1, 1), (1, 2), (1, 3), (1, 4), (1, 5), (1, 6), (1, 7), (1, 8),
+    (2, 23), (3, 8), (5, 1), (5, 9), (6, 12), (11, 4),
+)
+
+# Через сколько секунд процесс перечитывает исключения из БД (загрузка календаря
+# в другом процессе — воркере, команде — подхватится без перезапуска)
+CACHE_TTL_SECONDS = 300
+
+# Отправляется после изменения производственного календаря (зависимые расчёты дат пересобираются)
+calendar_changed = Signal()
+
+# Запас лет при расширении диапазона вперёд/назад
+_YEAR_PADDING = 1
+
+
+class BusinessCalendar:
+    """Рабочие дни по правилам пн–пт, праздникам и исключениям производственного календаря."""
+
+    def __init__(self, holidays=(), working_days=()):
+        self._holidays = frozenset(holidays)
+        self._working_days = frozenset(working_days)
+        self._loaded_years = frozenset(d.year for d in self._holidays | self._working_days)
+        self._lock = threading.Lock()
+        # (первый год, последний год, ординал 1 января первого года,
+        #  накопленное число рабочих дней по дням диапазона, ординалы рабочих дней)
+        self._state = None
+
+    def _year_flags(self, year):
+        start = date(year, 1, 1)
+        flags = [
+            (start + timedelta(days=i)).weekday() < 5
+            for i in range(366 if isleap(year) else 365)
+        ]
+        holiday_idx = {date(year, m, d).timetuple().tm_yday - 1 for m, d in STATUTORY_HOLIDAYS}
+        if year in self._loaded_years:
+            # Переносы на год заданы постановлением — берём их из загруженного календаря
+            for idx in holiday_idx:
+                flags[idx] = False
+            for d in self._holidays:
+                if d.year == year:
+                    flags[d.timetuple().tm_yday - 1] = False
+            for d in self._working_days:
+                if d.year == year:
+                    flags[d.timetuple().tm_yday - 1] = True
+            return flags
+
+        for idx in sorted(holiday_idx):
+            was_working = flags[idx]
+            flags[idx] = False
+            # Январские праздники (1–8 января) по ТК не переносятся
+            if was_working or idx < 8:
+                continue
+            # Праздник пришёлся на выходной — выходной переносится на следующий рабочий день
+            nxt = idx + 1
+            while nxt < len(flags) and not flags[nxt]:
+                nxt += 1
+            if nxt < len(flags):
+                flags[nxt] = False
+        return flags
+
+    def _build(self, first_year, last_year):
+        base = date(first_year, 1, 1).toordinal()
+        cumulative = array("l")
+        working = array("l")
+        total = 0
+        for year in range(first_year, last_year + 1):
+            ordinal = date(year, 1, 1).toordinal()
+            for offset, is_working in enumerate(self._year_flags(year)):
+                if is_working:
+                    total += 1
+                    working.append(ordinal + offset)
+                cumulative.append(total)
+        return (first_year, last_year, base, cumulative, working)
+
+    def _covering(self, first_year, last_year):
+        state = self._state
+        if state is not None and state[0] <= first_year and last_year <= state[1]:
+            return state
+        with self._lock:
+            state = self._state
+            if state is not None:
+                first_year = min(first_year, state[0])
+                last_year = max(last_year, state[1])
+            state = self._build(first_year - _YEAR_PADDING, last_year + _YEAR_PADDING)
+            self._state = state
+        return state
+
+    @staticmethod
+    def _count_through(state, ordinal):
+        """Число рабочих дней в диапазоне от начала массива до ordinal включительно."""
+        return state[3][ordinal - state[2]]
+
+    def _is_working(self, state, ordinal):
+        idx = ordinal - state[2]
+        return state[3][idx] - (state[3][idx - 1] if idx else 0) == 1
+
+    def is_working_day(self, day):
+        state = self._covering(day.year, day.year)
+        return self._is_working(state, day.toordinal())
+
+    def _add(self, state, start, days):
+        ordinal = start.toordinal()
+        if days > 0:
+            idx = self._count_through(state, ordinal) + days - 1
+            while idx >= len(state[4]):
+                state = self._covering(state[0], state[1] + 1 + days // 240)
+                idx = self._count_through(state, ordinal) + days - 1
+        else:
+            before = self._count_through(state, ordinal) - self._is_working(state, ordinal)
+            idx = before + days
+            while idx < 0:
+                state = self._covering(state[0] - 1 - (-days) // 240, state[1])
+                before = self._count_through(state, ordinal) - self._is_working(state, ordinal)
+                idx = before + days
+        return date.fromordinal(state[4][idx]), state
+
+    def add(self, start, days):
+        """Дата через days рабочих дней после start (days < 0 — назад; 0 — сама start)."""
+        if not days:
+            return start
+        result, _ = self._add(self._covering(start.year, start.year), start, days)
+        return result
+
+    def diff(self, start, end):
+        """Число рабочих дней в интервале (start, end]; отрицательное, если end раньше start."""
+        state = self._covering(min(start, end).year, max(start, end).year)
+        return self._count_through(state, end.toordinal()) - self._count_through(state, start.toordinal())
+
+    def between(self, start, end):
+        """Число рабочих дней в отрезке [start, end] (0, если end раньше start)."""
+        if end < start:
+            return 0
+        state = self._covering(start.year, end.year)
+        s = start.toordinal()
+        return (
+            self._count_through(state, end.toordinal())
+            - self._count_through(state, s)
+            + self._is_working(state, s)
+        )
+
+    def add_many(self, starts, days):
+        """add() для списка дат; days — число или последовательность той же длины."""
+        starts = list(starts)
+        if not starts:
+            return []
+        day_list = list(days) if isinstance(days, (list, tuple)) else [days] * len(starts)
+        present = [s for s in starts if s is not None]
+        if not present:
+            return [None] * len(starts)
+        state = self._covering(min(present).year, max(present).year)
+        result = []
+        for start, n in zip(starts, day_list):
+            if start is None or not n:
+                result.append(start)
+                continue
+            value, state = self._add(state, start, n)
+            result.append(value)
+        return result
+
+    def diff_many(self, starts, ends):
+        """diff() попарно для двух списков дат."""
+        pairs = list(zip(starts, ends))
+        if not pairs:
+            return []
+        state = self._covering(
+            min(min(s, e) for s, e in pairs).year,
+            max(max(s, e) for s, e in pairs).year,
+        )
+        return [
+            self._count_through(state, e.toordinal()) - self._count_through(state, s.toordinal())
+            for s, e in pairs
+        ]
+
+
+_cache_lock = threading.Lock()
+_cached_calendar = None
+_cached_at = 0.0
+
+
+def _load_calendar():
+    from .models import ProductionCalendar
+
+    holidays, working_days = [], []
+    try:
+        rows = list(ProductionCalendar.objects.values_list("date", "day_type"))
+    except (OperationalError, ProgrammingError):
+        # Таблица ещё не создана — считаем по правилам ТК РФ
+        rows = []
+    for day, day_type in rows:
+        if day_type == ProductionCalendar.DayType.WORKING:
+            working_days.append(day)
+        else:
+            holidays.append(day)
+    return BusinessCalendar(holidays=holidays, working_days=working_days)
+
+
+def get_calendar():
+    """Календарь процесса; исключения из БД перечитываются раз в CACHE_TTL_SECONDS."""
+    global _cached_calendar, _cached_at
+    calendar = _cached_calendar
+    if calendar is not None and time.monotonic() - _cached_at < CACHE_TTL_SECONDS:
+        return calendar
+    with _cache_lock:
+        if _cached_calendar is None or time.monotonic() - _cached_at >= CACHE_TTL_SECONDS:
+            _cached_calendar = _load_calendar()
+            _cached_at = time.monotonic()
+        return _cached_calendar
+
+
+def reset_calendar_cache():
+    global _cached_calendar
+    with _cache_lock:
+        _cached_calendar = None
+
+
+def add_business_days(start, days):
+    return get_calendar().add(start, days)
+
+
+def add_business_days_many(starts, days):
+    return get_calendar().add_many(starts, days)
+
+
+def business_days_diff(start, end):
+    return get_calendar().diff(start, end)
+
+
+def business_days_between(start, end):
+    return get_calendar().between(start, end)
+
+
+def is_business_day(day):
+    return get_calendar().is_working_day(day)
@@ -0,0 +1,96 @@
+"""
+Загрузка производственного календаря РФ из CSV.
+
+  python manage.py load_production_calendar --file calendar_2026.csv
+
+Формат: одна строка на день-исключение, разделитель «;» или «,»:
+  дата;тип[;примечание]
+  2026-01-09;holiday;Перенос с 3 января
+  2026-12-31;holiday
+  2027-02-20;working;Перенос выходного
+
+Дата — ГГГГ-ММ-ДД или ДД.ММ.ГГГГ. Тип: holiday / нерабочий / 0 — нерабочий день,
+working / рабочий / 1 — рабочий (перенесённый) выходной. Строки с «#» и заголовок пропускаются.
+
+Праздники ст. 112 ТК РФ учитываются и без файла; в файле достаточно переносов года
+(нерабочие будни и рабочие выходные по постановлению). Для каждого года из файла старые
+записи удаляются, для лет без файла переносы считаются по правилам ТК РФ.
+"""
+
+import csv
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from apps.reference.business_calendar import calendar_changed, reset_calendar_cache
+from apps.reference.models import ProductionCalendar
+
+_HOLIDAY_TOKENS = {"holiday", "нерабочий", "выходной", "праздник", "0"}
+_WORKING_TOKENS = {"working", "рабочий", "1"}
+
+
+def _parse_date(raw):
+    raw = (raw or "").strip()
+    for fmt in ("%Y-%m-%d", "%d.%m.%Y"):
+        try:
+            return datetime.strptime(raw, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+class Command(BaseCommand):
+    help = "Загрузить производственный календарь (нерабочие дни и переносы) из CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--file",
+            type=str,
+            required=True,
+            help="Путь к CSV: дата;тип[;примечание]",
+        )
+
+    def handle(self, *args, **options):
+        filepath = options["file"]
+        with open(filepath, "r", encoding="utf-8-sig") as f:
+            sample = f.read(2048)
+            f.seek(0)
+            delimiter = ";" if sample.count(";") >= sample.count(",") else ","
+            rows = list(csv.reader(f, delimiter=delimiter))
+
+        days = {}
+        for line_no, row in enumerate(rows, start=1):
+            if not row or not row[0].strip() or row[0].strip().startswith("#"):
+                continue
+            day = _parse_date(row[0])
+            if day is None:
+                if line_no == 1:
+                    continue  # заголовок
+                raise CommandError(f"Строка {line_no}: не удалось разобрать дату «{row[0]}»")
+            token = (row[1] if len(row) > 1 else "").strip().lower()
+            if token in _HOLIDAY_TOKENS:
+                day_type = ProductionCalendar.DayType.HOLIDAY
+            elif token in _WORKING_TOKENS:
+                day_type = ProductionCalendar.DayType.WORKING
+            else:
+                raise CommandError(f"Строка {line_no}: неизвестный тип дня «{token}»")
+            note = row[2].strip() if len(row) > 2 else ""
+            days[day] = ProductionCalendar(date=day, day_type=day_type, note=note[:300])
+
+        if not days:
+            self.stdout.write(self.style.WARNING("В файле нет дней — календарь не изменён."))
+            return
+
+        years = sorted({d.year for d in days})
+        with transaction.atomic():
+            ProductionCalendar.objects.filter(date__year__in=years).delete()
+            ProductionCalendar.objects.bulk_create(sorted(days.values(), key=lambda r: r.date))
+            reset_calendar_cache()
+            calendar_changed.send(sender=ProductionCalendar)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Загружено дней: {len(days)} (годы: {', '.join(str(y) for y in years)})"
+            )
+        )
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.15 on 2026-10-17 02:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reference', '0009_federal_operator_to_organization_fk'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductionCalendar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True, verbose_name='Дата')),
+                ('day_type', models.CharField(choices=[('holiday', 'Нерабочий день'), ('working', 'Рабочий день')], max_length=10, verbose_name='Тип дня')),
+                ('note', models.CharField(blank=True, max_length=300, verbose_name='Примечание')),
+            ],
+            options={
+                'verbose_name': 'День производственного календаря',
+                'verbose_name_plural': 'Производственный календарь',
+                'ordering': ['date'],
+            },
+        ),
+    ]
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 
 
 class FederalDistrict(models.Model):
@@ -415,3 +417,36 @@ class Quota(models.Model):
     @property
     def available(self):
         return self.total - self.used
+
+
+class ProductionCalendar(models.Model):
+    """
+    Исключения производственного календаря РФ на год: перенесённые нерабочие дни
+    и рабочие выходные. Остальные дни — пн–пт без праздников ст. 112 ТК РФ.
+    Загружается командой load_production_calendar; расчёт — apps.reference.business_calendar.
+    """
+
+    class DayType(models.TextChoices):
+        HOLIDAY = "holiday", "Нерабочий день"
+        WORKING = "working", "Рабочий день"
+
+    date = models.DateField(unique=True, verbose_name="Дата")
+    day_type = models.CharField(
+        max_length=10, choices=DayType.choices, verbose_name="Тип дня"
+    )
+    note = models.CharField(max_length=300, blank=True, verbose_name="Примечание")
+
+    class Meta:
+        verbose_name = "День производственного календаря"
+        verbose_name_plural = "Производственный календарь"
+        ordering = ["date"]
+
+    def __str__(self):
+        return f"{self.date:%d.%m.%Y} — {self.get_day_type_display()}"
+
+
+@receiver([post_save, post_delete], sender=ProductionCalendar)
+def reset_business_calendar_cache(sender, **kwargs):
+    from apps.reference.business_calendar import calendar_changed, reset_calendar_cache
+    reset_calendar_cache()
+    calendar_changed.send(sender=sender)
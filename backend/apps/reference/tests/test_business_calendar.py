@@ -0,0 +1,142 @@
+import random
+from datetime import date, timedelta
+
+from django.test import SimpleTestCase
+
+from apps.reference.business_calendar import BusinessCalendar
+
+ONE_DAY = timedelta(days=1)
+
+
+class NaiveCalendar:
+    """Эталон: перебор дней по одному с признаком рабочего дня из правил года (_year_flags)."""
+
+    def __init__(self, calendar):
+        self._calendar = calendar
+        self._flags = {}
+
+    def is_working(self, day):
+        if day.year not in self._flags:
+            self._flags[day.year] = self._calendar._year_flags(day.year)
+        return self._flags[day.year][day.timetuple().tm_yday - 1]
+
+    def add(self, start, days):
+        step = ONE_DAY if days > 0 else -ONE_DAY
+        day, left = start, abs(days)
+        while left:
+            day += step
+            left -= self.is_working(day)
+        return day
+
+    def diff(self, start, end):
+        sign = 1 if end >= start else -1
+        low, high = min(start, end), max(start, end)
+        count = 0
+        day = low + ONE_DAY
+        while day <= high:
+            count += self.is_working(day)
+            day += ONE_DAY
+        return sign * count
+
+    def between(self, start, end):
+        count = 0
+        day = start
+        while day <= end:
+            count += self.is_working(day)
+            day += ONE_DAY
+        return count
+
+
+class BusinessCalendarTests(SimpleTestCase):
+    def calendars(self):
+        """Календарь по правилам ТК и календарь с загруженными переносами на 2025 год."""
+        return {
+            "правила ТК": BusinessCalendar(),
+            "загруженный 2025": BusinessCalendar(
+                holidays=[date(2025, 5, 2), date(2025, 5, 8), date(2025, 12, 31)],
+                working_days=[date(2025, 11, 1)],
+            ),
+        }
+
+    def sample_dates(self, rng, count=150):
+        first = date(2023, 1, 1).toordinal()
+        last = date(2028, 12, 31).toordinal()
+        # Случайные даты и все «неудобные» — праздники, выходные, границы лет
+        dates = [date.fromordinal(rng.randint(first, last)) for _ in range(count)]
+        dates += [date(2025, 1, 1), date(2025, 1, 8), date(2025, 1, 9), date(2024, 12, 31), date(2026, 3, 8)]
+        dates += [date(2025, 5, 2), date(2025, 11, 1), date(2025, 11, 2), date(2025, 12, 31), date(2024, 2, 29)]
+        return dates
+
+    def test_rules_without_loaded_calendar(self):
+        calendar = BusinessCalendar()
+        self.assertFalse(calendar.is_working_day(date(2026, 1, 8)))
+        self.assertFalse(calendar.is_working_day(date(2026, 2, 23)))
+        # 8 марта 2026 — воскресенье: выходной переносится на понедельник 9 марта
+        self.assertFalse(calendar.is_working_day(date(2026, 3, 9)))
+        self.assertTrue(calendar.is_working_day(date(2026, 3, 10)))
+        # 4 января 2026 — воскресенье, но январские праздники не переносятся: 9 января рабочий
+        self.assertTrue(calendar.is_working_day(date(2026, 1, 9)))
+
+    def test_loaded_year_uses_exceptions(self):
+        calendar = self.calendars()["загруженный 2025"]
+        self.assertTrue(calendar.is_working_day(date(2025, 11, 1)))
+        self.assertFalse(calendar.is_working_day(date(2025, 5, 2)))
+        self.assertFalse(calendar.is_working_day(date(2025, 5, 1)))
+        self.assertTrue(calendar.is_working_day(date(2025, 11, 5)))
+
+    def test_add_matches_day_loop(self):
+        rng = random.Random(20261017)
+        for name, calendar in self.calendars().items():
+            naive = NaiveCalendar(calendar)
+            for start in self.sample_dates(rng):
+                for days in (0, 1, -1, 2, -3, 5, -7, rng.randint(-60, 60), rng.choice((-400, 400))):
+                    with self.subTest(calendar=name, start=start, days=days):
+                        expected = start if not days else naive.add(start, days)
+                        self.assertEqual(calendar.add(start, days), expected)
+
+    def test_diff_and_between_match_day_loop(self):
+        rng = random.Random(1017)
+        for name, calendar in self.calendars().items():
+            naive = NaiveCalendar(calendar)
+            for start in self.sample_dates(rng):
+                for delta in (0, 1, -1, 6, -6, rng.randint(-500, 500)):
+                    end = start + timedelta(days=delta)
+                    with self.subTest(calendar=name, start=start, end=end):
+                        self.assertEqual(calendar.diff(start, end), naive.diff(start, end))
+                        self.assertEqual(calendar.between(start, end), naive.between(start, end))
+
+    def test_batch_variants_match_single_calls(self):
+        rng = random.Random(7)
+        for name, calendar in self.calendars().items():
+            naive = NaiveCalendar(calendar)
+            starts = self.sample_dates(rng, count=60)
+            starts[3:3] = [None, None]
+            days = [rng.randint(-90, 90) for _ in starts]
+            with self.subTest(calendar=name, mode="add_many"):
+                self.assertEqual(
+                    calendar.add_many(starts, days),
+                    [None if s is None else (naive.add(s, n) if n else s) for s, n in zip(starts, days)],
+                )
+                self.assertEqual(
+                    calendar.add_many(starts, 10),
+                    [None if s is None else naive.add(s, 10) for s in starts],
+                )
+            present = [s for s in starts if s is not None]
+            ends = [s + timedelta(days=rng.randint(-200, 200)) for s in present]
+            with self.subTest(calendar=name, mode="diff_many"):
+                self.assertEqual(
+                    calendar.diff_many(present, ends), [naive.diff(s, e) for s, e in zip(present, ends)]
+                )
+        calendar = BusinessCalendar()
+        self.assertEqual(calendar.add_many([], 5), [])
+        self.assertEqual(calendar.add_many([None], 5), [None])
+        self.assertEqual(calendar.diff_many([], []), [])
+
+    def test_range_grows_far_beyond_built_years(self):
+        calendar = BusinessCalendar()
+        naive = NaiveCalendar(calendar)
+        start = date(2026, 6, 15)
+        self.assertEqual(calendar.add(start, 3000), naive.add(start, 3000))
+        self.assertEqual(calendar.add(start, -3000), naive.add(start, -3000))
+        far = (date(2010, 1, 1), date(2040, 1, 1))
+        self.assertEqual(calendar.diff(*far), naive.diff(*far))
@@ -20,7 +20,8 @@ from .models import (
     ProfessionApprovalStatus, Program, Contract,
     ContractProgram, Quota, DemandImport, DemandImportSnapshot,
 )
-from apps.organizations.models import Organization, ProjectOrganizationMembershipRole
+from apps.organizations.import_jobs import enqueue_import_job, wants_background
+from apps.organizations.models import ImportJob, Organization, ProjectOrganizationMembershipRole
 
 from .serializers import (
     FederalDistrictSerializer, FederalDistrictWithRegionsSerializer,
@@ -1419,6 +1420,8 @@ class DemandMatrixImportApplyView(DemandMatrixImportView):
                 {"detail": "File is required."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
+        if wants_background(request):
+            return enqueue_import_job(request, ImportJob.Kind.DEMAND_MATRIX)
 
         raw = upload.read()
         try:
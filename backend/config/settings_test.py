@@ -0,0 +1,28 @@
+"""
+Настройки для тестов: python manage.py test --settings=config.settings_test
+
+История миграций рассчитана на уже существующие базы (часть ранних миграций funnels
+отсутствует), поэтому схема тестовой БД строится прямо по моделям, без миграций.
+"""
+
+from .settings import *  # noqa: F401,F403
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": ":memory:",
+    }
+}
+
+
+class _DisableMigrations(dict):
+    def __contains__(self, item):
+        return True
+
+    def __getitem__(self, item):
+        return None
+
+
+MIGRATION_MODULES = _DisableMigrations()
+
+PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
@@ -1,14 +1,17 @@
-import { useQuery, useMutation, useQueryClient, keepPreviousData } from '@tanstack/react-query';
+import { useQuery, useInfiniteQuery, useMutation, useQueryClient, keepPreviousData } from '@tanstack/react-query';
+import type { InfiniteData } from '@tanstack/react-query';
 import client from './client';
+import { runImportJob } from './importJobs';
 import type {
-  PaginatedResponse, Campaign, CampaignDetail,
+  PaginatedResponse, CursorPaginatedResponse, LinkCursorPage, Campaign, CampaignDetail,
+  CampaignOrganization, CampaignRegion, Lead,
   Region, FederalDistrict, Profession, Program,
   FederalOperator, Organization, OrganizationTag, Project, ActingOrganization, Quota, DemandMatrix, UserShort,
   Funnel, FunnelDetail, FunnelStage, StageChecklistItem, ChecklistItemOption, Contact, EntityFieldChange, WorkloadDashboardResponse,
   RoleDefinition, UserRoleAssignment, SubfunnelTemplate, SubfunnelTemplateBinding, CampaignSubfunnel,
   LeadSubfunnel, LeadSubfunnelBulkUpdateResult, LeadSubfunnelBulkChecklistResult, CampaignCollectStageImportResult,
   OrganizationListCaptureResult, RegionTaskCaptureSummary,
-  SubfunnelWorkspaceResponse, TaskTemplateStage, SubfunnelTemplateItem,
+  SubfunnelWorkspaceResponse, SubfunnelWorkspaceColumnPage, TaskTemplateStage, SubfunnelTemplateItem,
 } from '../types';
 
 /** Второй сегмент ключа всегда string: из URL (useParams) и из API (number) иначе не сходятся при invalidate. */
@@ -17,6 +20,26 @@ function campaignDetailQueryKey(id: number | string | null | undefined) {
   return ['campaign', String(id)] as const;
 }
 
+type CampaignNestedList = 'leads' | 'organizations' | 'regions';
+
+/** Ключ вложенного списка начинается с ключа карточки — invalidate карточки обновляет и списки. */
+function campaignNestedQueryKey(
+  id: number | string | null | undefined,
+  list: CampaignNestedList,
+  params?: Record<string, unknown>,
+) {
+  const [, campaignId] = campaignDetailQueryKey(id);
+  return params === undefined
+    ? (['campaign', campaignId, list] as const)
+    : (['campaign', campaignId, list, params] as const);
+}
+
+/** Курсор следующей страницы из ссылки next (CursorPagination DRF). */
+function cursorFromNextLink(next: string | null): string | undefined {
+  if (!next) return undefined;
+  return new URL(next, window.location.origin).searchParams.get('cursor') ?? undefined;
+}
+
 // Auth
 export function useMe() {
   return useQuery<import('../types').User>({
@@ -317,12 +340,7 @@ export function useImportDemandMatrixPreview() {
 export function useImportDemandMatrixApply() {
   const qc = useQueryClient();
   return useMutation<import('../types').ImportApplyResult, unknown, FormData>({
-    mutationFn: (data: FormData) =>
-      client
-        .post('/demand-matrix/import/apply/', data, {
-          headers: { 'Content-Type': 'multipart/form-data' },
-        })
-        .then(r => r.data),
+    mutationFn: (data: FormData) => runImportJob('/demand-matrix/import/apply/', data),
     onSuccess: () => {
       qc.invalidateQueries({ queryKey: ['demand-matrix'] });
       qc.invalidateQueries({ queryKey: ['professions'] });
@@ -734,29 +752,33 @@ export function usePatchLead() {
     unknown,
     Error,
     { id: number; data: Record<string, unknown>; campaignId?: number },
-    { prev?: CampaignDetail }
+    { prev?: [readonly unknown[], InfiniteData<LinkCursorPage<Lead>> | undefined][] }
   >({
     mutationFn: (vars: { id: number; data: Record<string, unknown>; campaignId?: number }) =>
       client.patch(`/leads/${vars.id}/`, vars.data).then((r) => r.data),
     onMutate: async (vars) => {
       if (vars.campaignId == null || !('current_stage' in vars.data)) return {};
-      const key = campaignDetailQueryKey(vars.campaignId);
+      // Доска кампании показывает лидов из постраничных списков /campaigns/{id}/leads/
+      const key = campaignNestedQueryKey(vars.campaignId, 'leads');
       await qc.cancelQueries({ queryKey: key });
-      const prev = qc.getQueryData<CampaignDetail>(key);
-      if (!prev?.leads) return {};
+      const prev = qc.getQueriesData<InfiniteData<LinkCursorPage<Lead>>>({ queryKey: key });
+      if (!prev.length) return {};
       const raw = vars.data.current_stage;
       const newStage = raw === null || raw === undefined ? null : Number(raw);
-      qc.setQueryData<CampaignDetail>(key, {
-        ...prev,
-        leads: prev.leads.map((l) =>
-          l.id === vars.id ? { ...l, current_stage: newStage } : l,
-        ),
+      qc.setQueriesData<InfiniteData<LinkCursorPage<Lead>>>({ queryKey: key }, (data) => data && {
+        ...data,
+        pages: data.pages.map((page) => ({
+          ...page,
+          results: page.results.map((l) =>
+            l.id === vars.id ? { ...l, current_stage: newStage } : l,
+          ),
+        })),
       });
       return { prev };
     },
-    onError: (_e, vars, ctx) => {
-      if (ctx?.prev && vars.campaignId != null) {
-        qc.setQueryData(campaignDetailQueryKey(vars.campaignId), ctx.prev);
+    onError: (_e, _vars, ctx) => {
+      for (const [key, data] of ctx?.prev ?? []) {
+        qc.setQueryData(key, data);
       }
     },
     onSuccess: (_d, { id, campaignId }) => {
@@ -881,6 +903,26 @@ export function useLeadTimeline(leadId: number | string, filters?: LeadTimelineF
   });
 }
 
+/** Страница ленты по курсору (cursor: '' — первая страница). */
+export function useLeadTimelinePage(
+  leadId: number | string,
+  filters?: LeadTimelineFilters & { cursor?: string; page_size?: number },
+) {
+  const { kind, contact, cursor = '', page_size } = filters ?? {};
+  return useQuery<CursorPaginatedResponse<import('../types').LeadTimelineItem>>({
+    queryKey: ['lead-timeline', leadId, kind ?? 'all', contact ?? 'all', 'page', cursor, page_size],
+    queryFn: () => {
+      const params: Record<string, string> = { cursor };
+      if (kind) params.kind = kind;
+      if (contact != null) params.contact = String(contact);
+      if (page_size) params.page_size = String(page_size);
+      return client.get(`/leads/${leadId}/timeline/`, { params }).then(r => r.data);
+    },
+    enabled: !!leadId,
+    placeholderData: keepPreviousData,
+  });
+}
+
 export function useCreateLeadInteraction(leadId: number | string) {
   const qc = useQueryClient();
   return useMutation({
@@ -964,15 +1006,51 @@ export function useCampaigns(params?: Record<string, any>) {
   });
 }
 
-export function useCampaign(id: number | string) {
+/**
+ * Карточка кампании: шапка и счётчики. Лиды, заказчики и регионы — постранично
+ * (useCampaignLeads и т.п.); expand: 'all' — полные списки в карточке (форма редактирования).
+ */
+export function useCampaign(id: number | string, options?: { expand?: string }) {
   const key = campaignDetailQueryKey(id);
+  const expand = options?.expand;
   return useQuery<CampaignDetail>({
+    queryKey: expand ? [...key, 'expand', expand] : key,
+    queryFn: () => client.get(`/campaigns/${key[1]}/`, { params: expand ? { expand } : undefined }).then(r => r.data),
+    enabled: !!key[1],
+  });
+}
+
+function useCampaignNestedList<T>(
+  id: number | string,
+  list: CampaignNestedList,
+  params: Record<string, unknown> = {},
+) {
+  const key = campaignNestedQueryKey(id, list, params);
+  return useInfiniteQuery<LinkCursorPage<T>, Error, InfiniteData<LinkCursorPage<T>>, typeof key, string>({
     queryKey: key,
-    queryFn: () => client.get(`/campaigns/${key[1]}/`).then(r => r.data),
+    queryFn: ({ pageParam }) =>
+      client
+        .get(`/campaigns/${key[1]}/${list}/`, { params: { ...params, cursor: pageParam || undefined } })
+        .then(r => r.data),
+    initialPageParam: '',
+    getNextPageParam: (last) => cursorFromNextLink(last.next),
     enabled: !!key[1],
   });
 }
 
+/** Лиды кампании по курсору: ?page_size, ?tags, ?touch_min_days, ?touch_max_days, ?search и т.п. */
+export function useCampaignLeads(id: number | string, params?: Record<string, unknown>) {
+  return useCampaignNestedList<Lead>(id, 'leads', params);
+}
+
+export function useCampaignOrganizations(id: number | string, params?: Record<string, unknown>) {
+  return useCampaignNestedList<CampaignOrganization>(id, 'organizations', params);
+}
+
+export function useCampaignRegions(id: number | string, params?: Record<string, unknown>) {
+  return useCampaignNestedList<CampaignRegion>(id, 'regions', params);
+}
+
 export function useCreateCampaign() {
   const qc = useQueryClient();
   return useMutation({
@@ -1135,7 +1213,8 @@ export function useCampaignSubfunnels(campaignId?: number | string) {
   });
 }
 
-export function useSubfunnelWorkspace(params?: {
+/** Фильтры рабочего места подворонок (общие для первой страницы и догрузки). */
+export interface SubfunnelWorkspaceParams {
   campaign?: number;
   template?: number;
   subfunnel?: number;
@@ -1143,11 +1222,61 @@ export function useSubfunnelWorkspace(params?: {
   assignee?: number;
   status?: number | string;
   overdue?: boolean;
+  search?: string;
+}
+
+export function useSubfunnelWorkspace(params?: SubfunnelWorkspaceParams & {
   view_mode?: 'kanban' | 'table';
+  limit?: number;
+  cursor?: string;
 }) {
   return useQuery<SubfunnelWorkspaceResponse>({
     queryKey: ['subfunnel-workspace', params],
     queryFn: () => client.get('/campaigns/subfunnel-workspace/', { params }).then(r => r.data),
+    // Поиск и фильтры — на сервере: пока грузится новая выборка, доска показывает прежнюю
+    placeholderData: keepPreviousData,
+    staleTime: 30_000,
+  });
+}
+
+/**
+ * Следующие страницы колонки канбана (column — stage-<id>) или таблицы (column — null)
+ * по курсору из первой страницы. Запрос уходит только после enabled (кнопка «Показать ещё»).
+ */
+export function useSubfunnelWorkspaceMore(
+  params: SubfunnelWorkspaceParams,
+  column: string | null,
+  cursor: string | null | undefined,
+  limit: number,
+  enabled: boolean,
+) {
+  return useInfiniteQuery<
+    SubfunnelWorkspaceColumnPage,
+    Error,
+    InfiniteData<SubfunnelWorkspaceColumnPage>,
+    readonly unknown[],
+    string
+  >({
+    queryKey: ['subfunnel-workspace', 'more', column, cursor, limit, params],
+    queryFn: ({ pageParam }) =>
+      client
+        .get('/campaigns/subfunnel-workspace/', {
+          params: {
+            ...params,
+            view_mode: column ? 'kanban' : 'table',
+            column: column ?? undefined,
+            cursor: pageParam,
+            limit,
+          },
+        })
+        .then((r) =>
+          column
+            ? r.data
+            : { column: '', items: r.data.table, next_cursor: r.data.next_cursor ?? null },
+        ),
+    initialPageParam: cursor ?? '',
+    getNextPageParam: (last) => last.next_cursor ?? undefined,
+    enabled: enabled && !!cursor,
     staleTime: 30_000,
   });
 }
@@ -1244,9 +1373,7 @@ export function useCampaignCollectStageImport(campaignId?: number | string) {
   const qc = useQueryClient();
   return useMutation({
     mutationFn: (formData: FormData) =>
-      client
-        .post<CampaignCollectStageImportResult>(`/campaigns/${campaignId}/collect-stage-import/`, formData)
-        .then((r) => r.data),
+      runImportJob<CampaignCollectStageImportResult>(`/campaigns/${campaignId}/collect-stage-import/`, formData),
     onSuccess: () => {
       if (campaignId) {
         qc.invalidateQueries({ queryKey: ['campaign', String(campaignId)] });
@@ -1410,7 +1537,7 @@ export function useImportContactsXlsx() {
   const qc = useQueryClient();
   return useMutation({
     mutationFn: (formData: FormData) =>
-      client.post('/contacts/import-xlsx/', formData).then(r => r.data),
+      runImportJob<any>('/contacts/import-xlsx/', formData),
     onSuccess: () => {
       qc.invalidateQueries({ queryKey: ['contacts'] });
       qc.invalidateQueries({ queryKey: ['organizations'] });
@@ -1423,7 +1550,7 @@ export function useImportOrganizationsXlsx() {
   const qc = useQueryClient();
   return useMutation({
     mutationFn: (formData: FormData) =>
-      client.post('/organizations/import-xlsx/', formData).then(r => r.data),
+      runImportJob<any>('/organizations/import-xlsx/', formData),
     onSuccess: () => {
       qc.invalidateQueries({ queryKey: ['organizations'] });
       qc.invalidateQueries({ queryKey: ['import-batches'] });
@@ -0,0 +1,59 @@
+import client from './client';
+import type { ImportJob } from '../types';
+
+/** Интервал опроса статуса задания. */
+const POLL_INTERVAL_MS = 1500;
+/** Задание дольше этого в очереди — воркер (manage.py run_jobs) не запущен. */
+const QUEUED_TIMEOUT_MS = 60_000;
+
+/** Ошибка фонового импорта в форме ошибки axios — её разбирает getAxiosErrorMessage. */
+export class ImportJobError extends Error {
+  response: { status: number; data: unknown };
+  job: ImportJob;
+
+  constructor(job: ImportJob, message: string) {
+    super(message);
+    this.name = 'ImportJobError';
+    this.job = job;
+    this.response = {
+      status: job.response_status ?? 500,
+      data: job.result ?? { detail: message },
+    };
+  }
+}
+
+const sleep = (ms: number) => new Promise((resolve) => window.setTimeout(resolve, ms));
+
+/**
+ * Импорт файла фоновым заданием: запрос с background=true возвращает 202 и id задания,
+ * статус опрашивается через /import-jobs/<id>/ до завершения. Результат — ответ
+ * обработчика импорта (тот же, что у синхронного запроса).
+ */
+export async function runImportJob<T>(
+  url: string,
+  formData: FormData,
+  onProgress?: (job: ImportJob) => void,
+): Promise<T> {
+  formData.set('background', 'true');
+  const res = await client.post(url, formData);
+  if (res.status !== 202 || !res.data?.job_id) return res.data as T;
+
+  const jobId: number = res.data.job_id;
+  const queuedSince = Date.now();
+  for (;;) {
+    await sleep(POLL_INTERVAL_MS);
+    const { data: job } = await client.get<ImportJob>(`/import-jobs/${jobId}/`);
+    onProgress?.(job);
+    if (job.status === 'completed') return job.result as T;
+    if (job.status === 'failed') {
+      throw new ImportJobError(job, job.error || `Импорт завершился с ошибкой (${job.response_status ?? '—'})`);
+    }
+    if (job.status === 'queued' && Date.now() - queuedSince > QUEUED_TIMEOUT_MS) {
+      throw new ImportJobError(
+        job,
+        `Импорт в очереди (задание №${job.id}), но не начат: воркер фоновых заданий не запущен. ` +
+          'Задание выполнится после запуска manage.py run_jobs.',
+      );
+    }
+  }
+}
@@ -46,12 +46,14 @@ export default function ImportHistoryPanel({ entityType, title }: ImportHistoryP
       title: 'Статус',
       key: 'status',
       width: 130,
-      render: (_, row) =>
-        row.status === 'rolled_back' ? (
-          <Tag color="default">Откат выполнен</Tag>
-        ) : (
-          <Tag color="success">Загружен</Tag>
-        ),
+      render: (_, row) => {
+        if (row.status === 'rolled_back') return <Tag color="default">Откат выполнен</Tag>;
+        if (row.status === 'processing') {
+          return <Tag color="processing">Загружается: {row.processed_rows}</Tag>;
+        }
+        if (row.status === 'interrupted') return <Tag color="warning">Прерван</Tag>;
+        return <Tag color="success">Загружен</Tag>;
+      },
     },
     {
       title: '',
@@ -245,7 +245,7 @@ export default function CampaignCreatePage() {
   const updateCampaign = useUpdateCampaign(campaignId ?? 0);
 
   // Load existing campaign data in edit mode
-  const { data: existingCampaign, isLoading: loadingCampaign } = useCampaign(editId ?? '');
+  const { data: existingCampaign, isLoading: loadingCampaign } = useCampaign(editId ?? '', { expand: 'all' });
 
   useEffect(() => {
     if (!existingCampaign || initialLoaded) return;
@@ -6,11 +6,14 @@ import {
 } from 'antd';
 import ResponsiveTable from '../../components/responsive/ResponsiveTable';
 import { ArrowLeftOutlined, AppstoreOutlined, UnorderedListOutlined, EditOutlined, DeleteOutlined } from '@ant-design/icons';
-import { useCampaign, useUpdateCampaign, useDeleteCampaign, useOrganizationTags, useFunnel, useBulkUpdateLeads, useBulkDeleteLeads } from '../../api/hooks';
-import type { CampaignDetail, CampaignOrganization, Lead, LeadPrimaryContactBrief, OrganizationTag } from '../../types';
-import { daysSinceLastTouch } from '../../utils/leadTouch';
+import {
+  useCampaign, useCampaignLeads, useCampaignOrganizations, useCampaignRegions,
+  useUpdateCampaign, useDeleteCampaign, useOrganizationTags, useFunnel, useBulkUpdateLeads, useBulkDeleteLeads,
+} from '../../api/hooks';
+import type { CampaignDetail, CampaignManagerSummary, CampaignOrganization, Lead, LeadPrimaryContactBrief, OrganizationTag } from '../../types';
 import client from '../../api/client';
 import { getAxiosErrorMessage } from '../../api/errorMessage';
+import { runImportJob } from '../../api/importJobs';
 import LeadBoardView from './LeadBoardView';
 import ContactPreviewModal from '../../components/ContactPreviewModal';
 import DemandQuotaPreview from '../../components/DemandQuotaPreview';
@@ -35,6 +38,23 @@ const orgStatusColors: Record<string, string> = {
   demand_received: 'success',
 };
 
+/** Лиды, заказчики и регионы грузятся страницами по курсору (/campaigns/{id}/leads|organizations|regions/) */
+const LEADS_PAGE_SIZE = 200;
+const NESTED_PAGE_SIZE = 100;
+
+function LoadMoreButton({ query }: {
+  query: { hasNextPage: boolean; isFetchingNextPage: boolean; fetchNextPage: () => unknown };
+}) {
+  if (!query.hasNextPage) return null;
+  return (
+    <div style={{ textAlign: 'center', marginTop: 12 }}>
+      <Button onClick={() => query.fetchNextPage()} loading={query.isFetchingNextPage}>
+        Показать ещё
+      </Button>
+    </div>
+  );
+}
+
 export default function CampaignDetailPage() {
   const { message } = App.useApp();
   const { id } = useParams<{ id: string }>();
@@ -75,107 +95,41 @@ export default function CampaignDetailPage() {
 
   const leadBulkBusy = bulkUpdateLeads.isPending || bulkDeleteLeads.isPending;
 
-  const uniqueManagers = useMemo(() => {
-    if (!campaign) return [];
-    const managerSet = new Map<number, string>();
-    for (const p of campaign.campaign_programs) {
-      if (p.manager && p.manager_name) managerSet.set(p.manager, p.manager_name);
-    }
-    for (const r of campaign.campaign_regions) {
-      if (r.manager && r.manager_name) managerSet.set(r.manager, r.manager_name);
-    }
-    for (const o of campaign.organizations) {
-      if (o.manager && o.manager_name) managerSet.set(o.manager, o.manager_name);
-    }
-    for (const l of (campaign.leads || [])) {
-      if (l.manager && l.manager_name) managerSet.set(l.manager, l.manager_name);
-    }
-    return Array.from(managerSet.entries()).map(([id, name]) => ({ id, name }));
-  }, [campaign]);
-
-  const leadsAfterTouchFilter = useMemo(() => {
-    const list = campaign?.leads ?? [];
-    if (touchMinDays === undefined && touchMaxDays === undefined) return list;
-    return list.filter((l) => {
-      const days = daysSinceLastTouch(l);
-      const effective = days === null ? null : Math.max(0, days);
-      if (touchMinDays !== undefined) {
-        if (effective !== null && effective < touchMinDays) return false;
-      }
-      if (touchMaxDays !== undefined) {
-        if (effective === null) return false;
-        if (effective > touchMaxDays) return false;
-      }
-      return true;
-    });
-  }, [campaign?.leads, touchMinDays, touchMaxDays]);
-
-  const campaignTagIdsPresent = useMemo(() => {
-    const s = new Set<number>();
-    if (!campaign) return s;
-    for (const l of campaign.leads ?? []) {
-      for (const tid of l.tags ?? []) s.add(tid);
-      for (const tid of l.organization_tags ?? []) s.add(tid);
-    }
-    for (const o of campaign.organizations ?? []) {
-      for (const tid of o.organization_tags ?? []) s.add(tid);
-    }
-    return s;
-  }, [campaign]);
+  const leadListParams = useMemo(() => ({
+    page_size: LEADS_PAGE_SIZE,
+    tags: leadOrgTagFilter.length ? leadOrgTagFilter.join(',') : undefined,
+    touch_min_days: touchMinDays,
+    touch_max_days: touchMaxDays,
+  }), [leadOrgTagFilter, touchMinDays, touchMaxDays]);
+  const leadsQuery = useCampaignLeads(id!, leadListParams);
+  const organizationsQuery = useCampaignOrganizations(id!, { page_size: NESTED_PAGE_SIZE });
+  const regionsQuery = useCampaignRegions(id!, { page_size: NESTED_PAGE_SIZE });
+
+  const loadedLeads = useMemo(
+    () => leadsQuery.data?.pages.flatMap((page) => page.results) ?? [],
+    [leadsQuery.data],
+  );
+  const loadedOrganizations = useMemo(
+    () => organizationsQuery.data?.pages.flatMap((page) => page.results) ?? [],
+    [organizationsQuery.data],
+  );
+  const loadedRegions = useMemo(
+    () => regionsQuery.data?.pages.flatMap((page) => page.results) ?? [],
+    [regionsQuery.data],
+  );
 
-  /** Регионы из явных строк кампании, с лидов (region / подпись) и с заказчиков */
-  const distinctCampaignRegionsCount = useMemo(() => {
-    if (!campaign) return 0;
-    const keys = new Set<string>();
-    const addByName = (name: string | null | undefined) => {
-      const n = (name || '').trim().toLowerCase();
-      if (n) keys.add(`n:${n}`);
-    };
-    for (const r of campaign.campaign_regions ?? []) {
-      if (r.region != null) keys.add(`id:${r.region}`);
-      else addByName(r.region_name);
-    }
-    for (const l of campaign.leads ?? []) {
-      if (l.region != null) keys.add(`id:${l.region}`);
-      else addByName(l.organization_region);
-    }
-    for (const o of campaign.organizations ?? []) {
-      addByName(o.organization_region);
-    }
-    return keys.size;
-  }, [campaign]);
+  const uniqueManagers: CampaignManagerSummary[] = campaign?.managers ?? [];
 
   const leadOrgTagCatalogMerged = useMemo((): OrganizationTag[] => {
     const byId = new Map<number, OrganizationTag>();
     for (const t of leadTagsCatalog?.results ?? []) byId.set(t.id, t);
     for (const t of organizationTagsCatalog?.results ?? []) byId.set(t.id, t);
-    const merged = Array.from(byId.values()).sort((a, b) => a.name.localeCompare(b.name, 'ru'));
-    if (!campaign) return merged;
-    const keep = new Set(campaignTagIdsPresent);
-    for (const id of leadOrgTagFilter) keep.add(id);
-    return merged.filter((t) => keep.has(t.id));
-  }, [
-    leadTagsCatalog?.results,
-    organizationTagsCatalog?.results,
-    campaign,
-    campaignTagIdsPresent,
-    leadOrgTagFilter,
-  ]);
-
-  const leadsAfterFilters = useMemo(() => {
-    if (!leadOrgTagFilter.length) return leadsAfterTouchFilter;
-    return leadsAfterTouchFilter.filter((l) => {
-      const onLead = l.tags || [];
-      const onOrg = l.organization_tags || [];
-      return leadOrgTagFilter.some(
-        (tid) => onLead.includes(tid) || onOrg.includes(tid),
-      );
-    });
-  }, [leadsAfterTouchFilter, leadOrgTagFilter]);
+    return Array.from(byId.values()).sort((a, b) => a.name.localeCompare(b.name, 'ru'));
+  }, [leadTagsCatalog?.results, organizationTagsCatalog?.results]);
 
   const campaignForLeadsView: CampaignDetail | undefined = useMemo(
-    () => (campaign ? { ...campaign, leads: leadsAfterFilters } : undefined),
-    [campaign, leadsAfterFilters],
+    () => (campaign ? { ...campaign, leads: loadedLeads } : undefined),
+    [campaign, loadedLeads],
   );
 
   const queuePeriod = useMemo(() => {
@@ -277,8 +231,7 @@ export default function CampaignDetailPage() {
     fd.append('file', file);
     setLeadDemandImportBusy(true);
     try {
-      const res = await client.post(`/campaigns/${id}/leads-demand-import/`, fd);
-      const data = res.data || {};
+      const data = (await runImportJob<Record<string, any>>(`/campaigns/${id}/leads-demand-import/`, fd)) || {};
       message.success(`Импорт завершён: обновлено ${data.updated ?? 0}, пропущено ${data.skipped ?? 0}`);
       if (Array.isArray(data.errors) && data.errors.length) {
         Modal.info({
@@ -293,7 +246,7 @@ export default function CampaignDetailPage() {
       }
       setLeadDemandImportOpen(false);
       setLeadDemandImportFiles([]);
-      await refetchCampaign();
+      await Promise.all([refetchCampaign(), leadsQuery.refetch()]);
     } catch (err) {
       message.error(`Не удалось импортировать файл: ${getAxiosErrorMessage(err)}`);
     } finally {
@@ -301,12 +254,16 @@ export default function CampaignDetailPage() {
     }
   };
 
-  const leads = campaign.leads || [];
-  const visibleLeadCount = leadsAfterFilters.length;
-  const leadsTabLabel =
-    visibleLeadCount === leads.length
-      ? `Лиды (${leads.length})`
-      : `Лиды (${visibleLeadCount}/${leads.length})`;
+  const leadsTotal = campaign.leads_count ?? 0;
+  const leadFiltersActive =
+    touchMinDays !== undefined || touchMaxDays !== undefined || leadOrgTagFilter.length > 0;
+  // С фильтром общее число найденных неизвестно до последней страницы — показываем загруженные
+  const leadsTabLabel = leadFiltersActive
+    ? `Лиды (${loadedLeads.length}${leadsQuery.hasNextPage ? '+' : ''}/${leadsTotal})`
+    : `Лиды (${leadsTotal})`;
+  const campaignRegionsCount = campaign.campaign_regions_count ?? 0;
+  // Регионы лидов (с учётом региона организации) — из сводки кампании на сервере
+  const leadRegionsCount = campaign.regions_count ?? 0;
   const funnelNames = campaign.campaign_funnels?.map(f => f.funnel_name) || [];
 
   const programColumns = [
@@ -490,7 +447,7 @@ export default function CampaignDetailPage() {
                 />
               </span>
             </Tooltip>
-            {(touchMinDays !== undefined || touchMaxDays !== undefined || leadOrgTagFilter.length > 0) && (
+            {leadFiltersActive && (
               <Button
                 size="small"
                 type="link"
@@ -532,10 +489,11 @@ export default function CampaignDetailPage() {
                 />
               )}
               <ResponsiveTable
-                dataSource={leadsAfterFilters}
+                dataSource={loadedLeads}
                 columns={leadColumns}
                 rowKey="id"
                 size="small"
+                loading={leadsQuery.isLoading}
                 pagination={{ pageSize: 20 }}
                 rowSelection={{
                   selectedRowKeys: selectedLeadIds,
@@ -549,6 +507,7 @@ export default function CampaignDetailPage() {
               />
             </>
           ) : null}
+          <LoadMoreButton query={leadsQuery} />
         </div>
       ),
     },
@@ -565,30 +524,38 @@ export default function CampaignDetailPage() {
         />
       ),
     },
-    ...(campaign.campaign_regions.length > 0 ? [{
+    ...(campaignRegionsCount > 0 ? [{
       key: 'regions',
-      label: `Регионы (${campaign.campaign_regions.length})`,
+      label: `Регионы (${campaignRegionsCount})`,
       children: (
-        <ResponsiveTable
-          dataSource={campaign.campaign_regions}
-          columns={regionColumns}
-          rowKey="id"
-          size="small"
-          pagination={false}
-        />
+        <div>
+          <ResponsiveTable
+            dataSource={loadedRegions}
+            columns={regionColumns}
+            rowKey="id"
+            size="small"
+            loading={regionsQuery.isLoading}
+            pagination={false}
+          />
+          <LoadMoreButton query={regionsQuery} />
+        </div>
       ),
     }] : []),
-    ...(campaign.organizations.length > 0 ? [{
+    ...(campaign.organizations_count > 0 ? [{
       key: 'organizations',
-      label: `Заказчики (${campaign.organizations.length})`,
+      label: `Заказчики (${campaign.organizations_count})`,
       children: (
-        <ResponsiveTable
-          dataSource={campaign.organizations}
-          columns={orgColumns}
-          rowKey="id"
-          size="small"
-          pagination={{ pageSize: 20 }}
-        />
+        <div>
+          <ResponsiveTable
+            dataSource={loadedOrganizations}
+            columns={orgColumns}
+            rowKey="id"
+            size="small"
+            loading={organizationsQuery.isLoading}
+            pagination={{ pageSize: 20 }}
+          />
+          <LoadMoreButton query={organizationsQuery} />
+        </div>
       ),
     }] : []),
     {
@@ -602,13 +569,11 @@ export default function CampaignDetailPage() {
               { title: 'Менеджер', dataIndex: 'name', key: 'name' },
               {
                 title: 'Лидов', key: 'leads',
-                render: (_: any, record: { id: number }) =>
-                  leads.filter(l => l.manager === record.id).length || '—',
+                render: (_: any, record: CampaignManagerSummary) => record.leads_count || '—',
               },
               {
                 title: 'Программ', key: 'programs',
-                render: (_: any, record: { id: number }) =>
-                  campaign.campaign_programs.filter(p => p.manager === record.id).length || '—',
+                render: (_: any, record: CampaignManagerSummary) => record.programs_count || '—',
               },
             ]}
             rowKey="id"
@@ -684,14 +649,19 @@ export default function CampaignDetailPage() {
             <Statistic title="Потребность (план, Σ)" value={campaign.total_demand} suffix="чел." />
           </Col>
           <Col xs={12} sm={8} xl={4}>
-            <Statistic title="Лидов" value={leads.length} />
+            <Statistic title="Лидов" value={leadsTotal} />
           </Col>
           <Col xs={12} sm={8} xl={4}>
             <Statistic title="Программ" value={campaign.campaign_programs.length} />
           </Col>
           <Col xs={12} sm={8} xl={4}>
-            <Statistic title="Регионов" value={distinctCampaignRegionsCount} />
+            <Statistic title="Регионов лидов" value={leadRegionsCount} />
           </Col>
+          {campaignRegionsCount > 0 && (
+            <Col xs={12} sm={8} xl={4}>
+              <Statistic title="Регионов кампании" value={campaignRegionsCount} />
+            </Col>
+          )}
           <Col xs={12} sm={8} xl={4}>
             <Statistic title="Менеджеров" value={uniqueManagers.length} />
           </Col>
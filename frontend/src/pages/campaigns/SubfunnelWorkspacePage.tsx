@@ -1,4 +1,4 @@
-import { useEffect, useMemo, useState } from 'react';
+import { useCallback, useEffect, useMemo, useState } from 'react';
 import { useNavigate, useSearchParams } from 'react-router-dom';
 import type { ColumnsType } from 'antd/es/table';
 import {
@@ -64,10 +64,12 @@ import {
   useRoles,
   useSubfunnelTemplateItems,
   useSubfunnelWorkspace,
+  useSubfunnelWorkspaceMore,
   useTaskTemplateStages,
   useUsers,
 } from '../../api/hooks';
 import { getAxiosErrorMessage } from '../../api/errorMessage';
+import type { SubfunnelWorkspaceParams } from '../../api/hooks';
 import type { SubfunnelWorkspaceItem } from '../../types';
 import { normalizeTaskStatus, TASK_STATUS_META, TASK_WORKFLOW_STATUSES, type TaskWorkflowStatus } from '../../utils/taskStatusLabels';
 import './BoardStyles.css';
@@ -75,6 +77,12 @@ import './BoardStyles.css';
 type TaskDragPayload = { type: 'task'; taskId: number; stageKey: string };
 type ViewMode = 'kanban' | 'list';
 type BulkModalKind = 'assignee' | 'due' | 'status' | 'stage' | 'checklist' | null;
+/** Догруженные карточки по колонке (или 'table'): действуют, пока курсор первой страницы тот же. */
+type LoadedMore = Record<string, { cursor: string; items: SubfunnelWorkspaceItem[] }>;
+
+/** Карточек на колонку доски и на страницу списка. */
+const WORKSPACE_PAGE_SIZE = 50;
+const TABLE_MORE_KEY = 'table';
 
 function TaskCardFace({ item }: { item: SubfunnelWorkspaceItem }) {
   const workflowStatus = normalizeTaskStatus(item.status);
@@ -181,6 +189,48 @@ function TaskCardFace({ item }: { item: SubfunnelWorkspaceItem }) {
   );
 }
 
+/** «Показать ещё» для колонки или списка: страницы после cursor догружаются по кнопке. */
+function WorkspaceLoadMore({
+  moreKey,
+  params,
+  column,
+  cursor,
+  onLoaded,
+}: {
+  moreKey: string;
+  params: SubfunnelWorkspaceParams;
+  column: string | null;
+  cursor: string;
+  onLoaded: (moreKey: string, cursor: string, items: SubfunnelWorkspaceItem[]) => void;
+}) {
+  const [requested, setRequested] = useState(false);
+  const { data, hasNextPage, fetchNextPage, isFetching, isError } = useSubfunnelWorkspaceMore(
+    params,
+    column,
+    cursor,
+    WORKSPACE_PAGE_SIZE,
+    requested,
+  );
+
+  useEffect(() => {
+    if (data) onLoaded(moreKey, cursor, data.pages.flatMap((page) => page.items));
+  }, [data, moreKey, cursor, onLoaded]);
+
+  if (requested && !hasNextPage && !isError) return null;
+  return (
+    <Button
+      block
+      size="small"
+      type="dashed"
+      loading={isFetching}
+      onClick={() => (requested ? fetchNextPage() : setRequested(true))}
+      style={{ marginTop: 8 }}
+    >
+      {isError ? 'Повторить загрузку' : 'Показать ещё'}
+    </Button>
+  );
+}
+
 function KanbanDropColumn({ id, children }: { id: string; children: React.ReactNode }) {
   const { setNodeRef, isOver } = useDroppable({ id });
   return (
@@ -348,6 +398,8 @@ export default function SubfunnelWorkspacePage() {
   const [statusFilter, setStatusFilter] = useState<string | undefined>();
   const [overdue, setOverdue] = useState<boolean | undefined>();
   const [search, setSearch] = useState('');
+  const [debouncedSearch, setDebouncedSearch] = useState('');
+  const [loadedMore, setLoadedMore] = useState<LoadedMore>({});
   const [activeTemplate, setActiveTemplate] = useState<number | undefined>();
   const [activeDragItem, setActiveDragItem] = useState<SubfunnelWorkspaceItem | null>(null);
   const [editingTask, setEditingTask] = useState<SubfunnelWorkspaceItem | null>(null);
@@ -360,16 +412,36 @@ export default function SubfunnelWorkspacePage() {
   const { data: usersData } = useUsers();
   const { data: templateItems = [] } = useSubfunnelTemplateItems(activeTemplate);
   const { data: templateStages = [] } = useTaskTemplateStages(activeTemplate);
+  const workspaceParams: SubfunnelWorkspaceParams = useMemo(
+    () => ({
+      campaign,
+      template: activeTemplate,
+      role,
+      assignee,
+      status: statusFilter,
+      overdue,
+      search: debouncedSearch || undefined,
+    }),
+    [campaign, activeTemplate, role, assignee, statusFilter, overdue, debouncedSearch],
+  );
+  // Карточки отдаются постранично: первая страница каждой колонки (или списка), остальное — по «Показать ещё»
   const { data, isLoading, isError, error, refetch } = useSubfunnelWorkspace({
+    ...workspaceParams,
     view_mode: viewMode === 'kanban' ? 'kanban' : 'table',
-    campaign,
-    template: activeTemplate,
-    role,
-    assignee,
-    status: statusFilter,
-    overdue,
+    limit: WORKSPACE_PAGE_SIZE,
   });
 
+  useEffect(() => {
+    const timer = window.setTimeout(() => setDebouncedSearch(search.trim()), 300);
+    return () => window.clearTimeout(timer);
+  }, [search]);
+
+  const handleMoreLoaded = useCallback(
+    (moreKey: string, cursor: string, items: SubfunnelWorkspaceItem[]) =>
+      setLoadedMore((prev) => ({ ...prev, [moreKey]: { cursor, items } })),
+    [],
+  );
+
   useEffect(() => {
     const campaignParam = searchParams.get('campaign');
     const assigneeParam = searchParams.get('assignee');
@@ -391,7 +463,7 @@ export default function SubfunnelWorkspacePage() {
 
   useEffect(() => {
     setSelectedRowKeys([]);
-  }, [activeTemplate, campaign, role, assignee, statusFilter, overdue]);
+  }, [activeTemplate, campaign, role, assignee, statusFilter, overdue, debouncedSearch]);
 
   const campaignOptions = (campaignsData?.results || []).map((c) => ({ value: c.id, label: c.name }));
   const roleOptions = (rolesData?.results || []).map((r) => ({ value: r.id, label: r.name }));
@@ -422,16 +494,25 @@ export default function SubfunnelWorkspacePage() {
     [templateStages],
   );
 
+  const moreFor = useCallback(
+    (moreKey: string, cursor: string | null | undefined) => {
+      const loaded = loadedMore[moreKey];
+      return cursor && loaded?.cursor === cursor ? loaded.items : [];
+    },
+    [loadedMore],
+  );
+
+  /** Загруженные карточки: первая страница и догруженные (поиск и фильтры — на сервере). */
   const filteredItems = useMemo(() => {
-    const q = search.trim().toLowerCase();
-    if (!q) return data?.table || [];
-    return (data?.table || []).filter((item) =>
-      [item.lead_name, item.campaign_name, item.assignee_name || '', item.template_name]
-        .join(' ')
-        .toLowerCase()
-        .includes(q),
-    );
-  }, [data, search]);
+    if (!data) return [];
+    if (viewMode !== 'kanban') return [...data.table, ...moreFor(TABLE_MORE_KEY, data.next_cursor)];
+    return [...data.table, ...data.kanban.flatMap((col) => moreFor(col.status, col.next_cursor))];
+  }, [data, viewMode, moreFor]);
+
+  const columnTotals = useMemo(
+    () => new Map((data?.kanban || []).map((col) => [col.status, col] as const)),
+    [data],
+  );
 
   const filteredByStatus = useMemo(() => {
     const map = new Map<string, SubfunnelWorkspaceItem[]>();
@@ -527,7 +608,7 @@ export default function SubfunnelWorkspacePage() {
   function handleDragStart(event: DragStartEvent) {
     const payload = event.active.data.current as TaskDragPayload | undefined;
     if (!payload?.taskId) return;
-    const found = (data?.table || []).find((x) => x.id === payload.taskId) ?? null;
+    const found = filteredItems.find((x) => x.id === payload.taskId) ?? null;
     setActiveDragItem(found);
   }
 
@@ -682,7 +763,7 @@ export default function SubfunnelWorkspacePage() {
           <Card size="small"><Statistic title="Просрочено" value={data?.totals.overdue || 0} prefix={<FieldTimeOutlined />} valueStyle={{ color: '#cf1322' }} /></Card>
         </Col>
         <Col xs={12} sm={8}>
-          <Card size="small"><Statistic title="Исполнителей" value={new Set((data?.table || []).map((x) => x.assignee_id).filter(Boolean)).size} prefix={<TeamOutlined />} /></Card>
+          <Card size="small"><Statistic title="Исполнителей" value={new Set(filteredItems.map((x) => x.assignee_id).filter(Boolean)).size} prefix={<TeamOutlined />} /></Card>
         </Col>
       </Row>
 
@@ -763,11 +844,12 @@ export default function SubfunnelWorkspacePage() {
             {(data?.columns || []).map((col) => {
               const items = filteredByStatus.get(col.status) || [];
               const columnIds = items.map((item) => item.id);
+              const page = columnTotals.get(col.status);
               return (
                 <div key={col.status} className="kanban-column">
                   <KanbanColumnHeader
                     columnKey={col.status}
-                    count={items.length}
+                    count={page?.total ?? items.length}
                     columnIds={columnIds}
                     selectedIds={selectedRowKeys}
                     onSelectionChange={setSelectedRowKeys}
@@ -792,6 +874,16 @@ export default function SubfunnelWorkspacePage() {
                         />
                       ))
                     )}
+                    {page?.next_cursor && (
+                      <WorkspaceLoadMore
+                        key={page.next_cursor}
+                        moreKey={col.status}
+                        params={workspaceParams}
+                        column={col.status}
+                        cursor={page.next_cursor}
+                        onLoaded={handleMoreLoaded}
+                      />
+                    )}
                   </KanbanDropColumn>
                 </div>
               );
@@ -828,6 +920,16 @@ export default function SubfunnelWorkspacePage() {
               style: { cursor: 'pointer' },
             })}
           />
+          {data?.next_cursor && (
+            <WorkspaceLoadMore
+              key={data.next_cursor}
+              moreKey={TABLE_MORE_KEY}
+              params={workspaceParams}
+              column={null}
+              cursor={data.next_cursor}
+              onLoaded={handleMoreLoaded}
+            />
+          )}
         </Card>
       )}
 
@@ -122,12 +122,32 @@ export interface ImportBatch {
   updated_count: number;
   skipped_count: number;
   total_rows: number;
-  status: 'completed' | 'rolled_back';
+  processed_rows: number;
+  error_count: number;
+  status: 'processing' | 'completed' | 'interrupted' | 'rolled_back';
   status_display: string;
   rolled_back_at: string | null;
   can_rollback: boolean;
 }
 
+/** Фоновое задание импорта (/api/import-jobs/). */
+export interface ImportJob {
+  id: number;
+  kind: 'organizations' | 'contacts' | 'collect_stage' | 'leads_demand' | 'demand_matrix';
+  kind_display: string;
+  status: 'queued' | 'running' | 'completed' | 'failed';
+  status_display: string;
+  object_id: number | null;
+  batch: ImportBatch | null;
+  response_status: number | null;
+  result: unknown;
+  error: string;
+  created_at: string;
+  started_at: string | null;
+  heartbeat_at: string | null;
+  finished_at: string | null;
+}
+
 export interface ImportBatchRollbackResult {
   deleted: number;
   reverted: number;
@@ -230,13 +250,26 @@ export interface Campaign {
   updated_at: string;
 }
 
+/** Менеджер кампании (программы, регионы, заказчики, лиды) со счётчиками */
+export interface CampaignManagerSummary {
+  id: number;
+  name: string;
+  leads_count: number;
+  programs_count: number;
+}
+
 export interface CampaignDetail extends Campaign {
   queues: CampaignQueue[];
   campaign_funnels: CampaignFunnelEntry[];
   campaign_programs: CampaignProgram[];
-  campaign_regions: CampaignRegion[];
-  organizations: CampaignOrganization[];
-  leads: Lead[];
+  /** Только с ?expand=regions|all; постранично — /campaigns/{id}/regions/ */
+  campaign_regions?: CampaignRegion[];
+  /** Только с ?expand=organizations|all; постранично — /campaigns/{id}/organizations/ */
+  organizations?: CampaignOrganization[];
+  /** Только с ?expand=leads|all; постранично — /campaigns/{id}/leads/ */
+  leads?: Lead[];
+  campaign_regions_count?: number;
+  managers?: CampaignManagerSummary[];
 }
 
 export interface CampaignQueue {
@@ -390,6 +423,21 @@ export interface PaginatedResponse<T> {
   results: T[];
 }
 
+/** Страница CursorPagination DRF (вложенные списки кампании): курсор — в ссылках next/previous. */
+export interface LinkCursorPage<T> {
+  next: string | null;
+  previous: string | null;
+  results: T[];
+}
+
+/** Ответ списка в режиме ?cursor= (count — только при ?with_count=1). */
+export interface CursorPaginatedResponse<T> {
+  next: string | null;
+  next_cursor: string | null;
+  count?: number;
+  results: T[];
+}
+
 // Funnels
 
 export interface ChecklistItemOption {
@@ -1033,6 +1081,8 @@ export interface LeadSubfunnel {
   due_at: string | null;
   completed_at: string | null;
   is_available: boolean;
+  checklist_total?: number;
+  checklist_completed?: number;
   checklist_values: LeadSubfunnelChecklistValue[];
   forwarded_from?: string | null;
 }
@@ -1130,6 +1180,12 @@ export interface BulkActionResult {
   skipped?: Array<{ id: number; reason: string }>;
 }
 
+export interface SubfunnelWorkspaceColumnPage {
+  column: string;
+  items: SubfunnelWorkspaceItem[];
+  next_cursor: string | null;
+}
+
 export interface SubfunnelWorkspaceResponse {
   view_mode: 'kanban' | 'table';
   templates: Array<{
@@ -1146,8 +1202,19 @@ export interface SubfunnelWorkspaceResponse {
     is_work_stage?: boolean;
   }>;
   items_by_stage: Record<string, SubfunnelWorkspaceItem[]>;
-  kanban: Array<{ status: string; stage_id?: number | null; stage_name?: string | null; items: SubfunnelWorkspaceItem[] }>;
+  kanban: Array<{
+    status: string;
+    stage_id?: number | null;
+    stage_name?: string | null;
+    items: SubfunnelWorkspaceItem[];
+    /** Только при ?limit=: всего карточек в колонке и курсор следующей страницы колонки */
+    total?: number;
+    next_cursor?: string | null;
+  }>;
   table: SubfunnelWorkspaceItem[];
+  /** Только при ?limit=: размер страницы и курсор следующей страницы таблицы */
+  limit?: number;
+  next_cursor?: string | null;
   totals: {
     all: number;
     overdue: number;
@@ -1158,3 +1225,21 @@ export interface SubfunnelWorkspaceResponse {
     done: number;
   };
 }
+
+/** Компактный ответ рабочего места (?format=v2): карточки один раз, в колонках и таблице — id. */
+export interface SubfunnelWorkspaceResponseV2 {
+  format: 'v2';
+  view_mode: 'kanban' | 'table';
+  templates: SubfunnelWorkspaceResponse['templates'];
+  active_template_id: number | null;
+  columns: Array<SubfunnelWorkspaceResponse['columns'][number] & {
+    ids: number[];
+    total?: number;
+    next_cursor?: string | null;
+  }>;
+  cards: Record<string, SubfunnelWorkspaceItem>;
+  table: number[];
+  limit?: number;
+  next_cursor?: string | null;
+  totals: SubfunnelWorkspaceResponse['totals'];
+}